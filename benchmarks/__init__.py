@@ -0,0 +1,13 @@
+# benchmarks/__init__.py
+"""
+Benchmarks de desempenho do pipeline de relatórios (sem banco de dados).
+
+- `benchmarks/fixtures.py`: gravações dos `Indicadores.calcular_*` (sintéticas
+  ou de clientes reais) que alimentam os `RelatorioN` sem consultar o banco.
+- `benchmarks/pipeline.py`: cronometra cada etapa (dados, `calcular_outras_categorias`,
+  `render`, gráficos, HTML→PDF, merge e finalização) e compara com a baseline.
+- `benchmarks/comparacao.py`: comparação com tolerância contra `baseline.json`.
+
+    python -m benchmarks.pipeline                  # roda e compara com a baseline
+    python -m benchmarks.pipeline --atualizar-baseline
+"""
@@ -0,0 +1,61 @@
+# benchmarks/app_carga.py
+"""
+A API (`src.api.main:app`) com o banco substituído pelas fixtures gravadas.
+
+Serve para teste de carga sem Postgres: `Indicadores` devolve as respostas de
+`benchmarks/fixtures/<BENCH_FIXTURE>.json` para qualquer cliente, e o cadastro
+tem `BENCH_CLIENTES` clientes sintéticos. Todo o resto (admissão, jobs, lote,
+snapshots, cache de artefatos e de seções, renderização e wkhtmltopdf) é o
+código de produção.
+
+    BENCH_FIXTURE=tipico uvicorn benchmarks.app_carga:app --workers 2 --port 8765
+
+Os pedidos precisam usar o mês gravado na fixture (setembro/2025 nas
+sintéticas); `python -m benchmarks.carga --subir` já faz isso.
+"""
+import hashlib
+import os
+
+from benchmarks import fixtures
+
+# Nenhum pedido acessa o banco, mas config.settings exige as variáveis na importação
+for _variavel in ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT"):
+    os.environ.setdefault(_variavel, "benchmark")
+os.environ.setdefault("API_KEY", "carga")
+
+from src.core import lote, pipeline  # noqa: E402  (depois das variáveis acima)
+from src.api.main import app  # noqa: E402,F401
+
+FIXTURE = os.getenv("BENCH_FIXTURE", "tipico")
+CLIENTES = int(os.getenv("BENCH_CLIENTES", "50"))
+
+_gravacao = fixtures.carregar(FIXTURE)
+_clientes = [{"id_cliente": i, "nome": f"Cliente Carga {i:03d}"} for i in range(1, CLIENTES + 1)]
+
+
+class _SemBanco:
+    """No lugar de `DatabaseConnection`: qualquer consulta que escape das fixtures falha alto."""
+
+    def execute_query(self, query, params=None):
+        raise RuntimeError("app_carga: consulta ao banco fora das fixtures")
+
+
+def _indicadores(id_cliente, db):
+    return fixtures.IndicadoresGravados(_gravacao["chamadas"])
+
+
+def _buscar_clientes(db):
+    return list(_clientes)
+
+
+def _impressao_digital_dados(db, id_cliente, mes, ano):
+    # Dados "do banco" não mudam durante a carga: impressão fixa por pedido
+    return hashlib.md5(f"{FIXTURE}:{sorted(id_cliente)}:{mes}:{ano}".encode()).hexdigest()
+
+
+pipeline.DatabaseConnection = _SemBanco
+pipeline.Indicadores = _indicadores
+pipeline.buscar_clientes = _buscar_clientes
+pipeline.impressao_digital_dados = _impressao_digital_dados
+lote.DatabaseConnection = _SemBanco
+lote.buscar_clientes = _buscar_clientes
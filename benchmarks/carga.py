@@ -0,0 +1,477 @@
+# benchmarks/carga.py
+"""
+Teste de carga da API de relatórios.
+
+Vários "usuários" simultâneos (threads, ciclo fechado: cada um só manda o
+próximo pedido quando o anterior termina) sorteiam ações conforme o `--mix`:
+
+- `pdf`: `POST /v1/relatorios/pdf` e leitura do PDF;
+- `jobs`: `POST /v1/jobs`, consulta do status até concluir e download do PDF
+  (a latência é a do pedido inteiro, até o PDF);
+- `lote`: `POST /v1/relatorios/lote` com `--lote-tamanho` clientes, lendo o ZIP até o fim.
+
+Com `--concorrencia 2,4,8` cada nível roda `--duracao` segundos em sequência.
+Para cada nível são registrados vazão, percentis de latência por ação, taxa de
+erro (e de recusas 429/503 da admissão) e, a cada `--intervalo` segundos, os
+pedidos em andamento, os processos wkhtmltopdf e a memória (RSS) do servidor.
+
+Alvos:
+
+    # API já no ar (use --pid para medir a memória dela)
+    python -m benchmarks.carga --alvo http://localhost:8000 --api-key ... --pid 1234
+
+    # Sobe a API com as fixtures no lugar do banco (benchmarks/app_carga.py)
+    python -m benchmarks.carga --subir --workers 2 --concorrencia 2,4,8 --env WKHTMLTOPDF_SLOTS=4
+
+    # Idem, sem wkhtmltopdf instalado (só para validar o harness; ver wkhtmltopdf_simulado.py)
+    python -m benchmarks.carga --subir --simular-conversao --concorrencia 2 --duracao 20
+
+    # Sobe a API real apontando para o Postgres de benchmark (dados de benchmarks.dados_sinteticos)
+    python -m benchmarks.carga --subir --banco postgresql://postgres@localhost/ize_bench --schema bench_10x
+
+O resultado vai para `outputs/benchmarks/carga-<data>.json`.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.consultas import percentil
+
+try:
+    import psutil
+except ImportError:  # opcional: sem ele, lê /proc (Linux)
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAIDA_DIR = os.path.join("outputs", "benchmarks")
+RECUSAS = {429, 503}
+TEMPO_LIMITE_S = float(os.getenv("BENCH_TEMPO_LIMITE_S", "600"))
+
+
+# ---------------------------
+# Processos do servidor (RSS e wkhtmltopdf)
+# ---------------------------
+def _ler_proc(pid: int, arquivo: str) -> Optional[str]:
+    try:
+        with open(f"/proc/{pid}/{arquivo}", "rb") as f:
+            return f.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+
+
+def _processos_proc() -> Dict[int, Tuple[int, str, int]]:
+    """pid -> (ppid, linha de comando, RSS em bytes), lido de /proc."""
+    processos = {}
+    for nome in os.listdir("/proc"):
+        if not nome.isdigit():
+            continue
+        pid = int(nome)
+        stat = _ler_proc(pid, "stat")
+        status = _ler_proc(pid, "status")
+        if not stat or not status:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        rss = next((int(l.split()[1]) * 1024 for l in status.splitlines() if l.startswith("VmRSS:")), 0)
+        comando = (_ler_proc(pid, "cmdline") or "").replace("\0", " ")
+        processos[pid] = (ppid, comando, rss)
+    return processos
+
+
+def _processos() -> Dict[int, Tuple[int, str, int]]:
+    if psutil is not None:
+        processos = {}
+        for p in psutil.process_iter(["pid", "ppid", "cmdline", "memory_info"]):
+            info = p.info
+            memoria = info.get("memory_info")
+            processos[info["pid"]] = (info.get("ppid") or 0, " ".join(info.get("cmdline") or []),
+                                      memoria.rss if memoria else 0)
+        return processos
+    if os.path.isdir("/proc"):
+        return _processos_proc()
+    return {}
+
+
+def amostrar_processos(pid_servidor: Optional[int]) -> Dict[str, Any]:
+    """wkhtmltopdf em execução na máquina e RSS (MB) do servidor e dos filhos dele."""
+    processos = _processos()
+    wkhtmltopdf = sum(1 for _, comando, _ in processos.values() if "wkhtmltopdf" in comando)
+    rss_mb = None
+    if pid_servidor and pid_servidor in processos:
+        arvore, pendentes = set(), [pid_servidor]
+        while pendentes:
+            atual = pendentes.pop()
+            arvore.add(atual)
+            pendentes.extend(p for p, (ppid, _, _) in processos.items() if ppid == atual and p not in arvore)
+        # wkhtmltopdf fica de fora: é contado à parte e não é memória do Python
+        rss = sum(processos[p][2] for p in arvore if "wkhtmltopdf" not in processos[p][1])
+        rss_mb = round(rss / 1024 ** 2, 1)
+    return {"wkhtmltopdf": wkhtmltopdf, "rss_mb": rss_mb}
+
+
+# ---------------------------
+# Cliente HTTP (biblioteca padrão)
+# ---------------------------
+class ClienteApi:
+    def __init__(self, alvo: str, api_key: str, tempo_limite_s: float = TEMPO_LIMITE_S):
+        self.alvo = alvo.rstrip("/")
+        self.api_key = api_key
+        self.tempo_limite_s = tempo_limite_s
+
+    def pedir(self, metodo: str, caminho: str, corpo: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes]:
+        """Faz o pedido e lê a resposta inteira; devolve (status, corpo). Status 0 = falha de conexão."""
+        dados = json.dumps(corpo).encode() if corpo is not None else None
+        pedido = urllib.request.Request(f"{self.alvo}{caminho}", data=dados, method=metodo, headers={
+            "X-API-Key": self.api_key, "Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.tempo_limite_s) as resposta:
+                partes = []
+                while True:
+                    parte = resposta.read(1024 * 1024)
+                    if not parte:
+                        break
+                    partes.append(parte)
+                return resposta.status, b"".join(partes)
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            return 0, b""
+
+
+# ---------------------------
+# Ações
+# ---------------------------
+class Cenario:
+    """Sorteio de ações, clientes e pedidos (reprodutível pela semente)."""
+
+    def __init__(self, mix: Dict[str, float], clientes: List[int], relatorios: List[int], mes: int, ano: int,
+                 consolidado: float = 0.1, repetidos: float = 0.0, lote_tamanho: int = 3, semente: int = 42):
+        self.mix = mix
+        self.clientes = clientes
+        self.relatorios = relatorios
+        self.mes = mes
+        self.ano = ano
+        self.consolidado = consolidado
+        self.repetidos = repetidos
+        self.lote_tamanho = lote_tamanho
+        self.semente = semente
+
+    def rng(self, usuario: int) -> random.Random:
+        return random.Random(self.semente * 1009 + usuario)
+
+    def acao(self, rng: random.Random) -> str:
+        return rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+
+    def pedido(self, rng: random.Random) -> Dict[str, Any]:
+        quantos = rng.choice([2, 3]) if rng.random() < self.consolidado else 1
+        corpo = {"id_cliente": sorted(rng.sample(self.clientes, min(quantos, len(self.clientes)))),
+                 "mes": self.mes, "ano": self.ano, "relatorios": self.relatorios}
+        if rng.random() >= self.repetidos:
+            # Texto único: o pedido não cai no cache de artefatos (PDF idêntico já gerado)
+            corpo["analise_text"] = f"<p>Teste de carga {uuid.uuid4().hex}</p>"
+        return corpo
+
+    def lote(self, rng: random.Random) -> Dict[str, Any]:
+        return {"id_cliente": rng.sample(self.clientes, min(self.lote_tamanho, len(self.clientes))),
+                "mes": self.mes, "ano": self.ano, "relatorios": self.relatorios}
+
+
+def executar_acao(api: ClienteApi, cenario: Cenario, acao: str, rng: random.Random) -> int:
+    """Executa a ação e devolve o status HTTP final."""
+    if acao == "pdf":
+        status, _ = api.pedir("POST", "/v1/relatorios/pdf", cenario.pedido(rng))
+        return status
+    if acao == "lote":
+        status, _ = api.pedir("POST", "/v1/relatorios/lote", cenario.lote(rng))
+        return status
+    if acao == "jobs":
+        status, corpo = api.pedir("POST", "/v1/jobs", cenario.pedido(rng))
+        if status != 202:
+            return status
+        job_id = json.loads(corpo)["job_id"]
+        limite = time.monotonic() + api.tempo_limite_s
+        while time.monotonic() < limite:
+            status, corpo = api.pedir("GET", f"/v1/jobs/{job_id}")
+            if status != 200:
+                return status
+            if json.loads(corpo)["status"] in ("concluido", "erro"):
+                break
+            time.sleep(0.5)
+        else:
+            return 504
+        status, _ = api.pedir("GET", f"/v1/jobs/{job_id}/pdf")
+        return status
+    raise ValueError(f"Ação desconhecida: {acao}")
+
+
+# ---------------------------
+# Execução de um nível de concorrência
+# ---------------------------
+def executar_nivel(api: ClienteApi, cenario: Cenario, concorrencia: int, duracao_s: float,
+                   intervalo_s: float = 1.0, pid_servidor: Optional[int] = None) -> Dict[str, Any]:
+    """Roda `concorrencia` usuários por `duracao_s` segundos e resume o nível."""
+    registros: List[Tuple[str, float, float, int]] = []  # (ação, início relativo, duração, status)
+    lock = threading.Lock()
+    em_voo = [0]
+    parar = threading.Event()
+    inicio = time.monotonic()
+
+    def usuario(numero: int) -> None:
+        rng = cenario.rng(numero + concorrencia * 1000)
+        while not parar.is_set():
+            acao = cenario.acao(rng)
+            comeco = time.monotonic()
+            with lock:
+                em_voo[0] += 1
+            try:
+                status = executar_acao(api, cenario, acao, rng)
+            except Exception as e:  # resposta inesperada (ex.: JSON inválido): conta como erro
+                logger.warning(f"⚠️ {acao}: {e}")
+                status = -1
+            fim = time.monotonic()
+            with lock:
+                em_voo[0] -= 1
+                registros.append((acao, comeco - inicio, fim - comeco, status))
+
+    serie: List[Dict[str, Any]] = []
+
+    def amostrador() -> None:
+        while not parar.wait(intervalo_s):
+            with lock:
+                feitos = len(registros)
+                erros = sum(1 for r in registros if not _sucesso(r[3]))
+                andamento = em_voo[0]
+            serie.append({"t_s": round(time.monotonic() - inicio, 2), "em_voo": andamento,
+                          "concluidos": feitos, "erros": erros, **amostrar_processos(pid_servidor)})
+
+    threads = [threading.Thread(target=usuario, args=(i,), daemon=True, name=f"carga-{i}") for i in range(concorrencia)]
+    threads.append(threading.Thread(target=amostrador, daemon=True, name="carga-amostrador"))
+    for t in threads:
+        t.start()
+    parar.wait(duracao_s)
+    parar.set()
+    logger.info(f"⏳ Concorrência {concorrencia}: aguardando os pedidos em andamento")
+    for t in threads:
+        t.join()
+    total_s = time.monotonic() - inicio
+    return resumir_nivel(concorrencia, registros, total_s, serie)
+
+
+def _sucesso(status: int) -> bool:
+    return 200 <= status < 400
+
+
+def resumir_nivel(concorrencia: int, registros: List[Tuple[str, float, float, int]], total_s: float,
+                  serie: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Vazão, percentis por ação, erros e picos da série de um nível."""
+    por_acao: Dict[str, Any] = {}
+    for acao in sorted({r[0] for r in registros}):
+        da_acao = [r for r in registros if r[0] == acao]
+        ok = [r[2] for r in da_acao if _sucesso(r[3])]
+        por_acao[acao] = {
+            "pedidos": len(da_acao), "ok": len(ok),
+            "status": dict(Counter(str(r[3]) for r in da_acao)),
+            **({f"p{p}_s": round(percentil(ok, p), 3) for p in (50, 90, 95, 99)} if ok else {}),
+            "max_s": round(max(ok), 3) if ok else None,
+        }
+    ok = sum(1 for r in registros if _sucesso(r[3]))
+    recusas = sum(1 for r in registros if r[3] in RECUSAS)
+    rss = [a["rss_mb"] for a in serie if a.get("rss_mb") is not None]
+    return {
+        "concorrencia": concorrencia,
+        "duracao_s": round(total_s, 2),
+        "pedidos": len(registros),
+        "vazao_rps": round(ok / total_s, 3) if total_s else 0.0,
+        "vazao_por_hora": round(ok / total_s * 3600) if total_s else 0,
+        "taxa_erro": round((len(registros) - ok) / len(registros), 4) if registros else 0.0,
+        "taxa_recusa": round(recusas / len(registros), 4) if registros else 0.0,
+        "acoes": por_acao,
+        "wkhtmltopdf_max": max((a["wkhtmltopdf"] for a in serie), default=0),
+        "wkhtmltopdf_medio": round(statistics.mean(a["wkhtmltopdf"] for a in serie), 2) if serie else 0,
+        "rss_max_mb": max(rss) if rss else None,
+        "rss_final_mb": rss[-1] if rss else None,
+        "serie": serie,
+    }
+
+
+# ---------------------------
+# Servidor local (opcional)
+# ---------------------------
+def _ambiente_banco(url: str, schema: Optional[str]) -> Dict[str, str]:
+    """DB_* (lidas por config/settings.py) a partir de uma URL; o schema via PGOPTIONS."""
+    from sqlalchemy.engine import make_url
+
+    u = make_url(url)
+    ambiente = {"DB_NAME": u.database or "", "DB_USER": u.username or "", "DB_PASSWORD": u.password or "",
+                "DB_HOST": u.host or "localhost", "DB_PORT": str(u.port or 5432)}
+    if schema:
+        ambiente["PGOPTIONS"] = f"-csearch_path={schema}"
+    return ambiente
+
+
+def subir_servidor(porta: int, workers: int, extra_env: Dict[str, str], banco: Optional[str],
+                   schema: Optional[str], api_key: str) -> subprocess.Popen:
+    """Sobe o uvicorn (fixtures ou banco) e espera o /v1/health responder."""
+    ambiente = dict(os.environ, API_KEY=api_key, **extra_env)
+    if banco:
+        ambiente.update(_ambiente_banco(banco, schema))
+        modulo = "src.api.main:app"
+    else:
+        modulo = "benchmarks.app_carga:app"
+    comando = [sys.executable, "-m", "uvicorn", modulo, "--host", "127.0.0.1", "--port", str(porta),
+               "--workers", str(workers), "--log-level", "warning"]
+    logger.info(f"🚀 Subindo {modulo} na porta {porta} ({workers} worker(s))")
+    processo = subprocess.Popen(comando, cwd=RAIZ, env=ambiente)
+    api = ClienteApi(f"http://127.0.0.1:{porta}", api_key, tempo_limite_s=2)
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"O servidor saiu com código {processo.returncode}")
+        if api.pedir("GET", "/v1/health")[0] == 200:
+            return processo
+        time.sleep(0.5)
+    processo.terminate()
+    raise RuntimeError("O servidor não respondeu /v1/health em 60 s")
+
+
+def parar_servidor(processo: subprocess.Popen) -> None:
+    processo.send_signal(signal.SIGINT)
+    try:
+        processo.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def _lista_ids(texto: str) -> List[int]:
+    """'1-20,35' -> [1..20, 35]."""
+    ids = []
+    for parte in texto.split(","):
+        parte = parte.strip()
+        if "-" in parte:
+            a, b = (int(x) for x in parte.split("-", 1))
+            ids.extend(range(a, b + 1))
+        elif parte:
+            ids.append(int(parte))
+    return ids
+
+
+def _mix(texto: str) -> Dict[str, float]:
+    mix = {}
+    for parte in texto.split(","):
+        acao, _, peso = parte.partition("=")
+        if acao.strip() not in ("pdf", "jobs", "lote"):
+            raise argparse.ArgumentTypeError(f"Ação desconhecida no mix: {acao}")
+        mix[acao.strip()] = float(peso or 1)
+    return mix
+
+
+def formatar(resultado: Dict[str, Any]) -> str:
+    linhas = [f"{'conc':>4} {'pedidos':>7} {'rps':>7} {'/hora':>7} {'erro':>6} {'recusa':>6} "
+              f"{'wk max':>6} {'rss max':>8}  latência p50/p95 (s) por ação"]
+    for n in resultado["niveis"]:
+        latencias = "  ".join(f"{a} {d.get('p50_s', '-')}/{d.get('p95_s', '-')}" for a, d in n["acoes"].items())
+        linhas.append(f"{n['concorrencia']:>4} {n['pedidos']:>7} {n['vazao_rps']:>7.2f} {n['vazao_por_hora']:>7} "
+                      f"{n['taxa_erro']:>6.1%} {n['taxa_recusa']:>6.1%} {n['wkhtmltopdf_max']:>6} "
+                      f"{n['rss_max_mb'] if n['rss_max_mb'] is not None else '-':>8}  {latencias}")
+    return "\n".join(linhas)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.carga", description="Teste de carga da API.")
+    alvo = parser.add_mutually_exclusive_group(required=True)
+    alvo.add_argument("--alvo", help="URL de uma API já no ar (ex.: http://localhost:8000).")
+    alvo.add_argument("--subir", action="store_true", help="Sobe a API localmente durante o teste.")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", "carga"))
+    parser.add_argument("--pid", type=int, help="PID do servidor (--alvo) para medir a memória.")
+    parser.add_argument("--banco", help="Com --subir: URL do Postgres de benchmark (sem ela, usa as fixtures).")
+    parser.add_argument("--schema", help="Com --banco: schema dos dados (ex.: bench_10x).")
+    parser.add_argument("--fixture", default="tipico", help="Com --subir sem --banco: fixture servida.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn (com --subir).")
+    parser.add_argument("--simular-conversao", action="store_true",
+                        help="Com --subir: usa benchmarks/wkhtmltopdf_simulado.py no lugar do wkhtmltopdf.")
+    parser.add_argument("--env", action="append", default=[], metavar="CHAVE=VALOR",
+                        help="Variável extra para o servidor (ex.: WKHTMLTOPDF_SLOTS=4). Repetível.")
+    parser.add_argument("--concorrencia", default="2,4", help="Usuários simultâneos; vários níveis separados por vírgula.")
+    parser.add_argument("--duracao", type=float, default=60, help="Segundos por nível.")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="Intervalo da série (s).")
+    parser.add_argument("--mix", type=_mix, default=_mix("pdf=8,jobs=2"), help="Pesos das ações, ex.: pdf=8,jobs=2,lote=1.")
+    parser.add_argument("--clientes", default="1-50", help="IDs sorteados, ex.: 1-50 ou 3,7,12.")
+    parser.add_argument("--consolidado", type=float, default=0.1, help="Fração de pedidos consolidados (2 a 3 clientes).")
+    parser.add_argument("--repetidos", type=float, default=0.0,
+                        help="Fração de pedidos sem texto único (podem vir do cache de artefatos).")
+    parser.add_argument("--relatorios", default="1,2,3,4,5,6,7")
+    parser.add_argument("--lote-tamanho", type=int, default=3)
+    parser.add_argument("--mes", type=int)
+    parser.add_argument("--ano", type=int)
+    parser.add_argument("--saida", default=SAIDA_DIR)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    if args.simular_conversao:
+        extra_env.setdefault("WKHTMLTOPDF_CMD", os.path.join(RAIZ, "benchmarks", "wkhtmltopdf_simulado.py"))
+    if args.subir and not args.banco:
+        extra_env.setdefault("BENCH_FIXTURE", args.fixture)
+        extra_env.setdefault("BENCH_CLIENTES", str(max(_lista_ids(args.clientes))))
+        from benchmarks import fixtures
+        mes_padrao = date.fromisoformat(fixtures.carregar(args.fixture)["mes"])
+    else:
+        hoje = date.today().replace(day=1)
+        mes_padrao = date(hoje.year - (hoje.month == 1), (hoje.month - 2) % 12 + 1, 1)  # mês anterior
+    cenario = Cenario(args.mix, _lista_ids(args.clientes), _lista_ids(args.relatorios),
+                      args.mes or mes_padrao.month, args.ano or mes_padrao.year,
+                      args.consolidado, args.repetidos, args.lote_tamanho)
+
+    processo, pid = None, args.pid
+    if args.subir:
+        processo = subir_servidor(args.porta, args.workers, extra_env, args.banco, args.schema, args.api_key)
+        pid = processo.pid
+    api = ClienteApi(args.alvo or f"http://127.0.0.1:{args.porta}", args.api_key)
+
+    resultado: Dict[str, Any] = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "alvo": api.alvo, "servidor": "banco" if args.banco else ("fixtures" if args.subir else "externo"),
+        "workers": args.workers if args.subir else None, "env": extra_env,
+        "cenario": {"mix": args.mix, "clientes": args.clientes, "consolidado": args.consolidado,
+                    "repetidos": args.repetidos, "relatorios": cenario.relatorios,
+                    "mes": cenario.mes, "ano": cenario.ano},
+        "niveis": [],
+    }
+    try:
+        for concorrencia in _lista_ids(args.concorrencia):
+            logger.info(f"🏋️ Concorrência {concorrencia} por {args.duracao:.0f}s")
+            resultado["niveis"].append(executar_nivel(api, cenario, concorrencia, args.duracao, args.intervalo, pid))
+    finally:
+        if processo is not None:
+            parar_servidor(processo)
+
+    caminho = os.path.join(args.saida, f"carga-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(args.saida, exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=1)
+    print(formatar(resultado))
+    print(f"📄 Resultado em {caminho}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
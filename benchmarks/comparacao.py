@@ -0,0 +1,92 @@
+# benchmarks/comparacao.py
+"""
+Comparação de uma rodada de benchmark com a baseline gravada.
+
+As medições são `{"etapa/porte/item": {"mediana_s", "min_s", "max_s", "n"}}`.
+Uma etapa regrediu quando a mediana passou da baseline em mais que a tolerância
+relativa E em mais que o piso absoluto (variações de poucos milissegundos em
+etapas curtas são ruído, não regressão).
+
+A tolerância padrão vem de `BENCH_TOLERANCIA` (0.25 = 25%) e o piso de
+`BENCH_PISO_MS` (5 ms). A baseline pode sobrepor a tolerância por prefixo de
+etapa em `"tolerancias"` (ex.: `{"pdf/": 0.5}` para o wkhtmltopdf, mais ruidoso).
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+TOLERANCIA = float(os.getenv("BENCH_TOLERANCIA", "0.25"))
+PISO_MS = float(os.getenv("BENCH_PISO_MS", "5"))
+
+REGRESSAO = "regressao"
+MELHORIA = "melhoria"
+ESTAVEL = "ok"
+NOVA = "nova"
+AUSENTE = "ausente"
+
+
+def tolerancia_da_etapa(etapa: str, tolerancias: Optional[Dict[str, float]], padrao: float) -> float:
+    """Tolerância do prefixo mais específico que casa com a etapa."""
+    casados = [p for p in (tolerancias or {}) if etapa.startswith(p)]
+    return tolerancias[max(casados, key=len)] if casados else padrao
+
+
+def comparar(atual: Dict[str, Any], baseline: Dict[str, Any],
+             tolerancia: Optional[float] = None, piso_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Compara as medições de `atual` com as de `baseline`.
+
+    Args:
+        atual: Resultado de uma rodada (`{"medicoes": {...}}`).
+        baseline: Baseline gravada (`{"medicoes": {...}, "tolerancias": {...}}`).
+        tolerancia: Tolerância relativa padrão (padrão: `BENCH_TOLERANCIA`).
+        piso_ms: Diferença absoluta mínima para contar regressão/melhoria.
+
+    Returns:
+        Uma linha por etapa: etapa, status, base_s, atual_s, variacao (fração) e tolerancia.
+    """
+    tolerancia = TOLERANCIA if tolerancia is None else tolerancia
+    piso_s = (PISO_MS if piso_ms is None else piso_ms) / 1000
+    medicoes_atual = atual.get("medicoes", {})
+    medicoes_base = baseline.get("medicoes", {})
+
+    linhas = []
+    for etapa in sorted(set(medicoes_atual) | set(medicoes_base)):
+        tol = tolerancia_da_etapa(etapa, baseline.get("tolerancias"), tolerancia)
+        base = medicoes_base.get(etapa, {}).get("mediana_s")
+        valor = medicoes_atual.get(etapa, {}).get("mediana_s")
+        linha = {"etapa": etapa, "base_s": base, "atual_s": valor, "variacao": None, "tolerancia": tol}
+        if base is None:
+            linha["status"] = NOVA
+        elif valor is None:
+            linha["status"] = AUSENTE
+        else:
+            diferenca = valor - base
+            linha["variacao"] = diferenca / base if base else 0.0
+            if diferenca > piso_s and diferenca > base * tol:
+                linha["status"] = REGRESSAO
+            elif -diferenca > piso_s and -diferenca > base * tol:
+                linha["status"] = MELHORIA
+            else:
+                linha["status"] = ESTAVEL
+        linhas.append(linha)
+    return linhas
+
+
+def regressoes(linhas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [l for l in linhas if l["status"] == REGRESSAO]
+
+
+def formatar(linhas: List[Dict[str, Any]]) -> str:
+    """Tabela de texto da comparação (as etapas estáveis ficam por último)."""
+    ordem = {REGRESSAO: 0, MELHORIA: 1, NOVA: 2, AUSENTE: 3, ESTAVEL: 4}
+    icones = {REGRESSAO: "🔴", MELHORIA: "🟢", NOVA: "🆕", AUSENTE: "⚪", ESTAVEL: "  "}
+
+    def ms(valor: Optional[float]) -> str:
+        return "-" if valor is None else f"{valor * 1000:.1f}"
+
+    largura = max([len(l["etapa"]) for l in linhas] + [5])
+    saida = [f"   {'etapa':<{largura}} {'base ms':>10} {'atual ms':>10} {'var':>8}"]
+    for l in sorted(linhas, key=lambda l: (ordem[l["status"]], l["etapa"])):
+        variacao = "" if l["variacao"] is None else f"{l['variacao'] * 100:+.0f}%"
+        saida.append(f"{icones[l['status']]} {l['etapa']:<{largura}} {ms(l['base_s']):>10} {ms(l['atual_s']):>10} {variacao:>8}")
+    return "\n".join(saida)
@@ -0,0 +1,264 @@
+# benchmarks/consultas.py
+"""
+Benchmark das consultas de `Indicadores` no banco, em 1×, 10× e 100× o volume.
+
+Para cada escala, carrega (ou reaproveita) os dados sintéticos de
+`benchmarks/dados_sinteticos.py` num schema próprio e, para cada método
+`calcular_*`:
+
+- mede a latência de ponta a ponta (consulta + montagem do resultado) em
+  `--repeticoes` chamadas, alternando os clientes da amostra, e guarda p50/p95;
+- roda `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)` de cada SQL do método e guarda a
+  forma do plano (nós, varreduras sequenciais, blocos lidos, tempo de execução).
+
+    python -m benchmarks.consultas --url postgresql://localhost/ize_bench
+    python -m benchmarks.consultas --url ... --escalas 10 --sql indices_candidatos.sql
+
+O resultado vai para `outputs/benchmarks/consultas-<data>.json` no mesmo formato
+de medições do `benchmarks.pipeline`; com `--baseline` (outro resultado JSON)
+as medianas são comparadas e o comando sai com código 1 se houver regressão.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+
+from benchmarks import comparacao, dados_sinteticos
+
+logger = logging.getLogger(__name__)
+
+SAIDA_DIR = os.path.join("outputs", "benchmarks")
+
+# Métodos medidos e como o pipeline os chama: args(mes_atual, mes_anterior)
+CHAMADAS: List[Tuple[str, Callable[[date, date], tuple]]] = [
+    ("calcular_receitas_fc", lambda m, a: (m, "3.%")),
+    ("calcular_receitas_top_fc", lambda m, a: (m, a)),
+    ("calcular_custos_variaveis_fc", lambda m, a: (m, "4.%")),
+    ("calcular_custos_variaveis_top_fc", lambda m, a: (m, a)),
+    ("calcular_lucro_bruto_fc", lambda m, a: (m,)),
+    ("calcular_despesas_fixas_fc", lambda m, a: (m,)),
+    ("calcular_despesas_fixas_top_fc", lambda m, a: (m, a)),
+    ("calcular_lucro_operacional_fc", lambda m, a: (m, a)),
+    ("calcular_investimentos_fc", lambda m, a: (m, a)),
+    ("calcular_lucro_liquido_fc", lambda m, a: (m,)),
+    ("calcular_entradas_nao_operacionais_fc", lambda m, a: (m,)),
+    ("calcular_saidas_nao_operacionais_fc", lambda m, a: (m,)),
+    ("calcular_resultados_nao_operacionais_fc", lambda m, a: (m,)),
+    ("calcular_geracao_de_caixa_fc", lambda m, a: (m,)),
+    ("calcular_geracao_de_caixa_temporal_fc", lambda m, a: (m,)),
+    ("calcular_indicadores_dre", lambda m, a: (m,)),
+    ("calcular_indicadores_operacionais", lambda m, a: (m,)),
+]
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por interpolação linear (p entre 0 e 100)."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    posicao = (len(ordenados) - 1) * p / 100
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(ordenados) - 1)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (posicao - baixo)
+
+
+def resumir_plano(plano: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Forma de um plano `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`.
+
+    Returns:
+        Dicionário com `forma` (nós por tipo, ex.: "Seq Scan on fc×3 · Hash Join×2"),
+        `seq_scans` (tabelas varridas por completo), `execucao_ms`, `planejamento_ms`,
+        `custo`, `linhas` e os blocos lidos do cache (`blocos_cache`) e do disco (`blocos_disco`).
+    """
+    nos: Counter = Counter()
+    seq_scans: Counter = Counter()
+
+    def visitar(no: Dict[str, Any]) -> None:
+        tipo = no.get("Node Type", "?")
+        relacao = no.get("Relation Name")
+        nos[f"{tipo} on {relacao}" if relacao else tipo] += 1
+        if tipo == "Seq Scan" and relacao:
+            seq_scans[relacao] += 1
+        for filho in no.get("Plans", []):
+            visitar(filho)
+
+    raiz = plano["Plan"]
+    visitar(raiz)
+    return {
+        "forma": " · ".join(f"{n}×{q}" if q > 1 else n for n, q in nos.most_common()),
+        "seq_scans": dict(seq_scans),
+        "execucao_ms": round(plano.get("Execution Time", 0.0), 3),
+        "planejamento_ms": round(plano.get("Planning Time", 0.0), 3),
+        "custo": raiz.get("Total Cost"),
+        "linhas": raiz.get("Actual Rows"),
+        "blocos_cache": raiz.get("Shared Hit Blocks", 0),
+        "blocos_disco": raiz.get("Shared Read Blocks", 0),
+    }
+
+
+def explicar(engine, sql: str, params: Dict[str, Any], schema: str) -> Dict[str, Any]:
+    with engine.connect() as conn:
+        conn.execute(text(f"SET search_path TO {schema}"))
+        resultado = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+        conn.rollback()
+    plano = json.loads(resultado) if isinstance(resultado, str) else resultado
+    return resumir_plano(plano[0])
+
+
+def amostra_clientes(engine, schema: str, tamanho: int, semente: int = 7) -> List[List[int]]:
+    """Clientes medidos: `tamanho` clientes avulsos e um consolidado de três."""
+    with engine.connect() as conn:
+        ids = [r[0] for r in conn.execute(text(f"SELECT id_cliente FROM {schema}.cliente ORDER BY id_cliente"))]
+    rng = random.Random(semente)
+    escolhidos = rng.sample(ids, min(tamanho, len(ids)))
+    grupos = [[i] for i in escolhidos]
+    if len(ids) >= 3:
+        grupos.append(sorted(rng.sample(ids, 3)))
+    return grupos
+
+
+def medir_escala(url: str, schema: str, mes: date, repeticoes: int, tamanho_amostra: int) -> Dict[str, Any]:
+    """Latências e planos de todos os `calcular_*` num schema carregado."""
+    from dateutil.relativedelta import relativedelta
+    from src.core.indicadores import Indicadores
+    from src.database.db_utils import DatabaseConnection
+
+    db = DatabaseConnection(url, connect_args={"options": f"-csearch_path={schema}"})
+    mes_anterior = mes - relativedelta(months=1)
+    grupos = amostra_clientes(db.engine, schema, tamanho_amostra)
+    indicadores = [Indicadores(ids, db) for ids in grupos]
+
+    capturas: List[Tuple[Any, Any]] = []
+    executar_original = db.execute_query
+
+    def execute_query_gravando(query, params=None):
+        capturas.append((query, params))
+        return executar_original(query, params)
+
+    metodos: Dict[str, Any] = {}
+    for nome, argumentos in CHAMADAS:
+        args = argumentos(mes, mes_anterior)
+        for ind in indicadores:  # aquecimento: cache do Postgres e pool de conexões
+            getattr(ind, nome)(*args)
+
+        tempos = []
+        for i in range(repeticoes):
+            inicio = time.perf_counter()
+            getattr(indicadores[i % len(indicadores)], nome)(*args)
+            tempos.append(time.perf_counter() - inicio)
+
+        # Planos de cada SQL distinto do método, com o consolidado (o caso mais pesado)
+        capturas.clear()
+        db.execute_query = execute_query_gravando
+        try:
+            getattr(indicadores[-1], nome)(*args)
+        finally:
+            db.execute_query = executar_original
+        planos, vistos = [], set()
+        for query, params in capturas:
+            sql = str(getattr(query, "text", query)).strip()
+            if sql in vistos:
+                continue
+            vistos.add(sql)
+            planos.append(explicar(db.engine, sql, params or {}, schema))
+
+        metodos[nome] = {
+            "p50_s": round(percentil(tempos, 50), 6), "p95_s": round(percentil(tempos, 95), 6),
+            "min_s": round(min(tempos), 6), "max_s": round(max(tempos), 6), "n": len(tempos),
+            "consultas": len(capturas), "planos": planos,
+        }
+        logger.info(f"⏱️ {schema} {nome}: p50 {metodos[nome]['p50_s'] * 1000:.1f} ms, "
+                    f"p95 {metodos[nome]['p95_s'] * 1000:.1f} ms, {len(capturas)} consulta(s)")
+    db.engine.dispose()
+    return {"amostra": grupos, "metodos": metodos}
+
+
+def medicoes(resultado: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Medições no formato de `benchmarks.comparacao` (mediana = p50)."""
+    saida = {}
+    for escala, dados in resultado["escalas"].items():
+        for metodo, m in dados["metodos"].items():
+            saida[f"consultas/{escala}/{metodo}"] = {"mediana_s": m["p50_s"], "p95_s": m["p95_s"],
+                                                    "min_s": m["min_s"], "max_s": m["max_s"], "n": m["n"]}
+    return saida
+
+
+def formatar(resultado: Dict[str, Any]) -> str:
+    """Tabela método × escala com p50/p95 (ms) e as tabelas com Seq Scan na maior escala."""
+    escalas = list(resultado["escalas"])
+    metodos = [nome for nome, _ in CHAMADAS]
+    largura = max(len(m) for m in metodos)
+    linhas = [f"{'método':<{largura}} " + " ".join(f"{e + ' p50/p95':>18}" for e in escalas) + "  seq scans"]
+    for metodo in metodos:
+        colunas = []
+        for e in escalas:
+            m = resultado["escalas"][e]["metodos"].get(metodo)
+            colunas.append(f"{m['p50_s'] * 1000:>8.1f}/{m['p95_s'] * 1000:<9.1f}" if m else f"{'-':>18}")
+        maior = resultado["escalas"][escalas[-1]]["metodos"].get(metodo, {})
+        seq = Counter()
+        for plano in maior.get("planos", []):
+            seq.update(plano["seq_scans"])
+        linhas.append(f"{metodo:<{largura}} " + " ".join(colunas) + "  "
+                      + (", ".join(f"{t}×{q}" for t, q in seq.items()) or "-"))
+    return "\n".join(linhas)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.consultas",
+                                     description="Benchmark das consultas de Indicadores em 1×, 10× e 100×.")
+    dados_sinteticos.adicionar_argumentos_volume(parser)
+    parser.add_argument("--repeticoes", type=int, default=20, help="Chamadas medidas por método e escala.")
+    parser.add_argument("--amostra", type=int, default=5, help="Clientes avulsos medidos (mais um consolidado).")
+    parser.add_argument("--saida", default=SAIDA_DIR)
+    parser.add_argument("--baseline", help="Resultado anterior (JSON) para comparar as medianas.")
+    args = parser.parse_args(argv)
+    # Nenhuma consulta usa o banco do .env, mas config.settings exige as variáveis na
+    # importação; o EXPLAIN automático de consultas lentas fica desligado (o benchmark faz o seu)
+    for variavel in ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT"):
+        os.environ.setdefault(variavel, "benchmark")
+    os.environ.setdefault("DB_CONSULTA_LENTA_MS", "0")
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    logger.setLevel(logging.INFO)
+    dados_sinteticos.logger.setLevel(logging.INFO)
+
+    volume = dados_sinteticos.volume_dos_argumentos(args)
+    sql_extra = dados_sinteticos.ler_sql(args.sql)
+    engine = create_engine(args.url)
+    resultado: Dict[str, Any] = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "volume_1x": volume.parametros(), "sql_extra": args.sql, "repeticoes": args.repeticoes, "escalas": {},
+    }
+    for fator in (int(x) for x in args.escalas.split(",") if x.strip()):
+        schema = dados_sinteticos.preparar(engine, fator, volume, sql_extra, args.recarregar)
+        resultado["escalas"][f"{fator}x"] = medir_escala(args.url, schema, volume.ate, args.repeticoes, args.amostra)
+    engine.dispose()
+    resultado["medicoes"] = medicoes(resultado)
+
+    caminho = os.path.join(args.saida, f"consultas-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(args.saida, exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=1, default=str)
+    print(formatar(resultado))
+    print(f"📄 Resultado em {caminho}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            linhas = comparacao.comparar(resultado, json.load(f))
+        linhas = [l for l in linhas if l["status"] != comparacao.AUSENTE]
+        print(comparacao.formatar(linhas))
+        if comparacao.regressoes(linhas):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
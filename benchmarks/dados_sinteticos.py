@@ -0,0 +1,352 @@
+# benchmarks/dados_sinteticos.py
+"""
+Gerador de dados sintéticos para `cliente`, `plano_de_contas`, `fc`, `dre` e `indicador`.
+
+Os dados seguem a forma que as consultas de `Indicadores` esperam:
+
+- plano de contas por cliente, com `nivel_1` entre Receitas, Custos Variáveis,
+  Despesas Fixas, Investimentos e Entradas/Saídas Não Operacionais, e
+  `nivel_3_id` em texto (o `fc` guarda o mesmo id como inteiro);
+- `fc` com vários lançamentos por conta e mês, na visão "Realizado" e uma parte
+  em "Projetado" (que as consultas precisam descartar);
+- `dre` na visão "Competência", com as categorias lidas por `calcular_indicadores_dre`;
+- `indicador` com metas (`bom`/`ruim`), sentido e unidade.
+
+O volume 1× é definido por `Volume` (clientes × meses × contas × lançamentos);
+as escalas multiplicam o número de clientes, que é como a base cresce. Cada
+escala é carregada num schema próprio (`bench_1x`, `bench_10x`, ...), então o
+carregamento nunca toca as tabelas de `public`.
+
+    python -m benchmarks.dados_sinteticos --url postgresql://localhost/ize_bench --escalas 1,10
+"""
+import argparse
+import io
+import json
+import logging
+import random
+import re
+import sys
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger(__name__)
+
+# (nivel_1, fração das contas do plano, sinal, fração da receita do mês)
+GRUPOS_FC: List[Tuple[str, float, int, float]] = [
+    ("3. Receitas", 0.15, 1, 1.0),
+    ("4. Custos Variáveis", 0.20, -1, 0.35),
+    ("5. Despesas Fixas", 0.45, -1, 0.40),
+    ("6. Investimentos", 0.05, -1, 0.05),
+    ("7.1 Entradas Não Operacionais", 0.075, 1, 0.08),
+    ("7.2 Saídas Não Operacionais", 0.075, -1, 0.06),
+]
+
+# Categorias do DRE lidas por `calcular_indicadores_dre` (sinal, fração da receita)
+CATEGORIAS_DRE: List[Tuple[str, float]] = [
+    ("Receita de Vendas de Produtos", 0.55), ("Receita de Prestação de Serviços", 0.45),
+    ("Descontos Incondicionais", -0.01), ("ICMS", -0.03), ("PIS", -0.0065), ("COFINS", -0.03),
+    ("ISS", -0.02), ("Simples Nacional", -0.04), ("Devoluções de Vendas", -0.005),
+    ("Custos com Produtos e Serviços", -0.25), ("Custos Comerciais", -0.08),
+    ("Despesas Administrativas", -0.07), ("Despesas com Pessoal", -0.18),
+    ("Despesas com Serviços de Terceiros", -0.05), ("Despesas com Materiais e Equipamentos", -0.02),
+    ("Despesas de Marketing", -0.03), ("Despesas com Desenvolvimento Empresarial", -0.01),
+    ("Receitas Financeiras", 0.004), ("Rendimentos de Aplicações", 0.003),
+    ("Despesas Financeiras", -0.006), ("Juros Bancários", -0.004), ("IRPJ", -0.012), ("CSLL", -0.009),
+    ("Investimento em Imobilizado", -0.02), ("Empréstimos bancários", 0.03),
+    ("Pagamento de Empréstimos", -0.025), ("Capitalização dos sócios", 0.01), ("Distribuição de Lucros", -0.05),
+]
+
+UNIDADES = ["R$", "%", "SU"]
+VISAO_PROJETADO = 0.3  # fração de lançamentos duplicados na visão "Projetado"
+
+_RE_SCHEMA = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+DDL = """
+CREATE TABLE cliente (
+    id_cliente integer PRIMARY KEY,
+    nome text NOT NULL,
+    ativo boolean NOT NULL DEFAULT TRUE
+);
+CREATE TABLE plano_de_contas (
+    id_cliente integer NOT NULL,
+    nivel_3_id text NOT NULL,
+    nivel_1 text NOT NULL,
+    nivel_2 text NOT NULL,
+    nivel_3 text NOT NULL,
+    PRIMARY KEY (id_cliente, nivel_3_id)
+);
+CREATE TABLE fc (
+    id_cliente integer NOT NULL,
+    data date NOT NULL,
+    valor numeric(15, 2) NOT NULL,
+    visao text NOT NULL,
+    nivel_1 text NOT NULL,
+    categoria_nivel_3 text NOT NULL,
+    nivel_3_id integer NOT NULL
+);
+CREATE TABLE dre (
+    id_cliente integer NOT NULL,
+    data date NOT NULL,
+    valor numeric(15, 2) NOT NULL,
+    visao text NOT NULL,
+    categoria text NOT NULL
+);
+CREATE TABLE indicador (
+    id_cliente integer NOT NULL,
+    data date NOT NULL,
+    indicador text NOT NULL,
+    valor numeric(15, 4),
+    bom numeric(15, 4),
+    ruim numeric(15, 4),
+    sentido text,
+    unidade text
+);
+CREATE TABLE bench_meta (parametros jsonb NOT NULL);
+"""
+
+COLUNAS = {
+    "cliente": ["id_cliente", "nome", "ativo"],
+    "plano_de_contas": ["id_cliente", "nivel_3_id", "nivel_1", "nivel_2", "nivel_3"],
+    "fc": ["id_cliente", "data", "valor", "visao", "nivel_1", "categoria_nivel_3", "nivel_3_id"],
+    "dre": ["id_cliente", "data", "valor", "visao", "categoria"],
+    "indicador": ["id_cliente", "data", "indicador", "valor", "bom", "ruim", "sentido", "unidade"],
+}
+
+
+class Volume:
+    """Volume 1× da base; ajuste aos números de produção para medir a escala certa."""
+
+    def __init__(self, clientes: int = 20, meses: int = 24, contas: int = 40, lancamentos: int = 4,
+                 indicadores: int = 30, ate: date = date(2025, 9, 1), semente: int = 42):
+        self.clientes = clientes
+        self.meses = meses
+        self.contas = contas
+        self.lancamentos = lancamentos
+        self.indicadores = indicadores
+        self.ate = ate
+        self.semente = semente
+
+    def escalado(self, fator: int) -> "Volume":
+        return Volume(self.clientes * fator, self.meses, self.contas, self.lancamentos,
+                      self.indicadores, self.ate, self.semente)
+
+    def meses_gerados(self) -> List[date]:
+        indice = self.ate.year * 12 + self.ate.month - 1
+        return [date(i // 12, i % 12 + 1, 1) for i in range(indice - self.meses + 1, indice + 1)]
+
+    def parametros(self) -> Dict[str, Any]:
+        return {"clientes": self.clientes, "meses": self.meses, "contas": self.contas,
+                "lancamentos": self.lancamentos, "indicadores": self.indicadores,
+                "ate": self.ate.isoformat(), "semente": self.semente}
+
+    def linhas_fc_estimadas(self) -> int:
+        return int(self.clientes * self.meses * self.contas * self.lancamentos * (1 + VISAO_PROJETADO))
+
+
+def plano_de_contas(id_cliente: int, contas: int) -> List[Tuple[int, str, str, str, str]]:
+    """Contas nível 3 do cliente: (id_cliente, nivel_3_id, nivel_1, nivel_2, nivel_3)."""
+    linhas = []
+    for g, (nivel_1, fracao, _, _) in enumerate(GRUPOS_FC):
+        prefixo = nivel_1.split()[0].rstrip(".")
+        quantidade = max(1, round(contas * fracao))
+        grupos_n2 = max(1, quantidade // 3)
+        for i in range(quantidade):
+            n2 = i % grupos_n2 + 1
+            nivel_3_id = str((g + 1) * 1000 + i + 1)
+            linhas.append((id_cliente, nivel_3_id, nivel_1, f"{prefixo}.{n2} Grupo {prefixo}.{n2}",
+                           f"{prefixo}.{n2}.{i + 1} Conta {prefixo}.{n2}.{i + 1}"))
+    return linhas
+
+
+def gerar_cliente(id_cliente: int, volume: Volume) -> Dict[str, List[tuple]]:
+    """Todas as linhas de um cliente, determinísticas pela semente e pelo id."""
+    rng = random.Random(volume.semente * 1_000_003 + id_cliente)
+    receita_base = rng.lognormvariate(12.5, 1.2)  # clientes de ~50 mil a alguns milhões por mês
+    plano = plano_de_contas(id_cliente, volume.contas)
+    por_grupo: Dict[str, List[tuple]] = {}
+    for conta in plano:
+        por_grupo.setdefault(conta[2], []).append(conta)
+    nomes_indicadores = [(f"Indicador {i + 1:03d}", UNIDADES[i % 3]) for i in range(volume.indicadores)]
+
+    fc, dre, indicador = [], [], []
+    for mes in volume.meses_gerados():
+        receita = receita_base * rng.uniform(0.8, 1.25)
+        dias = (date(mes.year + (mes.month == 12), mes.month % 12 + 1, 1) - mes).days
+        for nivel_1, _, sinal, fracao in GRUPOS_FC:
+            contas = por_grupo[nivel_1]
+            pesos = [rng.paretovariate(1.5) for _ in contas]
+            soma = sum(pesos)
+            for conta, peso in zip(contas, pesos):
+                total_conta = receita * fracao * peso / soma
+                n = max(1, int(rng.expovariate(1 / volume.lancamentos)) + 1)
+                for _ in range(n):
+                    dia = date(mes.year, mes.month, rng.randint(1, dias))
+                    valor = round(sinal * total_conta / n * rng.uniform(0.5, 1.5), 2)
+                    linha = (id_cliente, dia, valor, "Realizado", nivel_1, conta[4], int(conta[1]))
+                    fc.append(linha)
+                    if rng.random() < VISAO_PROJETADO:
+                        fc.append(linha[:2] + (round(valor * rng.uniform(0.9, 1.1), 2), "Projetado") + linha[4:])
+        for categoria, fracao in CATEGORIAS_DRE:
+            for _ in range(rng.randint(1, 3)):
+                dre.append((id_cliente, date(mes.year, mes.month, rng.randint(1, dias)),
+                            round(receita * fracao * rng.uniform(0.3, 0.7), 2), "Competência", categoria))
+        for nome, unidade in nomes_indicadores:
+            base = {"R$": receita * 0.1, "%": 0.3, "SU": 150.0}[unidade]
+            indicador.append((id_cliente, mes, nome, round(base * rng.uniform(0.6, 1.3), 4),
+                              round(base * 1.1, 4), round(base * 0.8, 4), "maior", unidade))
+
+    return {
+        "cliente": [(id_cliente, f"Cliente Sintético {id_cliente:05d}", rng.random() > 0.05)],
+        "plano_de_contas": plano, "fc": fc, "dre": dre, "indicador": indicador,
+    }
+
+
+def _valor_copy(valor: Any) -> str:
+    if valor is None:
+        return r"\N"
+    if isinstance(valor, bool):
+        return "t" if valor else "f"
+    return str(valor)
+
+
+def _copiar(cursor, tabela: str, linhas: Sequence[tuple]) -> None:
+    """COPY das linhas (psycopg2 ou psycopg 3)."""
+    if not linhas:
+        return
+    buffer = io.StringIO()
+    for linha in linhas:
+        buffer.write("\t".join(_valor_copy(v) for v in linha))
+        buffer.write("\n")
+    comando = f"COPY {tabela} ({', '.join(COLUNAS[tabela])}) FROM STDIN"
+    if hasattr(cursor, "copy_expert"):
+        buffer.seek(0)
+        cursor.copy_expert(comando, buffer)
+    else:
+        with cursor.copy(comando) as copia:
+            copia.write(buffer.getvalue())
+
+
+def nome_schema(fator: int) -> str:
+    return f"bench_{fator}x"
+
+
+def parametros_carregados(engine, schema: str) -> Optional[Dict[str, Any]]:
+    """Parâmetros do volume já carregado no schema (None se não houver)."""
+    with engine.connect() as conn:
+        existe = conn.execute(text("SELECT to_regclass(:t)"), {"t": f"{schema}.bench_meta"}).scalar()
+        if not existe:
+            return None
+        valor = conn.execute(text(f"SELECT parametros FROM {schema}.bench_meta")).scalar()
+    return json.loads(valor) if isinstance(valor, str) else valor
+
+
+def carregar(engine, schema: str, volume: Volume, sql_extra: Optional[str] = None,
+             lote_clientes: int = 50) -> Dict[str, int]:
+    """
+    (Re)cria o schema e carrega o volume com COPY, depois roda `ANALYZE`.
+
+    Args:
+        engine: Engine SQLAlchemy do Postgres de benchmark.
+        schema: Schema de destino (recriado do zero).
+        volume: Volume a gerar.
+        sql_extra: SQL executado depois da carga (ex.: índices candidatos).
+        lote_clientes: Clientes gerados por COPY (limita a memória).
+
+    Returns:
+        Linhas carregadas por tabela.
+    """
+    if not _RE_SCHEMA.match(schema) or schema == "public":
+        raise ValueError(f"Schema inválido para benchmark: {schema}")
+
+    contagem = {tabela: 0 for tabela in COLUNAS}
+    conexao = engine.raw_connection()
+    try:
+        cursor = conexao.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        cursor.execute(DDL)
+        for inicio in range(1, volume.clientes + 1, lote_clientes):
+            lote: Dict[str, List[tuple]] = {tabela: [] for tabela in COLUNAS}
+            for id_cliente in range(inicio, min(inicio + lote_clientes, volume.clientes + 1)):
+                for tabela, linhas in gerar_cliente(id_cliente, volume).items():
+                    lote[tabela].extend(linhas)
+            for tabela, linhas in lote.items():
+                _copiar(cursor, tabela, linhas)
+                contagem[tabela] += len(linhas)
+            logger.info(f"📥 {schema}: {min(inicio + lote_clientes - 1, volume.clientes)}/{volume.clientes} clientes")
+        cursor.execute("INSERT INTO bench_meta (parametros) VALUES (%s)", (json.dumps(volume.parametros()),))
+        if sql_extra:
+            cursor.execute(sql_extra)
+        conexao.commit()
+        cursor.execute("ANALYZE")
+        conexao.commit()
+    finally:
+        conexao.close()
+    return contagem
+
+
+def preparar(engine, fator: int, volume: Volume, sql_extra: Optional[str] = None,
+             recarregar: bool = False) -> str:
+    """Garante o schema da escala carregado com o volume pedido; devolve o nome do schema."""
+    schema = nome_schema(fator)
+    escalado = volume.escalado(fator)
+    if not recarregar and parametros_carregados(engine, schema) == escalado.parametros():
+        logger.info(f"♻️ {schema} já carregado com o mesmo volume")
+        if sql_extra:
+            with engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL search_path TO {schema}"))
+                conn.exec_driver_sql(sql_extra)
+                conn.exec_driver_sql("ANALYZE")
+        return schema
+    logger.info(f"🏗️ Carregando {schema}: {escalado.clientes} clientes, ~{escalado.linhas_fc_estimadas():,} linhas de fc")
+    contagem = carregar(engine, schema, escalado, sql_extra)
+    logger.info(f"✅ {schema}: " + ", ".join(f"{t} {n:,}" for t, n in contagem.items()))
+    return schema
+
+
+def adicionar_argumentos_volume(parser: argparse.ArgumentParser) -> None:
+    padrao = Volume()
+    parser.add_argument("--url", required=True, help="URL SQLAlchemy do Postgres de benchmark (nunca o de produção).")
+    parser.add_argument("--escalas", default="1,10,100", help="Multiplicadores do volume 1× (padrão 1,10,100).")
+    parser.add_argument("--clientes", type=int, default=padrao.clientes, help="Clientes no volume 1×.")
+    parser.add_argument("--meses", type=int, default=padrao.meses, help="Meses de histórico.")
+    parser.add_argument("--contas", type=int, default=padrao.contas, help="Contas nível 3 por cliente.")
+    parser.add_argument("--lancamentos", type=int, default=padrao.lancamentos,
+                        help="Lançamentos médios por conta e mês no fc.")
+    parser.add_argument("--indicadores", type=int, default=padrao.indicadores, help="Indicadores operacionais por cliente.")
+    parser.add_argument("--ate", default=padrao.ate.strftime("%Y-%m"), help="Último mês gerado (AAAA-MM).")
+    parser.add_argument("--sql", help="Arquivo SQL aplicado em cada schema após a carga (ex.: índices candidatos).")
+    parser.add_argument("--recarregar", action="store_true", help="Recria o schema mesmo se já carregado.")
+
+
+def volume_dos_argumentos(args: argparse.Namespace) -> Volume:
+    ano, mes = (int(x) for x in args.ate.split("-"))
+    return Volume(args.clientes, args.meses, args.contas, args.lancamentos, args.indicadores, date(ano, mes, 1))
+
+
+def ler_sql(caminho: Optional[str]) -> Optional[str]:
+    if not caminho:
+        return None
+    with open(caminho, encoding="utf-8") as f:
+        return f.read()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.dados_sinteticos",
+                                     description="Carrega dados sintéticos em schemas bench_<n>x.")
+    adicionar_argumentos_volume(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    engine = create_engine(args.url)
+    volume, sql_extra = volume_dos_argumentos(args), ler_sql(args.sql)
+    for fator in (int(x) for x in args.escalas.split(",") if x.strip()):
+        preparar(engine, fator, volume, sql_extra, args.recarregar)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+# benchmarks/fixtures.py
+"""
+Fixtures dos benchmarks: gravações das respostas de `Indicadores.calcular_*`.
+
+Uma gravação é um JSON com `{"chamadas": {"metodo(args)": resultado}}`. Com
+`IndicadoresGravados`, os `RelatorioN` rodam exatamente como em produção
+(incluindo `calcular_outras_categorias` e a montagem das notas), só que sem
+banco. Os três portes distribuídos em `benchmarks/fixtures/` são sintéticos:
+
+- `pequeno`: poucas categorias e 12 indicadores operacionais;
+- `tipico`: volume de um cliente médio (40 indicadores);
+- `grande`: consolidado grande, com 120 indicadores no Relatório 7.
+
+Para gravar um cliente real (a partir do banco configurado no `.env`):
+
+    python -m benchmarks.fixtures gravar --clientes 12 --mes 9 --ano 2025 --nome cliente_12
+
+Para regenerar as sintéticas (determinísticas, mesma semente):
+
+    python -m benchmarks.fixtures sinteticas
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import zlib
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+DIRETORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MES_PADRAO = date(2025, 9, 1)
+
+# Quantidade de itens por lista em cada porte sintético
+PORTES: Dict[str, Dict[str, int]] = {
+    "pequeno": {"receitas": 3, "custos": 3, "despesas": 5, "investimentos": 1, "entradas": 2, "indicadores": 12},
+    "tipico": {"receitas": 8, "custos": 7, "despesas": 14, "investimentos": 3, "entradas": 5, "indicadores": 40},
+    "grande": {"receitas": 35, "custos": 28, "despesas": 60, "investimentos": 6, "entradas": 14, "indicadores": 120},
+}
+
+UNIDADES = ["R$", "%", "SU"]
+
+
+def chave_chamada(metodo: str, args: tuple) -> str:
+    """Chave estável de uma chamada (datas em ISO, None literal)."""
+    partes = [a.isoformat() if isinstance(a, date) else repr(a) for a in args]
+    return f"{metodo}({', '.join(partes)})"
+
+
+class GravadorIndicadores:
+    """Envolve um `Indicadores` (real ou sintético) e grava cada resposta."""
+
+    def __init__(self, indicadores: Any):
+        self._indicadores = indicadores
+        self.chamadas: Dict[str, Any] = {}
+
+    def __getattr__(self, nome: str) -> Callable:
+        metodo = getattr(self._indicadores, nome)
+        if not nome.startswith("calcular_"):
+            return metodo
+
+        def gravar(*args):
+            resultado = metodo(*args)
+            self.chamadas[chave_chamada(nome, args)] = resultado
+            return resultado
+        return gravar
+
+
+class IndicadoresGravados:
+    """Reproduz as respostas gravadas (mesma interface usada pelos `RelatorioN`)."""
+
+    def __init__(self, chamadas: Dict[str, Any]):
+        self.chamadas = chamadas
+
+    def __getattr__(self, nome: str) -> Callable:
+        if not nome.startswith("calcular_"):
+            raise AttributeError(nome)
+
+        def reproduzir(*args):
+            chave = chave_chamada(nome, args)
+            if chave not in self.chamadas:
+                raise KeyError(f"Chamada não gravada na fixture: {chave}")
+            return json.loads(json.dumps(self.chamadas[chave]))  # cópia: os relatórios podem alterar a lista
+        return reproduzir
+
+
+class IndicadoresSinteticos:
+    """Respostas plausíveis de `Indicadores.calcular_*`, determinísticas por chamada."""
+
+    def __init__(self, porte: str, semente: int = 42):
+        self.porte = porte
+        self.n = PORTES[porte]
+        self.semente = semente
+
+    def _rng(self, metodo: str, mes: date) -> random.Random:
+        return random.Random(zlib.crc32(f"{self.semente}:{self.porte}:{metodo}:{mes.isoformat()}".encode()))
+
+    def _receita(self, mes: date) -> float:
+        escala = {"pequeno": 80_000, "tipico": 450_000, "grande": 4_000_000}[self.porte]
+        return round(escala * self._rng("receita", mes).uniform(0.8, 1.2), 2)
+
+    def _partes(self, rng: random.Random, total: float, n: int) -> List[float]:
+        pesos = sorted((rng.paretovariate(1.3) for _ in range(n)), reverse=True)
+        soma = sum(pesos)
+        return [round(total * p / soma, 2) for p in pesos]
+
+    def _av_ah(self, rng: random.Random, valor: float, receita: float) -> Dict[str, float]:
+        return {"av": valor / receita * 100 if receita else 0, "ah": rng.uniform(-40, 60)}
+
+    def calcular_receitas_fc(self, mes: date, categoria_nivel_3: str) -> List[Dict[str, Any]]:
+        rng, receita = self._rng("receitas", mes), self._receita(mes)
+        return [{"categoria_nivel_3": f"3.{i + 1} Receita {i + 1}", "total_categoria": v, **self._av_ah(rng, v, receita)}
+                for i, v in enumerate(self._partes(rng, receita, self.n["receitas"]))]
+
+    def calcular_custos_variaveis_fc(self, mes: date, categoria_nivel_3: str) -> List[Dict[str, Any]]:
+        rng, receita = self._rng("custos", mes), self._receita(mes)
+        return [{"nivel_2": f"4.{i + 1} Custo {i + 1}", "total_categoria": -v, **self._av_ah(rng, -v, receita)}
+                for i, v in enumerate(self._partes(rng, receita * 0.35, self.n["custos"]))]
+
+    def _top(self, atual: List[Dict[str, Any]], anterior: List[Dict[str, Any]], chave_valor: str, chave_nome: str,
+             receita: float, top_n: int, usar_valor_abs: bool) -> Dict[str, Any]:
+        """Formato de `Indicadores.calcular_*_top_fc` a partir das listas completas."""
+        from src.core.utils import calcular_outras_categorias
+
+        return {
+            "subcategorias": calcular_outras_categorias(atual, anterior, 0, 0, receita, chave_valor, chave_nome,
+                                                        top_n, usar_valor_abs),
+            "total": sum(i[chave_valor] for i in atual),
+            "total_absoluto": sum(abs(i[chave_valor]) for i in atual),
+            "total_anterior": sum(i[chave_valor] for i in anterior),
+            "total_absoluto_anterior": sum(abs(i[chave_valor]) for i in anterior),
+        }
+
+    def _mes_anterior(self, mes: date, mes_anterior: Optional[date]) -> date:
+        return mes_anterior or date(mes.year - (mes.month == 1), (mes.month - 2) % 12 + 1, 1)
+
+    def calcular_receitas_top_fc(self, mes: date, mes_anterior: Optional[date] = None, top_n: int = 3) -> Dict[str, Any]:
+        mes_anterior = self._mes_anterior(mes, mes_anterior)
+        return self._top(self.calcular_receitas_fc(mes, "3.%"), self.calcular_receitas_fc(mes_anterior, "3.%"),
+                         "total_categoria", "categoria_nivel_3", self._receita(mes), top_n, False)
+
+    def calcular_custos_variaveis_top_fc(self, mes: date, mes_anterior: Optional[date] = None, top_n: int = 3) -> Dict[str, Any]:
+        mes_anterior = self._mes_anterior(mes, mes_anterior)
+        return self._top(self.calcular_custos_variaveis_fc(mes, "4.%"), self.calcular_custos_variaveis_fc(mes_anterior, "4.%"),
+                         "total_categoria", "nivel_2", self._receita(mes), top_n, True)
+
+    def _totais(self, mes: date, categorias: List[str]) -> List[Dict[str, Any]]:
+        rng, receita = self._rng("totais", mes), self._receita(mes)
+        fracoes = {"Receita": 1.0, "Custos Variáveis": 0.35, "Despesas Fixas": 0.4, "Investimentos": 0.05}
+        linhas = []
+        for categoria in categorias:
+            valor = round(receita * fracoes[categoria], 2)
+            linhas.append({"categoria": categoria, "valor": valor, **self._av_ah(rng, valor, receita)})
+        return linhas
+
+    def calcular_lucro_bruto_fc(self, mes: date) -> List[Dict[str, Any]]:
+        return self._totais(mes, ["Receita", "Custos Variáveis"])
+
+    def calcular_despesas_fixas_fc(self, mes: date) -> List[Dict[str, Any]]:
+        rng, receita = self._rng("despesas", mes), self._receita(mes)
+        return [{"categoria": f"5.{i + 1} Despesa {i + 1}", "valor": -v, **self._av_ah(rng, -v, receita)}
+                for i, v in enumerate(self._partes(rng, receita * 0.4, self.n["despesas"]))]
+
+    def calcular_despesas_fixas_top_fc(self, mes: date, mes_anterior: Optional[date] = None, top_n: int = 3) -> Dict[str, Any]:
+        mes_anterior = self._mes_anterior(mes, mes_anterior)
+        return self._top(self.calcular_despesas_fixas_fc(mes), self.calcular_despesas_fixas_fc(mes_anterior),
+                         "valor", "categoria", self._receita(mes), top_n, True)
+
+    def calcular_lucro_operacional_fc(self, mes_atual: date, mes_anterior: Optional[date] = None) -> List[Dict[str, Any]]:
+        return self._totais(mes_atual, ["Receita", "Custos Variáveis", "Despesas Fixas"])
+
+    def calcular_investimentos_fc(self, mes_atual: date, mes_anterior: Optional[date] = None) -> List[Dict[str, Any]]:
+        rng, receita = self._rng("investimentos", mes_atual), self._receita(mes_atual)
+        return [{"categoria": f"6.{i + 1} Investimento {i + 1}", "valor": -v, **self._av_ah(rng, -v, receita)}
+                for i, v in enumerate(self._partes(rng, receita * 0.05, self.n["investimentos"]))]
+
+    def calcular_lucro_liquido_fc(self, mes: date) -> List[Dict[str, Any]]:
+        return self._totais(mes, ["Receita", "Custos Variáveis", "Despesas Fixas", "Investimentos"])
+
+    def calcular_entradas_nao_operacionais_fc(self, mes: date) -> List[Dict[str, Any]]:
+        rng, receita = self._rng("entradas", mes), self._receita(mes)
+        return [{"categoria_nivel_3": f"7.{i + 1} Entrada {i + 1}", "total_valor": v, **self._av_ah(rng, v, receita)}
+                for i, v in enumerate(self._partes(rng, receita * 0.08, self.n["entradas"]))]
+
+    def calcular_saidas_nao_operacionais_fc(self, mes: date) -> List[Dict[str, Any]]:
+        return [{"categoria": "Saídas Não Operacionais", "valor": round(self._receita(mes) * 0.06, 2)}]
+
+    def calcular_resultados_nao_operacionais_fc(self, mes: date) -> List[Dict[str, Any]]:
+        rng, receita = self._rng("resultados", mes), self._receita(mes)
+        return [
+            {"nivel_1": "7. Entradas Não Operacionais", "total_valor": round(receita * 0.08, 2), **self._av_ah(rng, receita * 0.08, receita)},
+            {"nivel_1": "8. Saídas Não Operacionais", "total_valor": round(-receita * 0.06, 2), **self._av_ah(rng, -receita * 0.06, receita)},
+        ]
+
+    def calcular_geracao_de_caixa_fc(self, mes: date) -> List[Dict[str, Any]]:
+        rng, receita = self._rng("geracao", mes), self._receita(mes)
+        valores = {"Lucro Líquido": receita * 0.2, "Entradas Não Operacionais": receita * 0.08,
+                   "Saídas Não Operacionais": receita * 0.06}
+        return [{"categoria": c, "valor": round(v, 2), **self._av_ah(rng, v, receita)} for c, v in valores.items()]
+
+    def calcular_geracao_de_caixa_temporal_fc(self, mes_atual: date) -> List[Dict[str, Any]]:
+        rng = self._rng("temporal", mes_atual)
+        meses = [date(mes_atual.year - (mes_atual.month - i < 1), (mes_atual.month - i - 1) % 12 + 1, 1) for i in range(3)]
+        return [{"mes": m.strftime("%Y-%m"), "valor": round(self._receita(m) * rng.uniform(-0.05, 0.25), 2),
+                 "ah": rng.uniform(-50, 80)} for m in meses]
+
+    def calcular_indicadores_dre(self, mes: date) -> List[Dict[str, Any]]:
+        receita = self._receita(mes)
+        fracoes = [("Faturamento", 1.0), ("Deduções da Receita Bruta", -0.09), ("Custos Variáveis", -0.33),
+                   ("Despesas Fixas", -0.38), ("EBITDA", 0.2), ("Custos Variáveis + Deduções da Receita", -0.42),
+                   ("Custos com Produtos e Serviços", -0.25), ("Lucro Operacional", 0.17), ("Lucro Líquido", 0.12)]
+        return [{"indicador": nome, "valor": round(receita * f, 2), "av_dre": round(f * 100, 1)} for nome, f in fracoes]
+
+    def calcular_indicadores_operacionais(self, mes: date) -> List[Dict[str, Any]]:
+        rng = self._rng("operacionais", mes)
+        linhas = []
+        for i in range(self.n["indicadores"]):
+            unidade = UNIDADES[i % len(UNIDADES)]
+            base = {"R$": 50_000.0, "%": 0.3, "SU": 120.0}[unidade]
+            bom, ruim = base * 1.1, base * 0.8
+            linhas.append({"indicador": f"Indicador operacional {i + 1:03d}", "total_valor": round(base * rng.uniform(0.6, 1.3), 4),
+                           "bom": bom, "ruim": ruim, "sentido": "maior", "unidade": unidade})
+        return linhas
+
+
+def gravar_relatorios(indicadores: Any, mes_atual: date = MES_PADRAO,
+                      nota_consultor: str = "<p>Nota do consultor.</p>") -> Dict[str, Any]:
+    """Roda os `RelatorioN` 1 a 7 sobre `indicadores` e devolve a gravação."""
+    from dateutil.relativedelta import relativedelta
+    from src.core.relatorios import (
+        Relatorio1, Relatorio2, Relatorio3, Relatorio4, Relatorio5, Relatorio6, Relatorio7,
+    )
+
+    gravador = GravadorIndicadores(indicadores)
+    mes_anterior = mes_atual - relativedelta(months=1)
+    for classe in (Relatorio1, Relatorio2, Relatorio3, Relatorio4):
+        classe(gravador, "Cliente").gerar_relatorio(mes_atual, mes_anterior)
+    for classe in (Relatorio5, Relatorio6, Relatorio7):
+        classe(gravador, "Cliente").gerar_relatorio(mes_atual)
+    # Listas completas de despesas fixas: entrada do estágio `outras_categorias` do pipeline
+    for mes in (mes_atual, mes_anterior):
+        gravador.calcular_despesas_fixas_fc(mes)
+    return {"mes": mes_atual.isoformat(), "nota_consultor": nota_consultor, "chamadas": gravador.chamadas}
+
+
+def salvar(nome: str, gravacao: Dict[str, Any], diretorio: str = DIRETORIO_FIXTURES) -> str:
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, f"{nome}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(gravacao, f, ensure_ascii=False, indent=1, sort_keys=True, default=float)
+    return caminho
+
+
+def carregar(nome: str, diretorio: str = DIRETORIO_FIXTURES) -> Dict[str, Any]:
+    with open(os.path.join(diretorio, f"{nome}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fixtures_disponiveis(diretorio: str = DIRETORIO_FIXTURES) -> List[str]:
+    return sorted(os.path.splitext(n)[0] for n in os.listdir(diretorio) if n.endswith(".json"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.fixtures")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("sinteticas", help="Regenera as fixtures sintéticas (pequeno, tipico, grande).")
+    gravar = comandos.add_parser("gravar", help="Grava as respostas reais de um cliente/mês do banco.")
+    gravar.add_argument("--clientes", required=True, help="IDs separados por vírgula.")
+    gravar.add_argument("--mes", type=int, required=True)
+    gravar.add_argument("--ano", type=int, required=True)
+    gravar.add_argument("--nome", required=True)
+    args = parser.parse_args(argv)
+
+    if args.comando == "sinteticas":
+        for porte in PORTES:
+            print(salvar(porte, gravar_relatorios(IndicadoresSinteticos(porte))))
+        return 0
+
+    from src.core.indicadores import Indicadores
+    from src.database.db_utils import DatabaseConnection
+
+    ids = [int(x) for x in args.clientes.split(",") if x.strip()]
+    gravacao = gravar_relatorios(Indicadores(ids, DatabaseConnection()), date(args.ano, args.mes, 1))
+    print(salvar(args.nome, gravacao))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
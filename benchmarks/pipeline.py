@@ -0,0 +1,339 @@
+# benchmarks/pipeline.py
+"""
+Benchmark offline do pipeline, etapa por etapa, sobre as fixtures gravadas.
+
+Para cada porte (`benchmarks/fixtures/*.json`) mede separadamente:
+
+- `dados/<porte>/Relatório N`: `RelatorioN.gerar_relatorio` sobre as respostas
+  gravadas (sem banco: só a montagem dos dados e das notas);
+- `outras_categorias/<porte>/x1000`: 1000 chamadas de `calcular_outras_categorias`
+  com as despesas fixas do porte; `outras_categorias/<porte>/drilldown_x10`: 10
+  chamadas com 100 contas por categoria (drill-down até a conta);
+- `render/<porte>/<seção>`: `render` de cada renderizador (HTML, com os gráficos);
+- `graficos/<porte>/histograma_r5` e `graficos/<porte>/waterfall_r6`;
+- `pdf/<porte>/<seção>`: HTML→PDF com o wkhtmltopdf (pulado se não estiver no PATH);
+- `merge/<porte>/<origem>` e `finalizar/<porte>/<origem>`: `PdfUtils.combine_pdfs`
+  e `PDFinalizer.finalize_pdf`. A origem é `wkhtmltopdf` ou, sem ele, `reportlab`
+  (PDFs de texto gerados só para exercitar o merge e a finalização).
+
+Cada etapa roda uma vez para aquecer e depois `--repeticoes` vezes; guarda
+mediana, mínimo e máximo. O resultado vai para `outputs/benchmarks/<data>.json`
+e é comparado com `benchmarks/baseline.json` (ver `benchmarks/comparacao.py`);
+com regressão, o processo sai com código 1.
+
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --portes grande --etapas render,graficos
+    python -m benchmarks.pipeline --atualizar-baseline
+
+A baseline vale para a máquina onde foi gravada: ao trocar de máquina (ou de
+versão do wkhtmltopdf), grave uma nova antes de comparar.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import comparacao, fixtures
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(RAIZ, "benchmarks", "baseline.json")
+SAIDA_DIR = os.path.join("outputs", "benchmarks")
+ETAPAS = ["dados", "outras_categorias", "render", "graficos", "pdf", "merge", "finalizar"]
+
+# Nenhuma etapa acessa o banco, mas config.settings exige as variáveis na importação
+for _variavel in ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT"):
+    os.environ.setdefault(_variavel, "benchmark")
+
+logger = logging.getLogger(__name__)
+
+
+def cronometrar(funcao: Callable[[], Any], repeticoes: int) -> Dict[str, Any]:
+    """Roda `funcao` uma vez para aquecer e mede as `repeticoes` seguintes."""
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {"mediana_s": round(statistics.median(tempos), 6), "min_s": round(min(tempos), 6),
+            "max_s": round(max(tempos), 6), "n": repeticoes}
+
+
+class BenchmarkPipeline:
+    """Executa as etapas selecionadas para um porte e acumula as medições."""
+
+    def __init__(self, repeticoes: int, etapas: List[str]):
+        self.repeticoes = repeticoes
+        self.etapas = etapas
+        self.medicoes: Dict[str, Dict[str, Any]] = {}
+        self.wkhtmltopdf = shutil.which("wkhtmltopdf") is not None
+
+    def _medir(self, etapa: str, funcao: Callable[[], Any]) -> None:
+        self.medicoes[etapa] = cronometrar(funcao, self.repeticoes)
+        logger.info(f"⏱️ {etapa}: {self.medicoes[etapa]['mediana_s'] * 1000:.1f} ms")
+
+    def executar(self, porte: str) -> None:
+        gravacao = fixtures.carregar(porte)
+        workspace = tempfile.mkdtemp(prefix="ize_bench_")
+        try:
+            secoes = self._dados(porte, gravacao)
+            if "outras_categorias" in self.etapas:
+                self._outras_categorias(porte, gravacao)
+            htmls = self._render(porte, secoes)
+            if "graficos" in self.etapas:
+                self._graficos(porte, secoes)
+            pdfs = self._pdfs(porte, htmls, workspace)
+            self._merge_e_finalizar(porte, pdfs, workspace)
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    def _dados(self, porte: str, gravacao: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        from dateutil.relativedelta import relativedelta
+        from src.core.pipeline import RELATORIO_LABELS, montar_indice
+        from src.core.relatorios import (
+            Relatorio1, Relatorio2, Relatorio3, Relatorio4, Relatorio5, Relatorio6, Relatorio7, Relatorio8,
+        )
+
+        mes_atual = date.fromisoformat(gravacao["mes"])
+        mes_anterior = mes_atual - relativedelta(months=1)
+        indicadores = fixtures.IndicadoresGravados(gravacao["chamadas"])
+        classes = [Relatorio1, Relatorio2, Relatorio3, Relatorio4, Relatorio5, Relatorio6, Relatorio7, Relatorio8]
+
+        secoes = [("Índice", montar_indice(list(range(1, 9)), f"Cliente {porte}", "Setembro", mes_atual.year))]
+        for numero, classe in enumerate(classes, start=1):
+            def gerar(classe=classe, numero=numero):
+                relatorio = classe(indicadores, f"Cliente {porte}")
+                if numero == 8:
+                    relatorio.salvar_analise(mes_atual, gravacao.get("nota_consultor", ""))
+                if numero <= 4:
+                    return relatorio.gerar_relatorio(mes_atual, mes_anterior)
+                return relatorio.gerar_relatorio(mes_atual)
+
+            nome = RELATORIO_LABELS[numero]
+            if "dados" in self.etapas:
+                self._medir(f"dados/{porte}/{nome}", gerar)
+            secoes.append((nome, gerar()))
+        return secoes
+
+    def _outras_categorias(self, porte: str, gravacao: Dict[str, Any]) -> None:
+        from src.core.utils import calcular_outras_categorias
+
+        chamadas = gravacao["chamadas"]
+        despesas = sorted((k for k in chamadas if k.startswith("calcular_despesas_fixas_fc(")), reverse=True)
+        atual = chamadas[despesas[0]]
+        anterior = chamadas[despesas[1]] if len(despesas) > 1 else atual
+        total_atual = sum(d["valor"] for d in atual)
+        total_anterior = sum(d["valor"] for d in anterior)
+
+        def lote():
+            for _ in range(1000):
+                calcular_outras_categorias(
+                    atual, anterior, total_atual, total_anterior, abs(total_atual) * 2.5,
+                    chave_valor="valor", chave_nome="categoria", top_n=3, usar_valor_abs=True,
+                )
+        self._medir(f"outras_categorias/{porte}/x1000", lote)
+
+        def contas(despesas):
+            return [{**d, "categoria": f"{d['categoria']} / conta {j}", "valor": d["valor"] * (1 + j % 7) / 400}
+                    for d in despesas for j in range(100)]
+        contas_atual, contas_anterior = contas(atual), contas(anterior)
+
+        def drilldown():
+            for _ in range(10):
+                calcular_outras_categorias(
+                    contas_atual, contas_anterior, total_atual, total_anterior, abs(total_atual) * 2.5,
+                    chave_valor="valor", chave_nome="categoria", top_n=10, usar_valor_abs=True,
+                )
+        self._medir(f"outras_categorias/{porte}/drilldown_x10", drilldown)
+
+    @staticmethod
+    def _renderizador(nome: str):
+        """Instância nova (não congelada) do renderizador da seção, como o engine escolhe."""
+        from src.rendering.renderers import get_renderer
+        numero = 0 if nome == "Índice" else int(nome.split()[1])
+        return type(get_renderer(numero))()
+
+    def _render(self, porte: str, secoes: List[Tuple[str, Any]]) -> List[Tuple[str, str]]:
+        htmls = []
+        for nome, dados in secoes:
+            renderer = self._renderizador(nome)
+            render = lambda renderer=renderer, dados=dados: renderer.render(dados, f"Cliente {porte}", "Setembro", 2025)
+            if "render" in self.etapas:
+                self._medir(f"render/{porte}/{nome}", render)
+            if {"pdf", "merge", "finalizar"} & set(self.etapas):
+                htmls.append((nome, render()))
+        return htmls
+
+    def _graficos(self, porte: str, secoes: List[Tuple[str, Any]]) -> None:
+        """Captura os argumentos dos gráficos num render e mede só a geração da imagem."""
+        graficos = {"Relatório 5": ("generate_histogram_base64", "histograma_r5"),
+                    "Relatório 6": ("make_waterfall_base64", "waterfall_r6")}
+        for nome, dados in secoes:
+            if nome not in graficos:
+                continue
+            metodo, rotulo = graficos[nome]
+            renderer = self._renderizador(nome)
+            original = getattr(renderer, metodo)
+            capturados = []
+
+            def capturar(*args, original=original, capturados=capturados, **kwargs):
+                capturados.append((args, kwargs))
+                return original(*args, **kwargs)
+
+            setattr(renderer, metodo, capturar)
+            renderer.render(dados, f"Cliente {porte}", "Setembro", 2025)
+            if not capturados:
+                logger.warning(f"⚠️ {nome} não gerou gráfico com a fixture {porte}")
+                continue
+            args, kwargs = capturados[0]
+            self._medir(f"graficos/{porte}/{rotulo}", lambda original=original, a=args, k=kwargs: original(*a, **k))
+
+    def _pdfs(self, porte: str, htmls: List[Tuple[str, str]], workspace: str) -> List[str]:
+        if not htmls:
+            return []
+        if not self.wkhtmltopdf:
+            return [_pdf_substituto(html, nome, workspace) for nome, html in htmls]
+
+        from src.rendering.engine import RenderingEngine
+        engine = RenderingEngine()
+        footer_path = engine._escrever_footer(workspace)
+        pdfs = []
+        for nome, html in htmls:
+            converter = lambda html=html, nome=nome: engine._render_html_to_pdf(html, nome, workspace, footer_path)
+            if "pdf" in self.etapas:
+                self._medir(f"pdf/{porte}/{nome}", converter)
+            caminho = converter()
+            if caminho:
+                pdfs.append(caminho)
+        return pdfs
+
+    def _merge_e_finalizar(self, porte: str, pdfs: List[str], workspace: str) -> None:
+        if not pdfs:
+            return
+        from src.core.pdf_finalizer import PDFinalizer
+        from src.rendering.engine import PdfUtils
+
+        origem = "wkhtmltopdf" if self.wkhtmltopdf else "reportlab"
+        combinado = os.path.join(workspace, "combinado.pdf")
+        combinar = lambda: PdfUtils.combine_pdfs(pdfs, combinado)
+        if "merge" in self.etapas:
+            self._medir(f"merge/{porte}/{origem}", combinar)
+        combinar()
+
+        if "finalizar" in self.etapas:
+            finalizador = PDFinalizer()
+            copia = os.path.join(workspace, "final.pdf")
+
+            def finalizar():
+                shutil.copyfile(combinado, copia)  # finalize_pdf altera o arquivo
+                finalizador.finalize_pdf(copia)
+            self._medir(f"finalizar/{porte}/{origem}", finalizar)
+
+
+def _pdf_substituto(html: str, nome: str, workspace: str) -> str:
+    """PDF de texto com o conteúdo da seção (uma página a cada ~60 linhas)."""
+    import re
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    texto = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", re.sub(r"<(style|script)\b.*?</\1>", " ", html, flags=re.S)))
+    linhas = [texto[i:i + 100] for i in range(0, max(len(texto), 1), 100)] or [nome]
+    caminho = os.path.join(workspace, re.sub(r"[^\w\-]", "_", nome, flags=re.UNICODE) + ".pdf")
+    pdf = canvas.Canvas(caminho, pagesize=A4)
+    for inicio in range(0, len(linhas), 60):
+        y = 800
+        for linha in linhas[inicio:inicio + 60]:
+            pdf.drawString(30, y, linha)
+            y -= 13
+        pdf.showPage()
+    pdf.save()
+    return caminho
+
+
+def executar(portes: List[str], etapas: List[str], repeticoes: int) -> Dict[str, Any]:
+    """Roda o benchmark e devolve o resultado no formato gravado em JSON."""
+    benchmark = BenchmarkPipeline(repeticoes, etapas)
+    for porte in portes:
+        logger.info(f"🏁 Porte {porte}")
+        benchmark.executar(porte)
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "maquina": {"python": platform.python_version(), "plataforma": platform.platform(),
+                    "processador": platform.processor() or platform.machine(), "cpus": os.cpu_count()},
+        "wkhtmltopdf": benchmark.wkhtmltopdf,
+        "portes": portes,
+        "repeticoes": repeticoes,
+        "medicoes": benchmark.medicoes,
+    }
+
+
+def gravar_json(caminho: str, conteudo: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.pipeline",
+                                     description="Benchmark offline do pipeline de relatórios.")
+    parser.add_argument("--portes", default=",".join(fixtures.fixtures_disponiveis()),
+                        help="Fixtures a medir, separadas por vírgula (padrão: todas).")
+    parser.add_argument("--etapas", default=",".join(ETAPAS), help=f"Etapas a medir ({', '.join(ETAPAS)}).")
+    parser.add_argument("--repeticoes", type=int, default=int(os.getenv("BENCH_REPETICOES", "3")))
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--saida", default=SAIDA_DIR, help="Pasta dos resultados JSON.")
+    parser.add_argument("--tolerancia", type=float, default=None, help="Tolerância relativa (ex.: 0.25).")
+    parser.add_argument("--atualizar-baseline", action="store_true",
+                        help="Grava o resultado como nova baseline (mantém as tolerâncias por etapa).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    logger.setLevel(logging.INFO)
+    os.chdir(RAIZ)  # templates/ e assets/ são resolvidos a partir da raiz
+
+    etapas = [e for e in args.etapas.split(",") if e]
+    desconhecidas = set(etapas) - set(ETAPAS)
+    if desconhecidas:
+        parser.error(f"Etapas desconhecidas: {', '.join(sorted(desconhecidas))}")
+
+    resultado = executar([p for p in args.portes.split(",") if p], etapas, args.repeticoes)
+    caminho = os.path.join(args.saida, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    gravar_json(caminho, resultado)
+    print(f"📄 Resultado em {caminho}")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.atualizar_baseline:
+        resultado["tolerancias"] = (baseline or {}).get("tolerancias", {"pdf/": 0.5, "graficos/": 0.4})
+        gravar_json(args.baseline, resultado)
+        print(f"📌 Baseline atualizada em {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"⚠️ Sem baseline em {args.baseline}; rode com --atualizar-baseline para criar.")
+        return 0
+
+    linhas = comparacao.comparar(resultado, baseline, tolerancia=args.tolerancia)
+    # Só compara o que foi medido nesta rodada (filtros de porte/etapa)
+    linhas = [l for l in linhas if l["status"] != comparacao.AUSENTE]
+    print(comparacao.formatar(linhas))
+    piores = comparacao.regressoes(linhas)
+    if piores:
+        print(f"🔴 {len(piores)} etapa(s) acima da tolerância da baseline.")
+        return 1
+    print("✅ Nenhuma regressão em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
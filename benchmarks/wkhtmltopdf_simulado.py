@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# benchmarks/wkhtmltopdf_simulado.py
+"""
+Substituto do wkhtmltopdf para validar o teste de carga onde ele não está instalado.
+
+Aceita a mesma linha de comando do engine (`... <html> <pdf>`), espera
+`BENCH_CONVERSAO_S` segundos (padrão 1.5, o tempo típico de uma seção) e grava
+um PDF de uma página com o título do HTML. Ative com
+`WKHTMLTOPDF_CMD=benchmarks/wkhtmltopdf_simulado.py`. Os números de CPU e
+memória da conversão NÃO são representativos: dimensione com o wkhtmltopdf real.
+"""
+import os
+import re
+import sys
+import time
+
+
+def main(argv) -> int:
+    html_path, pdf_path = argv[-2], argv[-1]
+    time.sleep(float(os.getenv("BENCH_CONVERSAO_S", "1.5")))
+    with open(html_path, encoding="utf-8", errors="replace") as f:
+        titulo = re.search(r"<title>(.*?)</title>", f.read(), flags=re.S | re.I)
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(pdf_path, pagesize=A4)
+    pdf.drawString(40, 800, (titulo.group(1).strip() if titulo else os.path.basename(html_path))[:90])
+    pdf.drawString(40, 780, "Conversão simulada (benchmarks/wkhtmltopdf_simulado.py)")
+    pdf.showPage()
+    pdf.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
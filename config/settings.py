@@ -1,13 +1,6 @@
 import os
 from dotenv import load_dotenv
 
-# Streamlit pode não estar disponível em ambiente de testes ou scripts standalone
-try:
-    import streamlit as st
-    USE_STREAMLIT = True
-except ImportError:
-    USE_STREAMLIT = False
-
 # Carrega o .env
 load_dotenv()
 
@@ -15,7 +8,13 @@ def get_env_var(key: str) -> str | None:
     """Busca a variável de ambiente com fallback para st.secrets se necessário."""
     value = os.getenv(key)
     
-    if value is None and USE_STREAMLIT:
+    if value is None:
+        # Streamlit só é importado aqui: a API e os scripts usam o .env e não pagam essa importação.
+        # Pode não estar disponível em ambiente de testes ou scripts standalone.
+        try:
+            import streamlit as st
+        except ImportError:
+            return None
         # Tenta buscar nos secrets
         for section in st.secrets:
             if key in st.secrets[section]:
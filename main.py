@@ -23,7 +23,8 @@ def run_diagnostic():
             print(f"❌ ERRO: Arquivos não encontrados: {missing_files}")
             return False
             
-        # Verificar se as funções novas existem
+        # Verificar se as funções novas existem (importação adiada para cá: o
+        # PyPDF2 só é carregado quando o diagnóstico roda)
         try:
             from src.pdf_postprocessor import PDFPostProcessor
             if not hasattr(PDFPostProcessor, '_analyze_page_content'):
@@ -1,12 +1,13 @@
-from fastapi import FastAPI, HTTPException, Query, Depends, Security
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Depends, Security, Request
+from fastapi.responses import (
+    Response, StreamingResponse, JSONResponse, FileResponse, PlainTextResponse, HTMLResponse,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 from datetime import date, timedelta
 import os
-import io
 import re
 from dotenv import load_dotenv
 
@@ -14,22 +15,15 @@ load_dotenv()  # Carrega as variáveis do arquivo .env
 
 import logging
 from src.database.db_utils import DatabaseConnection, buscar_clientes, obter_meses, obter_anos
-from src.core.indicadores import Indicadores
-from src.core.relatorios import (
-    Relatorio1, Relatorio2, Relatorio3, Relatorio4, Relatorio5, Relatorio6, Relatorio7, Relatorio8
+from src.database.instrumentacao import ESTATISTICAS as ESTATISTICAS_CONSULTAS
+from src.core.pipeline import (
+    RELATORIO_CLASSES, RELATORIO_LABELS, MARCA_PADRAO, slugify_filename, gerar_relatorio_pdf_unico,
+    gerar_preview_html, chave_geracao, obter_artefato, etag_pdf,
 )
-from src.rendering.engine import RenderingEngine
-
-# --- Mapas: ID numérico -> Classe e Nome de exibição ---
-RELATORIO_CLASSES = {
-    1: Relatorio1, 2: Relatorio2, 3: Relatorio3, 4: Relatorio4,
-    5: Relatorio5, 6: Relatorio6, 7: Relatorio7, 8: Relatorio8
-}
-
-RELATORIO_LABELS = {
-    1: "Relatório 1", 2: "Relatório 2", 3: "Relatório 3", 4: "Relatório 4",
-    5: "Relatório 5", 6: "Relatório 6", 7: "Relatório 7", 8: "Relatório 8"
-}
+from src.core.jobs import GerenciadorJobs, FilaCheiaError, STATUS_CONCLUIDO, STATUS_ERRO
+from src.core.lote import gerar_lote_zip
+from src.core.concorrencia import ControleAdmissao, AdmissaoNegadaError, ConversaoOcupadaError
+from src.core import metricas, perfil, rastreamento
 
 # ---------------------------
 # Configuração FastAPI
@@ -68,10 +62,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def rastrear_requisicao(request: Request, call_next):
+    """Span raiz de cada requisição (continua o `traceparent` do chamador, se houver)."""
+    with rastreamento.continuar_trace(request.headers.get("traceparent")), \
+            rastreamento.span(f"HTTP {request.method}", **{
+                "http.method": request.method, "url.path": request.url.path}) as span:
+        resposta = await call_next(request)
+        rota = request.scope.get("route")
+        if getattr(rota, "path", None):
+            span.nome = f"HTTP {request.method} {rota.path}"
+        span.definir(**{"http.route": getattr(rota, "path", None), "http.status_code": resposta.status_code})
+        if span.trace_id:
+            resposta.headers["X-Trace-Id"] = span.trace_id
+        return resposta
+
+@app.middleware("http")
+async def perfil_por_cabecalho(request: Request, call_next):
+    """`X-Profile: 1` grava o perfil de CPU/memória da geração em outputs/profiles/."""
+    if request.headers.get("X-Profile") != "1":
+        return await call_next(request)
+    with perfil.perfil_ativo():
+        return await call_next(request)
+
 # ---------------------------
-# Constantes de Negócio
+# Fila de jobs (geração assíncrona)
 # ---------------------------
-MARCA_PADRAO = "Sim"  # marca fixa e interna
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+JOBS_FILA_MAX = int(os.getenv("JOBS_FILA_MAX", "50"))
+JOBS_RETENCAO_S = float(os.getenv("JOBS_RETENCAO_S", "3600"))
+
+gerenciador_jobs = GerenciadorJobs(
+    max_workers=JOBS_WORKERS,
+    tamanho_fila=JOBS_FILA_MAX,
+    retencao_segundos=JOBS_RETENCAO_S,
+)
+
+# Quantos clientes de um mesmo lote são gerados em paralelo
+LOTE_CONCORRENCIA = int(os.getenv("LOTE_CONCORRENCIA", "3"))
+
+# Admissão: gerações síncronas simultâneas aceitas por esta instância.
+# Acima do limite a API responde 429 + Retry-After (backpressure).
+MAX_GERACOES_SIMULTANEAS = int(os.getenv("MAX_GERACOES_SIMULTANEAS", "4"))
+controle_admissao = ControleAdmissao(MAX_GERACOES_SIMULTANEAS)
+
+metricas.API_CARGA.definir_funcao(lambda: {
+    ("geracoes_ativas",): controle_admissao.ativas(),
+    ("jobs_na_fila",): gerenciador_jobs.tamanho_fila(),
+})
+
+def resposta_ocupado(e: RuntimeError) -> HTTPException:
+    """429 quando a admissão recusa; 503 quando a conversão não conseguiu slot a tempo."""
+    if isinstance(e, AdmissaoNegadaError):
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return HTTPException(status_code=503, detail=str(e),
+                         headers={"Retry-After": str(controle_admissao.retry_after())})
 
 # ---------------------------
 # Helpers (mesmos do Streamlit)
@@ -94,12 +139,6 @@ def processar_html_parecer(html_content: str) -> str:
         processed_html = re.sub(pattern, replacement, processed_html, flags=re.DOTALL)
     return processed_html
 
-def slugify_filename(text: str) -> str:
-    # Sanitiza o nome do arquivo: espaços e caracteres especiais -> underscore
-    text = re.sub(r"\s+", "_", text.strip())
-    text = re.sub(r"[^\w\-\.]", "_", text, flags=re.UNICODE)
-    return text
-
 def get_mes_numero(mes: Optional[int]) -> int:
     """Aceita mês por número (1-12)."""
     if mes is not None:
@@ -179,6 +218,30 @@ class RelatorioRequest(BaseModel):
             raise ValueError("Selecione pelo menos um relatório.")
         return v
 
+class LoteRequest(BaseModel):
+    # Clientes individuais (cada um gera seu próprio PDF) ou todos os ativos
+    id_cliente: Optional[List[int]] = Field(default=None, description="IDs de cliente; omita e use todos_ativos=true para todos")
+    todos_ativos: bool = False
+
+    # Período
+    mes: Optional[int] = Field(default=None, ge=1, le=12)
+    ano: Optional[int] = None
+
+    relatorios: List[int] = Field(..., min_length=1, description="IDs dos relatórios (1 a 8)")
+
+    @field_validator("relatorios", mode="before")
+    @classmethod
+    def normalizar_relatorios_para_ids(cls, v):
+        """Mesma normalização do RelatorioRequest ('Relatório 7', '7,8', ...)."""
+        return RelatorioRequest.normalizar_relatorios_para_ids(v)
+
+    @field_validator("id_cliente")
+    @classmethod
+    def validar_clientes(cls, v):
+        if v is not None and not v:
+            raise ValueError("Informe ao menos um id_cliente ou use todos_ativos=true.")
+        return v
+
 # ---------------------------
 # Endpoints utilitários (todos protegidos por API Key)
 # ---------------------------
@@ -207,97 +270,192 @@ def listar_anos(id_cliente: str = Query(..., description="IDs separados por vír
     anos = sorted(list(set(todos)), reverse=True)
     return {"anos": anos}
 
+@app.get("/v1/metrics", dependencies=[Depends(verify_api_key)])
+def metrics():
+    """Métricas desta instância no formato texto do Prometheus."""
+    return PlainTextResponse(metricas.REGISTRO.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/v1/metrics/consultas", dependencies=[Depends(verify_api_key)])
+def metrics_consultas(por_cliente: bool = Query(True, description="Separar por cliente ou só por método")):
+    """Tempo acumulado das consultas por método (e cliente) nesta instância, maior primeiro."""
+    return {"consultas": ESTATISTICAS_CONSULTAS.resumo(por_cliente=por_cliente)}
+
 @app.get("/v1/meta", dependencies=[Depends(verify_api_key)])
 def meta():
     meses = obter_meses()  # [(nome, numero)]
     relatorios = [RELATORIO_LABELS[i] for i in range(1, 9)]
     return {"meses": meses, "relatorios": relatorios}
 
+def responder_pdf(request: Request, pdf_path: str, filename: str) -> Response:
+    """Serve o PDF direto do disco, com ETag (304 se o cliente já tem) e Range.
+
+    O ETag é o sha256 do PDF gravado no armazém (ver `etag_pdf`): muda sempre
+    que o conteúdo muda, inclusive quando o mesmo pedido é gerado de novo.
+    """
+    etag = f'"{etag_pdf(pdf_path)}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(
+        pdf_path, media_type="application/pdf", filename=filename,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
 # ---------------------------
 # Endpoint principal: gera PDF (POST recomendado)
 # ---------------------------
 @app.post("/v1/relatorios/pdf", dependencies=[Depends(verify_api_key)])
-def gerar_pdf(payload: RelatorioRequest):
+def gerar_pdf(payload: RelatorioRequest, request: Request):
     # 1) Período
     mes = get_mes_numero(payload.mes)
     ano = default_ano(payload.ano)
-    mes_atual = date(ano, mes, 1)
-    mes_anterior = (mes_atual - timedelta(days=1)).replace(day=1)
-
-    # 2) Clientes
-    id_cliente = payload.id_cliente  # SEMPRE lista (suporta consolidado)
-    is_consolidado = len(id_cliente) > 1
-
-    # Nome exibido sempre derivado do banco (ou fallback para Cliente_<id>)
-    db_tmp = DatabaseConnection()
-    all_cli = buscar_clientes(db_tmp) or []
-    mapa = {c["id_cliente"]: c["nome"] for c in all_cli}
-    base = mapa.get(id_cliente[0], f"Cliente_{id_cliente[0]}")
-    display_nome = f"{base}_Consolidado" if is_consolidado else base
 
-    # 3) Análise do consultor (se houver)
+    # 2) Análise do consultor (se houver)
     analise_text = processar_html_parecer(payload.analise_text or "")
 
-    # 4) Preparar geração (mesma lógica da UI)
-    db = DatabaseConnection()
-    indicadores = Indicadores(id_cliente, db)  # passa a lista (suporta consolidado)
-
-    # Índice (igual à UI)
-    meses = obter_meses()
-    nome_mes = next((nm for nm, n in meses if n == mes), str(mes))
-    ids_escolhidos = set(payload.relatorios)
-    indice_data = {
-        "fluxo_caixa": "Sim" if ids_escolhidos & {1, 2, 3, 4, 5} else "Não",
-        "dre_gerencial": "Sim" if 6 in ids_escolhidos else "Não",
-        "indicador": "Sim" if 7 in ids_escolhidos else "Não",
-        "nota_consultor": "Sim" if 8 in ids_escolhidos else "Não",
-        "cliente_nome": display_nome,
-        "mes": nome_mes,
-        "ano": ano,
-        "nome": display_nome,
-        "Periodo": f"{nome_mes} {ano}",
-        "marca": MARCA_PADRAO,
-    }
+    # 3) PDF idêntico já no armazém: responde do disco, sem ocupar vaga de geração
+    chave = chave_geracao(payload.id_cliente, mes, ano, payload.relatorios, analise_text)
+    existente = obter_artefato(chave, payload.id_cliente, mes, ano)
+    if existente:
+        return responder_pdf(request, *existente)
 
-    relatorios_dados = [("Índice", indice_data)]
+    # 4) Dados + renderização (mesma lógica da UI), se houver vaga
+    try:
+        with controle_admissao.admitir():
+            pdf_path, filename = gerar_relatorio_pdf_unico(
+                payload.id_cliente, mes, ano, payload.relatorios, analise_text
+            )
+    except (AdmissaoNegadaError, ConversaoOcupadaError) as e:
+        raise resposta_ocupado(e)
 
-    for rel_id in payload.relatorios:
-        rel_label = RELATORIO_LABELS[rel_id]
-        rel_class = RELATORIO_CLASSES[rel_id]
-        relatorio = rel_class(indicadores, display_nome)
+    # 5) Responder como arquivo (direto do disco)
+    return responder_pdf(request, pdf_path, filename)
 
-        if rel_id in {1, 2, 3, 4}:
-            dados = relatorio.gerar_relatorio(mes_atual, mes_anterior)
-        elif rel_id == 8:
-            if analise_text:
-                relatorio.salvar_analise(mes_atual, analise_text)
-            dados = relatorio.gerar_relatorio(mes_atual)
-        else:
-            dados = relatorio.gerar_relatorio(mes_atual)
+# ---------------------------
+# Geração em lote: vários clientes, um ZIP em streaming
+# ---------------------------
+@app.post("/v1/relatorios/lote", dependencies=[Depends(verify_api_key)])
+def gerar_lote(payload: LoteRequest):
+    """Gera um PDF por cliente e devolve um ZIP à medida que cada um fica pronto."""
+    if not payload.todos_ativos and not payload.id_cliente:
+        raise HTTPException(status_code=422, detail="Informe id_cliente ou todos_ativos=true.")
+
+    mes = get_mes_numero(payload.mes)
+    ano = default_ano(payload.ano)
+    ids = None if payload.todos_ativos else list(dict.fromkeys(payload.id_cliente))
 
-        relatorios_dados.append((rel_label, dados))
+    # O lote ocupa uma vaga de admissão até o último byte do ZIP ser enviado
+    try:
+        inicio = controle_admissao.entrar()
+    except AdmissaoNegadaError as e:
+        raise resposta_ocupado(e)
 
-    # 5) Renderizar PDF (mesmo engine)
-    engine = RenderingEngine()
-    os.makedirs("outputs", exist_ok=True)
-    filename = f"Relatorio_{slugify_filename(display_nome)}_{slugify_filename(nome_mes)}_{ano}.pdf"
-    output_path = os.path.join("outputs", filename)
-    pdf_path = engine.render_to_pdf(relatorios_dados, display_nome, nome_mes, ano, output_path)
+    def stream():
+        try:
+            yield from gerar_lote_zip(ids, mes, ano, payload.relatorios, concorrencia=LOTE_CONCORRENCIA)
+        finally:
+            controle_admissao.sair(inicio)
 
-    # 6) Responder como arquivo
-    pdf_bytes = open(pdf_path, "rb").read()
+    filename = f"Relatorios_{mes:02d}_{ano}.zip"
     return StreamingResponse(
-        io.BytesIO(pdf_bytes),
-        media_type="application/pdf",
+        stream(),
+        media_type="application/zip",
         headers={"Content-Disposition": f'attachment; filename=\"{filename}\"'}
     )
 
+# ---------------------------
+# Geração assíncrona: submete job, consulta status e baixa o PDF
+# ---------------------------
+@app.post("/v1/jobs", status_code=202, dependencies=[Depends(verify_api_key)])
+def submeter_job(payload: RelatorioRequest):
+    """Enfileira a geração e retorna imediatamente o `job_id` para acompanhamento."""
+    mes = get_mes_numero(payload.mes)
+    ano = default_ano(payload.ano)
+    analise_text = processar_html_parecer(payload.analise_text or "")
+
+    try:
+        job = gerenciador_jobs.submeter(
+            gerar_relatorio_pdf_unico,
+            payload.id_cliente, mes, ano, payload.relatorios, analise_text,
+            output_dir=os.path.join("outputs", "jobs"),
+        )
+    except FilaCheiaError as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(controle_admissao.retry_after())})
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/v1/jobs/{job.id}",
+        "download_url": f"/v1/jobs/{job.id}/pdf",
+    }
+
+@app.get("/v1/jobs/{job_id}", dependencies=[Depends(verify_api_key)])
+def status_job(job_id: str):
+    job = gerenciador_jobs.obter(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado (ou expirado).")
+    return job.to_dict()
+
+@app.get("/v1/jobs/{job_id}/pdf", dependencies=[Depends(verify_api_key)])
+def download_job(job_id: str, request: Request):
+    job = gerenciador_jobs.obter(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado (ou expirado).")
+    if job.status == STATUS_ERRO:
+        if isinstance(job.excecao, ConversaoOcupadaError):
+            raise resposta_ocupado(job.excecao)
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar PDF: {job.erro}")
+    if job.status != STATUS_CONCLUIDO:
+        raise HTTPException(status_code=409, detail=f"Job ainda não concluído (status: {job.status}).",
+                            headers={"Retry-After": "5"})
+
+    pdf_path, filename = job.resultado
+    if not os.path.exists(pdf_path):
+        raise HTTPException(status_code=410, detail="Arquivo do job não está mais disponível.")
+    return responder_pdf(request, pdf_path, filename)
+
+# ---------------------------
+# Preview HTML de uma seção (sem conversão para PDF)
+# ---------------------------
+ASSETS_DIR = os.path.abspath("assets")
+
+@app.get("/v1/relatorios/{n}/html", response_class=HTMLResponse, dependencies=[Depends(verify_api_key)])
+def preview_html(
+    n: int,
+    id_cliente: str = Query(..., description="IDs separados por vírgula"),
+    mes: Optional[int] = Query(None, ge=1, le=12),
+    ano: Optional[int] = None,
+):
+    """HTML da seção `n` (1 a 8) para conferência rápida; ícones servidos por `/v1/assets`."""
+    if n not in RELATORIO_LABELS:
+        raise HTTPException(status_code=404, detail="Relatório inexistente (use 1 a 8).")
+    ids = [int(x) for x in id_cliente.split(",") if x.strip().isdigit()]
+    if not ids:
+        raise HTTPException(status_code=422, detail="Informe id_cliente válidos.")
+
+    html = gerar_preview_html(ids, get_mes_numero(mes), default_ano(ano), n, assets_url="/v1/assets")
+    return HTMLResponse(html)
+
+@app.get("/v1/assets/{caminho:path}")
+def servir_asset(caminho: str):
+    """Ícones e imagens estáticas referenciados pelos previews.
+
+    Sem API Key: o navegador busca estes arquivos pelas tags <img> do HTML, que
+    não enviam headers. Só serve arquivos dentro de `assets/`.
+    """
+    alvo = os.path.abspath(os.path.join(ASSETS_DIR, caminho))
+    if not alvo.startswith(ASSETS_DIR + os.sep) or not os.path.isfile(alvo):
+        raise HTTPException(status_code=404, detail="Asset não encontrado.")
+    return FileResponse(alvo, headers={"Cache-Control": "public, max-age=86400"})
+
 # ---------------------------
 # Endpoint GET compatível com query params "estilo Streamlit"
 # (útil para testes rápidos via navegador)
 # ---------------------------
 @app.get("/v1/relatorios/pdf", dependencies=[Depends(verify_api_key)])
 def gerar_pdf_get(
+    request: Request,
     id_cliente: str = Query(..., description="IDs separados por vírgula"),
     mes: Optional[int] = Query(None, ge=1, le=12),
     ano: Optional[int] = None,
@@ -312,4 +470,4 @@ def gerar_pdf_get(
         relatorios=[x.strip() for x in relatorios.split(",") if x.strip()],
         analise_text=analise_text
     )
-    return gerar_pdf(payload)
+    return gerar_pdf(payload, request)
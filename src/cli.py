@@ -0,0 +1,328 @@
+# src/cli.py
+"""
+Linha de comando para as rotinas de operação.
+
+    python -m src.cli close-month --mes 9 --ano 2025 [--workers 4] [--relatorios 1,2,3,4,5,6,7]
+    python -m src.cli enqueue-month --mes 9 --ano 2025
+    python -m src.cli queue-worker [--workers 4]
+    python -m src.cli warm-cache [--listen | --intervalo 300 | --clientes 12 --mes 9 --ano 2025]
+    python -m src.cli slow-queries [--log outputs/logs/consultas_lentas.jsonl] [--top 20]
+
+`close-month` gera os PDFs de todos os clientes ativos (ou de `--clientes`) em
+um pool de processos. Cada cliente concluído é registrado em um manifesto JSON
+na pasta de saída; rodar o mesmo comando de novo (após uma queda, Ctrl+C ou
+erro) pula os clientes já entregues e tenta de novo os que falharam. Ao final
+mostra a vazão (clientes/hora), útil para dimensionar a janela de fechamento.
+
+`enqueue-month` + `queue-worker` fazem o mesmo com a fila do Postgres
+(`src/database/fila.py`): um nó enfileira o mês e qualquer número de nós roda
+workers que dividem os jobs entre si.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RELATORIOS_FECHAMENTO = [1, 2, 3, 4, 5, 6, 7]  # a nota do consultor (8) é individual
+
+# Estado de cada processo do pool (conexão criada uma vez por processo)
+_db_processo = None
+
+
+def _iniciar_processo() -> None:
+    logging.basicConfig(level=logging.WARNING)
+
+
+def _gerar_cliente(id_cliente: int, mes: int, ano: int, relatorios: List[int],
+                   clientes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Gera o PDF de um cliente dentro de um processo do pool (sem lançar exceções)."""
+    global _db_processo
+    inicio = time.time()
+    try:
+        from src.core.pipeline import gerar_relatorio_pdf_unico
+        from src.database.db_utils import DatabaseConnection
+        if _db_processo is None:
+            _db_processo = DatabaseConnection()
+        pdf_path, filename = gerar_relatorio_pdf_unico(
+            [id_cliente], mes, ano, relatorios, db=_db_processo, clientes=clientes,
+        )
+        return {"id_cliente": id_cliente, "status": "ok", "arquivo": filename,
+                "pdf_path": pdf_path, "tempo_s": round(time.time() - inicio, 2)}
+    except Exception as e:
+        return {"id_cliente": id_cliente, "status": "erro", "erro": str(e),
+                "tempo_s": round(time.time() - inicio, 2)}
+
+
+class Manifesto:
+    """Checkpoint do fechamento: um registro por cliente, gravado a cada conclusão."""
+
+    def __init__(self, caminho: str, mes: int, ano: int, relatorios: List[int]):
+        self.caminho = caminho
+        self.dados: Dict[str, Any] = {
+            "mes": mes, "ano": ano, "relatorios": relatorios,
+            "iniciado_em": datetime.now().isoformat(timespec="seconds"), "clientes": {},
+        }
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                anterior = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (anterior.get("mes"), anterior.get("ano"), anterior.get("relatorios")) == (mes, ano, relatorios):
+            self.dados = anterior
+        else:
+            logger.warning(f"Manifesto de outro período/seleção ignorado: {caminho}")
+
+    def concluido(self, id_cliente: int, saida: str) -> bool:
+        registro = self.dados["clientes"].get(str(id_cliente))
+        return bool(registro and registro["status"] == "ok"
+                    and os.path.exists(os.path.join(saida, registro["arquivo"])))
+
+    def registrar(self, resultado: Dict[str, Any]) -> None:
+        resultado["concluido_em"] = datetime.now().isoformat(timespec="seconds")
+        self.dados["clientes"][str(resultado["id_cliente"])] = resultado
+        self.salvar()
+
+    def arquivos_usados(self) -> set:
+        return {r["arquivo"] for r in self.dados["clientes"].values() if r["status"] == "ok"}
+
+    def salvar(self) -> None:
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.dados, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho)
+
+
+def _resumo_vazao(tempos: List[float], total_s: float, gerados: int) -> str:
+    if not gerados:
+        return "Nenhum cliente gerado nesta execução."
+    por_hora = gerados / total_s * 3600 if total_s else 0.0
+    p95 = sorted(tempos)[max(0, int(round(0.95 * len(tempos))) - 1)]
+    return (
+        f"{gerados} clientes em {total_s / 60:.1f} min → {por_hora:.0f} clientes/hora "
+        f"(por cliente: média {statistics.mean(tempos):.1f}s, p95 {p95:.1f}s)"
+    )
+
+
+def fechar_mes(mes: int, ano: int, relatorios: List[int], workers: int, saida: str,
+               ids_clientes: Optional[List[int]] = None) -> int:
+    """
+    Gera o fechamento do mês e devolve o código de saída (0 = todos ok).
+
+    Args:
+        mes: Mês (1-12).
+        ano: Ano.
+        relatorios: IDs dos relatórios (1 a 8).
+        workers: Processos geradores em paralelo.
+        saida: Pasta dos PDFs e do `manifesto.json`.
+        ids_clientes: Subconjunto de clientes (padrão: todos os ativos).
+    """
+    from src.database.db_utils import DatabaseConnection, buscar_clientes
+
+    os.makedirs(saida, exist_ok=True)
+    manifesto = Manifesto(os.path.join(saida, "manifesto.json"), mes, ano, relatorios)
+
+    clientes = buscar_clientes(DatabaseConnection()) or []
+    ids = ids_clientes or [c["id_cliente"] for c in clientes]
+    pendentes = [cid for cid in ids if not manifesto.concluido(cid, saida)]
+    print(f"📦 Fechamento {mes:02d}/{ano}: {len(ids)} clientes, {len(ids) - len(pendentes)} já concluídos, "
+          f"{len(pendentes)} a gerar com {workers} processos")
+    manifesto.salvar()
+
+    nomes_usados = manifesto.arquivos_usados()
+    tempos: List[float] = []
+    erros = 0
+    inicio = time.time()
+
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto, initializer=_iniciar_processo) as executor:
+        futures = {
+            executor.submit(_gerar_cliente, cid, mes, ano, relatorios, clientes): cid for cid in pendentes
+        }
+        try:
+            for n, future in enumerate(as_completed(futures), 1):
+                try:
+                    resultado = future.result()
+                except Exception as e:  # processo do pool morreu (ex.: falta de memória)
+                    resultado = {"id_cliente": futures[future], "status": "erro", "erro": repr(e), "tempo_s": 0.0}
+                pdf_path = resultado.pop("pdf_path", None)
+                if pdf_path:
+                    # Clientes homônimos não podem sobrescrever um ao outro
+                    if resultado["arquivo"] in nomes_usados:
+                        resultado["arquivo"] = f"{resultado['id_cliente']}_{resultado['arquivo']}"
+                    nomes_usados.add(resultado["arquivo"])
+                    shutil.copyfile(pdf_path, os.path.join(saida, resultado["arquivo"]))
+                    tempos.append(resultado["tempo_s"])
+                    print(f"  [{n}/{len(pendentes)}] ✓ {resultado['arquivo']} ({resultado['tempo_s']:.1f}s)")
+                else:
+                    erros += 1
+                    print(f"  [{n}/{len(pendentes)}] ✗ cliente {resultado['id_cliente']}: {resultado['erro']}")
+                manifesto.registrar(resultado)
+        except KeyboardInterrupt:
+            print("⏹️ Interrompido; rode o mesmo comando para continuar de onde parou.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            return 130
+
+    print(f"⏱️ {_resumo_vazao(tempos, time.time() - inicio, len(tempos))}")
+    if erros:
+        print(f"⚠️ {erros} clientes com erro (veja {manifesto.caminho}); rode de novo para tentar só eles.")
+    return 1 if erros else 0
+
+
+def _abrir_fila():
+    from src.database.db_utils import DatabaseConnection
+    from src.database.fila import FilaPostgres
+    fila = FilaPostgres(DatabaseConnection().engine, os.getenv("FILA_TABELA", "relatorio_jobs"))
+    fila.criar_tabela()
+    return fila
+
+
+def enfileirar_mes(mes: int, ano: int, relatorios: List[int], ids_clientes: Optional[List[int]] = None) -> int:
+    """Coloca um job por cliente ativo (ou de `ids_clientes`) na fila do Postgres."""
+    from src.database.db_utils import DatabaseConnection, buscar_clientes
+
+    fila = _abrir_fila()
+    ids = ids_clientes or [c["id_cliente"] for c in buscar_clientes(DatabaseConnection()) or []]
+    fila.enfileirar_mes(ids, mes, ano, relatorios)
+    print(f"📥 {len(ids)} jobs enfileirados para {mes:02d}/{ano} na tabela {fila.tabela}")
+    return 0
+
+
+def _laco_worker_fila() -> None:
+    """Processo worker: roda até receber SIGINT/SIGTERM, terminando o job atual antes."""
+    import threading
+    from src.core.pipeline import gerar_relatorio_pdf_unico
+    from src.database.fila import executar_worker
+
+    logging.basicConfig(level=logging.INFO)
+    parar = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: parar.set())
+    signal.signal(signal.SIGTERM, lambda *_: parar.set())
+    executar_worker(_abrir_fila(), gerar_relatorio_pdf_unico, parar=parar,
+                    intervalo_s=float(os.getenv("FILA_INTERVALO_S", "2")))
+
+
+def rodar_workers_fila(processos: int) -> int:
+    """Sobe `processos` workers da fila neste nó e espera por eles."""
+    contexto = multiprocessing.get_context("spawn")
+    filhos = [contexto.Process(target=_laco_worker_fila, name=f"fila-{n}") for n in range(processos)]
+    for filho in filhos:
+        filho.start()
+    print(f"👷 {processos} workers da fila em execução (Ctrl+C encerra após os jobs atuais)")
+    try:
+        for filho in filhos:
+            filho.join()
+    except KeyboardInterrupt:
+        for filho in filhos:
+            filho.join()
+    return 0
+
+
+def aquecer_cache(listen: bool, intervalo_s: float, ids_clientes: Optional[List[int]] = None,
+                  mes: Optional[int] = None, ano: Optional[int] = None) -> int:
+    """Aquece um período específico, ou fica ouvindo/monitorando mudanças no banco."""
+    from src.core.aquecimento import AquecedorCache, CANAL_PADRAO
+
+    logging.basicConfig(level=logging.INFO, force=True)
+    aquecedor = AquecedorCache(atraso_s=float(os.getenv("AQUECIMENTO_ATRASO_S", "30")))
+    if ids_clientes and mes and ano:
+        for cid in ids_clientes:
+            aquecedor.aquecer([cid], mes, ano)
+        return 0
+    try:
+        if listen:
+            aquecedor.ouvir(os.getenv("AQUECIMENTO_CANAL", CANAL_PADRAO))
+        else:
+            aquecedor.monitorar(intervalo_s)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def resumir_consultas_lentas(caminho: str, top: int) -> int:
+    """Mostra as consultas lentas capturadas, por método e cliente (pior primeiro)."""
+    from glob import glob
+    from src.database.instrumentacao import resumir_log
+
+    grupos = resumir_log([caminho] + sorted(glob(f"{caminho}.*")))
+    if not grupos:
+        print(f"Nenhuma consulta lenta registrada em {caminho}.")
+        return 0
+    print(f"{'método':<52} {'cliente':<12} {'capturas':>8} {'média ms':>10} {'máx ms':>10}  última")
+    for g in grupos[:top]:
+        print(f"{g['metodo'][:52]:<52} {g['cliente'][:12] or '-':<12} {g['capturas']:>8} "
+              f"{g['media_ms']:>10.0f} {g['max_ms']:>10.0f}  {g['ultima']}")
+    return 0
+
+
+def _lista_ids(texto: str) -> List[int]:
+    return [int(x) for x in texto.split(",") if x.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Rotinas de operação dos relatórios IZE.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    fechamento = comandos.add_parser("close-month", help="Gera os PDFs do mês para todos os clientes ativos.")
+    fechamento.add_argument("--mes", type=int, required=True, choices=range(1, 13), metavar="MES")
+    fechamento.add_argument("--ano", type=int, required=True)
+    fechamento.add_argument("--relatorios", type=_lista_ids, default=RELATORIOS_FECHAMENTO,
+                            help="IDs separados por vírgula (padrão: 1 a 7).")
+    fechamento.add_argument("--clientes", type=_lista_ids, default=None,
+                            help="IDs separados por vírgula (padrão: todos os ativos).")
+    fechamento.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    fechamento.add_argument("--saida", default=None,
+                            help="Pasta dos PDFs e do manifesto (padrão: outputs/fechamento/<ano>-<mes>).")
+
+    enfileirar = comandos.add_parser("enqueue-month", help="Enfileira o mês na fila do Postgres.")
+    enfileirar.add_argument("--mes", type=int, required=True, choices=range(1, 13), metavar="MES")
+    enfileirar.add_argument("--ano", type=int, required=True)
+    enfileirar.add_argument("--relatorios", type=_lista_ids, default=RELATORIOS_FECHAMENTO)
+    enfileirar.add_argument("--clientes", type=_lista_ids, default=None)
+
+    worker = comandos.add_parser("queue-worker", help="Processa jobs da fila do Postgres neste nó.")
+    worker.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+
+    aquecimento = comandos.add_parser("warm-cache", help="Pré-calcula dados e seções quando o ETL carrega dados.")
+    aquecimento.add_argument("--listen", action="store_true",
+                             help="Ouve avisos NOTIFY do ETL em vez de monitorar por polling.")
+    aquecimento.add_argument("--intervalo", type=float, default=300.0, help="Segundos entre verificações (polling).")
+    aquecimento.add_argument("--clientes", type=_lista_ids, default=None, help="Aquece só estes clientes e sai.")
+    aquecimento.add_argument("--mes", type=int, choices=range(1, 13), metavar="MES")
+    aquecimento.add_argument("--ano", type=int)
+
+    lentas = comandos.add_parser("slow-queries", help="Resume o log de consultas lentas (EXPLAIN capturado).")
+    lentas.add_argument("--log", default=None, help="Arquivo do log (padrão: DB_CONSULTA_LENTA_LOG).")
+    lentas.add_argument("--top", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.comando == "close-month":
+        saida = args.saida or os.path.join("outputs", "fechamento", f"{args.ano}-{args.mes:02d}")
+        return fechar_mes(args.mes, args.ano, sorted(set(args.relatorios)), max(1, args.workers), saida,
+                          args.clientes)
+    if args.comando == "enqueue-month":
+        return enfileirar_mes(args.mes, args.ano, sorted(set(args.relatorios)), args.clientes)
+    if args.comando == "queue-worker":
+        return rodar_workers_fila(max(1, args.workers))
+    if args.comando == "warm-cache":
+        return aquecer_cache(args.listen, args.intervalo, args.clientes, args.mes, args.ano)
+    if args.comando == "slow-queries":
+        from src.database.instrumentacao import CONSULTA_LENTA_LOG
+        return resumir_consultas_lentas(args.log or CONSULTA_LENTA_LOG, max(1, args.top))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+# src/core/aquecimento.py
+"""
+Aquecimento dos caches quando o ETL carrega um mês de um cliente.
+
+Quando `fc`/`dre`/`indicador` mudam, o aquecedor executa em segundo plano a
+coleta dos dados (todos os `Indicadores.calcular_*` via `RelatorioN`) e a
+renderização das seções com dados. O resultado fica:
+
+- no snapshot do período (`src/core/snapshots.py`), associado à impressão
+  digital dos dados: a geração interativa faz só uma consulta barata e
+  reaproveita os dados enquanto o banco não mudar;
+- no cache de seções do `RenderingEngine`: as seções já estão em PDF e a
+  geração faz apenas o índice, a nota do consultor e o merge.
+
+Duas formas de saber que algo mudou:
+
+- `ouvir`: `LISTEN` em um canal do Postgres. O ETL avisa ao final da carga com
+  `SELECT pg_notify('ize_dados_carregados', '{"id_cliente": 12, "mes": 9, "ano": 2025}')`.
+- `monitorar`: a cada intervalo, calcula a impressão digital dos clientes
+  ativos no mês corrente e no anterior e aquece os que mudaram.
+
+Avisos repetidos do mesmo cliente/mês são agrupados (`FilaAquecimento`): o
+aquecimento só começa depois de `atraso_s` sem novos avisos, para não rodar no
+meio de uma carga em várias etapas.
+"""
+import json
+import logging
+import select
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RELATORIOS_AQUECIMENTO = [1, 2, 3, 4, 5, 6, 7]  # a nota do consultor não depende do banco
+CANAL_PADRAO = "ize_dados_carregados"
+
+Periodo = Tuple[Tuple[int, ...], int, int]  # (clientes, mes, ano)
+
+
+class FilaAquecimento:
+    """Períodos a aquecer, agrupando avisos repetidos dentro de `atraso_s`."""
+
+    def __init__(self, atraso_s: float = 30.0):
+        self.atraso_s = atraso_s
+        self._lock = threading.Lock()
+        self._pendentes: Dict[Periodo, float] = {}
+
+    def avisar(self, id_cliente: List[int], mes: int, ano: int) -> None:
+        periodo = (tuple(sorted(set(int(i) for i in id_cliente))), int(mes), int(ano))
+        with self._lock:
+            self._pendentes[periodo] = time.monotonic()
+
+    def prontos(self) -> List[Periodo]:
+        """Retira e devolve os períodos sem novos avisos há `atraso_s`."""
+        limite = time.monotonic() - self.atraso_s
+        with self._lock:
+            prontos = [p for p, visto in self._pendentes.items() if visto <= limite]
+            for periodo in prontos:
+                del self._pendentes[periodo]
+        return prontos
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pendentes)
+
+
+class AquecedorCache:
+    """Pré-calcula dados e pré-renderiza seções de um cliente/mês."""
+
+    def __init__(self, db=None, relatorios: Optional[List[int]] = None, atraso_s: float = 30.0):
+        if db is None:
+            from src.database.db_utils import DatabaseConnection
+            db = DatabaseConnection()
+        self.db = db
+        self.relatorios = relatorios or RELATORIOS_AQUECIMENTO
+        self.fila = FilaAquecimento(atraso_s)
+        self._impressoes: Dict[Periodo, str] = {}
+
+    def aquecer(self, id_cliente: List[int], mes: int, ano: int) -> Dict[str, Any]:
+        """Coleta os dados (gravando o snapshot) e pré-renderiza as seções."""
+        from src.core import pipeline
+        from src.database.db_utils import impressao_digital_dados, obter_meses
+
+        inicio = time.time()
+        if pipeline.snapshots is not None and pipeline.mes_fechado(mes, ano):
+            # Carga tardia em mês encerrado: descarta o snapshot capturado antes dela
+            atual = pipeline.snapshots.carregar(id_cliente, mes, ano)
+            if atual and atual.get("impressao") != impressao_digital_dados(self.db, id_cliente, mes, ano):
+                logger.info(f"🔄 Dados de {id_cliente} {mes:02d}/{ano} mudaram após o snapshot; recapturando")
+                pipeline.snapshots.remover(id_cliente, mes, ano)
+
+        snapshot = pipeline.carregar_snapshot(id_cliente, mes, ano, self.db)
+        display_nome = (snapshot or {}).get("display_nome") or pipeline.resolver_display_nome(self.db, id_cliente)
+        nome_mes = next((nm for nm, n in obter_meses() if n == mes), str(mes))
+        dados = pipeline.coletar_dados_relatorios(
+            self.db, id_cliente, mes, ano, self.relatorios, display_nome, snapshot=snapshot
+        )
+        secoes = pipeline.rendering_engine.pre_renderizar(dados, display_nome, nome_mes, ano)
+
+        resumo = {"id_cliente": list(id_cliente), "mes": mes, "ano": ano,
+                  "secoes": secoes, "tempo_s": round(time.time() - inicio, 2)}
+        logger.info(f"🔥 Aquecido {display_nome} {mes:02d}/{ano}: {secoes} seções em {resumo['tempo_s']}s")
+        return resumo
+
+    def processar_prontos(self) -> int:
+        """Aquece os períodos da fila que já passaram do atraso."""
+        feitos = 0
+        for ids, mes, ano in self.fila.prontos():
+            try:
+                self.aquecer(list(ids), mes, ano)
+                feitos += 1
+            except Exception as e:
+                logger.error(f"❌ Falha ao aquecer {list(ids)} {mes:02d}/{ano}: {e}")
+        return feitos
+
+    def ouvir(self, canal: str = CANAL_PADRAO, parar: Optional[threading.Event] = None) -> None:
+        """`LISTEN canal` e aquece os períodos avisados (payload JSON)."""
+        parar = parar or threading.Event()
+        bruta = self.db.engine.raw_connection()
+        try:
+            conn = bruta.driver_connection
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{canal}"')
+            logger.info(f"👂 Aguardando avisos no canal {canal}")
+            while not parar.is_set():
+                for payload in _aguardar_notificacoes(conn, timeout_s=1.0):
+                    self._registrar_aviso(payload)
+                self.processar_prontos()
+        finally:
+            bruta.close()
+
+    def _registrar_aviso(self, payload: str) -> None:
+        try:
+            aviso = json.loads(payload)
+            ids = aviso["id_cliente"]
+            self.fila.avisar(ids if isinstance(ids, list) else [ids], int(aviso["mes"]), int(aviso["ano"]))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️ Aviso ignorado ({payload!r}): {e}")
+
+    def verificar_mudancas(self, hoje: Optional[date] = None) -> int:
+        """Uma rodada do monitoramento: enfileira os períodos cuja impressão mudou."""
+        from src.database.db_utils import buscar_clientes, impressoes_digitais_por_cliente
+
+        hoje = hoje or date.today()
+        anterior = (hoje.month - 1 or 12, hoje.year - (hoje.month == 1))
+        ids = [cliente["id_cliente"] for cliente in buscar_clientes(self.db) or []]
+        # Uma consulta por rodada para todos os clientes e os dois meses
+        impressoes = impressoes_digitais_por_cliente(self.db, ids, [(hoje.month, hoje.year), anterior])
+        mudaram = 0
+        for (id_cliente, mes, ano), impressao in impressoes.items():
+            periodo = ((id_cliente,), mes, ano)
+            if self._impressoes.get(periodo) != impressao:
+                self._impressoes[periodo] = impressao
+                self.fila.avisar([id_cliente], mes, ano)
+                mudaram += 1
+        return mudaram
+
+    def monitorar(self, intervalo_s: float = 300.0, parar: Optional[threading.Event] = None) -> None:
+        """Verifica as impressões digitais a cada `intervalo_s` e aquece o que mudou.
+
+        Na primeira rodada todos os períodos entram na fila; os que já estão
+        aquecidos custam só a leitura do snapshot e a checagem do cache.
+        """
+        parar = parar or threading.Event()
+        proxima = 0.0
+        while not parar.is_set():
+            if time.monotonic() >= proxima:
+                try:
+                    mudaram = self.verificar_mudancas()
+                    if mudaram:
+                        logger.info(f"🔎 {mudaram} períodos com dados novos")
+                except Exception as e:
+                    logger.error(f"❌ Falha ao verificar mudanças: {e}")
+                proxima = time.monotonic() + intervalo_s
+            self.processar_prontos()
+            parar.wait(min(5.0, intervalo_s))
+
+
+def _aguardar_notificacoes(conn, timeout_s: float) -> List[str]:
+    """Payloads recebidos em até `timeout_s` (psycopg2 ou psycopg 3)."""
+    if hasattr(conn, "poll"):  # psycopg2
+        if select.select([conn], [], [], timeout_s) == ([], [], []):
+            return []
+        conn.poll()
+        payloads = [n.payload for n in conn.notifies]
+        conn.notifies.clear()
+        return payloads
+    return [n.payload for n in conn.notifies(timeout=timeout_s, stop_after=100)]  # psycopg 3
@@ -0,0 +1,158 @@
+# src/core/armazem.py
+"""
+Armazém de arquivos endereçado por conteúdo, com limite de tamanho.
+
+Cada arquivo é guardado sob uma chave (hash das entradas que o produziram) em
+`<diretorio>/<2 primeiros caracteres>/<chave><extensao>`, com metadados
+opcionais em `<arquivo>.json` (incluindo o sha256 do conteúdo). Quando o total
+passa de `max_bytes`, os arquivos menos usados recentemente (atime, atualizado a
+cada acerto) são removidos; o mtime continua sendo o momento da gravação. As
+escritas são atômicas (arquivo temporário + `os.replace`), então vários
+processos podem compartilhar o mesmo diretório.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Optional
+
+from src.core import metricas
+
+logger = logging.getLogger(__name__)
+
+
+def _sha256(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class ArmazemArquivos:
+    """Diretório de arquivos imutáveis indexados por chave, com despejo LRU por tamanho."""
+
+    def __init__(self, diretorio: str, max_bytes: int, extensao: str = ".pdf", nome: str = "armazem"):
+        self.diretorio = os.path.abspath(diretorio)
+        self.max_bytes = max_bytes
+        self.extensao = extensao
+        self.nome = nome
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None  # estimativa; recalculada na varredura
+
+    def caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave[:2], f"{chave}{self.extensao}")
+
+    def obter(self, chave: str, validade: Optional[float] = None) -> Optional[str]:
+        """Caminho do arquivo da chave, ou None se não estiver no armazém.
+
+        Args:
+            chave: Chave do arquivo.
+            validade: Idade máxima (segundos desde a gravação); None = sem limite.
+        """
+        caminho = self.caminho(chave)
+        try:
+            st = os.stat(caminho)
+            agora = time.time()
+            acerto = validade is None or agora - st.st_mtime <= validade
+            if acerto:
+                os.utime(caminho, (agora, st.st_mtime))  # marca como usado recentemente
+        except OSError:
+            acerto = False
+        metricas.registrar_cache(self.nome, acerto)
+        return caminho if acerto else None
+
+    def ler_metadados(self, chave: str) -> dict:
+        """Metadados gravados junto com o arquivo ({} se não houver)."""
+        try:
+            with open(f"{self.caminho(chave)}.json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def guardar(self, chave: str, origem: str, mover: bool = False,
+                metadados: Optional[dict] = None) -> str:
+        """Copia (ou move) `origem` para o armazém e devolve o caminho final.
+
+        Os `metadados` (JSON) ganham o `sha256` do arquivo e são gravados antes
+        dele aparecer no destino, então um acerto em `obter` sempre os encontra.
+        """
+        destino = self.caminho(chave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = f"{destino}.{uuid.uuid4().hex}.tmp"
+        if mover:
+            shutil.move(origem, temporario)
+        else:
+            shutil.copyfile(origem, temporario)
+        if metadados is not None:
+            metadados = {**metadados, "sha256": _sha256(temporario)}
+            temporario_json = f"{destino}.json.{uuid.uuid4().hex}.tmp"
+            with open(temporario_json, "w", encoding="utf-8") as f:
+                json.dump(metadados, f, ensure_ascii=False)
+            os.replace(temporario_json, f"{destino}.json")
+        tamanho = os.path.getsize(temporario)
+        os.replace(temporario, destino)
+
+        with self._lock:
+            if self._total is not None:
+                self._total += tamanho
+            precisa_limpar = self._total is None or self._total > self.max_bytes
+        if precisa_limpar:
+            self.limpar()
+        return destino
+
+    def limpar(self) -> int:
+        """Remove os arquivos menos usados até o total caber em 90% do limite.
+
+        Returns:
+            Quantidade de bytes removidos.
+        """
+        arquivos = []
+        for raiz, _, nomes in os.walk(self.diretorio):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                try:
+                    st = os.stat(caminho)
+                except OSError:
+                    continue
+                if nome.endswith(".tmp") and time.time() - st.st_mtime < 3600:
+                    continue  # escrita em andamento em outro processo
+                if nome.endswith(".json"):
+                    continue  # metadados: removidos junto com o arquivo
+                arquivos.append((st.st_atime, st.st_size, caminho))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        removidos = 0
+        if total > self.max_bytes:
+            alvo = int(self.max_bytes * 0.9)
+            for _, tamanho, caminho in sorted(arquivos):
+                if total - removidos <= alvo:
+                    break
+                try:
+                    os.remove(caminho)
+                    removidos += tamanho
+                except OSError:
+                    continue
+                try:
+                    os.remove(f"{caminho}.json")
+                except OSError:
+                    pass
+            logger.info(f"🧹 {self.nome}: {removidos / 1e6:.1f} MB removidos ({self.diretorio})")
+
+        with self._lock:
+            self._total = total - removidos
+        return removidos
+
+    def tamanho_total(self) -> int:
+        """Bytes ocupados (estimativa; faz a varredura na primeira chamada)."""
+        with self._lock:
+            total = self._total
+        if total is None:
+            self.limpar()
+            with self._lock:
+                total = self._total
+        return total or 0
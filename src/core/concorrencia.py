@@ -0,0 +1,196 @@
+# src/core/concorrencia.py
+"""
+Limites de concorrência da geração de relatórios.
+
+- `SlotsConversao`: semáforo global de conversões wkhtmltopdf baseado em
+  arquivos de lock (flock/msvcrt), válido entre threads **e** entre processos
+  (workers do uvicorn, Streamlit e CLI na mesma máquina).
+- `ControleAdmissao`: limita quantas gerações uma instância aceita ao mesmo
+  tempo; acima disso a API responde 429 com `Retry-After` em vez de degradar
+  todas as requisições.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.core import metricas
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+class ConversaoOcupadaError(RuntimeError):
+    """Nenhum slot de conversão ficou livre dentro do tempo limite."""
+
+
+class AdmissaoNegadaError(RuntimeError):
+    """A instância já está no limite de gerações simultâneas."""
+
+    def __init__(self, mensagem: str, retry_after: int):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+
+def _tentar_lock(fd: int) -> bool:
+    """Tenta travar o arquivo sem bloquear; retorna True se conseguiu."""
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _liberar_lock(fd: int) -> None:
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+class SlotsConversao:
+    """Semáforo de N slots implementado com N arquivos de lock em um diretório.
+
+    Cada aquisição abre um descritor novo, então o lock é exclusivo tanto entre
+    processos quanto entre threads do mesmo processo. Se o processo morrer, o
+    sistema operacional libera o lock automaticamente.
+    """
+
+    def __init__(self, slots: int, lock_dir: str, timeout: float = 120.0):
+        self.slots = max(1, slots)
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._em_uso = 0
+        self._aguardando = 0
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+    def _caminho_slot(self, indice: int) -> str:
+        return os.path.join(self.lock_dir, f"slot_{indice}.lock")
+
+    def _adquirir(self, timeout: float) -> int:
+        limite = time.monotonic() + timeout
+        espera = 0.02
+        while True:
+            for indice in range(self.slots):
+                fd = os.open(self._caminho_slot(indice), os.O_RDWR | os.O_CREAT, 0o666)
+                if _tentar_lock(fd):
+                    return fd
+                os.close(fd)
+            if time.monotonic() >= limite:
+                raise ConversaoOcupadaError(
+                    f"Nenhum slot de conversão livre após {timeout:.0f}s ({self.slots} slots)."
+                )
+            time.sleep(espera)
+            espera = min(espera * 2, 0.5)
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """Segura um slot de conversão enquanto o bloco executa."""
+        with self._lock:
+            self._aguardando += 1
+        inicio = time.monotonic()
+        try:
+            fd = self._adquirir(self.timeout if timeout is None else timeout)
+        finally:
+            with self._lock:
+                self._aguardando -= 1
+        espera = time.monotonic() - inicio
+        if espera > 1:
+            logger.info(f"⏳ Slot de conversão obtido após {espera:.2f}s de espera")
+        with self._lock:
+            self._em_uso += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._em_uso -= 1
+            _liberar_lock(fd)
+
+    def em_uso(self) -> int:
+        """Slots ocupados por este processo."""
+        return self._em_uso
+
+    def aguardando(self) -> int:
+        """Conversões deste processo esperando por um slot."""
+        return self._aguardando
+
+
+class ControleAdmissao:
+    """Contador de gerações ativas com limite e estimativa de `Retry-After`.
+
+    A estimativa usa a média móvel (EWMA) da duração das últimas gerações.
+    """
+
+    def __init__(self, max_ativas: int, retry_after_padrao: int = 30):
+        self.max_ativas = max(1, max_ativas)
+        self._lock = threading.Lock()
+        self._ativas = 0
+        self._duracao_media = float(retry_after_padrao)
+
+    def entrar(self) -> float:
+        """Ocupa uma vaga e devolve o instante de entrada (para `sair`).
+
+        Raises:
+            AdmissaoNegadaError: Se a instância já está no limite.
+        """
+        with self._lock:
+            if self._ativas >= self.max_ativas:
+                raise AdmissaoNegadaError(
+                    f"Servidor ocupado: {self._ativas} gerações em andamento. Tente novamente.",
+                    retry_after=self.retry_after(),
+                )
+            self._ativas += 1
+        return time.monotonic()
+
+    def sair(self, inicio: float) -> None:
+        """Libera a vaga e atualiza a duração média usada no `Retry-After`."""
+        duracao = time.monotonic() - inicio
+        with self._lock:
+            self._ativas -= 1
+            self._duracao_media = 0.8 * self._duracao_media + 0.2 * duracao
+
+    @contextmanager
+    def admitir(self) -> Iterator[None]:
+        """Executa o bloco se houver vaga; caso contrário lança `AdmissaoNegadaError`."""
+        inicio = self.entrar()
+        try:
+            yield
+        finally:
+            self.sair(inicio)
+
+    def ativas(self) -> int:
+        return self._ativas
+
+    def retry_after(self) -> int:
+        """Segundos sugeridos até a próxima tentativa."""
+        return max(1, int(round(self._duracao_media)))
+
+
+# Instância global usada pelo RenderingEngine
+slots_conversao = SlotsConversao(
+    slots=int(os.getenv("WKHTMLTOPDF_SLOTS", str(os.cpu_count() or 2))),
+    lock_dir=os.getenv("WKHTMLTOPDF_LOCK_DIR", os.path.join(tempfile.gettempdir(), "ize_wkhtmltopdf_slots")),
+    timeout=float(os.getenv("WKHTMLTOPDF_SLOT_TIMEOUT", "120")),
+)
+
+metricas.PDF_SLOTS.definir_funcao(lambda: {
+    ("capacidade",): slots_conversao.slots,
+    ("em_uso",): slots_conversao.em_uso(),
+    ("aguardando",): slots_conversao.aguardando(),
+})
@@ -1,16 +1,241 @@
 # src/core/indicadores.py
 from datetime import date
-from typing import Union, List, Dict, Any, Optional
-from sqlalchemy import text
-from src.database.db_utils import DatabaseConnection
-import pandas as pd
+from typing import Union, List, Dict, Any, Optional, Tuple
+from src.database.db_utils import DatabaseConnection, text
+from src.database.plano_de_contas import PLANO_DE_CONTAS, Mapa, somar_por_nivel_2
+from src.core.metricas import INDICADORES_DURACAO, medir_metodo
+from src.core.utils import resumir_top_n
+
+# Final comum das consultas `*_top_fc`. Espera os CTEs `receita(total)` (receita
+# do mês, base do AV), `atual(categoria, valor)` e `anterior(categoria, valor)`.
+# Devolve as `:top_n` maiores categorias (por `{chave}`) e uma linha com o restante
+# (`outras`); o "anterior" do restante são as categorias do mês anterior fora do
+# top N de agora. Com o mês vazio, sai uma linha só com os totais (grupo NULL).
+_SQL_TOP_N = """
+              , ranking AS (
+                SELECT categoria, valor, {chave} AS chave,
+                       ROW_NUMBER() OVER (ORDER BY COALESCE({chave}, 0) DESC, categoria) AS posicao
+                FROM atual
+              ),
+              grupos AS (
+                SELECT LEAST(posicao, :top_n + 1) AS grupo, MIN(categoria) AS categoria,
+                       SUM(valor) AS valor, SUM(chave) AS chave
+                FROM ranking
+                GROUP BY 1
+              ),
+              anterior_grupos AS (
+                SELECT COALESCE(r.posicao, :top_n + 1) AS grupo, SUM(a.valor) AS valor, SUM({chave_anterior}) AS chave
+                FROM anterior a
+                LEFT JOIN ranking r
+                  ON r.categoria IS NOT DISTINCT FROM a.categoria
+                  AND r.posicao <= :top_n
+                GROUP BY 1
+              ),
+              totais AS (
+                SELECT
+                  (SELECT SUM(valor) FROM atual) AS total,
+                  (SELECT SUM(abs(valor)) FROM atual) AS total_absoluto,
+                  (SELECT SUM({chave}) FROM atual) AS total_chave,
+                  (SELECT SUM(valor) FROM anterior) AS total_anterior,
+                  (SELECT SUM(abs(valor)) FROM anterior) AS total_absoluto_anterior
+              )
+            SELECT
+              g.grupo,
+              g.grupo > :top_n AS outras,
+              g.categoria,
+              g.valor,
+              g.chave,
+              CASE
+                WHEN r.total IS NULL OR r.total = 0 THEN NULL
+                WHEN g.grupo > :top_n THEN g.chave / r.total * 100
+                ELSE g.valor / r.total * 100
+              END AS av,
+              CASE
+                WHEN g.grupo > :top_n THEN
+                  CASE WHEN ag.chave IS NULL OR ag.chave = 0 THEN NULL ELSE (g.chave / ag.chave - 1) * 100 END
+                ELSE
+                  CASE WHEN ag.valor IS NULL OR ag.valor = 0 THEN NULL ELSE (g.valor / ag.valor - 1) * 100 END
+              END AS ah,
+              CASE
+                WHEN t.total_chave IS NULL OR t.total_chave = 0 THEN NULL
+                WHEN g.grupo > :top_n THEN abs(g.chave) / t.total_chave * 100
+                ELSE abs(g.valor) / t.total_chave * 100
+              END AS representatividade,
+              t.total, t.total_absoluto, t.total_anterior, t.total_absoluto_anterior
+            FROM totais t
+            CROSS JOIN receita r
+            LEFT JOIN grupos g ON TRUE
+            LEFT JOIN anterior_grupos ag ON ag.grupo = g.grupo
+            ORDER BY g.grupo;
+"""
+
+# Lançamentos de um `nivel_1` somados por conta (`id_cliente`, `nivel_3_id`), no mês
+# e no mês anterior, mais a receita do mês (base do AV). Sem join com o
+# `plano_de_contas`: o `nivel_2` de cada conta vem de `PLANO_DE_CONTAS` e a soma
+# por `nivel_2` é feita em memória. O `text()` só converte as contas já agrupadas.
+_SQL_POR_CONTA = """
+            SELECT
+              f.id_cliente,
+              text(f.nivel_3_id) AS nivel_3_id,
+              SUM(f.valor) FILTER (
+                WHERE EXTRACT(YEAR FROM f.data) = :year AND EXTRACT(MONTH FROM f.data) = :month
+              ) AS valor,
+              SUM(f.valor) FILTER (
+                WHERE EXTRACT(YEAR FROM f.data) = :prev_year AND EXTRACT(MONTH FROM f.data) = :prev_month
+              ) AS valor_anterior,
+              (
+                SELECT SUM(valor)
+                FROM fc
+                WHERE id_cliente = ANY (:id_cliente)
+                  AND visao = 'Realizado'
+                  AND EXTRACT(YEAR FROM data) = :year
+                  AND EXTRACT(MONTH FROM data) = :month
+                  AND nivel_1 = '3. Receitas'
+              ) AS receita
+            FROM fc f
+            WHERE f.id_cliente = ANY (:id_cliente)
+              AND f.visao = 'Realizado'
+              AND f.nivel_1 = :nivel_1
+              AND (
+                (EXTRACT(YEAR FROM f.data) = :year AND EXTRACT(MONTH FROM f.data) = :month)
+                OR (EXTRACT(YEAR FROM f.data) = :prev_year AND EXTRACT(MONTH FROM f.data) = :prev_month)
+              )
+            GROUP BY f.id_cliente, f.nivel_3_id;
+"""
+
+
+def _preenchido(valor: Any) -> bool:
+    """Falso para NULL (None ou NaN, conforme o pandas tipou a coluna)."""
+    return valor is not None and valor == valor
+
+
+def _float(valor: Any) -> float:
+    return float(valor) if _preenchido(valor) else 0.0
+
 
 class Indicadores:
     def __init__(self, id_cliente: Union[int, List[int]], db_connection: DatabaseConnection):
         self.id_cliente = id_cliente
         self.db = db_connection
+        self._mapa_plano: Optional[Mapa] = None
+
+    def _plano_de_contas(self) -> Mapa:
+        """(id_cliente, nivel_3_id) → nivel_2, lido do cache uma vez por instância."""
+        if self._mapa_plano is None:
+            ids = self.id_cliente if isinstance(self.id_cliente, (list, tuple)) else [self.id_cliente]
+            self._mapa_plano = PLANO_DE_CONTAS.mapa(self.db, ids)
+        return self._mapa_plano
+
+    def _por_nivel_2(self, resultado: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], float]:
+        """Categorias (nivel_2) do mês, com AV e AH, e do mês anterior, a partir de `_SQL_POR_CONTA`.
+
+        AV e AH seguem as consultas antigas: None quando a base é zero ou não existe.
+        Contas sem nivel_2 também ficam sem AH: no SQL, `a.nivel_2 = p.nivel_2`
+        nunca casava NULL com o mês anterior.
+
+        Returns:
+            (categorias do mês, categorias do mês anterior, receita do mês)
+        """
+        receita = _float(resultado["receita"].iloc[0]) if not resultado.empty else 0.0
+        atual, anterior = [], []
+        for categoria, soma in somar_por_nivel_2(resultado, self._plano_de_contas()).items():
+            valor, valor_anterior = soma["valor"], soma["valor_anterior"]
+            if valor is not None:
+                atual.append({
+                    "categoria": categoria,
+                    "valor": valor,
+                    "av": valor / receita * 100 if receita else None,
+                    "ah": (valor / valor_anterior - 1) * 100 if valor_anterior and categoria is not None else None,
+                })
+            if valor_anterior is not None:
+                anterior.append({"categoria": categoria, "valor": valor_anterior})
+        return atual, anterior, receita
+
+    @staticmethod
+    def _top_n_em_memoria(atual: List[Dict[str, Any]], anterior: List[Dict[str, Any]], receita: float,
+                          top_n: int, nome_vazio: Optional[str] = None) -> Dict[str, Any]:
+        """Mesmo retorno de `_montar_top_n` (pelo valor absoluto) para categorias somadas em memória.
+
+        O ranking é o de `_SQL_TOP_N`: maior valor absoluto primeiro e, no empate,
+        a categoria em ordem alfabética (sem nivel_2 por último).
+        """
+        atual = sorted(atual, key=lambda c: (c["categoria"] is None, c["categoria"] or ""))
+        resumo = resumir_top_n(
+            [c["valor"] for c in atual], [c["categoria"] for c in atual],
+            [a["valor"] for a in anterior], [a["categoria"] for a in anterior],
+            receita_total=receita, top_n=top_n, usar_valor_abs=True,
+            av=[c["av"] for c in atual], ah=[c["ah"] for c in atual],
+        )
+        subcategorias = [
+            {
+                "subcategoria": atual[i]["categoria"] if atual[i]["categoria"] is not None or nome_vazio is None else nome_vazio,
+                "valor": valor,
+                "av": round(av, 2),
+                "ah": round(ah, 2),
+                "representatividade": round(representatividade, 2),
+            }
+            for i, valor, av, ah, representatividade in zip(
+                resumo["indices"], resumo["valor"], resumo["av"], resumo["ah"], resumo["representatividade"]
+            )
+        ]
+        outras = resumo["outras"]
+        if outras["valor"] != 0:
+            subcategorias.append({
+                "subcategoria": "Outras categorias",
+                "valor": -outras["valor"],
+                "av": round(outras["av"], 2),
+                "ah": round(outras["ah"], 2),
+                "representatividade": round(outras["representatividade"], 2),
+            })
+        return {
+            "subcategorias": subcategorias,
+            "total": sum(c["valor"] for c in atual),
+            "total_absoluto": sum(abs(c["valor"]) for c in atual),
+            "total_anterior": sum(a["valor"] for a in anterior),
+            "total_absoluto_anterior": sum(abs(a["valor"]) for a in anterior),
+        }
+
+    @staticmethod
+    def _sql_top_n(ctes: str, usar_valor_abs: bool) -> Any:
+        """Consulta `*_top_fc`: os CTEs do método seguidos do ranking comum (`_SQL_TOP_N`)."""
+        return text(ctes + _SQL_TOP_N.format(
+            chave="abs(valor)" if usar_valor_abs else "valor",
+            chave_anterior="abs(a.valor)" if usar_valor_abs else "a.valor",
+        ))
+
+    @staticmethod
+    def _montar_top_n(resultado: Any, usar_valor_abs: bool) -> Dict[str, Any]:
+        """Converte o resultado de `_SQL_TOP_N` no formato de `calcular_outras_categorias` mais os totais."""
+        subcategorias = []
+        totais = {"total": 0.0, "total_absoluto": 0.0, "total_anterior": 0.0, "total_absoluto_anterior": 0.0}
+        for _, row in resultado.iterrows():
+            totais = {chave: _float(row[chave]) for chave in totais}
+            if not _preenchido(row["grupo"]):  # mês sem lançamentos
+                continue
+            representatividade = row["representatividade"]
+            representatividade = round(float(representatividade), 2) if _preenchido(representatividade) else 0
+            if row["outras"]:
+                chave = _float(row["chave"])
+                if chave != 0:
+                    subcategorias.append({
+                        "subcategoria": "Outras categorias",
+                        "valor": -chave if usar_valor_abs else chave,
+                        "av": round(_float(row["av"]), 2),
+                        "ah": round(_float(row["ah"]), 2),
+                        "representatividade": representatividade,
+                    })
+                continue
+            subcategorias.append({
+                "subcategoria": row["categoria"],
+                "valor": _float(row["valor"]),
+                "av": round(_float(row["av"]), 2),
+                "ah": round(_float(row["ah"]), 2),
+                "representatividade": representatividade,
+            })
+        return {"subcategorias": subcategorias, **totais}
 
 # Relatório 1 (no relatorio esta inverso, receitas primeiro depois custos variaveis)
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_custos_variaveis_fc(self, mes: date, categoria_nivel_3: str) -> List[Dict[str, Any]]:
         """Calcula os 5 maiores totais de custos variáveis por nivel_2 em um mês.
 
@@ -31,62 +256,10 @@ class Indicadores:
         if not isinstance(categoria_nivel_3, str):
             raise ValueError("O parâmetro 'categoria_nivel_3' deve ser uma string.")
 
-        query = text("""
-            WITH 
-                receita AS (
-                    SELECT SUM(valor) AS total_receita
-                    FROM fc
-                    WHERE id_cliente = ANY (:id_cliente)
-                      AND visao = 'Realizado'
-                      AND EXTRACT(YEAR FROM data) = :year
-                      AND EXTRACT(MONTH FROM data) = :month
-                      AND nivel_1 = '3. Receitas'
-                ),
-                prev_custos AS (
-                    SELECT 
-                        p.nivel_2 AS categoria,
-                        SUM(f.valor) AS prev_valor
-                    FROM fc f
-                    JOIN plano_de_contas p
-                        ON f.id_cliente = p.id_cliente
-                        AND text(f.nivel_3_id) = p.nivel_3_id
-                    WHERE f.id_cliente = ANY (:id_cliente)
-                      AND f.visao = 'Realizado'
-                      AND f.nivel_1 = '4. Custos Variáveis'
-                      AND f.data < DATE_TRUNC('month', MAKE_DATE(:year, :month, 1))
-                      AND f.data >= DATE_TRUNC('month', MAKE_DATE(:year, :month, 1) - INTERVAL '1 month')
-                    GROUP BY p.nivel_2
-                )
-            SELECT 
-                p.nivel_2 AS nivel_2,
-                SUM(f.valor) AS total_categoria,
-                CASE 
-                    WHEN r.total_receita = 0 THEN NULL 
-                    ELSE SUM(f.valor) / r.total_receita * 100
-                END AS av,
-                CASE 
-                    WHEN prev.prev_valor IS NULL OR prev.prev_valor = 0 THEN NULL 
-                    ELSE (SUM(f.valor) / prev.prev_valor - 1) * 100
-                END AS ah
-            FROM fc f
-            JOIN plano_de_contas p
-                ON f.id_cliente = p.id_cliente
-                AND text(f.nivel_3_id) = p.nivel_3_id
-            CROSS JOIN receita r
-            LEFT JOIN prev_custos prev 
-                ON prev.categoria = p.nivel_2
-            WHERE f.id_cliente = ANY (:id_cliente)
-                AND f.visao = 'Realizado'
-                AND f.nivel_1 = '4. Custos Variáveis'
-                AND EXTRACT(YEAR FROM f.data) = :year
-                AND EXTRACT(MONTH FROM f.data) = :month
-            GROUP BY p.nivel_2, r.total_receita, prev.prev_valor
-            ORDER BY total_categoria ASC;
-            
-        """)
-
+        query = text(_SQL_POR_CONTA)
         params = {
             "id_cliente": self.id_cliente,
+            "nivel_1": "4. Custos Variáveis",
             "year": mes.year,
             "month": mes.month,
             "prev_year": mes.year if mes.month > 1 else mes.year - 1,
@@ -95,18 +268,20 @@ class Indicadores:
 
         try:
             resultado = self.db.execute_query(query, params)
+            atual, _, _ = self._por_nivel_2(resultado)
             return [
                 {
-                    "nivel_2": row["nivel_2"] or "Desconhecido",
-                    "total_categoria": float(row["total_categoria"]) if row["total_categoria"] is not None else 0,
-                    "av": float(row["av"]) if row["av"] is not None else 0,
-                    "ah": float(row["ah"]) if row["ah"] is not None else 0
+                    "nivel_2": c["categoria"] or "Desconhecido",
+                    "total_categoria": c["valor"],
+                    "av": c["av"] if c["av"] is not None else 0,
+                    "ah": c["ah"] if c["ah"] is not None else 0
                 }
-                for _, row in resultado.iterrows()
-            ] if not resultado.empty else []
+                for c in sorted(atual, key=lambda c: c["valor"])
+            ]
         except Exception as e:
             raise RuntimeError(f"Erro ao calcular custos variáveis: {str(e)}")
 
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_receitas_fc(self, mes: date, categoria_nivel_3: str) -> List[Dict[str, Any]]:
         """Calcula os 5 maiores totais de receitas por categoria_nivel_3 em um mês.
 
@@ -187,16 +362,125 @@ class Indicadores:
             return [
                 {
                     "categoria_nivel_3": row["categoria_nivel_3"],
-                    "total_categoria": float(row["total_categoria"]) if row["total_categoria"] is not None else 0,
-                    "av": float(row["av"]) if row["av"] is not None else 0,
-                    "ah": float(row["ah"]) if row["ah"] is not None else 0
+                    "total_categoria": _float(row["total_categoria"]),
+                    "av": _float(row["av"]),
+                    "ah": _float(row["ah"])
                 }
                 for _, row in resultado.iterrows()
             ] if not resultado.empty else []
         except Exception as e:
             raise RuntimeError(f"Erro ao calcular receitas: {str(e)}")
-            
+
+    @medir_metodo(INDICADORES_DURACAO)
+    def calcular_receitas_top_fc(self, mes: date, mes_anterior: Optional[date] = None,
+                                 top_n: int = 3) -> Dict[str, Any]:
+        """Top N receitas por categoria_nivel_3 e o restante agrupado, calculados no banco.
+
+        Variante de `calcular_receitas_fc` + `calcular_outras_categorias`: só as
+        `top_n` categorias e a linha "Outras categorias" saem do banco, com AV
+        (sobre a receita do mês) e AH (contra o mês anterior) já calculados.
+
+        Args:
+            mes: Data do mês a ser calculado.
+            mes_anterior: Mês de comparação do AH (padrão: o mês anterior a `mes`).
+            top_n: Número de categorias principais.
+
+        Returns:
+            Dicionário com 'subcategorias' (mesmo formato de `calcular_outras_categorias`),
+            'total' e 'total_absoluto' do mês e 'total_anterior' e 'total_absoluto_anterior'
+            do mês anterior (somas de todas as categorias).
+
+        Raises:
+            ValueError: Se os parâmetros forem inválidos.
+            RuntimeError: Se houver erro na execução da consulta.
+        """
+        if not isinstance(mes, date):
+            raise ValueError("O parâmetro 'mes' deve ser um objeto date.")
+        if mes_anterior is None:
+            mes_anterior = date(mes.year if mes.month > 1 else mes.year - 1, mes.month - 1 if mes.month > 1 else 12, 1)
+
+        query = self._sql_top_n("""
+            WITH
+              receita AS (
+                SELECT SUM(valor) AS total
+                FROM fc
+                WHERE id_cliente = ANY (:id_cliente)
+                  AND visao = 'Realizado'
+                  AND EXTRACT(YEAR FROM data) = :year
+                  AND EXTRACT(MONTH FROM data) = :month
+                  AND nivel_1 = '3. Receitas'
+              ),
+              atual AS (
+                SELECT categoria_nivel_3 AS categoria, SUM(valor) AS valor
+                FROM fc
+                WHERE id_cliente = ANY (:id_cliente)
+                  AND visao = 'Realizado'
+                  AND EXTRACT(YEAR FROM data) = :year
+                  AND EXTRACT(MONTH FROM data) = :month
+                  AND nivel_1 = '3. Receitas'
+                GROUP BY categoria_nivel_3
+              ),
+              anterior AS (
+                SELECT categoria_nivel_3 AS categoria, SUM(valor) AS valor
+                FROM fc
+                WHERE id_cliente = ANY (:id_cliente)
+                  AND visao = 'Realizado'
+                  AND EXTRACT(YEAR FROM data) = :prev_year
+                  AND EXTRACT(MONTH FROM data) = :prev_month
+                  AND nivel_1 = '3. Receitas'
+                GROUP BY categoria_nivel_3
+              )
+        """, usar_valor_abs=False)
+
+        params = {
+            "id_cliente": self.id_cliente,
+            "year": mes.year,
+            "month": mes.month,
+            "prev_year": mes_anterior.year,
+            "prev_month": mes_anterior.month,
+            "top_n": top_n,
+        }
+
+        try:
+            resultado = self.db.execute_query(query, params)
+            return self._montar_top_n(resultado, usar_valor_abs=False)
+        except Exception as e:
+            raise RuntimeError(f"Erro ao calcular receitas: {str(e)}")
+
+    @medir_metodo(INDICADORES_DURACAO)
+    def calcular_custos_variaveis_top_fc(self, mes: date, mes_anterior: Optional[date] = None,
+                                         top_n: int = 3) -> Dict[str, Any]:
+        """Top N custos variáveis por nivel_2 (pelo valor absoluto) e o restante agrupado.
+
+        Mesmo retorno de `calcular_receitas_top_fc`. Uma consulta soma o mês e o
+        mês anterior por conta (`_SQL_POR_CONTA`, sem join com o plano de
+        contas); o nivel_2 vem de `PLANO_DE_CONTAS` e o ranking é feito em
+        memória (`resumir_top_n`). Categorias sem nivel_2 aparecem como "Desconhecido".
+        """
+        if not isinstance(mes, date):
+            raise ValueError("O parâmetro 'mes' deve ser um objeto date.")
+        if mes_anterior is None:
+            mes_anterior = date(mes.year if mes.month > 1 else mes.year - 1, mes.month - 1 if mes.month > 1 else 12, 1)
+
+        query = text(_SQL_POR_CONTA)
+        params = {
+            "id_cliente": self.id_cliente,
+            "nivel_1": "4. Custos Variáveis",
+            "year": mes.year,
+            "month": mes.month,
+            "prev_year": mes_anterior.year,
+            "prev_month": mes_anterior.month,
+        }
+
+        try:
+            resultado = self.db.execute_query(query, params)
+            atual, anterior, receita = self._por_nivel_2(resultado)
+            return self._top_n_em_memoria(atual, anterior, receita, top_n, nome_vazio="Desconhecido")
+        except Exception as e:
+            raise RuntimeError(f"Erro ao calcular custos variáveis: {str(e)}")
+
 # Relatorio 2
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_lucro_bruto_fc(self, mes: date) -> List[Dict[str, Any]]:
         """Calcula as categorias de Lucro Bruto (Receitas e Custos Variáveis) do fluxo de caixa (fc) com AV e AH.
 
@@ -289,6 +573,7 @@ class Indicadores:
         except Exception as e:
             raise RuntimeError(f"Erro ao calcular lucro bruto: {str(e)}")
 
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_despesas_fixas_fc(self, mes: date) -> List[Dict[str, Any]]:
         """Calcula as despesas fixas do fluxo de caixa (fc) por categoria nivel_2 com AV e AH.
 
@@ -298,60 +583,10 @@ class Indicadores:
         Returns:
             Lista de dicionários com 'categoria', 'valor', 'av' (análise vertical), e 'ah' (análise horizontal).
         """
-        query = text("""
-            WITH 
-              receita AS (
-                SELECT SUM(valor) AS total_receita
-                FROM fc
-                WHERE id_cliente = ANY (:id_cliente)
-                  AND visao = 'Realizado'
-                  AND EXTRACT(YEAR FROM data) = :year
-                  AND EXTRACT(MONTH FROM data) = :month
-                  AND nivel_1 = '3. Receitas'
-              ),
-              prev_despesas AS (
-                SELECT 
-                  p.nivel_2 AS categoria_nivel_2,
-                  SUM(f.valor) AS prev_valor
-                FROM fc f
-                JOIN plano_de_contas p
-                  ON f.id_cliente = p.id_cliente
-                  AND text(f.nivel_3_id) = p.nivel_3_id
-                WHERE f.id_cliente = ANY (:id_cliente)
-                  AND f.visao = 'Realizado'
-                  AND f.nivel_1 = '5. Despesas Fixas'
-                  AND EXTRACT(YEAR FROM f.data) = :prev_year
-                  AND EXTRACT(MONTH FROM f.data) = :prev_month
-                GROUP BY p.nivel_2
-              )
-            SELECT 
-              p.nivel_2 AS categoria_nivel_2,
-              SUM(f.valor) AS total_valor,
-              CASE 
-                WHEN r.total_receita = 0 THEN NULL 
-                ELSE SUM(f.valor) / r.total_receita * 100
-              END AS av,
-              CASE 
-                WHEN prev.prev_valor IS NULL OR prev.prev_valor = 0 THEN NULL 
-                ELSE (SUM(f.valor) / prev.prev_valor - 1) * 100
-              END AS ah
-            FROM fc f
-            JOIN plano_de_contas p
-              ON f.id_cliente = p.id_cliente
-              AND text(f.nivel_3_id) = p.nivel_3_id
-            CROSS JOIN receita r
-            LEFT JOIN prev_despesas prev 
-              ON prev.categoria_nivel_2 = p.nivel_2
-            WHERE f.id_cliente = ANY (:id_cliente)
-              AND f.visao = 'Realizado'
-              AND f.nivel_1 = '5. Despesas Fixas'
-              AND EXTRACT(YEAR FROM f.data) = :year
-              AND EXTRACT(MONTH FROM f.data) = :month
-            GROUP BY p.nivel_2, r.total_receita, prev.prev_valor
-            ORDER BY total_valor ASC;
-        """)
+        query = text(_SQL_POR_CONTA)
         params = {
             "id_cliente": self.id_cliente,
+            "nivel_1": "5. Despesas Fixas",
             "year": mes.year,
             "month": mes.month,
             "prev_year": mes.year if mes.month > 1 else mes.year - 1,
@@ -359,19 +594,51 @@ class Indicadores:
         }
         try:
             result = self.db.execute_query(query, params)
+            atual, _, _ = self._por_nivel_2(result)
             return [
                 {
-                    "categoria": row["categoria_nivel_2"],
-                    "valor": float(row["total_valor"]) if row["total_valor"] is not None else 0,
-                    "av": float(row["av"]) if row["av"] is not None else 0,
-                    "ah": float(row["ah"]) if row["ah"] is not None else 0
+                    "categoria": c["categoria"],
+                    "valor": c["valor"],
+                    "av": c["av"] if c["av"] is not None else 0,
+                    "ah": c["ah"] if c["ah"] is not None else 0
                 }
-                for _, row in result.iterrows()
-            ] if not result.empty else []
+                for c in sorted(atual, key=lambda c: c["valor"])
+            ]
         except Exception as e:
             raise RuntimeError(f"Erro ao calcular despesas fixas: {str(e)}")
-        
+
+    @medir_metodo(INDICADORES_DURACAO)
+    def calcular_despesas_fixas_top_fc(self, mes: date, mes_anterior: Optional[date] = None,
+                                       top_n: int = 3) -> Dict[str, Any]:
+        """Top N despesas fixas por nivel_2 (pelo valor absoluto) e o restante agrupado.
+
+        Mesmo retorno de `calcular_receitas_top_fc`; consulta e ranking como em
+        `calcular_custos_variaveis_top_fc`.
+        """
+        if not isinstance(mes, date):
+            raise ValueError("O parâmetro 'mes' deve ser um objeto date.")
+        if mes_anterior is None:
+            mes_anterior = date(mes.year if mes.month > 1 else mes.year - 1, mes.month - 1 if mes.month > 1 else 12, 1)
+
+        query = text(_SQL_POR_CONTA)
+        params = {
+            "id_cliente": self.id_cliente,
+            "nivel_1": "5. Despesas Fixas",
+            "year": mes.year,
+            "month": mes.month,
+            "prev_year": mes_anterior.year,
+            "prev_month": mes_anterior.month,
+        }
+
+        try:
+            resultado = self.db.execute_query(query, params)
+            atual, anterior, receita = self._por_nivel_2(resultado)
+            return self._top_n_em_memoria(atual, anterior, receita, top_n)
+        except Exception as e:
+            raise RuntimeError(f"Erro ao calcular despesas fixas: {str(e)}")
+
 #Relatorio 3
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_lucro_operacional_fc(self, mes_atual: date, mes_anterior: Optional[date] = None) -> List[Dict[str, Any]]:
         """Calcula Receita, Custos Variáveis, Despesas Fixas, AV e AH para o Lucro Operacional."""
         query = text("""
@@ -463,74 +730,25 @@ class Indicadores:
         result = self.db.execute_query(query, params)
         return result.to_dict('records') # type: ignore
 
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_investimentos_fc(self, mes_atual: date, mes_anterior: Optional[date] = None) -> List[Dict[str, Any]]:
           """Calcula categorias de Investimentos (nivel_2 6.1, 6.2, 6.3), com AV e AH."""
-          query = text("""
-              WITH 
-                receita AS (
-                  SELECT SUM(valor) AS total_receita
-                  FROM fc
-                  WHERE id_cliente = ANY (:id_cliente)
-                    AND visao = 'Realizado'
-                    AND EXTRACT(YEAR FROM data) = :ano_atual
-                    AND EXTRACT(MONTH FROM data) = :mes_atual
-                    AND nivel_1 = '3. Receitas'
-                ),
-                prev_custos AS (
-                  SELECT 
-                    p.nivel_2 AS categoria,
-                    SUM(f.valor) AS prev_valor
-                  FROM fc f
-                  JOIN plano_de_contas p
-                    ON f.id_cliente = p.id_cliente
-                    AND text(f.nivel_3_id) = p.nivel_3_id
-                  WHERE f.id_cliente = ANY (:id_cliente)
-                    AND f.visao = 'Realizado'
-                    AND f.nivel_1 = '6. Investimentos'
-                    AND EXTRACT(YEAR FROM f.data) = :ano_anterior
-                    AND EXTRACT(MONTH FROM f.data) = :mes_anterior
-                    AND p.nivel_2 LIKE 
-                      '6.%'
-                  GROUP BY p.nivel_2
-                )
-              SELECT 
-                p.nivel_2 AS categoria,
-                SUM(f.valor) AS valor,
-                CASE 
-                  WHEN r.total_receita = 0 THEN NULL 
-                  ELSE SUM(f.valor) / r.total_receita * 100
-                END AS av,
-                CASE 
-                  WHEN prev.prev_valor IS NULL OR prev.prev_valor = 0 THEN NULL 
-                  ELSE (SUM(f.valor) / prev.prev_valor - 1) * 100
-                END AS ah
-              FROM fc f
-              JOIN plano_de_contas p
-                ON f.id_cliente = p.id_cliente
-                AND text(f.nivel_3_id) = p.nivel_3_id
-              CROSS JOIN receita r
-              LEFT JOIN prev_custos prev 
-                ON prev.categoria = p.nivel_2
-              WHERE f.id_cliente = ANY (:id_cliente)
-                AND f.visao = 'Realizado'
-                AND f.nivel_1 = '6. Investimentos'
-                AND EXTRACT(YEAR FROM f.data) = :ano_atual
-                AND EXTRACT(MONTH FROM f.data) = :mes_atual
-                AND p.nivel_2 LIKE '6.%' 
-              GROUP BY p.nivel_2, r.total_receita, prev.prev_valor
-              ORDER BY valor DESC;
-          """)
+          query = text(_SQL_POR_CONTA)
           params = {
               "id_cliente": self.id_cliente,
-              "ano_atual": mes_atual.year,
-              "mes_atual": mes_atual.month,
-              "ano_anterior": mes_anterior.year if mes_anterior else mes_atual.year,
-              "mes_anterior": mes_anterior.month if mes_anterior else mes_atual.month
+              "nivel_1": "6. Investimentos",
+              "year": mes_atual.year,
+              "month": mes_atual.month,
+              "prev_year": mes_anterior.year if mes_anterior else mes_atual.year,
+              "prev_month": mes_anterior.month if mes_anterior else mes_atual.month
           }
           result = self.db.execute_query(query, params)
-          return result.to_dict('records') # type: ignore
+          atual, _, _ = self._por_nivel_2(result)
+          investimentos = [c for c in atual if c["categoria"] is not None and c["categoria"].startswith("6.")]
+          return sorted(investimentos, key=lambda c: c["valor"], reverse=True)
         
   # Relatorio 4      
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_lucro_liquido_fc(self, mes: date) -> List[Dict[str, Any]]:
       """Calcula as categorias que compõem o Lucro Líquido (Receita, Custos Variáveis, Despesas Fixas, Investimentos) do fluxo de caixa (fc).
 
@@ -657,6 +875,7 @@ class Indicadores:
       except Exception as e:
           raise RuntimeError(f"Erro ao calcular lucro líquido: {str(e)}")
 
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_entradas_nao_operacionais_fc(self, mes: date) -> List[Dict[str, Any]]:
         """Calcula as Entradas Não Operacionais do fluxo de caixa (fc) por categoria_nivel_3 com AV e AH.
 
@@ -745,6 +964,7 @@ class Indicadores:
             raise RuntimeError(f"Erro ao calcular entradas não operacionais: {str(e)}")
           
 # Relatorio 5
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_saidas_nao_operacionais_fc(self, mes: date) -> List[Dict[str, Any]]:
         """Calcula o total de Saídas Não Operacionais do fluxo de caixa (fc).
 
@@ -782,6 +1002,7 @@ class Indicadores:
         except Exception as e:
             raise RuntimeError(f"Erro ao calcular saídas não operacionais: {str(e)}")
           
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_resultados_nao_operacionais_fc(self, mes: date) -> List[Dict[str, Any]]:
       """Calcula o Resultado Não Operacional (Entradas - Saídas) do fluxo de caixa por nivel_1 com AV e AH.
 
@@ -872,6 +1093,7 @@ class Indicadores:
           raise RuntimeError(f"Erro ao calcular resultado não operacional: {str(e)}")
 
 
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_geracao_de_caixa_fc(self, mes: date) -> List[Dict[str, Any]]:
         """Calcula as categorias que compõem a Geração de Caixa do fluxo de caixa (fc).
 
@@ -1079,6 +1301,7 @@ class Indicadores:
         except Exception as e:
             raise RuntimeError(f"Erro ao calcular geração de caixa: {str(e)}")
 
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_geracao_de_caixa_temporal_fc(self, mes_atual: date) -> List[Dict[str, Any]]:
         """Calcula a Geração de Caixa dos últimos 3 meses e a análise horizontal (ah) em relação ao mês anterior.
 
@@ -1140,6 +1363,7 @@ class Indicadores:
 
 #relatorio 6
 
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_indicadores_dre(self, mes: date) -> List[Dict[str, Any]]:
             """Calcula os indicadores financeiros do DRE para um mês específico.
 
@@ -1263,6 +1487,7 @@ class Indicadores:
             return indicadores
 
   #indicadores do b.i:
+    @medir_metodo(INDICADORES_DURACAO)
     def calcular_indicadores_operacionais(self, mes: date) -> List[Dict[str, Any]]:
         """Calcula os indicadores operacionais e seus valores para um cliente e mês específico, somando valores de indicadores com o mesmo nome.
 
@@ -0,0 +1,176 @@
+# src/core/jobs.py
+"""
+Fila de jobs em memória para geração de relatórios em segundo plano.
+
+O HTTP só enfileira o pedido e devolve o `job_id`; um número fixo de workers
+consome a fila (limitada) e registra status, andamento por etapa e erros de
+cada job, que podem ser consultados a qualquer momento.
+"""
+import contextvars
+import logging
+import queue
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Status possíveis de um job
+STATUS_NA_FILA = "na_fila"
+STATUS_PROCESSANDO = "processando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+
+class FilaCheiaError(RuntimeError):
+    """Lançada quando a fila de jobs atingiu o limite configurado."""
+
+
+class Job:
+    """Estado de um job de geração (status, etapas, erro e resultado)."""
+
+    def __init__(self, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.status = STATUS_NA_FILA
+        self.etapas: List[Dict[str, Any]] = []
+        self.erro: Optional[str] = None
+        self.excecao: Optional[Exception] = None
+        self.resultado: Any = None
+        self.criado_em = time.time()
+        self.iniciado_em: Optional[float] = None
+        self.concluido_em: Optional[float] = None
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        # Contexto de quem submeteu (ex.: span da requisição), para o job continuar o trace
+        self._contexto = contextvars.copy_context()
+        self._lock = threading.Lock()
+
+    def registrar_progresso(self, etapa: str, status: str) -> None:
+        """Callback de progresso: atualiza (ou cria) a etapa informada."""
+        agora = time.time()
+        with self._lock:
+            for item in self.etapas:
+                if item["etapa"] == etapa:
+                    item["status"] = status
+                    if status != "iniciado":
+                        item["fim"] = agora
+                    return
+            self.etapas.append({
+                "etapa": etapa,
+                "status": status,
+                "inicio": agora,
+                "fim": None if status == "iniciado" else agora,
+            })
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in (STATUS_CONCLUIDO, STATUS_ERRO)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representação serializável (usada pelo endpoint de status)."""
+        with self._lock:
+            etapas = [dict(e) for e in self.etapas]
+        concluidas = sum(1 for e in etapas if e["status"] != "iniciado")
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "erro": self.erro,
+            "criado_em": self.criado_em,
+            "iniciado_em": self.iniciado_em,
+            "concluido_em": self.concluido_em,
+            "etapas": etapas,
+            "etapas_concluidas": concluidas,
+        }
+
+
+class GerenciadorJobs:
+    """
+    Executa funções em workers de segundo plano a partir de uma fila limitada.
+
+    A função submetida recebe o kwarg `progresso` (ligado ao `Job`) e seu
+    retorno fica disponível em `job.resultado`.
+    """
+
+    def __init__(self, max_workers: int = 2, tamanho_fila: int = 50, retencao_segundos: float = 3600):
+        self.max_workers = max_workers
+        self.retencao_segundos = retencao_segundos
+        self._fila: "queue.Queue[Job]" = queue.Queue(maxsize=tamanho_fila)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    def _iniciar_workers(self) -> None:
+        """Sobe os workers na primeira submissão (evita threads em imports)."""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                t = threading.Thread(target=self._worker, name=f"jobs-worker-{i}", daemon=True)
+                t.start()
+                self._workers.append(t)
+
+    def submeter(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Job:
+        """Enfileira `func(*args, progresso=..., **kwargs)` e devolve o job criado.
+
+        Raises:
+            FilaCheiaError: Se a fila estiver no limite.
+        """
+        self._limpar_expirados()
+        self._iniciar_workers()
+        job = Job(func, args, kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._fila.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise FilaCheiaError("Fila de geração cheia, tente novamente em instantes.")
+        logger.info(f"Job {job.id} enfileirado ({self._fila.qsize()} na fila)")
+        return job
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def tamanho_fila(self) -> int:
+        return self._fila.qsize()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._fila.get()
+            try:
+                self._executar(job)
+            finally:
+                self._fila.task_done()
+
+    def _executar(self, job: Job) -> None:
+        job.status = STATUS_PROCESSANDO
+        job.iniciado_em = time.time()
+        try:
+            job.resultado = job._contexto.run(
+                job._func, *job._args, progresso=job.registrar_progresso, **job._kwargs
+            )
+            job.status = STATUS_CONCLUIDO
+            logger.info(f"Job {job.id} concluído em {time.time() - job.iniciado_em:.2f}s")
+        except Exception as e:
+            job.erro = str(e)
+            job.excecao = e
+            job.status = STATUS_ERRO
+            logger.error(f"Job {job.id} falhou: {e}\n{traceback.format_exc()}")
+        finally:
+            job.concluido_em = time.time()
+
+    def _limpar_expirados(self) -> None:
+        """Remove jobs finalizados há mais tempo que a retenção configurada."""
+        limite = time.time() - self.retencao_segundos
+        with self._lock:
+            expirados = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finalizado and job.concluido_em and job.concluido_em < limite
+            ]
+            for job_id in expirados:
+                del self._jobs[job_id]
@@ -0,0 +1,146 @@
+# src/core/lote.py
+"""
+Geração em lote: vários clientes em uma única chamada, entregues como ZIP.
+
+Todos os clientes do lote compartilham a mesma `DatabaseConnection` (pool do
+SQLAlchemy), a lista de clientes carregada uma única vez, os renderizadores e
+os PDFs estáticos já parseados. Os clientes rodam em paralelo sob um limite e
+cada PDF entra no ZIP assim que fica pronto (streaming).
+"""
+import io
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.database.db_utils import DatabaseConnection, buscar_clientes
+from src.core.pipeline import gerar_relatorio_pdf
+
+logger = logging.getLogger(__name__)
+
+
+class _BufferZip(io.RawIOBase):
+    """Stream somente-escrita (não pesquisável) que acumula os bytes do ZIP
+    para serem entregues em pedaços pelo gerador de streaming."""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self._posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        dados = bytes(b)
+        self._partes.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def consumir(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def _gerar_cliente(id_cliente: int, mes: int, ano: int, relatorios: List[int],
+                   output_dir: str, db: DatabaseConnection,
+                   clientes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Gera o PDF de um cliente e devolve o resultado (sem lançar exceções)."""
+    inicio = time.time()
+    try:
+        pdf_path, filename = gerar_relatorio_pdf(
+            [id_cliente], mes, ano, relatorios,
+            output_dir=os.path.join(output_dir, str(id_cliente)),
+            db=db, clientes=clientes,
+        )
+        return {"id_cliente": id_cliente, "status": "ok", "arquivo": filename,
+                "pdf_path": pdf_path, "tempo_s": round(time.time() - inicio, 2)}
+    except Exception as e:
+        logger.error(f"Lote: falha ao gerar cliente {id_cliente}: {e}")
+        return {"id_cliente": id_cliente, "status": "erro", "erro": str(e),
+                "tempo_s": round(time.time() - inicio, 2)}
+
+
+def gerar_lote_zip(
+    ids_clientes: Optional[List[int]],
+    mes: int,
+    ano: int,
+    relatorios: List[int],
+    concorrencia: int = 3,
+    output_dir: str = os.path.join("outputs", "lote"),
+) -> Iterator[bytes]:
+    """
+    Gera os relatórios de vários clientes e produz os bytes de um ZIP à medida
+    que cada PDF termina.
+
+    Args:
+        ids_clientes: IDs a gerar; None gera todos os clientes ativos.
+        mes: Mês (1-12).
+        ano: Ano.
+        relatorios: IDs dos relatórios (1 a 8).
+        concorrencia: Quantos clientes são processados ao mesmo tempo.
+        output_dir: Pasta temporária do lote (removida ao final).
+
+    Yields:
+        Pedaços do arquivo ZIP. O último item do ZIP é `resumo.json` com o
+        status e o tempo de cada cliente.
+    """
+    db = DatabaseConnection()
+    clientes = buscar_clientes(db) or []
+    if ids_clientes is None:
+        ids_clientes = [c["id_cliente"] for c in clientes]
+
+    lote_dir = os.path.join(output_dir, uuid.uuid4().hex)
+    buffer = _BufferZip()
+    resumo: List[Dict[str, Any]] = []
+    nomes_usados = set()
+    inicio = time.time()
+
+    # Sem `with`: se o cliente desconectar (GeneratorExit no `yield`), o `finally`
+    # cancela os clientes que ainda não começaram em vez de esperar todos renderizarem.
+    executor = ThreadPoolExecutor(max_workers=max(1, concorrencia), thread_name_prefix="lote")
+    futures: List[Any] = []
+    try:
+        with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+            futures = [
+                executor.submit(_gerar_cliente, cid, mes, ano, relatorios, lote_dir, db, clientes)
+                for cid in ids_clientes
+            ]
+            for future in as_completed(futures):
+                resultado = future.result()
+                pdf_path = resultado.pop("pdf_path", None)
+                if pdf_path:
+                    # Clientes homônimos não podem sobrescrever um ao outro no ZIP
+                    if resultado["arquivo"] in nomes_usados:
+                        resultado["arquivo"] = f"{resultado['id_cliente']}_{resultado['arquivo']}"
+                    nomes_usados.add(resultado["arquivo"])
+                    zf.write(pdf_path, arcname=resultado["arquivo"])
+                    os.remove(pdf_path)
+                resumo.append(resultado)
+                yield buffer.consumir()
+
+            total = time.time() - inicio
+            logger.info(
+                f"Lote concluído: {len(ids_clientes)} clientes em {total:.2f}s "
+                f"({total / max(1, len(ids_clientes)):.2f}s por cliente)"
+            )
+            zf.writestr("resumo.json", json.dumps(
+                {"mes": mes, "ano": ano, "tempo_total_s": round(total, 2), "clientes": resumo},
+                ensure_ascii=False, indent=2,
+            ))
+        yield buffer.consumir()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(lote_dir, ignore_errors=True)
+        # Os clientes já em renderização terminam em segundo plano e limpam a pasta de novo
+        for future in futures:
+            if not future.done():
+                future.add_done_callback(lambda _: shutil.rmtree(lote_dir, ignore_errors=True))
@@ -0,0 +1,225 @@
+# src/core/metricas.py
+"""
+Métricas do pipeline no formato texto do Prometheus (exposto em `/v1/metrics`).
+
+Implementação mínima e sem dependências: contadores, histogramas e gauges com
+labels, seguros entre threads. Os valores são por processo (cada worker do
+uvicorn expõe os seus).
+"""
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Buckets padrão de latência (segundos), do milissegundo ao minuto
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_labels(nomes: Iterable[str], valores: Iterable[str], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _chave(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def _amostras(self) -> List[str]:
+        raise NotImplementedError
+
+    def exportar(self) -> str:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas.extend(self._amostras())
+        return "\n".join(linhas)
+
+
+class Contador(_Metrica):
+    """Contador monotônico."""
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = ()):
+        super().__init__(nome, descricao, labels)
+        self._valores: Dict[LabelValues, float] = {}
+
+    def inc(self, valor: float = 1.0, **labels: str) -> None:
+        chave = self._chave(labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def valor(self, **labels: str) -> float:
+        with self._lock:
+            return self._valores.get(self._chave(labels), 0.0)
+
+    def _amostras(self) -> List[str]:
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return [f"{self.nome}{_formatar_labels(self.labels, k)} {_formatar_numero(v)}" for k, v in itens]
+
+
+class Histograma(_Metrica):
+    """Histograma cumulativo de durações."""
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = BUCKETS_LATENCIA):
+        super().__init__(nome, descricao, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}  # [contagens por bucket..., soma, total]
+
+    def observar(self, valor: float, **labels: str) -> None:
+        chave = self._chave(labels)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [0.0] * (len(self.buckets) + 2)
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    @contextmanager
+    def cronometrar(self, **labels: str) -> Iterator[None]:
+        """Mede o tempo do bloco (mesmo se ele lançar exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **labels)
+
+    def contagem(self, **labels: str) -> int:
+        with self._lock:
+            serie = self._series.get(self._chave(labels))
+            return int(serie[-1]) if serie else 0
+
+    def _amostras(self) -> List[str]:
+        with self._lock:
+            itens = sorted((k, list(v)) for k, v in self._series.items())
+        linhas = []
+        le_inf = 'le="+Inf"'
+        for chave, serie in itens:
+            for limite, contagem in zip(self.buckets, serie):
+                le = f'le="{_formatar_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_labels(self.labels, chave, le)} {_formatar_numero(contagem)}")
+            linhas.append(f"{self.nome}_bucket{_formatar_labels(self.labels, chave, le_inf)} {_formatar_numero(serie[-1])}")
+            linhas.append(f"{self.nome}_sum{_formatar_labels(self.labels, chave)} {_formatar_numero(serie[-2])}")
+            linhas.append(f"{self.nome}_count{_formatar_labels(self.labels, chave)} {_formatar_numero(serie[-1])}")
+        return linhas
+
+
+class Gauge(_Metrica):
+    """Valor instantâneo, lido de uma função no momento da coleta."""
+    tipo = "gauge"
+
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = ()):
+        super().__init__(nome, descricao, labels)
+        self._funcao: Optional[Callable[[], Dict[LabelValues, float]]] = None
+
+    def definir_funcao(self, funcao: Callable[[], Dict[LabelValues, float]]) -> None:
+        """`funcao()` devolve {(valores dos labels...): valor}."""
+        self._funcao = funcao
+
+    def _amostras(self) -> List[str]:
+        if not self._funcao:
+            return []
+        try:
+            itens = sorted(self._funcao().items())
+        except Exception:
+            return []
+        return [f"{self.nome}{_formatar_labels(self.labels, k)} {_formatar_numero(v)}" for k, v in itens]
+
+
+class Registro:
+    """Conjunto de métricas exportadas juntas."""
+
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+
+    def registrar(self, metrica: _Metrica) -> _Metrica:
+        self._metricas.append(metrica)
+        return metrica
+
+    def exportar(self) -> str:
+        return "\n".join(m.exportar() for m in self._metricas) + "\n"
+
+
+REGISTRO = Registro()
+
+# --- Catálogo de métricas do pipeline ---
+INDICADORES_DURACAO = REGISTRO.registrar(Histograma(
+    "ize_indicadores_duracao_segundos", "Duração de cada método de Indicadores.", ["metodo"]))
+RELATORIO_DADOS_DURACAO = REGISTRO.registrar(Histograma(
+    "ize_relatorio_dados_duracao_segundos", "Duração do gerar_relatorio de cada RelatorioN.", ["relatorio"]))
+RENDER_DURACAO = REGISTRO.registrar(Histograma(
+    "ize_render_html_duracao_segundos", "Duração do render() de cada renderizador.", ["renderer"]))
+CONVERSAO_DURACAO = REGISTRO.registrar(Histograma(
+    "ize_pdf_conversao_duracao_segundos", "Duração de cada conversão HTML→PDF (wkhtmltopdf).", ["relatorio"]))
+SLOT_ESPERA = REGISTRO.registrar(Histograma(
+    "ize_pdf_slot_espera_segundos", "Espera por um slot de conversão wkhtmltopdf."))
+MERGE_DURACAO = REGISTRO.registrar(Histograma(
+    "ize_pdf_merge_duracao_segundos", "Duração da combinação dos PDFs (capa, seções, marketing)."))
+FINALIZACAO_DURACAO = REGISTRO.registrar(Histograma(
+    "ize_pdf_finalizacao_duracao_segundos", "Duração do pós-processamento (PDFinalizer)."))
+GERACAO_DURACAO = REGISTRO.registrar(Histograma(
+    "ize_geracao_duracao_segundos", "Duração total do render_to_pdf."))
+DB_CONSULTA_DURACAO = REGISTRO.registrar(Histograma(
+    "ize_db_consulta_duracao_segundos", "Duração de cada execute_query, pelo método chamador.", ["metodo"]))
+
+SECOES_IGNORADAS = REGISTRO.registrar(Contador(
+    "ize_secoes_ignoradas_total", "Seções não incluídas no PDF final.", ["relatorio", "motivo"]))
+PAGINAS_REMOVIDAS = REGISTRO.registrar(Contador(
+    "ize_paginas_removidas_total", "Páginas vazias removidas no merge ou no pós-processamento.", ["etapa"]))
+DB_CONSULTA_LINHAS = REGISTRO.registrar(Contador(
+    "ize_db_consulta_linhas_total", "Linhas devolvidas pelas consultas, pelo método chamador.", ["metodo"]))
+DB_CONSULTAS_LENTAS = REGISTRO.registrar(Contador(
+    "ize_db_consultas_lentas_total", "Consultas acima de DB_CONSULTA_LENTA_MS.", ["metodo"]))
+CACHE_REQUISICOES = REGISTRO.registrar(Contador(
+    "ize_cache_requisicoes_total", "Consultas aos caches internos.", ["cache", "resultado"]))
+
+DB_POOL = REGISTRO.registrar(Gauge(
+    "ize_db_pool_conexoes", "Conexões dos pools SQLAlchemy ativos neste processo.", ["estado"]))
+PDF_SLOTS = REGISTRO.registrar(Gauge(
+    "ize_pdf_slots", "Slots de conversão deste processo.", ["estado"]))
+API_CARGA = REGISTRO.registrar(Gauge(
+    "ize_api_carga", "Gerações ativas e jobs na fila desta instância da API.", ["tipo"]))
+
+
+def registrar_cache(cache: str, acerto: bool) -> None:
+    """Atalho para contabilizar hit/miss de um cache."""
+    CACHE_REQUISICOES.inc(cache=cache, resultado="hit" if acerto else "miss")
+
+
+def medir_metodo(histograma: Histograma, label: str = "metodo") -> Callable:
+    """Decorador que registra a duração do método em `histograma`, com o nome
+    da função como valor do label."""
+    def decorador(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histograma.cronometrar(**{label: func.__name__}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorador
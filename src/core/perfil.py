@@ -0,0 +1,143 @@
+# src/core/perfil.py
+"""
+Perfil de CPU e memória da geração, ligado sem mudar o código.
+
+Quando ativo, cada etapa envolvida por `perfilar(etapa, rotulo)` (a coleta dos
+dados e o `render_to_pdf`) grava em `PERFIL_DIR` (padrão `outputs/profiles/`):
+
+- `<data>_<rotulo>_<etapa>.prof`: perfil do `cProfile`, para abrir com
+  `python -m pstats`, `snakeviz` ou `gprof2dot`;
+- `<data>_<rotulo>_<etapa>.txt`: resumo legível com as 40 funções de maior tempo
+  acumulado, o pico de memória (`tracemalloc`) e as linhas que mais alocaram.
+
+Como ativar:
+
+- `PERFIL=1` no ambiente: todas as gerações do processo;
+- cabeçalho `X-Profile: 1` na API (inclusive em `/v1/jobs`);
+- `?perfil=1` na URL do Streamlit.
+
+O `cProfile` mede só a thread da geração. O `tracemalloc` é do processo
+inteiro: com outras gerações simultâneas, o pico inclui o que elas alocaram.
+O custo é alto (2 a 3 vezes mais lento), então use só para investigar.
+"""
+import contextvars
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+PERFIL = os.getenv("PERFIL", "0") == "1"
+PERFIL_DIR = os.getenv("PERFIL_DIR", os.path.join("outputs", "profiles"))
+PERFIL_QUADROS_MEMORIA = int(os.getenv("PERFIL_QUADROS_MEMORIA", "10"))
+
+_ativo: "contextvars.ContextVar[Optional[bool]]" = contextvars.ContextVar("ize_perfil_ativo", default=None)
+
+# tracemalloc é global: liga na primeira etapa perfilada e desliga na última
+_memoria_lock = threading.Lock()
+_memoria_usuarios = 0
+
+
+def ativo() -> bool:
+    """True se a geração atual deve ser perfilada (contexto ou `PERFIL=1`)."""
+    valor = _ativo.get()
+    return PERFIL if valor is None else valor
+
+
+@contextmanager
+def perfil_ativo(valor: bool = True) -> Iterator[None]:
+    """Liga (ou desliga) o perfil para o código executado neste contexto."""
+    token = _ativo.set(valor)
+    try:
+        yield
+    finally:
+        _ativo.reset(token)
+
+
+def _iniciar_memoria() -> None:
+    global _memoria_usuarios
+    with _memoria_lock:
+        if _memoria_usuarios == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(PERFIL_QUADROS_MEMORIA)
+        _memoria_usuarios += 1
+        tracemalloc.reset_peak()
+
+
+def _parar_memoria() -> None:
+    global _memoria_usuarios
+    with _memoria_lock:
+        _memoria_usuarios -= 1
+        if _memoria_usuarios == 0:
+            tracemalloc.stop()
+
+
+def _nome_arquivo(rotulo: str, etapa: str) -> str:
+    base = re.sub(r"[^\w\-]+", "_", f"{rotulo}_{etapa}", flags=re.UNICODE).strip("_")
+    return f"{datetime.now():%Y%m%d-%H%M%S}_{base[:80]}"
+
+
+@contextmanager
+def perfilar(etapa: str, rotulo: str, diretorio: Optional[str] = None) -> Iterator[Optional[str]]:
+    """
+    Perfila o bloco se o perfil estiver ativo; caso contrário, não faz nada.
+
+    Args:
+        etapa: Nome da etapa (ex.: "dados", "render").
+        rotulo: Identificação do pedido no nome dos arquivos (ex.: "c12_2025-09").
+        diretorio: Pasta de saída (padrão: `PERFIL_DIR`).
+
+    Yields:
+        Caminho base dos arquivos (sem extensão), ou None se inativo.
+    """
+    if not ativo():
+        yield None
+        return
+
+    diretorio = diretorio or PERFIL_DIR
+    os.makedirs(diretorio, exist_ok=True)
+    base = os.path.join(diretorio, _nome_arquivo(rotulo, etapa))
+    perfilador = cProfile.Profile()
+    _iniciar_memoria()
+    inicio = time.perf_counter()
+    memoria_inicial = tracemalloc.get_traced_memory()[0]
+    perfilador.enable()
+    try:
+        yield base
+    finally:
+        perfilador.disable()
+        duracao = time.perf_counter() - inicio
+        atual, pico = tracemalloc.get_traced_memory()
+        maiores = tracemalloc.take_snapshot().statistics("lineno")[:20]
+        _parar_memoria()
+        try:
+            _gravar(base, perfilador, etapa, rotulo, duracao, memoria_inicial, atual, pico, maiores)
+            logger.info(f"🔬 Perfil de {etapa} ({rotulo}) em {base}.prof / .txt")
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível gravar o perfil de {etapa}: {e}")
+
+
+def _gravar(base: str, perfilador: cProfile.Profile, etapa: str, rotulo: str, duracao: float,
+            memoria_inicial: int, memoria_final: int, pico: int, maiores) -> None:
+    perfilador.dump_stats(f"{base}.prof")
+    texto = io.StringIO()
+    texto.write(f"Etapa: {etapa}\nPedido: {rotulo}\nDuração: {duracao:.3f}s\n")
+    texto.write(
+        f"Memória (tracemalloc): início {memoria_inicial / 1024 ** 2:.1f} MB, "
+        f"fim {memoria_final / 1024 ** 2:.1f} MB, pico {pico / 1024 ** 2:.1f} MB\n\n"
+    )
+    texto.write("Linhas que mais alocaram (ainda vivas no fim da etapa):\n")
+    for estatistica in maiores:
+        texto.write(f"  {estatistica}\n")
+    texto.write("\nFunções por tempo acumulado:\n")
+    pstats.Stats(perfilador, stream=texto).sort_stats("cumulative").print_stats(40)
+    with open(f"{base}.txt", "w", encoding="utf-8") as f:
+        f.write(texto.getvalue())
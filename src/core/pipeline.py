@@ -0,0 +1,458 @@
+# src/core/pipeline.py
+"""
+Pipeline de geração do relatório mensal (dados → HTML → PDF).
+
+Concentra a mesma sequência usada pelo endpoint `POST /v1/relatorios/pdf` para
+que ela possa ser executada tanto de forma síncrona quanto por workers em
+segundo plano (ver `src/core/jobs.py`), reportando o andamento de cada etapa.
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import uuid
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.database.db_utils import DatabaseConnection, buscar_clientes, obter_meses, impressao_digital_dados
+from src.core.indicadores import Indicadores
+from src.core.metricas import RELATORIO_DADOS_DURACAO
+from src.core import perfil, rastreamento
+from src.core.singleflight import SingleFlight
+from src.core.armazem import ArmazemArquivos
+from src.core.snapshots import ArmazemSnapshots
+from src.core.relatorios import (
+    Relatorio1, Relatorio2, Relatorio3, Relatorio4, Relatorio5, Relatorio6, Relatorio7, Relatorio8
+)
+from src.rendering.engine import RenderingEngine
+
+logger = logging.getLogger(__name__)
+
+# Callback de progresso: progresso(etapa, status), ex.: ("dados:Relatório 1", "concluido")
+Progresso = Callable[[str, str], None]
+
+# --- Mapas: ID numérico -> Classe e Nome de exibição ---
+RELATORIO_CLASSES = {
+    1: Relatorio1, 2: Relatorio2, 3: Relatorio3, 4: Relatorio4,
+    5: Relatorio5, 6: Relatorio6, 7: Relatorio7, 8: Relatorio8
+}
+
+RELATORIO_LABELS = {
+    1: "Relatório 1", 2: "Relatório 2", 3: "Relatório 3", 4: "Relatório 4",
+    5: "Relatório 5", 6: "Relatório 6", 7: "Relatório 7", 8: "Relatório 8"
+}
+
+MARCA_PADRAO = "Sim"  # marca fixa e interna
+
+# O RenderingEngine é reentrante: uma instância atende todas as gerações do processo
+rendering_engine = RenderingEngine()
+
+# Gerações idênticas em andamento compartilham uma única execução
+geracoes_em_andamento = SingleFlight("geracao_pdf")
+
+# Armazém dos PDFs finais, endereçado por `chave_geracao`. Meses já encerrados
+# são reaproveitados sem prazo; o mês corrente (dados ainda mudando) só por
+# ARTEFATOS_VALIDADE_MES_ATUAL segundos. ARTEFATOS=0 desliga o reaproveitamento.
+ARTEFATOS = os.getenv("ARTEFATOS", "1") != "0"
+ARTEFATOS_DIR = os.getenv("ARTEFATOS_DIR", os.path.join("outputs", "artefatos"))
+ARTEFATOS_MAX_MB = int(os.getenv("ARTEFATOS_MAX_MB", "2000"))
+ARTEFATOS_VALIDADE_MES_ATUAL = int(os.getenv("ARTEFATOS_VALIDADE_MES_ATUAL", "900"))
+
+artefatos = ArmazemArquivos(
+    ARTEFATOS_DIR, ARTEFATOS_MAX_MB * 1024 * 1024, nome="artefatos_pdf"
+) if ARTEFATOS else None
+
+# Snapshots dos dados de meses encerrados: a primeira geração consulta o banco e
+# grava; as seguintes renderizam do snapshot, sem SQL. SNAPSHOTS=0 desliga.
+SNAPSHOTS = os.getenv("SNAPSHOTS", "1") != "0"
+SNAPSHOTS_DIR = os.getenv("SNAPSHOTS_DIR", os.path.join("outputs", "snapshots"))
+
+snapshots = ArmazemSnapshots(SNAPSHOTS_DIR) if SNAPSHOTS else None
+
+# Dias após o fim do mês em que ele ainda é tratado como aberto (cargas do ETL
+# de fechamento): até lá o snapshot segue a impressão digital dos dados e não
+# fica congelado na primeira geração do dia 1.
+SNAPSHOT_CARENCIA_DIAS = int(os.getenv("SNAPSHOT_CARENCIA_DIAS", "5"))
+
+# Mês aberto: snapshot por impressão digital dos dados (uma consulta barata por
+# geração). Enquanto o banco não muda, os dados pré-calculados (ex.: pelo
+# aquecimento, src/core/aquecimento.py) são reaproveitados.
+CACHE_DADOS_MES_ABERTO = os.getenv("CACHE_DADOS_MES_ABERTO", "1") != "0"
+
+# Seções sem consulta ao banco (a nota do consultor vem do pedido): fora do snapshot
+SECOES_SEM_SNAPSHOT = {8}
+
+
+def _sem_progresso(etapa: str, status: str) -> None:
+    """Callback padrão quando ninguém acompanha o andamento."""
+
+
+def slugify_filename(text: str) -> str:
+    # Sanitiza o nome do arquivo: espaços e caracteres especiais -> underscore
+    text = re.sub(r"\s+", "_", text.strip())
+    text = re.sub(r"[^\w\-\.]", "_", text, flags=re.UNICODE)
+    return text
+
+
+def nome_arquivo_relatorio(display_nome: str, nome_mes: str, ano: int) -> str:
+    """Nome padrão do PDF final (mesmo formato usado pela API)."""
+    return f"Relatorio_{slugify_filename(display_nome)}_{slugify_filename(nome_mes)}_{ano}.pdf"
+
+
+def resolver_display_nome(db: DatabaseConnection, id_cliente: List[int],
+                          clientes: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Nome exibido sempre derivado do banco (ou fallback para Cliente_<id>).
+
+    `clientes` permite reaproveitar o resultado de `buscar_clientes` já carregado
+    (ex.: geração em lote), evitando uma consulta por relatório.
+    """
+    all_cli = clientes if clientes is not None else (buscar_clientes(db) or [])
+    mapa = {c["id_cliente"]: c["nome"] for c in all_cli}
+    base = mapa.get(id_cliente[0], f"Cliente_{id_cliente[0]}")
+    return f"{base}_Consolidado" if len(id_cliente) > 1 else base
+
+
+def montar_indice(relatorios: List[int], display_nome: str, nome_mes: str, ano: int) -> Dict[str, Any]:
+    """Monta os dados do Índice a partir dos relatórios escolhidos."""
+    ids_escolhidos = set(relatorios)
+    return {
+        "fluxo_caixa": "Sim" if ids_escolhidos & {1, 2, 3, 4, 5} else "Não",
+        "dre_gerencial": "Sim" if 6 in ids_escolhidos else "Não",
+        "indicador": "Sim" if 7 in ids_escolhidos else "Não",
+        "nota_consultor": "Sim" if 8 in ids_escolhidos else "Não",
+        "cliente_nome": display_nome,
+        "mes": nome_mes,
+        "ano": ano,
+        "nome": display_nome,
+        "Periodo": f"{nome_mes} {ano}",
+        "marca": MARCA_PADRAO,
+    }
+
+
+def _impressao_ou_none(db: DatabaseConnection, id_cliente: List[int], mes: int, ano: int) -> Optional[str]:
+    """Impressão digital dos dados; None (sem cache) se a consulta falhar."""
+    try:
+        return impressao_digital_dados(db, id_cliente, mes, ano)
+    except Exception as e:
+        logger.warning(f"⚠️ Impressão digital indisponível para {id_cliente} {mes:02d}/{ano}: {e}")
+        return None
+
+
+def carregar_snapshot(id_cliente: List[int], mes: int, ano: int,
+                      db: Optional[DatabaseConnection] = None) -> Optional[Dict[str, Any]]:
+    """Snapshot dos dados do período.
+
+    Mês encerrado: o snapshot fixo do período. Mês aberto (com `db`): o snapshot
+    da impressão digital atual dos dados, se existir.
+
+    Returns:
+        None se não há snapshot aplicável (desligado, ou mês aberto sem `db`);
+        {} se ainda não há snapshot (será criado pela coleta).
+    """
+    if snapshots is None or perfil.ativo():  # o perfil mede as consultas de verdade
+        return None
+    if mes_fechado(mes, ano):
+        snapshot = snapshots.carregar(id_cliente, mes, ano)
+        if snapshot is None and db is not None:
+            # Captura nova: guarda a impressão para o aquecimento detectar cargas tardias
+            impressao = _impressao_ou_none(db, id_cliente, mes, ano)
+            snapshot = {"impressao": impressao} if impressao else None
+        return snapshot or {}
+    if not CACHE_DADOS_MES_ABERTO or db is None:
+        return None
+    impressao = _impressao_ou_none(db, id_cliente, mes, ano)
+    if impressao is None:
+        return None
+    snapshot = snapshots.carregar(id_cliente, mes, ano, variante=impressao) or {}
+    snapshot.update(impressao=impressao, variante=impressao)
+    return snapshot
+
+
+def coletar_dados_relatorios(
+    db: DatabaseConnection,
+    id_cliente: List[int],
+    mes: int,
+    ano: int,
+    relatorios: List[int],
+    display_nome: str,
+    analise_text: str = "",
+    progresso: Optional[Progresso] = None,
+    snapshot: Optional[Dict[str, Any]] = None,
+) -> List[Tuple[str, Any]]:
+    """
+    Executa os `RelatorioN.gerar_relatorio` e devolve a lista no formato esperado
+    por `RenderingEngine.render_to_pdf` (Índice primeiro).
+
+    Com `snapshot` (ver `carregar_snapshot`), as seções já guardadas nele são
+    usadas sem consultar o banco; as que faltarem são consultadas e acrescentadas
+    ao snapshot, que é gravado ao final.
+    """
+    progresso = progresso or _sem_progresso
+    mes_atual = date(ano, mes, 1)
+    mes_anterior = (mes_atual - timedelta(days=1)).replace(day=1)
+    nome_mes = next((nm for nm, n in obter_meses() if n == mes), str(mes))
+
+    indicadores = Indicadores(id_cliente, db)  # passa a lista (suporta consolidado)
+    relatorios_dados = [("Índice", montar_indice(relatorios, display_nome, nome_mes, ano))]
+    secoes_snapshot = snapshot.setdefault("secoes", {}) if snapshot is not None else {}
+    novas_secoes = False
+
+    for rel_id in relatorios:
+        rel_label = RELATORIO_LABELS[rel_id]
+        if rel_id in secoes_snapshot:
+            progresso(f"snapshot:{rel_label}", "concluido")
+            relatorios_dados.append((rel_label, secoes_snapshot[rel_id]))
+            continue
+
+        etapa = f"dados:{rel_label}"
+        progresso(etapa, "iniciado")
+        try:
+            relatorio = RELATORIO_CLASSES[rel_id](indicadores, display_nome)
+
+            with RELATORIO_DADOS_DURACAO.cronometrar(relatorio=rel_label), \
+                    rastreamento.span(f"{type(relatorio).__name__}.gerar_relatorio", relatorio=rel_label):
+                if rel_id in {1, 2, 3, 4}:
+                    dados = relatorio.gerar_relatorio(mes_atual, mes_anterior)
+                elif rel_id == 8:
+                    if analise_text:
+                        relatorio.salvar_analise(mes_atual, analise_text)
+                    dados = relatorio.gerar_relatorio(mes_atual)
+                else:
+                    dados = relatorio.gerar_relatorio(mes_atual)
+        except Exception:
+            progresso(etapa, "erro")
+            raise
+        progresso(etapa, "concluido")
+
+        relatorios_dados.append((rel_label, dados))
+        if snapshot is not None and rel_id not in SECOES_SEM_SNAPSHOT:
+            secoes_snapshot[rel_id] = dados
+            novas_secoes = True
+
+    if novas_secoes:
+        snapshot.setdefault("display_nome", display_nome)
+        try:
+            snapshots.salvar(id_cliente, mes, ano, snapshot, variante=snapshot.get("variante", ""))
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível salvar o snapshot de {display_nome} {mes:02d}/{ano}: {e}")
+
+    return relatorios_dados
+
+
+def gerar_relatorio_pdf(
+    id_cliente: List[int],
+    mes: int,
+    ano: int,
+    relatorios: List[int],
+    analise_text: str = "",
+    output_dir: str = "outputs",
+    progresso: Optional[Progresso] = None,
+    db: Optional[DatabaseConnection] = None,
+    clientes: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[str, str]:
+    """
+    Gera o PDF completo (mesma lógica do app Streamlit).
+
+    Args:
+        id_cliente: IDs de cliente(s); mais de um gera o consolidado.
+        mes: Mês (1-12).
+        ano: Ano.
+        relatorios: IDs dos relatórios (1 a 8), na ordem desejada.
+        analise_text: HTML já processado da nota do consultor.
+        output_dir: Pasta onde o PDF final é salvo.
+        progresso: Callback opcional `progresso(etapa, status)`.
+        db: Conexão compartilhada (reaproveita o pool do SQLAlchemy); se None, cria uma nova.
+        clientes: Resultado de `buscar_clientes` já carregado (opcional).
+
+    Returns:
+        Tupla (caminho_do_pdf, nome_do_arquivo).
+    """
+    progresso = progresso or _sem_progresso
+
+    with rastreamento.span("gerar_relatorio_pdf", **rastreamento.atributos_periodo(id_cliente, mes, ano)) as span:
+        db = db or DatabaseConnection()
+        # Mês encerrado com snapshot: nome e dados vêm do snapshot, sem SQL (mês
+        # aberto: só a consulta da impressão digital, se os dados já foram aquecidos)
+        snapshot = carregar_snapshot(id_cliente, mes, ano, db)
+        display_nome = (snapshot or {}).get("display_nome") or resolver_display_nome(db, id_cliente, clientes)
+        nome_mes = next((nm for nm, n in obter_meses() if n == mes), str(mes))
+
+        span.definir(**{"ize.cliente_nome": display_nome, "ize.relatorios": list(relatorios)})
+        rotulo_perfil = f"c{'-'.join(str(i) for i in sorted(id_cliente))}_{ano}-{mes:02d}"
+        with perfil.perfilar("dados", rotulo_perfil):
+            relatorios_dados = coletar_dados_relatorios(
+                db, id_cliente, mes, ano, relatorios, display_nome, analise_text, progresso, snapshot=snapshot
+            )
+
+        os.makedirs(output_dir, exist_ok=True)
+        filename = nome_arquivo_relatorio(display_nome, nome_mes, ano)
+        # Caminho único por geração: pedidos do mesmo cliente/mês com seções
+        # diferentes não sobrescrevem o arquivo um do outro
+        output_path = os.path.join(output_dir, f"{os.path.splitext(filename)[0]}_{uuid.uuid4().hex[:8]}.pdf")
+        with perfil.perfilar("render", rotulo_perfil):
+            pdf_path = rendering_engine.render_to_pdf(
+                relatorios_dados, display_nome, nome_mes, ano, output_path, progresso=progresso
+            )
+        return pdf_path, filename
+
+
+def chave_geracao(id_cliente: List[int], mes: int, ano: int, relatorios: List[int],
+                  analise_text: str = "") -> str:
+    """Chave de uma geração: clientes, período, seções e hash da nota do consultor.
+
+    A ordem dos clientes/relatórios não importa (o PDF segue sempre a mesma
+    ordem de seções).
+    """
+    nota = hashlib.sha256((analise_text or "").encode("utf-8")).hexdigest()
+    base = json.dumps({
+        "clientes": sorted(set(id_cliente)),
+        "mes": mes,
+        "ano": ano,
+        "relatorios": sorted(set(relatorios)),
+        "nota": nota,
+    }, sort_keys=True)
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+def mes_fechado(mes: int, ano: int, hoje: Optional[date] = None) -> bool:
+    """True se o período terminou há mais de `SNAPSHOT_CARENCIA_DIAS` dias."""
+    hoje = hoje or date.today()
+    inicio_seguinte = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    return (hoje - inicio_seguinte).days >= SNAPSHOT_CARENCIA_DIAS
+
+
+def obter_artefato(chave: str, id_cliente: List[int], mes: int, ano: int) -> Optional[Tuple[str, str]]:
+    """(caminho, nome_do_arquivo) do PDF já gerado para a chave, se ainda válido."""
+    if artefatos is None or perfil.ativo():
+        return None
+    validade = None if mes_fechado(mes, ano) else ARTEFATOS_VALIDADE_MES_ATUAL
+    caminho = artefatos.obter(chave, validade=validade)
+    if caminho and validade is None and snapshots is not None:
+        # Snapshot recapturado depois do PDF (carga tardia no mês encerrado): gera de novo
+        recapturado_em = snapshots.modificado_em(id_cliente, mes, ano)
+        if recapturado_em and recapturado_em > os.path.getmtime(caminho):
+            caminho = None
+    filename = artefatos.ler_metadados(chave).get("filename") if caminho else None
+    return (caminho, filename) if filename else None
+
+
+def etag_pdf(pdf_path: str) -> str:
+    """ETag forte de um PDF entregue pela API.
+
+    No armazém de artefatos é o sha256 gravado junto com o arquivo; fora dele
+    (ou em artefatos antigos, sem o hash) usa mtime + tamanho.
+    """
+    if artefatos is not None:
+        chave = os.path.splitext(os.path.basename(pdf_path))[0]
+        if artefatos.caminho(chave) == os.path.abspath(pdf_path):
+            sha256 = artefatos.ler_metadados(chave).get("sha256")
+            if sha256:
+                return sha256
+    st = os.stat(pdf_path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def gerar_relatorio_pdf_unico(
+    id_cliente: List[int],
+    mes: int,
+    ano: int,
+    relatorios: List[int],
+    analise_text: str = "",
+    output_dir: str = "outputs",
+    progresso: Optional[Progresso] = None,
+    db: Optional[DatabaseConnection] = None,
+    clientes: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[str, str]:
+    """
+    Igual a `gerar_relatorio_pdf`, mas pedidos idênticos simultâneos (duplo
+    clique, retry do cliente HTTP) aguardam a geração já em andamento e
+    recebem o mesmo PDF, em vez de renderizar de novo e disputar o mesmo
+    arquivo de saída.
+
+    O PDF final fica no armazém de artefatos (`ARTEFATOS_DIR/<chave>.pdf`): um
+    pedido idêntico posterior devolve o arquivo existente sem gerar de novo.
+    O caminho devolvido pertence ao armazém e não deve ser removido.
+    """
+    progresso = progresso or _sem_progresso
+    chave = chave_geracao(id_cliente, mes, ano, relatorios, analise_text)
+
+    compartilhada = []
+
+    def aguardando():
+        compartilhada.append(True)
+        logger.info(f"🔁 Geração idêntica já em andamento ({chave[:12]}); aguardando o resultado")
+        progresso("geracao_compartilhada", "iniciado")
+
+    def gerar() -> Tuple[str, str]:
+        existente = obter_artefato(chave, id_cliente, mes, ano)
+        if existente:
+            logger.info(f"♻️ PDF idêntico já gerado ({chave[:12]}); reaproveitando {existente[0]}")
+            progresso("artefato", "concluido")
+            return existente
+        pdf_path, filename = gerar_relatorio_pdf(
+            id_cliente, mes, ano, relatorios, analise_text,
+            output_dir=output_dir, progresso=progresso, db=db, clientes=clientes,
+        )
+        if artefatos is None:
+            return pdf_path, filename
+        return artefatos.guardar(chave, pdf_path, mover=True, metadados={"filename": filename}), filename
+
+    try:
+        with rastreamento.span("gerar_relatorio_pdf_unico", **rastreamento.atributos_periodo(id_cliente, mes, ano)):
+            resultado = geracoes_em_andamento.executar(chave, gerar, ao_aguardar=aguardando)
+    except Exception:
+        if compartilhada:
+            progresso("geracao_compartilhada", "erro")
+        raise
+    if compartilhada:
+        progresso("geracao_compartilhada", "concluido")
+    return resultado
+
+
+def gerar_preview_html(
+    id_cliente: List[int],
+    mes: int,
+    ano: int,
+    relatorio: int,
+    db: Optional[DatabaseConnection] = None,
+    clientes: Optional[List[Dict[str, Any]]] = None,
+    assets_url: Optional[str] = None,
+) -> str:
+    """
+    HTML de uma única seção para conferência na tela, sem wkhtmltopdf.
+
+    Usa o mesmo `get_renderer(n).render(...)` do PDF, em modo preview: gráficos
+    em baixa resolução e ícones referenciados por `assets_url` (ex.:
+    "/v1/assets") em vez de embutidos. Sem `assets_url`, os ícones são
+    embutidos a partir do cache em memória.
+
+    Args:
+        id_cliente: IDs de cliente(s); mais de um gera o consolidado.
+        mes: Mês (1-12).
+        ano: Ano.
+        relatorio: ID do relatório (1 a 8).
+        db: Conexão compartilhada (opcional).
+        clientes: Resultado de `buscar_clientes` já carregado (opcional).
+        assets_url: Prefixo das URLs dos assets.
+
+    Raises:
+        ValueError: Se o relatório não existir.
+    """
+    from src.rendering.renderers import get_renderer
+    from src.rendering.renderers.base_renderer import modo_preview, resolver_assets
+
+    if relatorio not in RELATORIO_CLASSES:
+        raise ValueError(f"Relatório inválido: {relatorio}")
+
+    db = db or DatabaseConnection()
+    snapshot = carregar_snapshot(id_cliente, mes, ano, db)
+    display_nome = (snapshot or {}).get("display_nome") or resolver_display_nome(db, id_cliente, clientes)
+    nome_mes = next((nm for nm, n in obter_meses() if n == mes), str(mes))
+
+    _, dados = coletar_dados_relatorios(
+        db, id_cliente, mes, ano, [relatorio], display_nome, snapshot=snapshot
+    )[1]
+    with modo_preview():
+        html = get_renderer(relatorio).render(dados, display_nome, nome_mes, ano)
+    return resolver_assets(html, assets_url)
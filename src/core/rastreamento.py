@@ -0,0 +1,234 @@
+# src/core/rastreamento.py
+"""
+Rastreamento (tracing) leve do pipeline, sem dependências.
+
+Cada etapa relevante abre um span com `span("nome", **atributos)`: a requisição
+HTTP, `render_to_pdf`, cada `RelatorioN.gerar_relatorio`, cada consulta do
+`execute_query`, cada `renderer.render`, cada wkhtmltopdf, o merge e o
+`PDFinalizer`. O span atual fica em um `ContextVar`, então os filhos se ligam
+ao pai sem passar nada pelas assinaturas. Os atributos `ize.*` (cliente, mês,
+ano) são herdados pelos filhos, para filtrar qualquer span por cliente/mês.
+
+Com `TRACING=1`, cada span concluído vira uma linha em `TRACING_ARQUIVO`
+(padrão `outputs/traces/spans.jsonl`, rotativo). A linha segue o formato
+OTLP/JSON (`{"resourceSpans": [...]}`), o mesmo lido pelo receiver
+`otlpjsonfile` do OpenTelemetry Collector. Dá para mandar os spans para
+Jaeger/Tempo sem mudar o código, ou ler o arquivo direto com `jq`.
+
+Sem `TRACING=1`, `span()` não grava nada e custa só a criação do contexto.
+"""
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACING = os.getenv("TRACING", "0") == "1"
+TRACING_ARQUIVO = os.getenv("TRACING_ARQUIVO", os.path.join("outputs", "traces", "spans.jsonl"))
+TRACING_SERVICO = os.getenv("TRACING_SERVICO", "ize-relatorios")
+
+PREFIXO_HERDADO = "ize."
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# Códigos de status do OTLP
+STATUS_OK = 1
+STATUS_ERRO = 2
+
+
+class Span:
+    """Um intervalo de tempo nomeado, com atributos, dentro de um trace."""
+
+    __slots__ = ("trace_id", "span_id", "pai_id", "nome", "inicio_ns", "fim_ns", "atributos", "erro")
+
+    def __init__(self, nome: str, trace_id: str, pai_id: str = "", atributos: Optional[Dict[str, Any]] = None):
+        self.nome = nome
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.pai_id = pai_id
+        self.inicio_ns = time.time_ns()
+        self.fim_ns = 0
+        self.atributos: Dict[str, Any] = dict(atributos or {})
+        self.erro = ""
+
+    @property
+    def duracao_s(self) -> float:
+        return ((self.fim_ns or time.time_ns()) - self.inicio_ns) / 1e9
+
+    def definir(self, **atributos: Any) -> None:
+        """Acrescenta atributos (valores None são ignorados)."""
+        self.atributos.update({k: v for k, v in atributos.items() if v is not None})
+
+    def traceparent(self) -> str:
+        """Cabeçalho W3C `traceparent` que aponta para este span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def otlp(self) -> Dict[str, Any]:
+        """Span no formato OTLP/JSON."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.nome,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.inicio_ns),
+            "endTimeUnixNano": str(self.fim_ns),
+            "attributes": [{"key": k, "value": _valor_otlp(v)} for k, v in self.atributos.items()],
+            "status": {"code": STATUS_ERRO, "message": self.erro} if self.erro else {"code": STATUS_OK},
+        }
+        if self.pai_id:
+            span["parentSpanId"] = self.pai_id
+        return span
+
+
+class _SpanNulo:
+    """Span usado com o rastreamento desligado (aceita tudo, não grava nada)."""
+
+    trace_id = span_id = pai_id = ""
+    atributos: Dict[str, Any] = {}
+
+    def definir(self, **atributos: Any) -> None:
+        pass
+
+    def traceparent(self) -> str:
+        return ""
+
+
+SPAN_NULO = _SpanNulo()
+
+_span_atual: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("ize_span_atual", default=None)
+# Pai vindo de fora (cabeçalho traceparent): (trace_id, span_id)
+_pai_remoto: "contextvars.ContextVar[Optional[tuple]]" = contextvars.ContextVar("ize_pai_remoto", default=None)
+
+
+def _valor_otlp(valor: Any) -> Dict[str, Any]:
+    if isinstance(valor, bool):
+        return {"boolValue": valor}
+    if isinstance(valor, int):
+        return {"intValue": str(valor)}
+    if isinstance(valor, float):
+        return {"doubleValue": valor}
+    if isinstance(valor, (list, tuple)):
+        return {"arrayValue": {"values": [_valor_otlp(v) for v in valor]}}
+    return {"stringValue": str(valor)}
+
+
+class ExportadorJsonl:
+    """Grava cada span concluído como uma linha OTLP/JSON, em arquivo rotativo."""
+
+    def __init__(self, caminho: str = TRACING_ARQUIVO, servico: str = TRACING_SERVICO,
+                 max_bytes: int = 50 * 1024 * 1024, arquivos: int = 5):
+        self.caminho = caminho
+        self.servico = servico
+        self._max_bytes = max_bytes
+        self._arquivos = arquivos
+        self._lock = threading.Lock()
+        self._log: Optional[logging.Logger] = None
+
+    def _logger(self) -> logging.Logger:
+        with self._lock:
+            if self._log is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+                log = logging.getLogger(f"{__name__}.spans.{id(self)}")
+                log.propagate = False
+                log.setLevel(logging.INFO)
+                handler = logging.handlers.RotatingFileHandler(
+                    self.caminho, maxBytes=self._max_bytes, backupCount=self._arquivos, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                log.addHandler(handler)
+                self._log = log
+            return self._log
+
+    def exportar(self, span: Span) -> None:
+        linha = {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.servico}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "ize.rastreamento"}, "spans": [span.otlp()]}],
+        }]}
+        try:
+            self._logger().info(json.dumps(linha, ensure_ascii=False, default=str))
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível gravar o span {span.nome}: {e}")
+
+
+exportador: Optional[ExportadorJsonl] = ExportadorJsonl() if TRACING else None
+
+
+def configurar(ativo: bool, caminho: Optional[str] = None) -> None:
+    """Liga/desliga o rastreamento em tempo de execução (testes, CLI)."""
+    global exportador
+    exportador = ExportadorJsonl(caminho or TRACING_ARQUIVO) if ativo else None
+
+
+def span_atual() -> Optional[Span]:
+    return _span_atual.get()
+
+
+@contextmanager
+def span(nome: str, **atributos: Any) -> Iterator[Any]:
+    """Abre um span filho do atual; grava ao sair (com status de erro se houve exceção)."""
+    if exportador is None:
+        yield SPAN_NULO
+        return
+    pai = _span_atual.get()
+    if pai is not None:
+        trace_id, pai_id = pai.trace_id, pai.span_id
+        herdados = {k: v for k, v in pai.atributos.items() if k.startswith(PREFIXO_HERDADO)}
+    else:
+        trace_id, pai_id = _pai_remoto.get() or (secrets.token_hex(16), "")
+        herdados = {}
+    novo = Span(nome, trace_id, pai_id, {**herdados, **{k: v for k, v in atributos.items() if v is not None}})
+    token = _span_atual.set(novo)
+    try:
+        yield novo
+    except BaseException as e:
+        novo.erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        novo.fim_ns = time.time_ns()
+        _span_atual.reset(token)
+        destino = exportador
+        if destino is not None:
+            destino.exportar(novo)
+
+
+def rastrear(nome: Optional[str] = None) -> Callable:
+    """Decorador: executa a função dentro de um span (nome padrão: nome qualificado)."""
+    def decorador(func: Callable) -> Callable:
+        nome_span = nome or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(nome_span):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorador
+
+
+@contextmanager
+def continuar_trace(traceparent: Optional[str]) -> Iterator[None]:
+    """Faz os spans raiz deste contexto pertencerem ao trace de `traceparent` (W3C)."""
+    casamento = _TRACEPARENT.match((traceparent or "").strip().lower())
+    if not casamento or exportador is None:
+        yield
+        return
+    token = _pai_remoto.set((casamento.group(1), casamento.group(2)))
+    try:
+        yield
+    finally:
+        _pai_remoto.reset(token)
+
+
+def atributos_periodo(id_cliente: Any, mes: int, ano: int, **extra: Any) -> Dict[str, Any]:
+    """Atributos padrão de cliente/período (herdados pelos spans filhos)."""
+    ids = list(id_cliente) if isinstance(id_cliente, (list, tuple, set)) else [id_cliente]
+    return {"ize.cliente": ",".join(str(i) for i in sorted(ids)), "ize.mes": int(mes), "ize.ano": int(ano), **extra}
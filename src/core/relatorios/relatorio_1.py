@@ -3,7 +3,7 @@ from datetime import date
 from typing import Optional, List, Dict, Any
 from src.core.indicadores import Indicadores
 from dateutil.relativedelta import relativedelta
-from src.core.utils import calcular_outras_categorias, safe_float
+from src.core.utils import safe_float
 import math
 
 class Relatorio1:
@@ -35,42 +35,17 @@ class Relatorio1:
         if mes_anterior is None:
             mes_anterior = mes_atual - relativedelta(months=1)
         
-        receitas = self.indicadores.calcular_receitas_fc(mes_atual, '3.%')
-        custos = self.indicadores.calcular_custos_variaveis_fc(mes_atual, '4.%')
-        receitas_mes_anterior = self.indicadores.calcular_receitas_fc(mes_anterior, '3.%')
-        custos_mes_anterior = self.indicadores.calcular_custos_variaveis_fc(mes_anterior, '4.%')
+        # Top 3 and "Outras categorias" come ready from the database (AV/AH and totals included)
+        receitas = self.indicadores.calcular_receitas_top_fc(mes_atual, mes_anterior)
+        custos = self.indicadores.calcular_custos_variaveis_top_fc(mes_atual, mes_anterior)
 
-        # Calculate totals
-        receita_total = sum(self.safe_float(r.get('total_categoria', 0)) for r in receitas) if receitas else 0
-        custos_total = sum(self.safe_float(c.get('total_categoria', 0)) for c in custos) if custos else 0
-        receita_total_anterior = sum(self.safe_float(r.get('total_categoria', 0)) for r in receitas_mes_anterior) if receitas_mes_anterior else 0
-        custos_total_anterior = sum(self.safe_float(c.get('total_categoria', 0)) for c in custos_mes_anterior) if custos_mes_anterior else 0
+        # Totals over all categories, not just the top 3
+        receita_total = receitas["total"]
+        custos_total = custos["total"]
+        receita_total_anterior = receitas["total_anterior"]
 
-        # Calculate subcategories with "Outras categorias" for Receitas
-        receitas_categoria = calcular_outras_categorias(
-            items=receitas,
-            items_anterior=receitas_mes_anterior,
-            total_atual=receita_total,
-            total_anterior=receita_total_anterior,
-            receita_total=receita_total,  # Pass receita_total for AV calculation
-            chave_valor="total_categoria",
-            chave_nome="categoria_nivel_3",
-            top_n=3,
-            usar_valor_abs=False
-        )
-
-        # Calculate subcategories with "Outras categorias" for Custos Variáveis
-        custos_variaveis = calcular_outras_categorias(
-            items=custos,
-            items_anterior=custos_mes_anterior,
-            total_atual=custos_total,
-            total_anterior=custos_total_anterior,
-            receita_total=receita_total,  # Pass receita_total for AV calculation
-            chave_valor="total_categoria",
-            chave_nome="nivel_2",
-            top_n=3,
-            usar_valor_abs=True
-        )
+        receitas_categoria = receitas["subcategorias"]
+        custos_variaveis = custos["subcategorias"]
 
         # Identify the most representative categories
         receitas_ordenadas = sorted(receitas_categoria, key=lambda x: x['representatividade'], reverse=True)
@@ -94,8 +69,7 @@ class Relatorio1:
         )
 
         # Check if there are valid data
-        if (not receitas or all(self.safe_float(r.get("total_categoria", 0)) == 0 for r in receitas)) and \
-           (not custos or all(self.safe_float(c.get("total_categoria", 0)) == 0 for c in custos)):
+        if receitas["total_absoluto"] == 0 and custos["total_absoluto"] == 0:
             notas_automatizadas = "Não há dados disponíveis para o período selecionado."
 
         return [
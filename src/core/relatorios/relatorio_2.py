@@ -26,21 +26,21 @@ class Relatorio2:
         
         # Obtém dados do período atual
         lucro_bruto = self.indicadores.calcular_lucro_bruto_fc(mes_atual)
-        despesas_fixas = self.indicadores.calcular_despesas_fixas_fc(mes_atual)
         lucro_bruto_anterior = self.indicadores.calcular_lucro_bruto_fc(mes_anterior)
-        despesas_fixas_anterior = self.indicadores.calcular_despesas_fixas_fc(mes_anterior)
+        # Top 3 despesas fixas e "Outras categorias" já vêm agrupados do banco
+        despesas_fixas = self.indicadores.calcular_despesas_fixas_top_fc(mes_atual, mes_anterior)
 
         # Calcula receita total e totais das categorias
         receita_total = next((r['valor'] for r in lucro_bruto if r['categoria'] == 'Receita'), 0)
         custos_total = next((r['valor'] for r in lucro_bruto if r['categoria'] == 'Custos Variáveis'), 0)
         lucro_bruto_total = receita_total - custos_total
-        despesas_fixas_total = sum(abs(r['valor']) for r in despesas_fixas) if despesas_fixas else 0
+        despesas_fixas_total = despesas_fixas["total_absoluto"]
 
         # Calcula totais do período anterior
         receita_total_anterior = next((r['valor'] for r in lucro_bruto_anterior if r['categoria'] == 'Receita'), 0)
         custos_total_anterior = next((r['valor'] for r in lucro_bruto_anterior if r['categoria'] == 'Custos Variáveis'), 0)
         lucro_bruto_anterior_total = receita_total_anterior - custos_total_anterior
-        despesas_fixas_anterior_total = sum(abs(r['valor']) for r in despesas_fixas_anterior) if despesas_fixas_anterior else 0
+        despesas_fixas_anterior_total = despesas_fixas["total_absoluto_anterior"]
 
         # Calcula subcategorias com "Outras categorias" para Lucro Bruto
         lucro_bruto_categorias = calcular_outras_categorias(
@@ -55,18 +55,7 @@ class Relatorio2:
             usar_valor_abs=False
         )
 
-        # Calcula subcategorias com "Outras categorias" para Despesas Fixas
-        despesas_fixas_categorias = calcular_outras_categorias(
-            items=despesas_fixas,
-            items_anterior=despesas_fixas_anterior,
-            total_atual=despesas_fixas_total,
-            total_anterior=despesas_fixas_anterior_total,
-            receita_total=receita_total,
-            chave_valor="valor",
-            chave_nome="categoria",
-            top_n=3,
-            usar_valor_abs=True
-        )
+        despesas_fixas_categorias = despesas_fixas["subcategorias"]
 
         # Calcula AV para lucro bruto (em relação à receita total)
         lucro_bruto_av = round((lucro_bruto_total / receita_total * 100) if receita_total != 0 else 0, 2)
@@ -101,7 +90,7 @@ class Relatorio2:
 
         # Verifica se há dados válidos
         if (not lucro_bruto or all(safe_float(r.get("valor", 0)) == 0 for r in lucro_bruto)) and \
-           (not despesas_fixas or all(safe_float(d.get("valor", 0)) == 0 for d in despesas_fixas)):
+           despesas_fixas_total == 0:
             notas_automatizadas = "Não há dados disponíveis para o período selecionado."
 
         return [
@@ -2,7 +2,6 @@ from datetime import date
 from typing import List, Dict, Any
 import logging
 import math
-import numpy as np
 from src.core.indicadores import Indicadores
 from src.core.utils import safe_float
 
@@ -52,7 +51,7 @@ class Relatorio6:
                 # Verifica se pelo menos um dos valores principais não é nulo, zero ou NaN
                 for indicador in indicadores_esperados:
                     valor = indicadores_dict[indicador]["valor"]
-                    if valor is not None and valor != 0 and not (isinstance(valor, float) and (math.isnan(valor) or np.isnan(valor))):
+                    if valor is not None and valor != 0 and not (isinstance(valor, float) and math.isnan(valor)):
                         dados_validos = True
                         break
             
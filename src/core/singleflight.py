@@ -0,0 +1,74 @@
+# src/core/singleflight.py
+"""
+Coalescência de chamadas idênticas em andamento ("single-flight").
+
+Quando várias threads pedem o mesmo trabalho (mesma chave) ao mesmo tempo,
+apenas a primeira executa; as demais aguardam e recebem o mesmo resultado (ou
+a mesma exceção). Nada fica em cache depois que a chamada termina.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.core import metricas
+
+
+class _Chamada:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+        self.seguidores = 0
+
+
+class SingleFlight:
+    """Executa no máximo uma chamada por chave ao mesmo tempo (por processo)."""
+
+    def __init__(self, nome: str = "singleflight"):
+        self.nome = nome
+        self._lock = threading.Lock()
+        self._chamadas: Dict[Hashable, _Chamada] = {}
+
+    def executar(self, chave: Hashable, func: Callable[[], Any],
+                 ao_aguardar: Optional[Callable[[], None]] = None) -> Any:
+        """
+        Executa `func()` ou, se já houver uma chamada com a mesma chave em
+        andamento, espera por ela e devolve o mesmo resultado.
+
+        Args:
+            chave: Identifica o trabalho (ex.: hash dos parâmetros).
+            func: Trabalho a executar (sem argumentos).
+            ao_aguardar: Callback opcional chamado quando esta chamada vai
+                aproveitar uma execução já em andamento.
+        """
+        with self._lock:
+            chamada = self._chamadas.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._chamadas[chave] = _Chamada()
+            else:
+                chamada.seguidores += 1
+        metricas.registrar_cache(self.nome, acerto=not lider)
+
+        if not lider:
+            if ao_aguardar:
+                ao_aguardar()
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = func()
+            return chamada.resultado
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._chamadas[chave]
+            chamada.evento.set()
+
+    def em_andamento(self) -> int:
+        """Quantas chaves distintas estão sendo executadas agora."""
+        with self._lock:
+            return len(self._chamadas)
@@ -0,0 +1,102 @@
+# src/core/snapshots.py
+"""
+Snapshots dos dados dos relatórios por conjunto de clientes e mês.
+
+Guarda as tuplas devolvidas pelos `RelatorioN.gerar_relatorio` (categorias,
+subcategorias, AV/AH, notas) em `pickle` comprimido com `zlib`, em
+`<diretorio>/v<versao>/<ano>-<mes>/<clientes>.pkl.z`. Regerar um mês que já
+tem snapshot não consulta o banco e produz sempre o mesmo resultado, mesmo que
+o `fc` tenha sido editado depois.
+
+Incrementar `VERSAO_SCHEMA` sempre que o formato devolvido por algum
+`gerar_relatorio` mudar: os snapshots antigos deixam de ser lidos.
+
+Para o mês ainda aberto, o snapshot leva uma `variante` (impressão digital dos
+dados no banco): `<clientes>_<variante>.pkl.z`. Ele só é reaproveitado enquanto
+os dados não mudarem; ao gravar uma variante nova, as anteriores são removidas.
+
+Os arquivos são gerados e lidos apenas por este sistema (pickle não deve ser
+usado com arquivos de origem desconhecida).
+"""
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+
+from src.core import metricas
+
+logger = logging.getLogger(__name__)
+
+VERSAO_SCHEMA = 1
+
+
+class ArmazemSnapshots:
+    """Leitura e gravação atômica dos snapshots (um arquivo por clientes/mês)."""
+
+    def __init__(self, diretorio: str, versao: int = VERSAO_SCHEMA):
+        self.diretorio = os.path.abspath(diretorio)
+        self.versao = versao
+
+    def caminho(self, id_cliente: List[int], mes: int, ano: int, variante: str = "") -> str:
+        ids = sorted(set(int(i) for i in id_cliente))
+        nome = "-".join(str(i) for i in ids)
+        if len(ids) > 8:  # consolidados grandes: nome curto e estável
+            nome = f"c{len(ids)}_{hashlib.sha256(nome.encode()).hexdigest()[:16]}"
+        if variante:
+            nome = f"{nome}_{variante[:16]}"
+        return os.path.join(self.diretorio, f"v{self.versao}", f"{ano}-{mes:02d}", f"{nome}.pkl.z")
+
+    def modificado_em(self, id_cliente: List[int], mes: int, ano: int) -> Optional[float]:
+        """mtime do snapshot (sem variante), ou None se não existir."""
+        try:
+            return os.path.getmtime(self.caminho(id_cliente, mes, ano))
+        except OSError:
+            return None
+
+    def carregar(self, id_cliente: List[int], mes: int, ano: int,
+                 variante: str = "") -> Optional[Dict[str, Any]]:
+        """Snapshot do período, ou None se não existir (ou estiver corrompido)."""
+        caminho = self.caminho(id_cliente, mes, ano, variante)
+        try:
+            with open(caminho, "rb") as f:
+                snapshot = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            snapshot = None
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot ilegível ignorado ({caminho}): {e}")
+            snapshot = None
+        metricas.registrar_cache("snapshots", snapshot is not None)
+        return snapshot
+
+    def salvar(self, id_cliente: List[int], mes: int, ano: int, snapshot: Dict[str, Any],
+               variante: str = "") -> str:
+        """Grava o snapshot (substitui o anterior de forma atômica)."""
+        caminho = self.caminho(id_cliente, mes, ano, variante)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(zlib.compress(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL), 6))
+        os.replace(temporario, caminho)
+        if variante:
+            # Variantes anteriores (dados que já mudaram) não serão mais lidas
+            base = self.caminho(id_cliente, mes, ano)[:-len(".pkl.z")]
+            for antigo in glob.glob(f"{glob.escape(base)}_*.pkl.z"):
+                if antigo != caminho:
+                    try:
+                        os.remove(antigo)
+                    except OSError:
+                        pass
+        logger.info(f"📸 Snapshot salvo: {caminho} ({os.path.getsize(caminho) / 1024:.1f} KB)")
+        return caminho
+
+    def remover(self, id_cliente: List[int], mes: int, ano: int) -> bool:
+        """Descarta o snapshot (a próxima geração consulta o banco de novo)."""
+        try:
+            os.remove(self.caminho(id_cliente, mes, ano))
+            return True
+        except FileNotFoundError:
+            return False
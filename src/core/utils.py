@@ -4,7 +4,10 @@ from typing import List, Dict, Any
 import math
 
 import math
-from typing import Any, Union
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Union
+
+if TYPE_CHECKING:  # numpy é importado no primeiro cálculo (ver tests/test_importacao.py)
+    import numpy as np
 
 def safe_float(value: Any, default: float = 0.0) -> Union[float, str]:
     """
@@ -23,6 +26,129 @@ def safe_float(value: Any, default: float = 0.0) -> Union[float, str]:
         return default
 
 
+# Abaixo disso a ordenação completa (uma chamada) sai mais barata que a seleção parcial
+_SELECAO_PARCIAL_A_PARTIR_DE = 256
+
+
+def _coluna(valores: Sequence[Any]) -> "np.ndarray":
+    """Coluna float64 com as regras de `safe_float` (None, NaN, inválido e infinito viram 0)."""
+    import numpy as np
+
+    try:
+        coluna = np.array(valores, dtype=float)
+    except (TypeError, ValueError):
+        coluna = np.fromiter((safe_float(v) for v in valores), dtype=float, count=len(valores))
+    coluna[~np.isfinite(coluna)] = 0.0
+    return coluna
+
+
+def _indices_top_n(chave: "np.ndarray", top_n: int) -> "np.ndarray":
+    """Posições dos `top_n` maiores valores de `chave`, em ordem decrescente.
+
+    Em colunas grandes a seleção é parcial (O(n)) e só os escolhidos são
+    ordenados. Empates ficam na ordem original, como num `sorted(..., reverse=True)` estável.
+    """
+    import numpy as np
+
+    n = len(chave)
+    k = max(0, min(top_n, n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if n <= _SELECAO_PARCIAL_A_PARTIR_DE:
+        return np.argsort(-chave, kind="stable")[:k]
+    corte = -np.partition(-chave, k - 1)[k - 1]
+    maiores = np.flatnonzero(chave > corte)
+    empatados = np.flatnonzero(chave == corte)[:k - len(maiores)]
+    escolhidos = np.concatenate([maiores, empatados])
+    return escolhidos[np.lexsort((escolhidos, -chave[escolhidos]))]
+
+
+def resumir_top_n(
+    valores: Sequence[Any],
+    nomes: Sequence[Any],
+    valores_anterior: Sequence[Any] = (),
+    nomes_anterior: Sequence[Any] = (),
+    receita_total: float = 0.0,
+    top_n: int = 3,
+    usar_valor_abs: bool = False,
+    av: Optional[Sequence[Any]] = None,
+    ah: Optional[Sequence[Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Núcleo colunar de `calcular_outras_categorias`: top N e o restante agrupado.
+
+    Recebe colunas (listas ou arrays) em vez de dicionários, então serve também
+    para drill-downs com milhares de contas. O mês anterior é casado por
+    categoria: o "anterior" de "Outras categorias" é a soma das categorias do
+    mês anterior que não estão no top N de agora.
+
+    Args:
+        valores: Valores do período atual.
+        nomes: Categoria de cada valor (chave de comparação com o mês anterior).
+        valores_anterior: Valores do período anterior.
+        nomes_anterior: Categoria de cada valor do período anterior.
+        receita_total: Receita total do período, base do AV.
+        top_n: Número de categorias principais.
+        usar_valor_abs: Se True, ordena e soma pelo valor absoluto.
+        av: AV já calculado de cada item (ex.: vindo do SQL). Sem ele, AV = valor / receita_total.
+        ah: AH já calculado de cada item. Sem ele, compara com a mesma categoria no mês anterior.
+
+    Returns:
+        Dicionário com `indices` (posições dos top N em `valores`, em ordem
+        decrescente), `valor`, `av`, `ah` e `representatividade` dos top N (listas),
+        `total` (soma usada na representatividade) e `outras` (`valor`,
+        `anterior`, `av`, `ah`, `representatividade` do restante).
+    """
+    import numpy as np
+
+    atual = _coluna(valores)
+    chave = np.abs(atual) if usar_valor_abs else atual
+    indices = _indices_top_n(chave, top_n).tolist()
+    total = float(chave.sum())
+
+    # Restante de agora e do mês anterior (as categorias que não estão no top N)
+    outras_valor = 0.0
+    if len(indices) < len(atual):
+        restante = np.ones(len(atual), dtype=bool)
+        restante[indices] = False
+        outras_valor = float(chave[restante].sum())
+    nomes_topo = {nomes[i] for i in indices}
+    anterior = _coluna(valores_anterior)
+    fora_do_topo = np.fromiter((nome not in nomes_topo for nome in nomes_anterior), dtype=bool, count=len(anterior))
+    outras_anterior = float((np.abs(anterior) if usar_valor_abs else anterior)[fora_do_topo].sum())
+
+    # Top N: poucos itens, calculados um a um
+    valor_topo = [float(atual[i]) for i in indices]
+    if av is not None:
+        av_topo = [safe_float(av[i]) for i in indices]
+    else:
+        av_topo = [v / receita_total * 100 if receita_total else 0.0 for v in valor_topo]
+    if ah is not None:
+        ah_topo = [safe_float(ah[i]) for i in indices]
+    else:
+        por_nome: Dict[Any, float] = {}
+        for nome, valor in zip(nomes_anterior, anterior.tolist()):
+            por_nome[nome] = por_nome.get(nome, 0.0) + valor
+        bases = [por_nome.get(nomes[i], 0.0) for i in indices]
+        ah_topo = [(v / base - 1) * 100 if base else 0.0 for v, base in zip(valor_topo, bases)]
+
+    return {
+        "indices": indices,
+        "valor": valor_topo,
+        "av": av_topo,
+        "ah": ah_topo,
+        "representatividade": [abs(v) / total * 100 if total else 0.0 for v in valor_topo],
+        "total": total,
+        "outras": {
+            "valor": outras_valor,
+            "anterior": outras_anterior,
+            "av": outras_valor / receita_total * 100 if receita_total else 0.0,
+            "ah": (outras_valor / outras_anterior - 1) * 100 if outras_anterior else 0.0,
+            "representatividade": abs(outras_valor) / total * 100 if total else 0.0,
+        },
+    }
+
+
 def calcular_outras_categorias(
     items: List[Dict[str, Any]],
     items_anterior: List[Dict[str, Any]],
@@ -37,6 +163,10 @@ def calcular_outras_categorias(
     """
     Calcula subcategorias principais e agrupa o restante em 'Outras categorias'.
 
+    Os cálculos ficam em `resumir_top_n`; aqui só convertemos os dicionários em
+    colunas e o resultado de volta. O AH de 'Outras categorias' compara com as
+    mesmas categorias no mês anterior (as que não estão no top N de agora).
+
     Args:
         items: Lista de dicionários com os dados do período atual.
         items_anterior: Lista de dicionários com os dados do período anterior.
@@ -51,65 +181,42 @@ def calcular_outras_categorias(
     Returns:
         Lista de dicionários com subcategorias, incluindo 'Outras categorias' se aplicável.
     """
-    # Ordena itens por valor (absoluto, se especificado)
-    ordenados = sorted(
-        items,
-        key=lambda x: abs(safe_float(x.get(chave_valor, 0))) if usar_valor_abs else safe_float(x.get(chave_valor, 0)),
-        reverse=True
+    nomes = [item.get(chave_nome, "N/A") for item in items]
+    resumo = resumir_top_n(
+        [item.get(chave_valor, 0) for item in items],
+        nomes,
+        [item.get(chave_valor, 0) for item in items_anterior],
+        [item.get(chave_nome, "N/A") for item in items_anterior],
+        receita_total=receita_total,
+        top_n=top_n,
+        usar_valor_abs=usar_valor_abs,
+        av=[item.get("av", 0) for item in items],
+        ah=[item.get("ah", 0) for item in items],
     )
-    
-    # Calcula totais das subcategorias
-    total_subcategorias = sum(
-        abs(safe_float(item.get(chave_valor, 0))) if usar_valor_abs else safe_float(item.get(chave_valor, 0))
-        for item in items
-    ) if items else 0
+    total_subcategorias = resumo["total"]
 
     # Gera lista de subcategorias principais (top N)
     resultado = [
         {
-            "subcategoria": item.get(chave_nome, "N/A"),
-            "valor": safe_float(item.get(chave_valor, 0)),
-            "av": round(safe_float(item.get("av", 0)), 2),
-            "ah": round(safe_float(item.get("ah", 0)), 2),
-            "representatividade": round(
-                (abs(safe_float(item.get(chave_valor, 0))) / total_subcategorias) * 100, 2
-            ) if total_subcategorias != 0 else 0
-        } for item in ordenados[:top_n]
+            "subcategoria": nomes[i],
+            "valor": valor,
+            "av": round(av, 2),
+            "ah": round(ah, 2),
+            "representatividade": round(representatividade, 2) if total_subcategorias != 0 else 0
+        } for i, valor, av, ah, representatividade in zip(
+            resumo["indices"], resumo["valor"], resumo["av"], resumo["ah"], resumo["representatividade"]
+        )
     ]
 
-    # Calcula valores para "Outras categorias"
-    outras_valor = sum(
-        abs(safe_float(item.get(chave_valor, 0))) if usar_valor_abs else safe_float(item.get(chave_valor, 0))
-        for item in ordenados[top_n:]
-    ) if len(ordenados) > top_n else 0
-
-    outras_anterior = sum(
-        abs(safe_float(item.get(chave_valor, 0))) if usar_valor_abs else safe_float(item.get(chave_valor, 0))
-        for item in sorted(
-            items_anterior,
-            key=lambda x: abs(safe_float(x.get(chave_valor, 0))) if usar_valor_abs else safe_float(x.get(chave_valor, 0)),
-            reverse=True
-        )[top_n:]
-    ) if len(items_anterior) > top_n else 0
-
-    # Calcula AV (em relação à receita total) e AH para "Outras categorias"
-    outras_av = round(
-        (outras_valor / receita_total) * 100, 2
-    ) if receita_total != 0 else 0
-    outras_ah = round(
-        ((outras_valor / outras_anterior) - 1) * 100, 2
-    ) if outras_anterior != 0 else 0
-
     # Adiciona "Outras categorias" se houver valores
-    if outras_valor != 0:  # Alterado para != 0 para capturar valores negativos
+    outras = resumo["outras"]
+    if outras["valor"] != 0:  # Alterado para != 0 para capturar valores negativos
         resultado.append({
             "subcategoria": "Outras categorias",
-            "valor": -outras_valor if usar_valor_abs else outras_valor,
-            "av": outras_av,
-            "ah": outras_ah,
-            "representatividade": round(
-                (abs(outras_valor) / total_subcategorias) * 100, 2
-            ) if total_subcategorias != 0 else 0
+            "valor": -outras["valor"] if usar_valor_abs else outras["valor"],
+            "av": round(outras["av"], 2) if receita_total != 0 else 0,
+            "ah": round(outras["ah"], 2) if outras["anterior"] != 0 else 0,
+            "representatividade": round(outras["representatividade"], 2) if total_subcategorias != 0 else 0
         })
 
-    return resultado
\ No newline at end of file
+    return resultado
@@ -1,20 +1,59 @@
 #src/database/db_utils.py
-import pandas as pd
-from sqlalchemy import create_engine, text
-from typing import Optional, Union, Dict, List, Tuple
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Optional, Union, Dict, List, Tuple
 from datetime import date
 from config.settings import DB_CONFIG
+from src.core import metricas, rastreamento
+from src.database.instrumentacao import metodo_chamador, registrar_consulta
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas e SQLAlchemy são importados no primeiro uso, não na importação do módulo:
+# a API e o Streamlit sobem sem pagar por eles (ver tests/test_importacao.py).
+
+def text(sql: str) -> Any:
+    """`sqlalchemy.text`, importado só na primeira consulta."""
+    from sqlalchemy import text as _text
+    return _text(sql)
+
+# Engines vivos neste processo (para as métricas de pool em /v1/metrics)
+_ENGINES: "weakref.WeakSet" = weakref.WeakSet()
+
+def _estatisticas_pool() -> Dict[Tuple[str, ...], float]:
+    """Soma o estado dos pools de todos os engines ativos."""
+    totais = {"em_uso": 0, "ociosas": 0, "overflow": 0, "capacidade": 0}
+    for engine in list(_ENGINES):
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        totais["em_uso"] += pool.checkedout()
+        totais["ociosas"] += pool.checkedin()
+        totais["overflow"] += max(0, pool.overflow())
+        totais["capacidade"] += pool.size()
+    return {(estado,): valor for estado, valor in totais.items()}
+
+metricas.DB_POOL.definir_funcao(_estatisticas_pool)
 
 class DatabaseConnection:
-    def __init__(self):
+    def __init__(self, url: Optional[str] = None, connect_args: Optional[Dict] = None):
+        """Conexão com o banco do `.env` ou, com `url`, com outro banco (ex.: benchmarks locais)."""
+        from sqlalchemy import create_engine
+
         self.engine = create_engine(
-            f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@"
-            f"{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}"
+            url or f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@"
+                   f"{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}",
+            connect_args=connect_args or {},
         )
+        _ENGINES.add(self.engine)
 
-    def execute_query(self, query: Union[str, text], params: Optional[Union[Dict, List, Tuple]] = None) -> pd.DataFrame:
+    def execute_query(self, query: Union[str, Any], params: Optional[Union[Dict, List, Tuple]] = None) -> "pd.DataFrame":
         """Executa uma query SQL e retorna um DataFrame's a DataFrame.
 
+        Cada execução é cronometrada e contabilizada pelo método que a chamou
+        (ver `src/database/instrumentacao.py`); as lentas têm o plano capturado.
+
         Args:
             query: Consulta SQL (string ou objeto SQLAlchemy text).
             params: Parâmetros da consulta (dicionário, lista ou tupla).
@@ -25,10 +64,18 @@ class DatabaseConnection:
         Raises:
             ValueError: Se a consulta ou parâmetros forem inválidos.
         """
-        try:
-            return pd.read_sql_query(query, self.engine, params=params)
-        except Exception as e:
-            raise ValueError(f"Erro ao executar consulta: {str(e)}")
+        import pandas as pd
+
+        metodo = metodo_chamador()
+        inicio = time.perf_counter()
+        with rastreamento.span("db.query", **{"db.system": "postgresql", "code.function": metodo}) as span:
+            try:
+                df = pd.read_sql_query(query, self.engine, params=params)
+            except Exception as e:
+                raise ValueError(f"Erro ao executar consulta: {str(e)}")
+            span.definir(**{"db.rows": len(df)})
+        registrar_consulta(self.engine, query, params, metodo, time.perf_counter() - inicio, len(df))
+        return df
 
 def buscar_clientes(db: DatabaseConnection) -> list:
     """Busca todos os clientes no banco."""
@@ -74,3 +121,107 @@ def obter_anos(db: DatabaseConnection, id_cliente: int) -> List[int]:
     anos = df['ano'].tolist() if not df.empty else [date.today().year]
     return anos
 
+
+# Meses anteriores ao do relatório que alguma seção lê (Relatório 5: geração de
+# caixa dos 3 últimos meses, cada um comparado ao anterior)
+MESES_LIDOS_ANTES = 3
+
+
+def _janela_impressao(mes: int, ano: int) -> Tuple[date, date]:
+    """[início, fim) das datas que os relatórios do período leem."""
+    indice = ano * 12 + mes - 1 - MESES_LIDOS_ANTES
+    return date(indice // 12, indice % 12 + 1, 1), date(ano + (mes == 12), mes % 12 + 1, 1)
+
+
+def _partes_impressao(db: DatabaseConnection, id_cliente: List[int],
+                      inicio: date, fim: date) -> List[Tuple[int, Optional[date], str]]:
+    """Contagem e soma dos hashes das linhas, por cliente, tabela e mês.
+
+    `fc`, `dre` e `indicador` são agrupados por mês dentro de [inicio, fim);
+    `plano_de_contas` e `cliente` (sem data) vêm com mês None.
+    """
+    query = text("""
+        SELECT tabela, id_cliente, mes, linhas, soma FROM (
+            SELECT 'fc' AS tabela, id_cliente, date_trunc('month', data)::date AS mes,
+                   count(*) AS linhas, sum(hashtext(t::text)::bigint) AS soma
+              FROM fc t WHERE id_cliente = ANY (:id_cliente) AND data >= :inicio AND data < :fim
+             GROUP BY id_cliente, date_trunc('month', data)
+            UNION ALL
+            SELECT 'dre', id_cliente, date_trunc('month', data)::date, count(*), sum(hashtext(t::text)::bigint)
+              FROM dre t WHERE id_cliente = ANY (:id_cliente) AND data >= :inicio AND data < :fim
+             GROUP BY id_cliente, date_trunc('month', data)
+            UNION ALL
+            SELECT 'indicador', id_cliente, date_trunc('month', data)::date, count(*), sum(hashtext(t::text)::bigint)
+              FROM indicador t WHERE id_cliente = ANY (:id_cliente) AND data >= :inicio AND data < :fim
+             GROUP BY id_cliente, date_trunc('month', data)
+            UNION ALL
+            SELECT 'plano', id_cliente, NULL, count(*), sum(hashtext(t::text)::bigint)
+              FROM plano_de_contas t WHERE id_cliente = ANY (:id_cliente) GROUP BY id_cliente
+            UNION ALL
+            SELECT 'cliente', id_cliente, NULL, count(*), sum(hashtext(t::text)::bigint)
+              FROM cliente t WHERE id_cliente = ANY (:id_cliente) GROUP BY id_cliente
+        ) partes;
+    """)
+    df = db.execute_query(query, {"id_cliente": list(id_cliente), "inicio": inicio, "fim": fim})
+    return [
+        (int(r.id_cliente), r.mes if isinstance(r.mes, date) else None,
+         f"{r.tabela}:{r.id_cliente}:{r.mes if isinstance(r.mes, date) else '-'}:{r.linhas}:{r.soma}")
+        for r in df.itertuples(index=False)
+    ]
+
+
+def _combinar_partes(partes: List[str]) -> str:
+    import hashlib
+    return hashlib.md5("|".join(sorted(partes)).encode()).hexdigest()
+
+
+def impressao_digital_dados(db: DatabaseConnection, id_cliente: List[int], mes: int, ano: int) -> str:
+    """Hash do que os relatórios do período leem para o(s) cliente(s).
+
+    Combina contagem e soma dos hashes das linhas de `fc`, `dre` e `indicador`
+    do mês e dos `MESES_LIDOS_ANTES` anteriores (comparativos e série da
+    geração de caixa), do `plano_de_contas` e do cadastro (`cliente`). Qualquer
+    carga, edição ou remoção nessa janela muda o valor; meses mais antigos não
+    são lidos.
+
+    Args:
+        db: Instância de DatabaseConnection.
+        id_cliente: IDs de cliente(s).
+        mes: Mês (1-12).
+        ano: Ano.
+
+    Returns:
+        Hash MD5 em hexadecimal.
+    """
+    inicio, fim = _janela_impressao(mes, ano)
+    return _combinar_partes([parte for _, _, parte in _partes_impressao(db, id_cliente, inicio, fim)])
+
+
+def impressoes_digitais_por_cliente(db: DatabaseConnection, id_clientes: List[int],
+                                    periodos: List[Tuple[int, int]]) -> Dict[Tuple[int, int, int], str]:
+    """`impressao_digital_dados` de cada cliente em cada período, numa consulta só.
+
+    Usado pelo monitoramento do aquecimento, que verifica todos os clientes a
+    cada rodada. Os valores são iguais aos de `impressao_digital_dados` com um
+    único cliente.
+
+    Returns:
+        {(id_cliente, mes, ano): impressão}
+    """
+    if not id_clientes or not periodos:
+        return {}
+    janelas = {periodo: _janela_impressao(*periodo) for periodo in periodos}
+    partes = _partes_impressao(
+        db, id_clientes, min(i for i, _ in janelas.values()), max(f for _, f in janelas.values())
+    )
+    por_cliente: Dict[int, List[Tuple[Optional[date], str]]] = {}
+    for id_cliente, mes_parte, parte in partes:
+        por_cliente.setdefault(id_cliente, []).append((mes_parte, parte))
+    return {
+        (id_cliente, mes, ano): _combinar_partes([
+            parte for mes_parte, parte in por_cliente.get(id_cliente, [])
+            if mes_parte is None or inicio <= mes_parte < fim
+        ])
+        for id_cliente in id_clientes
+        for (mes, ano), (inicio, fim) in janelas.items()
+    }
@@ -0,0 +1,246 @@
+# src/database/fila.py
+"""
+Fila de geração durável no Postgres, para dividir o fechamento entre vários nós.
+
+Cada pedido é uma linha em `relatorio_jobs`. Os workers reservam o próximo
+pendente com `SELECT ... FOR UPDATE SKIP LOCKED` (duas máquinas nunca pegam a
+mesma linha e ninguém espera pelo lock da outra), executam o pipeline normal
+(`gerar_relatorio_pdf_unico`) e gravam o resultado, o tempo e as etapas. Não há
+broker além do próprio banco.
+
+Falhas voltam para a fila com espera crescente até `max_tentativas`. Jobs de um
+worker que morreu no meio (status `executando` há mais de `timeout_s`) são
+devolvidos por `recuperar_abandonados`, chamado pelos próprios workers. Só o
+worker que ainda detém o job (status `executando` com o seu nome) grava o
+resultado: se o job foi devolvido e reservado por outro, `concluir` e `falhar`
+não alteram nada e devolvem False.
+
+Com vários nós, aponte `ARTEFATOS_DIR` para um volume compartilhado: o
+`pdf_path` gravado é o caminho no nó que gerou o PDF.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+
+class FilaPostgres:
+    """Fila de jobs de geração em uma tabela do Postgres."""
+
+    def __init__(self, engine: Engine, tabela: str = "relatorio_jobs"):
+        if not tabela.replace("_", "").isalnum():
+            raise ValueError(f"Nome de tabela inválido: {tabela}")
+        self.engine = engine
+        self.tabela = tabela
+
+    def criar_tabela(self) -> None:
+        """Cria a tabela e o índice parcial dos pendentes (idempotente)."""
+        with self.engine.begin() as conn:
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {self.tabela} (
+                    id              BIGSERIAL PRIMARY KEY,
+                    id_cliente      INTEGER[] NOT NULL,
+                    mes             SMALLINT NOT NULL,
+                    ano             SMALLINT NOT NULL,
+                    relatorios      INTEGER[] NOT NULL,
+                    analise_text    TEXT NOT NULL DEFAULT '',
+                    status          TEXT NOT NULL DEFAULT '{STATUS_PENDENTE}',
+                    tentativas      INTEGER NOT NULL DEFAULT 0,
+                    max_tentativas  INTEGER NOT NULL DEFAULT 3,
+                    disponivel_em   TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    criado_em       TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    iniciado_em     TIMESTAMPTZ,
+                    concluido_em    TIMESTAMPTZ,
+                    worker          TEXT,
+                    pdf_path        TEXT,
+                    arquivo         TEXT,
+                    erro            TEXT,
+                    duracao_s       DOUBLE PRECISION,
+                    etapas          JSONB
+                )
+            """))
+            conn.execute(text(f"""
+                CREATE INDEX IF NOT EXISTS {self.tabela}_pendentes_idx
+                    ON {self.tabela} (disponivel_em, id) WHERE status = '{STATUS_PENDENTE}'
+            """))
+
+    def enfileirar(self, id_cliente: List[int], mes: int, ano: int, relatorios: List[int],
+                   analise_text: str = "", max_tentativas: int = 3) -> int:
+        """Insere um job pendente e devolve o id."""
+        with self.engine.begin() as conn:
+            return conn.execute(text(f"""
+                INSERT INTO {self.tabela} (id_cliente, mes, ano, relatorios, analise_text, max_tentativas)
+                VALUES (:id_cliente, :mes, :ano, :relatorios, :analise_text, :max_tentativas)
+                RETURNING id
+            """), {
+                "id_cliente": list(id_cliente), "mes": mes, "ano": ano, "relatorios": list(relatorios),
+                "analise_text": analise_text or "", "max_tentativas": max_tentativas,
+            }).scalar_one()
+
+    def enfileirar_mes(self, ids_clientes: List[int], mes: int, ano: int, relatorios: List[int]) -> List[int]:
+        """Um job por cliente (fechamento do mês), em uma única transação."""
+        with self.engine.begin() as conn:
+            return [
+                conn.execute(text(f"""
+                    INSERT INTO {self.tabela} (id_cliente, mes, ano, relatorios)
+                    VALUES (:id_cliente, :mes, :ano, :relatorios) RETURNING id
+                """), {"id_cliente": [cid], "mes": mes, "ano": ano, "relatorios": list(relatorios)}).scalar_one()
+                for cid in ids_clientes
+            ]
+
+    def reservar(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Reserva o próximo job pendente para `worker` (None se a fila estiver vazia)."""
+        with self.engine.begin() as conn:
+            linha = conn.execute(text(f"""
+                UPDATE {self.tabela} AS j
+                   SET status = '{STATUS_EXECUTANDO}', iniciado_em = now(), worker = :worker,
+                       tentativas = j.tentativas + 1, erro = NULL
+                 WHERE j.id = (
+                       SELECT id FROM {self.tabela}
+                        WHERE status = '{STATUS_PENDENTE}' AND disponivel_em <= now()
+                        ORDER BY disponivel_em, id
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                 )
+             RETURNING j.id, j.id_cliente, j.mes, j.ano, j.relatorios, j.analise_text, j.tentativas
+            """), {"worker": worker}).mappings().first()
+        return dict(linha) if linha else None
+
+    def concluir(self, job_id: int, worker: str, pdf_path: str, arquivo: str, duracao_s: float,
+                 etapas: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """Registra o resultado; False se `worker` não detém mais o job."""
+        with self.engine.begin() as conn:
+            return conn.execute(text(f"""
+                UPDATE {self.tabela}
+                   SET status = '{STATUS_CONCLUIDO}', concluido_em = now(), pdf_path = :pdf_path,
+                       arquivo = :arquivo, duracao_s = :duracao_s, etapas = CAST(:etapas AS JSONB)
+                 WHERE id = :id AND worker = :worker AND status = '{STATUS_EXECUTANDO}'
+            """), {"id": job_id, "worker": worker, "pdf_path": pdf_path, "arquivo": arquivo,
+                   "duracao_s": duracao_s, "etapas": json.dumps(etapas or [], ensure_ascii=False)}).rowcount == 1
+
+    def falhar(self, job_id: int, worker: str, erro: str, duracao_s: float, espera_base_s: int = 30) -> bool:
+        """Registra a falha; volta para a fila (espera 30s, 60s, 120s...) até `max_tentativas`.
+
+        False se `worker` não detém mais o job.
+        """
+        with self.engine.begin() as conn:
+            return conn.execute(text(f"""
+                UPDATE {self.tabela}
+                   SET status = CASE WHEN tentativas < max_tentativas
+                                     THEN '{STATUS_PENDENTE}' ELSE '{STATUS_ERRO}' END,
+                       disponivel_em = now() + make_interval(secs => :espera * power(2, tentativas - 1)),
+                       concluido_em = CASE WHEN tentativas < max_tentativas THEN NULL ELSE now() END,
+                       erro = :erro, duracao_s = :duracao_s
+                 WHERE id = :id AND worker = :worker AND status = '{STATUS_EXECUTANDO}'
+            """), {"id": job_id, "worker": worker, "erro": erro[:4000], "duracao_s": duracao_s,
+                   "espera": espera_base_s}).rowcount == 1
+
+    def recuperar_abandonados(self, timeout_s: int = 1800) -> int:
+        """Devolve à fila os jobs `executando` há mais de `timeout_s` (worker caiu)."""
+        with self.engine.begin() as conn:
+            devolvidos = conn.execute(text(f"""
+                UPDATE {self.tabela}
+                   SET status = CASE WHEN tentativas < max_tentativas
+                                     THEN '{STATUS_PENDENTE}' ELSE '{STATUS_ERRO}' END,
+                       concluido_em = CASE WHEN tentativas < max_tentativas THEN NULL ELSE now() END,
+                       erro = 'Worker ' || coalesce(worker, '?') || ' não concluiu o job (timeout)'
+                 WHERE status = '{STATUS_EXECUTANDO}'
+                   AND iniciado_em < now() - make_interval(secs => :timeout)
+            """), {"timeout": timeout_s}).rowcount
+        if devolvidos:
+            logger.warning(f"♻️ {devolvidos} jobs abandonados devolvidos à fila")
+        return devolvidos
+
+    def resumo(self, mes: Optional[int] = None, ano: Optional[int] = None) -> Dict[str, Any]:
+        """Contagem por status e tempos médios (opcionalmente de um período)."""
+        filtro = "WHERE mes = :mes AND ano = :ano" if mes and ano else ""
+        with self.engine.connect() as conn:
+            linhas = conn.execute(text(f"""
+                SELECT status, count(*) AS total, avg(duracao_s) AS duracao_media_s,
+                       min(criado_em) AS primeiro, max(concluido_em) AS ultimo
+                  FROM {self.tabela} {filtro}
+              GROUP BY status
+            """), {"mes": mes, "ano": ano}).mappings().all()
+        return {linha["status"]: dict(linha) for linha in linhas}
+
+
+def nome_worker() -> str:
+    """Identificação do worker: host + pid + thread."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def executar_worker(
+    fila: FilaPostgres,
+    gerar: Callable[..., Any],
+    parar: Optional[threading.Event] = None,
+    intervalo_s: float = 2.0,
+    max_jobs: Optional[int] = None,
+    timeout_abandono_s: int = 1800,
+) -> int:
+    """
+    Laço de um worker: reserva, gera e registra até `parar` ser sinalizado (ou
+    `max_jobs` serem processados). Com a fila vazia, espera `intervalo_s`.
+
+    Args:
+        fila: Fila compartilhada.
+        gerar: Função de geração com a assinatura de `gerar_relatorio_pdf_unico`.
+        parar: Evento para encerrar o laço de forma limpa.
+        intervalo_s: Espera entre consultas quando não há trabalho.
+        max_jobs: Encerra após processar esta quantidade (None = sem limite).
+        timeout_abandono_s: Idade para considerar um job `executando` abandonado.
+
+    Returns:
+        Quantidade de jobs processados (com sucesso ou erro).
+    """
+    parar = parar or threading.Event()
+    worker = nome_worker()
+    processados = 0
+    ultima_recuperacao = 0.0
+
+    while not parar.is_set() and (max_jobs is None or processados < max_jobs):
+        if time.time() - ultima_recuperacao > 60:
+            fila.recuperar_abandonados(timeout_abandono_s)
+            ultima_recuperacao = time.time()
+
+        job = fila.reservar(worker)
+        if job is None:
+            parar.wait(intervalo_s)
+            continue
+
+        etapas: List[Dict[str, Any]] = []
+        inicio = time.time()
+
+        def progresso(etapa: str, status: str) -> None:
+            etapas.append({"etapa": etapa, "status": status, "t": round(time.time() - inicio, 3)})
+
+        logger.info(f"▶️ Job {job['id']} (clientes {job['id_cliente']}, {job['mes']:02d}/{job['ano']}) em {worker}")
+        try:
+            pdf_path, arquivo = gerar(
+                list(job["id_cliente"]), job["mes"], job["ano"], list(job["relatorios"]),
+                job["analise_text"], progresso=progresso,
+            )
+            if fila.concluir(job["id"], worker, os.path.abspath(pdf_path), arquivo, time.time() - inicio, etapas):
+                logger.info(f"✅ Job {job['id']} concluído em {time.time() - inicio:.1f}s")
+            else:
+                logger.warning(f"⚠️ Job {job['id']} não pertence mais a {worker}; resultado descartado")
+        except Exception as e:
+            if fila.falhar(job["id"], worker, str(e), time.time() - inicio):
+                logger.error(f"❌ Job {job['id']} falhou (tentativa {job['tentativas']}): {e}")
+            else:
+                logger.warning(f"⚠️ Job {job['id']} não pertence mais a {worker}; falha descartada: {e}")
+        processados += 1
+
+    return processados
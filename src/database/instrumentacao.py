@@ -0,0 +1,214 @@
+# src/database/instrumentacao.py
+"""
+Instrumentação das consultas feitas por `DatabaseConnection.execute_query`.
+
+Cada execução é identificada pelo método que a chamou (ex.:
+`Indicadores.calcular_receitas_fc`) e pelo(s) cliente(s) do parâmetro
+`id_cliente`. Para cada uma registramos:
+
+- duração e linhas devolvidas, nas métricas do Prometheus (`/v1/metrics`);
+- um acumulado por método e cliente neste processo (`/v1/metrics/consultas`).
+
+Consultas acima de `DB_CONSULTA_LENTA_MS` são repetidas com
+`EXPLAIN (ANALYZE, BUFFERS)` e o plano vai para um log rotativo em JSON lines
+(`DB_CONSULTA_LENTA_LOG`). O EXPLAIN executa a consulta de novo; por isso roda
+em segundo plano e no máximo uma vez a cada `DB_EXPLAIN_INTERVALO_S` para o
+mesmo método e cliente. Para resumir o log: `python -m src.cli slow-queries`.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.core import metricas
+
+logger = logging.getLogger(__name__)
+
+CONSULTA_LENTA_MS = float(os.getenv("DB_CONSULTA_LENTA_MS", "500"))
+CONSULTA_LENTA_LOG = os.getenv("DB_CONSULTA_LENTA_LOG", os.path.join("outputs", "logs", "consultas_lentas.jsonl"))
+EXPLAIN_INTERVALO_S = float(os.getenv("DB_EXPLAIN_INTERVALO_S", "600"))
+
+
+def metodo_chamador(profundidade: int = 2) -> str:
+    """Nome qualificado da função `profundidade` quadros acima (ex.: `Indicadores.calcular_receitas_fc`)."""
+    try:
+        codigo = sys._getframe(profundidade).f_code
+    except ValueError:
+        return "desconhecido"
+    return getattr(codigo, "co_qualname", codigo.co_name)
+
+
+def rotulo_cliente(params: Any) -> str:
+    """IDs de cliente do parâmetro `id_cliente` ("12" ou "12,15"), ou "" se não houver."""
+    if not isinstance(params, dict) or params.get("id_cliente") is None:
+        return ""
+    ids = params["id_cliente"]
+    if isinstance(ids, (list, tuple, set)):
+        return ",".join(str(i) for i in sorted(ids))
+    return str(ids)
+
+
+class EstatisticasConsultas:
+    """Acumulado de execuções por (método, cliente), seguro entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dados: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def registrar(self, metodo: str, cliente: str, duracao_s: float, linhas: int, lenta: bool) -> None:
+        with self._lock:
+            item = self._dados.setdefault((metodo, cliente), {
+                "execucoes": 0, "total_s": 0.0, "max_s": 0.0, "linhas": 0, "lentas": 0})
+            item["execucoes"] += 1
+            item["total_s"] += duracao_s
+            item["max_s"] = max(item["max_s"], duracao_s)
+            item["linhas"] += linhas
+            item["lentas"] += int(lenta)
+
+    def resumo(self, por_cliente: bool = True) -> List[Dict[str, Any]]:
+        """Linhas ordenadas pelo tempo total (maior primeiro)."""
+        with self._lock:
+            itens = [(k, dict(v)) for k, v in self._dados.items()]
+        agrupado: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for (metodo, cliente), valores in itens:
+            chave = (metodo, cliente if por_cliente else "")
+            atual = agrupado.setdefault(chave, {"execucoes": 0, "total_s": 0.0, "max_s": 0.0, "linhas": 0, "lentas": 0})
+            for campo in ("execucoes", "total_s", "linhas", "lentas"):
+                atual[campo] += valores[campo]
+            atual["max_s"] = max(atual["max_s"], valores["max_s"])
+        linhas = []
+        for (metodo, cliente), v in agrupado.items():
+            linha = {"metodo": metodo, **v, "media_s": v["total_s"] / v["execucoes"]}
+            if por_cliente:
+                linha["cliente"] = cliente
+            linhas.append(linha)
+        return sorted(linhas, key=lambda l: l["total_s"], reverse=True)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._dados.clear()
+
+
+ESTATISTICAS = EstatisticasConsultas()
+
+
+class RegistroConsultasLentas:
+    """Captura o plano das consultas lentas em um log rotativo (JSON lines)."""
+
+    def __init__(self, caminho: str = CONSULTA_LENTA_LOG, intervalo_s: float = EXPLAIN_INTERVALO_S,
+                 max_bytes: int = 10 * 1024 * 1024, arquivos: int = 5):
+        self.caminho = caminho
+        self.intervalo_s = intervalo_s
+        self._max_bytes = max_bytes
+        self._arquivos = arquivos
+        self._lock = threading.Lock()
+        self._ultima: Dict[Tuple[str, str], float] = {}
+        self._log: Optional[logging.Logger] = None
+
+    def _logger(self) -> logging.Logger:
+        if self._log is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+            log = logging.getLogger(f"{__name__}.lentas.{id(self)}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            handler = logging.handlers.RotatingFileHandler(
+                self.caminho, maxBytes=self._max_bytes, backupCount=self._arquivos, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            log.addHandler(handler)
+            self._log = log
+        return self._log
+
+    def deve_capturar(self, metodo: str, cliente: str) -> bool:
+        """No máximo uma captura por método/cliente a cada `intervalo_s`."""
+        agora = time.monotonic()
+        with self._lock:
+            ultima = self._ultima.get((metodo, cliente))
+            if ultima is not None and agora - ultima < self.intervalo_s:
+                return False
+            self._ultima[(metodo, cliente)] = agora
+            return True
+
+    def capturar(self, engine, query: Any, params: Any, metodo: str, cliente: str,
+                 duracao_s: float, linhas: int, em_segundo_plano: bool = True) -> None:
+        if not self.deve_capturar(metodo, cliente):
+            return
+        sql = str(getattr(query, "text", query)).strip()
+        if em_segundo_plano:
+            threading.Thread(
+                target=self._explicar, args=(engine, sql, params, metodo, cliente, duracao_s, linhas),
+                name="explain-consulta-lenta", daemon=True,
+            ).start()
+        else:
+            self._explicar(engine, sql, params, metodo, cliente, duracao_s, linhas)
+
+    def _explicar(self, engine, sql: str, params: Any, metodo: str, cliente: str,
+                  duracao_s: float, linhas: int) -> None:
+        registro: Dict[str, Any] = {
+            "quando": datetime.now().isoformat(timespec="seconds"), "metodo": metodo, "cliente": cliente,
+            "duracao_ms": round(duracao_s * 1000, 1), "linhas": linhas,
+            "params": dict(params) if isinstance(params, dict) else params,
+            "sql": sql,
+        }
+        if sql.lstrip("( \n").upper().startswith(("SELECT", "WITH")):
+            try:
+                from sqlalchemy import text
+
+                with engine.connect() as conn:
+                    plano = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params or {}).scalars().all()
+                    conn.rollback()
+                registro["plano"] = "\n".join(plano)
+            except Exception as e:
+                registro["erro_explain"] = str(e)
+        try:
+            self._logger().info(json.dumps(registro, ensure_ascii=False, default=str))
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível gravar o log de consultas lentas: {e}")
+        logger.warning(f"🐢 Consulta lenta: {metodo} (cliente {cliente or '-'}) {duracao_s * 1000:.0f} ms, {linhas} linhas")
+
+
+CONSULTAS_LENTAS = RegistroConsultasLentas()
+
+
+def registrar_consulta(engine, query: Any, params: Any, metodo: str, duracao_s: float, linhas: int,
+                       limite_ms: Optional[float] = None) -> None:
+    """Contabiliza uma execução e, se passou do limite, captura o plano."""
+    limite_ms = CONSULTA_LENTA_MS if limite_ms is None else limite_ms
+    cliente = rotulo_cliente(params)
+    lenta = limite_ms > 0 and duracao_s * 1000 >= limite_ms
+    metricas.DB_CONSULTA_DURACAO.observar(duracao_s, metodo=metodo)
+    metricas.DB_CONSULTA_LINHAS.inc(linhas, metodo=metodo)
+    ESTATISTICAS.registrar(metodo, cliente, duracao_s, linhas, lenta)
+    if lenta:
+        metricas.DB_CONSULTAS_LENTAS.inc(metodo=metodo)
+        CONSULTAS_LENTAS.capturar(engine, query, params, metodo, cliente, duracao_s, linhas)
+
+
+def resumir_log(caminhos: Iterable[str]) -> List[Dict[str, Any]]:
+    """Resumo por método e cliente do log de consultas lentas (inclui os arquivos rotacionados)."""
+    grupos: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for caminho in caminhos:
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                linhas = f.readlines()
+        except OSError:
+            continue
+        for linha in linhas:
+            try:
+                r = json.loads(linha)
+            except ValueError:
+                continue
+            g = grupos.setdefault((r.get("metodo", ""), r.get("cliente", "")), {
+                "metodo": r.get("metodo", ""), "cliente": r.get("cliente", ""),
+                "capturas": 0, "max_ms": 0.0, "total_ms": 0.0, "ultima": ""})
+            g["capturas"] += 1
+            g["total_ms"] += float(r.get("duracao_ms", 0))
+            g["max_ms"] = max(g["max_ms"], float(r.get("duracao_ms", 0)))
+            g["ultima"] = max(g["ultima"], r.get("quando", ""))
+    for g in grupos.values():
+        g["media_ms"] = g["total_ms"] / g["capturas"]
+    return sorted(grupos.values(), key=lambda g: g["max_ms"], reverse=True)
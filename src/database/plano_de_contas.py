@@ -0,0 +1,130 @@
+# src/database/plano_de_contas.py
+"""
+Cache em memória do `plano_de_contas`: `nivel_3_id` → `nivel_2` de cada cliente.
+
+As consultas por nivel_2 de custos variáveis, despesas fixas e investimentos
+(inclusive as variantes `*_top_fc` dos Relatórios 1 e 2) agregam `fc` só por
+(`id_cliente`, `nivel_3_id`), sem o join `text(f.nivel_3_id) = p.nivel_3_id`
+(o cast linha a linha impede o uso de índices e se repetia no CTE do mês
+anterior). O `nivel_2` de cada conta vem daqui, e a soma por `nivel_2` é feita
+em memória (`somar_por_nivel_2`), assim como o ranking dos `*_top_fc`.
+
+O plano de cada cliente é lido uma vez e guardado com a sua versão (contagem e
+soma dos hashes das linhas, como em `impressao_digital_dados`). A versão só é
+conferida no banco depois de `PLANO_DE_CONTAS_VALIDADE_S` segundos desde a
+última conferência; dentro desse prazo o mapa sai da memória sem consulta
+nenhuma. Só os clientes cujo plano mudou são relidos. A carga do ETL pode
+chamar `invalidar` para não esperar o prazo.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.core import metricas
+from src.database.db_utils import DatabaseConnection, text
+
+Mapa = Dict[Tuple[int, str], Optional[str]]  # (id_cliente, nivel_3_id) → nivel_2
+
+# Segundos entre conferências da versão do plano de um cliente no banco
+PLANO_DE_CONTAS_VALIDADE_S = float(os.getenv("PLANO_DE_CONTAS_VALIDADE_S", "300"))
+
+
+class CachePlanoDeContas:
+    """Planos de contas por cliente, com versão; seguro entre threads."""
+
+    def __init__(self, nome: str = "plano_de_contas", validade_s: float = PLANO_DE_CONTAS_VALIDADE_S):
+        self.nome = nome
+        self.validade_s = validade_s
+        self._lock = threading.Lock()
+        # id → (versão, {nivel_3_id: nivel_2}, instante da última conferência)
+        self._planos: Dict[int, Tuple[str, Dict[str, Optional[str]], float]] = {}
+
+    def versoes(self, db: DatabaseConnection, id_cliente: List[int]) -> Dict[int, str]:
+        """Versão atual do plano de cada cliente no banco (clientes sem plano ficam de fora)."""
+        query = text("""
+            SELECT id_cliente, count(*) || ':' || coalesce(sum(hashtext(t::text)::bigint), 0) AS versao
+            FROM plano_de_contas t
+            WHERE id_cliente = ANY (:id_cliente)
+            GROUP BY id_cliente;
+        """)
+        df = db.execute_query(query, {"id_cliente": list(id_cliente)})
+        return {int(row["id_cliente"]): str(row["versao"]) for _, row in df.iterrows()}
+
+    def carregar(self, db: DatabaseConnection, id_cliente: List[int]) -> Dict[int, Dict[str, Optional[str]]]:
+        """Lê do banco o plano dos clientes: {id_cliente: {nivel_3_id: nivel_2}}."""
+        query = text("""
+            SELECT id_cliente, nivel_3_id, nivel_2
+            FROM plano_de_contas
+            WHERE id_cliente = ANY (:id_cliente);
+        """)
+        df = db.execute_query(query, {"id_cliente": list(id_cliente)})
+        planos: Dict[int, Dict[str, Optional[str]]] = {i: {} for i in id_cliente}
+        for cliente, nivel_3_id, nivel_2 in zip(df["id_cliente"], df["nivel_3_id"], df["nivel_2"]):
+            planos[int(cliente)][str(nivel_3_id)] = nivel_2 if isinstance(nivel_2, str) else None
+        return planos
+
+    def mapa(self, db: DatabaseConnection, id_cliente: Iterable[int]) -> Mapa:
+        """(id_cliente, nivel_3_id) → nivel_2 dos clientes.
+
+        Confere a versão só dos planos com a última conferência vencida e relê
+        só os que mudaram. O resultado é montado a partir de uma única leitura
+        do cache, então um `invalidar` concorrente não o afeta.
+        """
+        ids = sorted({int(i) for i in id_cliente})
+        agora = time.monotonic()
+        with self._lock:
+            entradas = {i: self._planos.get(i) for i in ids}
+        a_conferir = [i for i, e in entradas.items() if e is None or agora - e[2] >= self.validade_s]
+
+        desatualizados: List[int] = []
+        if a_conferir:
+            versoes = self.versoes(db, a_conferir)
+            desatualizados = [i for i in a_conferir
+                              if entradas[i] is None or entradas[i][0] != versoes.get(i, "")]
+            lidos = self.carregar(db, desatualizados) if desatualizados else {}
+            with self._lock:
+                for cliente in a_conferir:
+                    plano = lidos[cliente] if cliente in lidos else entradas[cliente][1]
+                    entradas[cliente] = self._planos[cliente] = (versoes.get(cliente, ""), plano, agora)
+        for cliente in ids:
+            metricas.registrar_cache(self.nome, cliente not in desatualizados)
+
+        return {(cliente, nivel_3_id): nivel_2
+                for cliente, (_, plano, _) in entradas.items() for nivel_3_id, nivel_2 in plano.items()}
+
+    def invalidar(self, id_cliente: Optional[Iterable[int]] = None) -> None:
+        """Descarta o plano dos clientes (todos, sem `id_cliente`)."""
+        with self._lock:
+            if id_cliente is None:
+                self._planos.clear()
+            else:
+                for cliente in id_cliente:
+                    self._planos.pop(int(cliente), None)
+
+
+def somar_por_nivel_2(resultado: Any, mapa: Mapa, colunas: Tuple[str, ...] = ("valor", "valor_anterior")) -> Dict[Optional[str], Dict[str, float]]:
+    """Soma as `colunas` de um resultado agregado por (`id_cliente`, `nivel_3_id`) por `nivel_2`.
+
+    Contas fora do plano são descartadas, como no antigo `JOIN plano_de_contas`.
+    Valores NULL (mês sem lançamento na conta) não entram na soma; um `nivel_2`
+    sem nenhum valor numa coluna fica com None nela, como o `SUM` do SQL.
+
+    Returns:
+        {nivel_2: {coluna: soma ou None}}, na ordem em que os `nivel_2` aparecem.
+    """
+    somas: Dict[Optional[str], Dict[str, Any]] = {}
+    linhas = zip(resultado["id_cliente"], resultado["nivel_3_id"], *(resultado[c] for c in colunas))
+    for cliente, nivel_3_id, *valores in linhas:
+        chave = (int(cliente), str(nivel_3_id))
+        if chave not in mapa:
+            continue
+        soma = somas.setdefault(mapa[chave], dict.fromkeys(colunas))
+        for coluna, valor in zip(colunas, valores):
+            if valor is not None and valor == valor:  # NULL vem como None ou NaN
+                soma[coluna] = (soma[coluna] or 0.0) + float(valor)
+    return somas
+
+
+# Cache do processo (API, Streamlit, lote)
+PLANO_DE_CONTAS = CachePlanoDeContas()
@@ -1,15 +1,60 @@
 import streamlit as st
+import streamlit.components.v1 as components
 from streamlit_quill import st_quill
-from datetime import date, timedelta
+from datetime import date
 from src.database.db_utils import DatabaseConnection, buscar_clientes, obter_meses, obter_anos
-from src.core.indicadores import Indicadores
-from src.core.relatorios import (
-    Relatorio1, Relatorio2, Relatorio3, Relatorio4, Relatorio5, Relatorio6, Relatorio7, Relatorio8
-)
-from src.rendering.engine import RenderingEngine
+from src.core.pipeline import gerar_relatorio_pdf_unico, gerar_preview_html, rendering_engine
+from src.core.jobs import GerenciadorJobs, FilaCheiaError, STATUS_ERRO
+from src.core import perfil
 import os
 import re
 
+# Validade (segundos) dos caches de dados do formulário
+CACHE_TTL_CLIENTES = int(os.getenv("CACHE_TTL_CLIENTES", "600"))
+CACHE_TTL_ANOS = int(os.getenv("CACHE_TTL_ANOS", "1800"))
+
+@st.cache_resource(show_spinner=False)
+def obter_conexao() -> DatabaseConnection:
+    """Conexão (pool do SQLAlchemy) compartilhada por todas as sessões e reruns."""
+    return DatabaseConnection()
+
+@st.cache_resource(show_spinner=False)
+def obter_motor_renderizacao():
+    """Motor de renderização carregado uma única vez por processo.
+
+    Os renderizadores (templates Jinja compilados, matplotlib) não precisam de
+    cache aqui: `get_renderer` devolve instâncias congeladas criadas na
+    importação de `src.rendering.renderers`. Importar o módulo já os pré-carrega.
+    """
+    import src.rendering.renderers  # noqa: F401
+    return rendering_engine
+
+@st.cache_data(ttl=CACHE_TTL_CLIENTES, show_spinner=False)
+def carregar_clientes(_db: DatabaseConnection) -> list:
+    """Clientes ativos (cacheados; `_db` não entra na chave do cache)."""
+    return buscar_clientes(_db)
+
+@st.cache_data(ttl=CACHE_TTL_ANOS, show_spinner=False)
+def carregar_anos(_db: DatabaseConnection, cliente_ids: tuple) -> list:
+    """Anos disponíveis para o conjunto de clientes (união, ordem decrescente)."""
+    todos_anos = []
+    for id_cliente in cliente_ids:
+        todos_anos.extend(obter_anos(_db, id_cliente))
+    return sorted(set(todos_anos), reverse=True)
+
+@st.cache_resource(show_spinner=False)
+def obter_gerenciador_jobs() -> GerenciadorJobs:
+    """Workers de geração compartilhados pelas sessões deste processo."""
+    return GerenciadorJobs(
+        max_workers=int(os.getenv("STREAMLIT_JOBS_WORKERS", "2")),
+        tamanho_fila=int(os.getenv("STREAMLIT_JOBS_FILA_MAX", "20")),
+    )
+
+def invalidar_caches():
+    """Descarta clientes/anos em cache (ex.: cliente novo ou mês recém-importado)."""
+    carregar_clientes.clear()
+    carregar_anos.clear()
+
 def verificar_permissoes():
     """
     Verifica se o usuário tem permissão para acessar os relatórios
@@ -115,6 +160,87 @@ def render_parecer_tecnico(relatorios_selecionados: list) -> str:
         return processar_html_parecer(content)
     return ""
 
+def obter_job_sessao():
+    """Job de geração desta sessão (None se não houver ou se já expirou)."""
+    job_id = st.session_state.get("job_id")
+    return obter_gerenciador_jobs().obter(job_id) if job_id else None
+
+def total_etapas_previstas(relatorios_ids: list) -> int:
+    """Etapas esperadas: consulta, HTML e PDF por seção, HTML/PDF do índice, merge e finalização."""
+    return 3 * len(relatorios_ids) + 2 + 2
+
+def descrever_etapa(etapa: str) -> str:
+    """Texto amigável para as etapas registradas pelo pipeline."""
+    tipo, _, secao = etapa.partition(":")
+    return {
+        "dados": f"Consultas ao banco — {secao}",
+        "snapshot": f"Dados do snapshot do mês — {secao}",
+        "html": f"Montagem do HTML — {secao}",
+        "pdf": f"Conversão para PDF — {secao}",
+        "cache": f"Reaproveitada do cache — {secao}",
+        "artefato": "PDF idêntico já gerado — reaproveitado",
+        "merge": "Combinação das seções",
+        "finalizacao": "Pós-processamento do PDF",
+        "geracao_compartilhada": "Aguardando uma geração idêntica já em andamento",
+    }.get(tipo, etapa)
+
+@st.fragment(run_every=1.0)
+def acompanhar_geracao():
+    """Atualiza o andamento a cada segundo sem reexecutar o restante da página."""
+    job = obter_job_sessao()
+    if job is None or job.finalizado:
+        st.rerun()  # exibe o resultado (download ou erro) na página inteira
+
+    estado = job.to_dict()
+    total = max(st.session_state.get("job_total_etapas", 1), estado["etapas_concluidas"], 1)
+    atual = next((e for e in reversed(estado["etapas"]) if e["status"] == "iniciado"), None)
+    texto = descrever_etapa(atual["etapa"]) if atual else "Na fila..."
+    st.progress(min(estado["etapas_concluidas"] / total, 1.0), text=f"⏳ {texto}")
+
+    with st.expander("Etapas", expanded=False):
+        icones = {"iniciado": "⏳", "concluido": "✅", "erro": "❌"}
+        for e in estado["etapas"]:
+            duracao = f" ({e['fim'] - e['inicio']:.1f}s)" if e["fim"] else ""
+            st.markdown(f"{icones.get(e['status'], '•')} {descrever_etapa(e['etapa'])}{duracao}")
+
+def mostrar_resultado_geracao(job):
+    """Mostra o download do PDF (ou o erro) do último job da sessão."""
+    if job.status == STATUS_ERRO:
+        st.error(f"Erro ao gerar relatório: {job.erro}")
+        st.warning("Certifique-se de que o wkhtmltopdf está instalado e no PATH do sistema.")
+        return
+
+    pdf_path, output_filename = job.resultado
+    if not os.path.exists(pdf_path):
+        return
+    st.success(f"Relatório gerado com sucesso em {job.concluido_em - job.iniciado_em:.1f}s!")
+    with open(pdf_path, "rb") as f:
+        st.download_button(
+            label="📥 Baixar Relatório PDF",
+            data=f,
+            file_name=output_filename,
+            mime="application/pdf",
+            use_container_width=True
+        )
+
+def renderizar_preview(db, clientes, cliente_ids, mes, ano, relatorios_selecionados):
+    """Mostra o HTML de uma seção para conferir números e notas antes de exportar."""
+    with st.expander("👁️ Pré-visualizar seção", expanded=False):
+        secao = st.selectbox("Seção", relatorios_selecionados, key="preview_secao")
+        chave = (tuple(cliente_ids), mes, ano, secao)
+        if st.button("Pré-visualizar", key="preview_botao"):
+            try:
+                with st.spinner("Montando pré-visualização..."):
+                    html = gerar_preview_html(
+                        cliente_ids, mes, ano, int(secao.split()[1]), db=db, clientes=clientes
+                    )
+                st.session_state.preview = (chave, html)
+            except Exception as e:
+                st.error(f"Erro ao gerar pré-visualização: {str(e)}")
+        preview = st.session_state.get("preview")
+        if preview and preview[0] == chave:
+            components.html(preview[1], height=1100, scrolling=True)
+
 def main():
     # PRIMEIRO: Configurar a página ANTES de qualquer outra coisa
     st.set_page_config(page_title="IZE Relatórios Financeiros", page_icon="📊", layout="centered")
@@ -159,8 +285,9 @@ def main():
     
     st.markdown("---")
     
-    # Conexão com o banco
-    db = DatabaseConnection()
+    # Conexão com o banco (cacheada entre reruns) e motor de renderização pré-carregado
+    db = obter_conexao()
+    obter_motor_renderizacao()
     
     # Inicializar session_state para armazenar cliente_id
     if 'cliente_id' not in st.session_state:
@@ -168,7 +295,15 @@ def main():
     
     # Seleção de cliente
     st.markdown("<h3 class='subheader'>Selecione o Cliente</h3>", unsafe_allow_html=True)
-    clientes = buscar_clientes(db)
+    if st.button("🔄 Atualizar clientes e períodos", key="atualizar_cache",
+                 help="Recarrega do banco a lista de clientes e os anos disponíveis"):
+        invalidar_caches()
+    try:
+        clientes = carregar_clientes(db)
+    except ValueError:
+        # Conexão possivelmente inválida: descarta o recurso para recriá-lo no próximo rerun
+        obter_conexao.clear()
+        raise
     if not clientes:
         st.error("Nenhum cliente ativo encontrado no banco de dados.")
         return
@@ -235,15 +370,7 @@ def main():
     
     with col_periodo2:
         # Se for multi-cliente, busque anos de todos os clientes selecionados
-        if multi_cliente and cliente_ids:
-            todos_anos = []
-            for id_cliente in cliente_ids:
-                anos_cliente = obter_anos(db, id_cliente)
-                todos_anos.extend(anos_cliente)
-            # Remove duplicados e ordena
-            anos = sorted(list(set(todos_anos)), reverse=True)
-        else:
-            anos = obter_anos(db, cliente_id)
+        anos = carregar_anos(db, tuple(cliente_ids) if multi_cliente and cliente_ids else (cliente_id,))
             
         ano = st.selectbox(
             "Ano",
@@ -312,97 +439,41 @@ def main():
     
     analise_text = render_parecer_tecnico(relatorios_selecionados)
     
-    # Quando o botão "Gerar e Baixar Relatório PDF" for clicado:
-    if st.button("Gerar e Baixar Relatório PDF", key="gerar_relatorio"):
+    # Pré-visualização rápida de uma seção (HTML, sem wkhtmltopdf)
+    if relatorios_selecionados:
+        renderizar_preview(db, clientes, cliente_ids, mes, ano, relatorios_selecionados)
+
+    # Quando o botão "Gerar e Baixar Relatório PDF" for clicado: a geração vai
+    # para um worker em segundo plano e a página acompanha o andamento
+    job = obter_job_sessao()
+    em_andamento = job is not None and not job.finalizado
+    if st.button("Gerar e Baixar Relatório PDF", key="gerar_relatorio", disabled=em_andamento):
         if not relatorios_selecionados:
                 st.error("Selecione pelo menos um agrupamento ou a Nota do Consultor para gerar o PDF.")
                 return
 
-        # NOVO: Aviso informativo sobre o tempo de processamento
-        with st.spinner("Gerando relatório, por favor aguarde..."):
-            # Adicionar informação sobre tempo estimado
-            st.info(" **Processando relatório...** O tempo estimado é de aproximadamente 30 segundos.")
-            
-            try:
-                # Cria uma instância de indicadores com os ids de clientes escolhidos
-                indicadores = Indicadores(cliente_ids, db)  # Passar cliente_ids diretamente
-                
-                relatorios_classes = {
-                    "Relatório 1": Relatorio1,
-                    "Relatório 2": Relatorio2,
-                    "Relatório 3": Relatorio3,
-                    "Relatório 4": Relatorio4,
-                    "Relatório 5": Relatorio5,
-                    "Relatório 6": Relatorio6,
-                    "Relatório 7": Relatorio7,
-                    "Relatório 8": Relatorio8
-                }
-                
-                relatorios_dados = []
-                mes_atual = date(ano, mes, 1)
-                mes_anterior = (mes_atual - timedelta(days=1)).replace(day=1)
-                
-                marca = "Sim"
-                
-                # Mapear agrupamentos para o índice
-                indice_data = {
-                    "fluxo_caixa": "Sim" if any(r in relatorios_selecionados for r in ["Relatório 1", "Relatório 2", "Relatório 3", "Relatório 4", "Relatório 5"]) else "Não",
-                    "dre_gerencial": "Sim" if "Relatório 6" in relatorios_selecionados else "Não",
-                    "indicador": "Sim" if "Relatório 7" in relatorios_selecionados else "Não",
-                    "nota_consultor": "Sim" if "Relatório 8" in relatorios_selecionados else "Não",
-                    "cliente_nome": display_cliente_nome,
-                    "mes": mes_nome,
-                    "ano": ano,
-                    "nome": display_cliente_nome,  # Nome para o template
-                    "Periodo": f"{mes_nome} {ano}",  # Período para o template
-                    "marca": marca
-                }
-                relatorios_dados.append(("Índice", indice_data))
-                
-                for rel_nome in relatorios_selecionados:
-                    rel_class = relatorios_classes[rel_nome]
-                    relatorio = rel_class(indicadores, display_cliente_nome)
-                    
-                    if rel_nome in ["Relatório 1", "Relatório 2", "Relatório 3", "Relatório 4"]:
-                        dados = relatorio.gerar_relatorio(mes_atual, mes_anterior)
-                    elif rel_nome == "Relatório 8":
-                        if analise_text:
-                            relatorio.salvar_analise(mes_atual, analise_text)
-                        dados = relatorio.gerar_relatorio(mes_atual)
-                    else:
-                        dados = relatorio.gerar_relatorio(mes_atual)
-                    
-                    relatorios_dados.append((rel_nome, dados))
-                
-                rendering_engine = RenderingEngine()
-                output_filename = f"Relatorio_{display_cliente_nome.replace(' ', '_')}_{mes_nome}_{ano}.pdf"
-                output_path = os.path.join("outputs", output_filename)
-                
-                os.makedirs("outputs", exist_ok=True)  # Criar diretório se não existir
-                
-                pdf_path = rendering_engine.render_to_pdf(
-                    relatorios_dados, 
-                    display_cliente_nome, 
-                    mes_nome, 
-                    ano, 
-                    output_path
+        relatorios_ids = [int(r.split()[1]) for r in relatorios_selecionados]
+        try:
+            # Pedidos idênticos em andamento (outra aba, outro consultor)
+            # reaproveitam a mesma geração em vez de renderizar de novo.
+            # Com ?perfil=1 na URL, o job grava o perfil em outputs/profiles/
+            with perfil.perfil_ativo(st.query_params.get("perfil") == "1" or perfil.PERFIL):
+                job = obter_gerenciador_jobs().submeter(
+                    gerar_relatorio_pdf_unico,
+                    cliente_ids, mes, ano, relatorios_ids, analise_text,
+                    db=db, clientes=clientes,
                 )
-                
-                st.success("Relatório gerado com sucesso!")
-                
-                with open(pdf_path, "rb") as f:
-                    st.download_button(
-                        label="📥 Baixar Relatório PDF",
-                        data=f,
-                        file_name=output_filename,
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                    
-            except Exception as e:
-                st.error(f"Erro ao gerar relatório: {str(e)}")
-                st.exception(e)
-                st.warning("Certifique-se de que o wkhtmltopdf está instalado e no PATH do sistema.")
+        except FilaCheiaError as e:
+            st.error(str(e))
+            return
+        st.session_state.job_id = job.id
+        st.session_state.job_total_etapas = total_etapas_previstas(relatorios_ids)
+        em_andamento = True
+
+    if em_andamento:
+        acompanhar_geracao()
+    elif job is not None:
+        mostrar_resultado_geracao(job)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
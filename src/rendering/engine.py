@@ -3,8 +3,7 @@ import os
 import tempfile
 import subprocess
 from pathlib import Path
-from typing import List, Tuple, Any
-from pypdf import PdfReader, PdfWriter
+from typing import TYPE_CHECKING, List, Tuple, Any, Callable, Optional
 import io
 import logging
 import re
@@ -14,17 +13,139 @@ import shutil
 import uuid
 from datetime import datetime
 import threading
+import hashlib
+import inspect
+import json
+from src.core.concorrencia import slots_conversao, ConversaoOcupadaError
+from src.core.armazem import ArmazemArquivos
+from src.core import metricas, perfil, rastreamento
+
+if TYPE_CHECKING:  # pypdf só é importado ao combinar PDFs (ver tests/test_importacao.py)
+    from pypdf import PdfReader, PdfWriter
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache dos PDFs estáticos (capa e marketing): são parseados uma vez por processo
+# e reaproveitados em todas as gerações. O lock serializa a cópia das páginas,
+# pois o PdfReader lê do mesmo stream de forma preguiçosa.
+_STATIC_PDF_CACHE: dict = {}
+_STATIC_PDF_LOCK = threading.Lock()
+
+# Cache de PDFs por seção: a chave combina os dados da seção, cliente/período e a
+# versão do renderizador (código + templates + ícones) e da conversão. Gerar de
+# novo um relatório em que só uma seção mudou reconverte apenas essa seção.
+# Incrementar VERSAO_CONVERSAO ao mudar as opções do wkhtmltopdf.
+VERSAO_CONVERSAO = "1"
+SECOES_CACHE = os.getenv("SECOES_CACHE", "1") != "0"
+SECOES_CACHE_DIR = os.getenv("SECOES_CACHE_DIR", os.path.join("outputs", "cache", "secoes"))
+SECOES_CACHE_MAX_MB = int(os.getenv("SECOES_CACHE_MAX_MB", "500"))
+
+cache_secoes = ArmazemArquivos(
+    SECOES_CACHE_DIR, SECOES_CACHE_MAX_MB * 1024 * 1024, nome="secoes_pdf"
+) if SECOES_CACHE else None
+
+_VERSOES_RENDERER: dict = {}
+_VERSOES_LOCK = threading.Lock()
+
+
+def _arquivos_renderer(renderer) -> List[str]:
+    """Arquivos que influenciam o HTML de um renderizador."""
+    arquivos = [
+        inspect.getsourcefile(cls) for cls in type(renderer).__mro__
+        if cls.__module__.startswith("src.")
+    ]
+    template = getattr(renderer, "template", None)
+    diretorios = [os.path.dirname(template.filename)] if getattr(template, "filename", None) \
+        else [os.path.abspath("templates")]
+    diretorios.append(os.path.abspath("assets/icons"))
+    for diretorio in diretorios:
+        for raiz, _, nomes in os.walk(diretorio):
+            arquivos.extend(os.path.join(raiz, nome) for nome in nomes)
+    return sorted(a for a in arquivos if a)
+
+
+def versao_renderer(renderer) -> str:
+    """Hash do código, dos templates e dos ícones do renderizador.
+
+    O hash é memorizado pela assinatura (caminho, mtime, tamanho) dos arquivos:
+    qualquer edição muda a versão e invalida as seções em cache.
+    """
+    assinatura = []
+    for caminho in _arquivos_renderer(renderer):
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            continue
+        assinatura.append((caminho, st.st_mtime_ns, st.st_size))
+    assinatura = tuple(assinatura)
+
+    with _VERSOES_LOCK:
+        versao = _VERSOES_RENDERER.get(assinatura)
+    if versao is None:
+        h = hashlib.sha256()
+        for caminho, _, _ in assinatura:
+            with open(caminho, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+        versao = h.hexdigest()
+        with _VERSOES_LOCK:
+            _VERSOES_RENDERER[assinatura] = versao
+    return versao
+
+
+def chave_secao(rel_nome: str, dados: Any, cliente_nome: str, mes_nome: str, ano: int, renderer) -> Optional[str]:
+    """Chave do PDF de uma seção no cache, ou None se os dados não forem serializáveis."""
+    try:
+        conteudo = json.dumps(
+            [rel_nome, cliente_nome, mes_nome, ano, dados],
+            sort_keys=True, default=str, ensure_ascii=False
+        )
+    except (TypeError, ValueError):
+        return None
+    h = hashlib.sha256(conteudo.encode("utf-8"))
+    h.update(versao_renderer(renderer).encode())
+    h.update(f"{VERSAO_CONVERSAO}|{os.getenv('RODAPE_IMG_PATH', '')}".encode())
+    return h.hexdigest()
+
+
 class PdfUtils:
     """Utilitários para manipulação de arquivos PDF."""
     
     @staticmethod
-    def read_pdf(pdf_path: str) -> PdfReader:
+    def read_static_pdf(pdf_path: str) -> "PdfReader":
+        """Lê um PDF estático (capa/marketing) usando cache por caminho + mtime."""
+        try:
+            mtime = os.path.getmtime(pdf_path)
+        except OSError:
+            return None # type: ignore
+        with _STATIC_PDF_LOCK:
+            cached = _STATIC_PDF_CACHE.get(pdf_path)
+            acerto = bool(cached and cached[0] == mtime)
+            metricas.registrar_cache("pdf_estatico", acerto)
+            if acerto:
+                return cached[1]
+            reader = PdfUtils.read_pdf(pdf_path)
+            if reader:
+                _STATIC_PDF_CACHE[pdf_path] = (mtime, reader)
+            return reader
+
+    @staticmethod
+    def _add_static_pages(writer: "PdfWriter", pdf_path: str) -> int:
+        """Copia as páginas de um PDF estático cacheado para o writer."""
+        reader = PdfUtils.read_static_pdf(pdf_path)
+        if not reader:
+            return 0
+        with _STATIC_PDF_LOCK:
+            for page in reader.pages:
+                writer.add_page(page)
+            return len(reader.pages)
+
+    @staticmethod
+    def read_pdf(pdf_path: str) -> "PdfReader":
         """Lê um arquivo PDF e retorna um PdfReader."""
+        from pypdf import PdfReader
+
         try:
             with open(pdf_path, "rb") as f:
                 pdf_bytes = f.read()
@@ -40,17 +161,17 @@ class PdfUtils:
     @staticmethod
     def combine_pdfs(pdf_paths: List[str], output_path: str, capa_path: str = None, marketing_paths: List[str] = None) -> None: # type: ignore
         """Combina múltiplos PDFs em um único arquivo, detectando e removendo páginas vazias."""
+        from pypdf import PdfWriter
+
         writer = PdfWriter()
         total_pages_added = 0
 
         # Adicionar capa, se existir
         if capa_path and os.path.exists(capa_path):
-            capa_reader = PdfUtils.read_pdf(capa_path)
-            if capa_reader:
-                for page in capa_reader.pages:
-                    writer.add_page(page)
-                    total_pages_added += 1
-                logger.info(f"Capa adicionada: {capa_path} ({len(capa_reader.pages)} páginas)")
+            capa_pages = PdfUtils._add_static_pages(writer, capa_path)
+            if capa_pages:
+                total_pages_added += capa_pages
+                logger.info(f"Capa adicionada: {capa_path} ({capa_pages} páginas)")
 
         # Adicionar relatórios com detecção de páginas vazias
         for pdf_path in pdf_paths:
@@ -82,6 +203,7 @@ class PdfUtils:
                                 total_pages_added += 1
                                 logger.info(f"Página {page_num} adicionada (sem texto, mas com imagens): {pdf_path}")
                             else:
+                                metricas.PAGINAS_REMOVIDAS.inc(etapa="merge")
                                 logger.warning(f"❌ Página {page_num} VAZIA ignorada em: {pdf_path}")
                     except Exception as e:
                         # Se houver erro na extração, adicionar a página mesmo assim
@@ -98,12 +220,10 @@ class PdfUtils:
         if marketing_paths:
             for marketing_path in marketing_paths:
                 if os.path.exists(marketing_path):
-                    reader = PdfUtils.read_pdf(marketing_path)
-                    if reader:
-                        for page in reader.pages:
-                            writer.add_page(page)
-                            total_pages_added += 1
-                        logger.info(f"Marketing adicionado: {marketing_path} ({len(reader.pages)} páginas)")
+                    marketing_pages = PdfUtils._add_static_pages(writer, marketing_path)
+                    if marketing_pages:
+                        total_pages_added += marketing_pages
+                        logger.info(f"Marketing adicionado: {marketing_path} ({marketing_pages} páginas)")
                 else:
                     logger.warning(f"Arquivo de marketing não encontrado: {marketing_path}")
 
@@ -118,44 +238,40 @@ class PdfUtils:
         logger.info(f"PDF combinado salvo em: {output_path} (total: {total_pages_added} páginas válidas)")
 
 class RenderingEngine:
-    """Motor central de renderização que coordena a geração de relatórios em PDF."""
+    """Motor central de renderização que coordena a geração de relatórios em PDF.
+
+    É reentrante: cada chamada de `render_to_pdf` trabalha em um diretório
+    temporário próprio (workspace) e grava o PDF final em um caminho único, e os
+    renderizadores compartilhados são imutáveis. Uma mesma instância pode ser
+    usada por várias threads ao mesmo tempo.
+    """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ArmazemArquivos] = None):
+        # Cache de seções: o do módulo por padrão (desligado com SECOES_CACHE=0)
+        self.cache_secoes = cache if cache is not None else cache_secoes
         # Configuração do ambiente Jinja2
         templates_dir = os.path.abspath("templates")
         self.env = Environment(
             loader=FileSystemLoader(templates_dir),
             autoescape=True
         )
-        self.temp_files: List[str] = []
 
-    def _clean_temp_files(self) -> None:
-        """Remove arquivos temporários gerados durante a renderização."""
-        for temp_file in self.temp_files:
-            try:
-                os.unlink(temp_file)
-                logger.debug(f"Removido arquivo temporário: {temp_file}")
-            except Exception as e:
-                logger.warning(f"Erro ao remover arquivo temporário {temp_file}: {e}")
-        self.temp_files.clear()
-
-    def _render_html_to_pdf(self, html: str, rel_name: str) -> str:
-        """Converte HTML para PDF (usando footer nativo do wkhtmltopdf) e retorna o caminho do PDF temporário."""
-        # Gerar identificadores e arquivos temporários
-        unique_id = str(uuid.uuid4())
-        html_path = tempfile.NamedTemporaryFile(delete=False, suffix=f'_{rel_name}_{unique_id}.html', mode='w', encoding='utf-8').name
-        pdf_path = tempfile.NamedTemporaryFile(delete=False, suffix=f'_{rel_name}_{unique_id}.pdf').name
-        footer_path = tempfile.NamedTemporaryFile(delete=False, suffix=f'_{rel_name}_{unique_id}_footer.html', mode='w', encoding='utf-8').name
-
-        self.temp_files.extend([html_path, pdf_path, footer_path])
-
-        # Salvar HTML do relatório
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html)
+    @staticmethod
+    def _criar_workspace() -> str:
+        """Cria o diretório temporário isolado de uma geração."""
+        return tempfile.mkdtemp(prefix="ize_render_")
 
-        # Caminho do executável wkhtmltopdf (permite sobrepor via .env)
-        wkhtmltopdf_cmd = os.getenv("WKHTMLTOPDF_CMD", "wkhtmltopdf")
+    @staticmethod
+    def _limpar_workspace(workspace: str) -> None:
+        """Remove o workspace (mantido se KEEP_WKHTML_HTML=1, para depuração)."""
+        if os.getenv("KEEP_WKHTML_HTML") == "1":
+            logger.info(f"Workspace mantido para depuração: {workspace}")
+            return
+        shutil.rmtree(workspace, ignore_errors=True)
 
+    @staticmethod
+    def _escrever_footer(workspace: str) -> str:
+        """Grava o HTML do rodapé (igual para todas as seções) no workspace."""
         # Caminho do PNG do rodapé (permite sobrepor via .env, senão usa assets/icons/rodape.png)
         rodape_img = os.getenv("RODAPE_IMG_PATH", os.path.abspath("assets/icons/rodape.png"))
         rodape_url = "file:///" + rodape_img.replace("\\", "/")
@@ -172,8 +288,35 @@ class RenderingEngine:
         <div class="wrap"><img src="{rodape_url}" alt="rodapé"/></div>
         </body></html>"""
 
+        footer_path = os.path.join(workspace, "footer.html")
         with open(footer_path, 'w', encoding='utf-8') as f:
             f.write(footer_html)
+        return footer_path
+
+    @staticmethod
+    def _caminho_saida_padrao(cliente_nome: str, mes_nome: str, ano: int) -> str:
+        """Caminho único em outputs/ quando o chamador não informa um."""
+        return os.path.join(
+            "outputs",
+            f"Relatorio_{cliente_nome.replace(' ', '_')}_{mes_nome}_{ano}_{uuid.uuid4().hex[:8]}.pdf"
+        )
+
+    def _render_html_to_pdf(self, html: str, rel_name: str, workspace: str, footer_path: str) -> str:
+        """Converte HTML para PDF (usando footer nativo do wkhtmltopdf) e retorna o caminho do PDF no workspace.
+
+        Raises:
+            ConversaoOcupadaError: Se nenhum slot de conversão ficou livre a tempo.
+        """
+        base = re.sub(r"[^\w\-]", "_", rel_name, flags=re.UNICODE)
+        html_path = os.path.join(workspace, f"{base}.html")
+        pdf_path = os.path.join(workspace, f"{base}.pdf")
+
+        # Salvar HTML do relatório
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+        # Caminho do executável wkhtmltopdf (permite sobrepor via .env)
+        wkhtmltopdf_cmd = os.getenv("WKHTMLTOPDF_CMD", "wkhtmltopdf")
 
         # Comando wkhtmltopdf com footer HTML e margem inferior maior
         cmd = [
@@ -190,83 +333,171 @@ class RenderingEngine:
             html_path, pdf_path
         ]
 
-        keep = os.getenv("KEEP_WKHTML_HTML") == "1"
         try:
-            subprocess.run(cmd, check=True)
+            # Limita quantos wkhtmltopdf rodam ao mesmo tempo na máquina (entre processos)
+            espera_inicio = time.perf_counter()
+            with rastreamento.span("wkhtmltopdf", relatorio=rel_name) as span, slots_conversao.slot():
+                espera = time.perf_counter() - espera_inicio
+                metricas.SLOT_ESPERA.observar(espera)
+                span.definir(slot_espera_s=round(espera, 4))
+                with metricas.CONVERSAO_DURACAO.cronometrar(relatorio=rel_name):
+                    try:
+                        subprocess.run(cmd, check=True)
+                    except subprocess.CalledProcessError as e:
+                        span.definir(**{"process.exit_code": e.returncode})
+                        raise
+                span.definir(**{"process.exit_code": 0})
             logger.info(f"PDF gerado para {rel_name}: {pdf_path}")
             return pdf_path
         except subprocess.CalledProcessError as e:
             logger.error(f"Erro ao converter HTML para PDF ({rel_name}): {e}")
             return None
-        finally:
-            if not keep:
-                try: os.unlink(html_path)
-                except: pass
-                try: os.unlink(footer_path)
-                except: pass
-                for p in [html_path, footer_path]:
-                    if p in self.temp_files:
-                        self.temp_files.remove(p)
-
-    def _process_single_report(self, rel_nome: str, dados: Any, cliente_nome: str, mes_nome: str, ano: int) -> tuple:
+
+    def _secao_do_cache(self, chave: str, rel_name: str, workspace: str) -> Optional[str]:
+        """Copia o PDF da seção em cache para o workspace (ou None se não houver)."""
+        origem = self.cache_secoes.obter(chave)
+        if not origem:
+            return None
+        base = re.sub(r"[^\w\-]", "_", rel_name, flags=re.UNICODE)
+        destino = os.path.join(workspace, f"{base}.pdf")
+        try:
+            # Cópia no workspace: o arquivo do cache pode ser despejado durante o merge
+            shutil.copyfile(origem, destino)
+        except OSError:
+            return None
+        return destino
+
+    def _process_single_report(self, rel_nome: str, dados: Any, cliente_nome: str, mes_nome: str, ano: int,
+                               workspace: str, footer_path: str,
+                               progresso: Optional[Callable[[str, str], None]] = None) -> tuple:
         """Processa um único relatório sequencialmente."""
         conversion_start = time.time()
+        progresso = progresso or (lambda etapa, status: None)
         
         try:
             if rel_nome == "Índice":
                 from src.rendering.renderers import get_renderer
                 renderer = get_renderer(0)
                 if not renderer or not isinstance(dados, dict):
+                    metricas.SECOES_IGNORADAS.inc(relatorio=rel_nome, motivo="dados_invalidos")
                     return None, rel_nome, "Dados inválidos para índice"
                 
-                html = renderer.render(dados, cliente_nome, mes_nome, ano)
-                
             else:
                 # Extrair número do relatório
                 try:
                     rel_num = int(rel_nome.split()[1])
                 except (IndexError, ValueError):
+                    metricas.SECOES_IGNORADAS.inc(relatorio=rel_nome, motivo="nome_invalido")
                     return None, rel_nome, "Nome de relatório inválido"
                 
                 from src.rendering.renderers import get_renderer
                 renderer = get_renderer(rel_num)
                 if not renderer:
+                    metricas.SECOES_IGNORADAS.inc(relatorio=rel_nome, motivo="sem_renderizador")
                     return None, rel_nome, "Renderizador não encontrado"
                 
                 if not dados or not isinstance(dados, tuple) or len(dados) < 2:
+                    metricas.SECOES_IGNORADAS.inc(relatorio=rel_nome, motivo="dados_invalidos")
                     return None, rel_nome, "Dados inválidos"
-                
-                html = renderer.render(dados, cliente_nome, mes_nome, ano)
+            
+            chave = None
+            if self.cache_secoes is not None:
+                chave = chave_secao(rel_nome, dados, cliente_nome, mes_nome, ano, renderer)
+                # Com o perfil ligado a seção é sempre renderizada (mede o trabalho real)
+                pdf_cache = self._secao_do_cache(chave, rel_nome, workspace) if chave and not perfil.ativo() else None
+                if pdf_cache:
+                    progresso(f"cache:{rel_nome}", "concluido")
+                    logger.info(f"♻️ {rel_nome} reaproveitado do cache de seções")
+                    return pdf_cache, rel_nome, "Sucesso (cache)"
+
+            progresso(f"html:{rel_nome}", "iniciado")
+            try:
+                with metricas.RENDER_DURACAO.cronometrar(renderer=type(renderer).__name__), \
+                        rastreamento.span("renderer.render", renderer=type(renderer).__name__, relatorio=rel_nome):
+                    html = renderer.render(dados, cliente_nome, mes_nome, ano)
+            except Exception:
+                progresso(f"html:{rel_nome}", "erro")
+                raise
+            progresso(f"html:{rel_nome}", "concluido")
             
             if not isinstance(html, str) or not html.strip():
+                metricas.SECOES_IGNORADAS.inc(relatorio=rel_nome, motivo="html_vazio")
                 return None, rel_nome, "HTML inválido"
             
-            pdf_path = self._render_html_to_pdf(html, rel_nome)
+            pdf_path = self._render_html_to_pdf(html, rel_nome, workspace, footer_path)
             
             conversion_time = time.time() - conversion_start
             
             # Verificar se a conversão foi bem-sucedida
             if pdf_path:
                 logger.info(f"🎯 {rel_nome} convertido em {conversion_time:.2f}s")
+                if chave:
+                    try:
+                        self.cache_secoes.guardar(chave, pdf_path)
+                    except OSError as e:
+                        logger.warning(f"⚠️ Não foi possível guardar {rel_nome} no cache de seções: {e}")
                 return pdf_path, rel_nome, "Sucesso"
             else:
                 error_msg = f"Falha na conversão PDF para {rel_nome}"
+                metricas.SECOES_IGNORADAS.inc(relatorio=rel_nome, motivo="falha_conversao")
                 logger.error(error_msg)
                 return None, rel_nome, error_msg
             
+        except ConversaoOcupadaError as e:
+            # Sem slot de conversão a geração inteira falha: um PDF sem a seção não é entregue
+            logger.error(f"⏳ Conversão de {rel_nome} não executada: {e}")
+            raise
         except Exception as e:
             error_msg = f"Erro ao processar {rel_nome}: {str(e)}"
+            metricas.SECOES_IGNORADAS.inc(relatorio=rel_nome, motivo="erro")
             logger.error(error_msg)
             return None, rel_nome, error_msg
 
-    def render_to_pdf(self, relatorios_data: List[Tuple[str, Any]], cliente_nome: str, 
-                      mes_nome: str, ano: int, output_path: str = None) -> str:
-        """Renderiza relatórios sequencialmente para PDF mantendo a ordem correta."""
+    def pre_renderizar(self, relatorios_data: List[Tuple[str, Any]], cliente_nome: str,
+                       mes_nome: str, ano: int) -> int:
+        """Renderiza e converte as seções só para preencher o cache de seções.
+
+        Usado pelo aquecimento: a geração interativa seguinte encontra os PDFs
+        das seções prontos e só faz o merge. Devolve quantas seções ficaram no cache.
+        """
+        if self.cache_secoes is None:
+            return 0
+        workspace = self._criar_workspace()
+        try:
+            footer_path = self._escrever_footer(workspace)
+            prontas = 0
+            for rel_nome, dados in relatorios_data:
+                pdf_path, _, _ = self._process_single_report(
+                    rel_nome, dados, cliente_nome, mes_nome, ano, workspace, footer_path
+                )
+                prontas += bool(pdf_path)
+            return prontas
+        finally:
+            self._limpar_workspace(workspace)
+
+    @rastreamento.rastrear("render_to_pdf")
+    def render_to_pdf(self, relatorios_data: List[Tuple[str, Any]], cliente_nome: str,
+                      mes_nome: str, ano: int, output_path: str = None,
+                      progresso: Optional[Callable[[str, str], None]] = None) -> str:
+        """Renderiza relatórios sequencialmente para PDF mantendo a ordem correta.
+
+        `progresso(etapa, status)` é chamado (se informado) a cada seção convertida,
+        na combinação e no pós-processamento, para acompanhamento em tempo real.
+
+        Sem `output_path`, o PDF vai para `outputs/` com um sufixo único. O
+        arquivo final só aparece no destino depois de combinado e finalizado.
+
+        Raises:
+            ConversaoOcupadaError: Se alguma seção não conseguiu slot de conversão;
+                nada é gravado no destino.
+        """
+        if progresso is None:
+            progresso = lambda etapa, status: None
+        workspace = self._criar_workspace()
         try:
             
             start_time = time.time() 
-            
-            self._clean_temp_files()
+            footer_path = self._escrever_footer(workspace)
 
             # Definir ordem correta dos relatórios
             ordem_relatorios = [
@@ -295,9 +526,11 @@ class RenderingEngine:
                     continue
                 
                 # Processar o relatório
+                progresso(f"pdf:{rel_nome}", "iniciado")
                 pdf_path, rel_nome_result, status = self._process_single_report(
-                    rel_nome, dados_relatorio, cliente_nome, mes_nome, ano
+                    rel_nome, dados_relatorio, cliente_nome, mes_nome, ano, workspace, footer_path, progresso
                 )
+                progresso(f"pdf:{rel_nome}", "concluido" if pdf_path else "erro")
                 
                 if pdf_path:
                     if rel_nome == "Índice":
@@ -324,13 +557,15 @@ class RenderingEngine:
             ]
             
             if not output_path:
-                output_path = os.path.join(
-                    "outputs", 
-                    f"Relatorio_{cliente_nome.replace(' ', '_')}_{mes_nome}_{ano}.pdf"
-                )
+                output_path = self._caminho_saida_padrao(cliente_nome, mes_nome, ano)
+            # Combina e finaliza dentro do workspace; o destino só recebe o PDF pronto
+            combinado_path = os.path.join(workspace, "final.pdf")
             
-            PdfUtils.combine_pdfs(pdf_paths, output_path, capa_path, marketing_paths)
-            logger.info(f"✓ PDF final gerado: {output_path}")
+            progresso("merge", "iniciado")
+            with metricas.MERGE_DURACAO.cronometrar(), rastreamento.span("combine_pdfs", secoes=len(pdf_paths)):
+                PdfUtils.combine_pdfs(pdf_paths, combinado_path, capa_path, marketing_paths)
+            progresso("merge", "concluido")
+            logger.info(f"✓ PDF combinado: {combinado_path}")
             logger.info(f"Relatórios processados na ordem correta: {', '.join(processed_reports)}")
             
             # Aplicar pós-processamento inteligente para remover páginas vazias
@@ -338,26 +573,37 @@ class RenderingEngine:
             enable_postprocessing = True  # Reabilitado com lógica inteligente
             
             if enable_postprocessing:
+                progresso("finalizacao", "iniciado")
                 try:
                     from src.core.pdf_finalizer import PDFinalizer
                     finalizer = PDFinalizer()
                     
-                    success, final_path, removed_pages = finalizer.finalize_pdf(output_path)
+                    with metricas.FINALIZACAO_DURACAO.cronometrar(), \
+                            rastreamento.span("PDFinalizer.finalize_pdf") as span:
+                        success, final_path, removed_pages = finalizer.finalize_pdf(combinado_path)
+                        span.definir(paginas_removidas=len(removed_pages or []))
                     if success and removed_pages:
+                        metricas.PAGINAS_REMOVIDAS.inc(len(removed_pages), etapa="finalizacao")
                         logger.info(f"🧹 Pós-processamento: {len(removed_pages)} páginas vazias removidas")
                         logger.info(f"📋 Páginas removidas: {removed_pages}")
                     else:
                         logger.info("✅ PDF já otimizado, nenhuma página removida")
                 except Exception as e:
                     logger.warning(f"⚠️  Falha no pós-processamento (PDF mantido): {e}")
+                progresso("finalizacao", "concluido")
             else:
                 logger.info("📄 Pós-processamento desabilitado - PDF mantido sem alterações")
             
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            shutil.move(combinado_path, output_path)
+            logger.info(f"✓ PDF final gerado: {output_path}")
+            
             processing_time = time.time() - start_time
+            metricas.GERACAO_DURACAO.observar(processing_time)
             logger.info(f"✓ Processamento concluído em {processing_time:.2f}s")
             logger.info(f"Performance: {len(processed_reports)/processing_time:.1f} relatórios/segundo")
             
             return output_path
             
         finally:
-            self._clean_temp_files()
\ No newline at end of file
+            self._limpar_workspace(workspace)
\ No newline at end of file
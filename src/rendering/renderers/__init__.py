@@ -12,17 +12,17 @@ from src.rendering.renderers.relatorio7_renderer import Relatorio7Renderer
 from src.rendering.renderers.relatorio8_renderer import Relatorio8Renderer
 
 
-# Dicionário de renderizadores disponíveis
+# Dicionário de renderizadores disponíveis (instâncias imutáveis, seguras entre threads)
 _RENDERERS: Dict[int, BaseRenderer] = {
-    0: IndiceRenderer(),
-    1: Relatorio1Renderer(),
-    2: Relatorio2Renderer(),
-    3: Relatorio3Renderer(),
-    4: Relatorio4Renderer(),
-    5: Relatorio5Renderer(),
-    6: Relatorio6Renderer(),
-    7: Relatorio7Renderer(),
-    8: Relatorio8Renderer(),
+    0: IndiceRenderer().congelar(),
+    1: Relatorio1Renderer().congelar(),
+    2: Relatorio2Renderer().congelar(),
+    3: Relatorio3Renderer().congelar(),
+    4: Relatorio4Renderer().congelar(),
+    5: Relatorio5Renderer().congelar(),
+    6: Relatorio6Renderer().congelar(),
+    7: Relatorio7Renderer().congelar(),
+    8: Relatorio8Renderer().congelar(),
 }
 
 
@@ -1,11 +1,89 @@
 #src/rendering/renderers/base_renderer.py
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from contextlib import contextmanager
+from typing import Dict, Any, List, Iterator, Optional, Tuple
 from jinja2 import Environment, FileSystemLoader
+import base64
+import contextvars
 import os
+import re
+import threading
+
+from src.core import metricas
+
+# Diretório dos arquivos estáticos (ícones, logos) usados pelos templates
+ASSETS_DIR = os.path.abspath("assets")
+
+# DPI dos gráficos no modo preview (o PDF final continua em alta resolução)
+DPI_PREVIEW = 96
+
+# Modo preview: HTML para visualização na tela, sem conversão para PDF.
+# Contextvar para valer apenas na thread/requisição que ativou o modo.
+_MODO_PREVIEW: contextvars.ContextVar = contextvars.ContextVar("modo_preview", default=False)
+
+# Cache do base64 dos assets: (caminho) -> (mtime, conteúdo)
+_ASSETS_CACHE: Dict[str, Tuple[float, str]] = {}
+_ASSETS_LOCK = threading.Lock()
+
+# Em preview, os renderizadores devolvem uma referência no lugar do base64; o
+# HTML fica com "data:...;base64,__ASSET__/icons/x.png", resolvido depois
+_MARCADOR_ASSET = "__ASSET__/"
+_RE_ASSET = re.compile(r"data:[\w/+.\-]+;base64,__ASSET__/([^\"'\s)]+)")
+
+
+@contextmanager
+def modo_preview() -> Iterator[None]:
+    """Ativa o modo preview (assets referenciados, gráficos em baixa resolução)."""
+    token = _MODO_PREVIEW.set(True)
+    try:
+        yield
+    finally:
+        _MODO_PREVIEW.reset(token)
+
+
+def em_modo_preview() -> bool:
+    return _MODO_PREVIEW.get()
+
+
+def ler_asset_base64(caminho: str) -> str:
+    """Lê um arquivo e devolve seu conteúdo em base64, com cache por caminho + mtime."""
+    caminho = os.path.abspath(caminho)
+    mtime = os.path.getmtime(caminho)  # FileNotFoundError se não existir
+    with _ASSETS_LOCK:
+        cached = _ASSETS_CACHE.get(caminho)
+    acerto = bool(cached and cached[0] == mtime)
+    metricas.registrar_cache("assets", acerto)
+    if acerto:
+        return cached[1]
+    with open(caminho, "rb") as f:
+        conteudo = base64.b64encode(f.read()).decode("ascii")
+    with _ASSETS_LOCK:
+        _ASSETS_CACHE[caminho] = (mtime, conteudo)
+    return conteudo
+
+
+def resolver_assets(html: str, base_url: Optional[str] = None) -> str:
+    """Troca as referências de assets geradas em preview.
+
+    Com `base_url` (ex.: "/v1/assets"), vira URL servida pela API; sem ela, o
+    base64 é embutido a partir do cache em memória (ex.: Streamlit).
+    """
+    def substituir(m: "re.Match") -> str:
+        relativo = m.group(1)
+        if base_url:
+            return f"{base_url.rstrip('/')}/{relativo}"
+        prefixo = m.group(0)[: m.group(0).index("__ASSET__/")]
+        return prefixo + ler_asset_base64(os.path.join(ASSETS_DIR, relativo))
+    return _RE_ASSET.sub(substituir, html)
+
 
 class BaseRenderer(ABC):
-    """Classe base para renderizadores de relatórios."""
+    """Classe base para renderizadores de relatórios.
+
+    As instâncias registradas em `src.rendering.renderers` são compartilhadas
+    por todas as threads e ficam congeladas após a inicialização: `render()`
+    não pode guardar estado em `self` (use variáveis locais).
+    """
     
     def __init__(self):
         # Configuração do ambiente Jinja2
@@ -20,6 +98,33 @@ class BaseRenderer(ABC):
         self.env.filters['format_percentage'] = self._format_percentage
         self.env.filters['format_number'] = self._format_number
     
+    def congelar(self) -> "BaseRenderer":
+        """Impede novas atribuições de atributos (instância compartilhada entre threads)."""
+        object.__setattr__(self, "_congelado", True)
+        return self
+
+    def __setattr__(self, nome, valor):
+        if getattr(self, "_congelado", False):
+            raise AttributeError(
+                f"{type(self).__name__} é compartilhado entre threads; "
+                f"não altere '{nome}' após a inicialização."
+            )
+        super().__setattr__(nome, valor)
+
+    def carregar_asset(self, caminho: str) -> str:
+        """Base64 de um arquivo de `assets/` (cacheado); em preview, uma referência."""
+        if em_modo_preview():
+            relativo = os.path.relpath(os.path.abspath(caminho), ASSETS_DIR)
+            if not relativo.startswith(".."):
+                if not os.path.isfile(caminho):
+                    raise FileNotFoundError(caminho)
+                return _MARCADOR_ASSET + relativo.replace(os.sep, "/")
+        return ler_asset_base64(caminho)
+
+    def dpi_grafico(self, dpi: int) -> int:
+        """DPI efetivo dos gráficos (reduzido no modo preview)."""
+        return min(dpi, DPI_PREVIEW) if em_modo_preview() else dpi
+
     def _format_currency(self, value):
         """Formata valores monetários no padrão brasileiro (R$ 1.234.567,89)."""
         if value is None:
@@ -2,7 +2,6 @@
 from typing import Dict, Any
 from .base_renderer import BaseRenderer
 import os
-import base64
 
 class IndiceRenderer(BaseRenderer):
     def __init__(self):
@@ -13,15 +12,8 @@ class IndiceRenderer(BaseRenderer):
         # Carregar ícones e imagens
         icons_dir = os.path.abspath("assets/icons")
         
-        # Carregar o logo PNG
-        logo_path = os.path.join(icons_dir, "IZE-SIMBOLO-1.png")
-        try:
-            with open(logo_path, "rb") as f:
-                logo_bytes = f.read()
-                self.logo_png_b64 = base64.b64encode(logo_bytes).decode("ascii")
-        except Exception as e:
-            print(f"Erro ao carregar logo: {str(e)}")
-            self.logo_png_b64 = ""
+        # Caminho do logo PNG (carregado no render: base64 cacheado ou referência no preview)
+        self.logo_path = os.path.join(icons_dir, "IZE-SIMBOLO-1.png")
 
     def render(self, data: Dict[str, Any], cliente_nome: str, mes_nome: str, ano: int) -> str:
         """
@@ -36,4 +28,9 @@ class IndiceRenderer(BaseRenderer):
         Returns:
             String com o HTML renderizado.
         """
-        return self.template.render(data=data, logo_png_b64=self.logo_png_b64)
\ No newline at end of file
+        try:
+            logo_png_b64 = self.carregar_asset(self.logo_path)
+        except Exception as e:
+            print(f"Erro ao carregar logo: {str(e)}")
+            logo_png_b64 = ""
+        return self.template.render(data=data, logo_png_b64=logo_png_b64)
\ No newline at end of file
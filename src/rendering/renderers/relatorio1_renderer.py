@@ -2,7 +2,6 @@
 from typing import Dict, Any, List, Tuple, Union
 from src.rendering.renderers.base_renderer import BaseRenderer
 import os
-import base64
 import logging
 logger = logging.getLogger(__name__)
 
@@ -45,31 +44,23 @@ class Relatorio1Renderer(BaseRenderer):
         # Rodapé
         rodape_path = os.path.join(icons_dir, "rodape.png")
         try:
-            with open(rodape_path, "rb") as f:
-                icon_bytes = f.read()
-                logger.info(f"Arquivo rodapé lido com sucesso: {rodape_path}, tamanho: {len(icon_bytes)} bytes")
-                icon_rodape = base64.b64encode(icon_bytes).decode("ascii")
-                logger.info(f"Base64 do rodapé gerado com sucesso, tamanho: {len(icon_rodape)}")
+            icon_rodape = self.carregar_asset(rodape_path)
         except Exception as e:
             logger.error(f"Erro ao carregar rodapé: {str(e)}")
             icon_rodape = ""  # Valor padrão vazio em caso de erro
         
         # Setas (carregar como base64)
         seta_up_verde_path = os.path.join(icons_dir, "SETA-UP-VERDE.svg")
-        with open(seta_up_verde_path, "rb") as f:
-            seta_up_verde_b64 = base64.b64encode(f.read()).decode("utf-8")
+        seta_up_verde_b64 = self.carregar_asset(seta_up_verde_path)
         
         seta_down_laranja_path = os.path.join(icons_dir, "SETA-DOWN-LARANJA.svg")
-        with open(seta_down_laranja_path, "rb") as f:
-            seta_down_laranja_b64 = base64.b64encode(f.read()).decode("utf-8")
+        seta_down_laranja_b64 = self.carregar_asset(seta_down_laranja_path)
             
         seta_up_laranja_path = os.path.join(icons_dir, "SETA-UP-LARANJA.svg")
-        with open(seta_up_laranja_path, "rb") as f:
-            seta_up_laranja_b64 = base64.b64encode(f.read()).decode("utf-8")
+        seta_up_laranja_b64 = self.carregar_asset(seta_up_laranja_path)
             
         seta_down_verde_path = os.path.join(icons_dir, "SETA-DOWN-VERDE.svg")
-        with open(seta_down_verde_path, "rb") as f:
-            seta_down_verde_b64 = base64.b64encode(f.read()).decode("utf-8")
+        seta_down_verde_b64 = self.carregar_asset(seta_down_verde_path)
         
         # Processar dados do relatório
         # Estrutura: [{'categoria': 'Receitas', 'valor': X, 'subcategorias': [...]}, {'categoria': 'Custos Variáveis', ...}]
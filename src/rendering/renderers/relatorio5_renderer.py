@@ -3,7 +3,7 @@ from src.rendering.renderers.base_renderer import BaseRenderer
 import os
 import base64
 import logging
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import numpy as np
 from scipy.interpolate import make_interp_spline
 import io
@@ -118,8 +118,10 @@ class Relatorio5Renderer(BaseRenderer):
                  for valor in geracao_caixa]
         
         # Configurações do gráfico
-        plt.style.use('default')
-        fig, ax = plt.subplots(figsize=cfg['figure_size'], dpi=cfg['dpi'])
+        # Figure sem pyplot: nenhum estado global, seguro para gerações em paralelo
+        dpi = self.dpi_grafico(cfg['dpi'])
+        fig = Figure(figsize=cfg['figure_size'], dpi=dpi)
+        ax = fig.subplots()
         
         # Função para formatação de valores no eixo Y - ALTERADA: formato abreviado
         def y_fmt(value, tick_number):
@@ -308,12 +310,11 @@ class Relatorio5Renderer(BaseRenderer):
         ax.set_axisbelow(True)
         ax.grid(False)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Converter para base64
         buf = io.BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight', dpi=cfg['dpi'])
-        plt.close(fig)
+        fig.savefig(buf, format='png', bbox_inches='tight', dpi=dpi)
         buf.seek(0)
         return base64.b64encode(buf.read()).decode('utf-8')
     
@@ -345,23 +346,17 @@ class Relatorio5Renderer(BaseRenderer):
         # Carregar rodapé
         rodape_path = os.path.join(icons_dir, "rodape.png")
         try:
-            with open(rodape_path, "rb") as f:
-                icon_bytes = f.read()
-                logger.info(f"Arquivo rodapé lido com sucesso: {rodape_path}, tamanho: {len(icon_bytes)} bytes")
-                icon_rodape = base64.b64encode(icon_bytes).decode("ascii")
-                logger.info(f"Base64 do rodapé gerado com sucesso, tamanho: {len(icon_rodape)}")
+            icon_rodape = self.carregar_asset(rodape_path)
         except Exception as e:
             logger.error(f"Erro ao carregar rodapé: {str(e)}")
             icon_rodape = ""
         
         # Setas (carregar como base64)
         seta_up_verde_path = os.path.join(icons_dir, "SETA-UP-VERDE.svg")
-        with open(seta_up_verde_path, "rb") as f:
-            seta_up_verde_b64 = base64.b64encode(f.read()).decode("utf-8")
+        seta_up_verde_b64 = self.carregar_asset(seta_up_verde_path)
         
         seta_down_laranja_path = os.path.join(icons_dir, "SETA-DOWN-LARANJA.svg")
-        with open(seta_down_laranja_path, "rb") as f:
-            seta_down_laranja_b64 = base64.b64encode(f.read()).decode("utf-8")
+        seta_down_laranja_b64 = self.carregar_asset(seta_down_laranja_path)
             
         # Processar dados do relatório
         geracao_de_caixa_data = next((item for item in relatorio_data if item['categoria'] == 'Geração de Caixa'), {})
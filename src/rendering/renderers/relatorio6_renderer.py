@@ -1,7 +1,7 @@
 # src/rendering/renderers/relatorio6_renderer.py
 from typing import Dict, Any, List, Tuple, Union
 from src.rendering.renderers.base_renderer import BaseRenderer
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import textwrap
 from matplotlib.ticker import FuncFormatter, MaxNLocator
 from matplotlib.patches import Rectangle
@@ -36,7 +36,9 @@ class Relatorio6Renderer(BaseRenderer):
         for v in values[:-1]:
             bottoms.append(bottoms[-1] + v)
 
-        fig, ax = plt.subplots(figsize=(8, 4), dpi=300)
+        # Figure sem pyplot: nenhum estado global, seguro para gerações em paralelo
+        fig = Figure(figsize=(8, 4), dpi=self.dpi_grafico(300))
+        ax = fig.subplots()
         bar_width = 0.6
         colors = ['#009F64' if v >= 0 else '#FF6900' for v in values]
 
@@ -92,20 +94,17 @@ class Relatorio6Renderer(BaseRenderer):
         ax.yaxis.set_major_locator(MaxNLocator(6))
 
         fig.subplots_adjust(bottom=0.25)
-        plt.tight_layout()
+        fig.tight_layout()
 
         buf = io.BytesIO()
-        fig.savefig(buf, format="png", bbox_inches="tight", dpi=800)
-        plt.close(fig)
+        fig.savefig(buf, format="png", bbox_inches="tight", dpi=self.dpi_grafico(800))
         buf.seek(0)
         return base64.b64encode(buf.read()).decode("utf-8")
 
     def load_icon(self, icon_path: str) -> str:
         """Carrega um ícone em base64."""
         try:
-            with open(icon_path, "rb") as f:
-                icon_bytes = f.read()
-            return base64.b64encode(icon_bytes).decode("ascii")
+            return self.carregar_asset(icon_path)
         except FileNotFoundError:
             raise FileNotFoundError(f"Ícone não encontrado: {icon_path}")
 
@@ -1,7 +1,6 @@
 from typing import Dict, Any, List, Tuple, Union
 from src.rendering.renderers.base_renderer import BaseRenderer
 import os
-import base64
 import logging
 import math
 import numpy as np
@@ -82,15 +81,13 @@ class Relatorio7Renderer(BaseRenderer):
         icon_path = os.path.join(icons_dir, icon_file)
         
         try:
-            with open(icon_path, "rb") as f:
-                return base64.b64encode(f.read()).decode("ascii")
+            return self.carregar_asset(icon_path)
         except FileNotFoundError:
             logger.warning(f"Ícone não encontrado: {icon_path}. Usando ícone padrão.")
             # Usar ícone padrão (SU cinza)
             default_path = os.path.join(icons_dir, 'LOGO-SU-CINZA.png')
             try:
-                with open(default_path, "rb") as f:
-                    return base64.b64encode(f.read()).decode("ascii")
+                return self.carregar_asset(default_path)
             except:
                 return ""  # Retorna string vazia se não conseguir carregar nenhum ícone
     
@@ -238,11 +235,7 @@ class Relatorio7Renderer(BaseRenderer):
         icons_dir = os.path.abspath("assets/icons")
         rodape_path = os.path.join(icons_dir, "rodape.png")
         try:
-            with open(rodape_path, "rb") as f:
-                icon_bytes = f.read()
-                logger.info(f"Arquivo rodapé lido com sucesso: {rodape_path}, tamanho: {len(icon_bytes)} bytes")
-                icon_rodape = base64.b64encode(icon_bytes).decode("ascii")
-                logger.info(f"Base64 do rodapé gerado com sucesso, tamanho: {len(icon_rodape)}")
+            icon_rodape = self.carregar_asset(rodape_path)
         except Exception as e:
             logger.error(f"Erro ao carregar rodapé: {str(e)}")
             icon_rodape = ""
@@ -0,0 +1,72 @@
+# test_api.py
+import pytest
+
+from src.api import main as api
+from src.core import pipeline
+from src.core.armazem import ArmazemArquivos
+from src.core.concorrencia import ConversaoOcupadaError
+
+PEDIDO = {"id_cliente": [1], "mes": 9, "ano": 2025, "relatorios": [1]}
+CABECALHOS = {"X-API-Key": "chave-teste"}
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 8
+
+
+@pytest.fixture
+def cliente(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(api, "API_KEY", "chave-teste")
+    monkeypatch.setattr(pipeline, "artefatos", ArmazemArquivos(str(tmp_path / "artefatos"), 10 * 1024 * 1024))
+    monkeypatch.setattr(pipeline, "snapshots", None)
+    monkeypatch.chdir(tmp_path)
+    return TestClient(api.app)
+
+
+@pytest.fixture
+def artefato(tmp_path):
+    """PDF do PEDIDO já no armazém; devolve o ETag esperado (sha256 do conteúdo)."""
+    origem = tmp_path / "gerado.pdf"
+    origem.write_bytes(PDF)
+    chave = pipeline.chave_geracao(PEDIDO["id_cliente"], PEDIDO["mes"], PEDIDO["ano"], PEDIDO["relatorios"])
+    pipeline.artefatos.guardar(chave, str(origem), metadados={"filename": "Relatorio_Padaria.pdf"})
+    return f'"{pipeline.artefatos.ler_metadados(chave)["sha256"]}"'
+
+
+def test_pdf_do_armazem_com_etag_do_conteudo(cliente, artefato):
+    resposta = cliente.post("/v1/relatorios/pdf", json=PEDIDO, headers=CABECALHOS)
+
+    assert resposta.status_code == 200
+    assert resposta.content == PDF
+    assert resposta.headers["etag"] == artefato
+    assert 'filename="Relatorio_Padaria.pdf"' in resposta.headers["content-disposition"]
+
+
+def test_if_none_match_responde_304(cliente, artefato):
+    resposta = cliente.post("/v1/relatorios/pdf", json=PEDIDO,
+                            headers={**CABECALHOS, "If-None-Match": f'"outro", W/{artefato}'})
+
+    assert resposta.status_code == 304
+    assert resposta.content == b""
+    assert resposta.headers["etag"] == artefato
+
+
+def test_range_responde_206_parcial(cliente, artefato):
+    resposta = cliente.post("/v1/relatorios/pdf", json=PEDIDO, headers={**CABECALHOS, "Range": "bytes=100-199"})
+
+    assert resposta.status_code == 206
+    assert resposta.content == PDF[100:200]
+    assert resposta.headers["content-range"] == f"bytes 100-199/{len(PDF)}"
+    assert resposta.headers["etag"] == artefato
+
+
+def test_sem_slot_de_conversao_responde_503_com_retry_after(cliente, monkeypatch):
+    def gerar(*args, **kwargs):
+        raise ConversaoOcupadaError("Nenhum slot de conversão livre após 120s (2 slots).")
+
+    monkeypatch.setattr(api, "gerar_relatorio_pdf_unico", gerar)
+    resposta = cliente.post("/v1/relatorios/pdf", json=PEDIDO, headers=CABECALHOS)
+
+    assert resposta.status_code == 503
+    assert int(resposta.headers["retry-after"]) >= 1
+    assert "slot de conversão" in resposta.json()["detail"]
+    assert api.controle_admissao.ativas() == 0
@@ -0,0 +1,99 @@
+# test_aquecimento.py
+import os
+import threading
+import time
+
+import pytest
+
+from src.core.aquecimento import AquecedorCache, FilaAquecimento
+
+
+def test_avisos_repetidos_sao_agrupados():
+    fila = FilaAquecimento(atraso_s=0.05)
+    fila.avisar([12], 9, 2025)
+    fila.avisar([12], 9, 2025)
+    fila.avisar([3, 1], 9, 2025)
+
+    assert fila.prontos() == []  # ainda dentro do atraso
+    time.sleep(0.06)
+    assert sorted(fila.prontos()) == [((1, 3), 9, 2025), ((12,), 9, 2025)]
+    assert len(fila) == 0
+
+
+class _Conexao:
+    def __init__(self, engine):
+        self.engine = engine
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL não definido (Postgres local)")
+def test_listen_notify_dispara_aquecimento():
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(os.environ["TEST_DATABASE_URL"])
+    aquecidos = []
+
+    class Aquecedor(AquecedorCache):
+        def aquecer(self, id_cliente, mes, ano):
+            aquecidos.append((id_cliente, mes, ano))
+
+    aquecedor = Aquecedor(db=_Conexao(engine), atraso_s=0)
+    parar = threading.Event()
+    thread = threading.Thread(target=aquecedor.ouvir, args=("ize_teste_aquecimento", parar))
+    thread.start()
+    try:
+        time.sleep(0.5)
+        with engine.begin() as conn:
+            conn.execute(text("""SELECT pg_notify('ize_teste_aquecimento', '{"id_cliente": 12, "mes": 9, "ano": 2025}')"""))
+            conn.execute(text("SELECT pg_notify('ize_teste_aquecimento', 'invalido')"))
+        prazo = time.time() + 5
+        while not aquecidos and time.time() < prazo:
+            time.sleep(0.1)
+    finally:
+        parar.set()
+        thread.join()
+        engine.dispose()
+
+    assert aquecidos == [([12], 9, 2025)]
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL não definido (Postgres local)")
+def test_monitor_so_enfileira_periodos_cuja_janela_mudou():
+    from datetime import date
+
+    from sqlalchemy import create_engine, text
+
+    from benchmarks import dados_sinteticos
+    from src.database.db_utils import DatabaseConnection, impressao_digital_dados, impressoes_digitais_por_cliente
+
+    url, schema = os.environ["TEST_DATABASE_URL"], "bench_teste_impressao"
+    engine = create_engine(url)
+    dados_sinteticos.carregar(engine, schema, dados_sinteticos.Volume(clientes=2, meses=6, contas=6, lancamentos=1,
+                                                                      indicadores=1))
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"UPDATE {schema}.cliente SET ativo = TRUE"))
+        db = DatabaseConnection(url, connect_args={"options": f"-csearch_path={schema}"})
+        periodos = [(9, 2025), (8, 2025)]
+        impressoes = impressoes_digitais_por_cliente(db, [1, 2], periodos)
+        assert impressoes == {(c, m, a): impressao_digital_dados(db, [c], m, a) for c in (1, 2) for m, a in periodos}
+
+        aquecedor = AquecedorCache(db=db, atraso_s=0)
+        hoje = date(2025, 9, 15)
+        assert aquecedor.verificar_mudancas(hoje) == 4  # primeira rodada: tudo entra na fila
+        aquecedor.fila.prontos()
+
+        def alterar(id_cliente, mes):
+            with engine.begin() as conn:
+                conn.execute(text(f"UPDATE {schema}.fc SET valor = valor + 1 WHERE id_cliente = :c AND data >= :d "
+                                  f"AND data < :d + interval '1 month'"), {"c": id_cliente, "d": date(2025, mes, 1)})
+
+        alterar(1, 4)  # fora das janelas (agosto lê de maio em diante)
+        assert aquecedor.verificar_mudancas(hoje) == 0
+        alterar(1, 9)
+        alterar(2, 6)
+        assert aquecedor.verificar_mudancas(hoje) == 3
+        assert sorted(aquecedor.fila.prontos()) == [((1,), 9, 2025), ((2,), 8, 2025), ((2,), 9, 2025)]
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        engine.dispose()
@@ -0,0 +1,47 @@
+# test_armazem.py
+import hashlib
+import os
+import time
+
+from src.core.armazem import ArmazemArquivos
+
+
+def _arquivo(tmp_path, nome, tamanho):
+    caminho = tmp_path / nome
+    caminho.write_bytes(b"x" * tamanho)
+    return str(caminho)
+
+
+def test_guardar_obter_e_metadados(tmp_path):
+    armazem = ArmazemArquivos(str(tmp_path / "a"), 10_000)
+    destino = armazem.guardar("ab12", _arquivo(tmp_path, "o.pdf", 10), metadados={"filename": "R.pdf"})
+
+    assert armazem.obter("ab12") == destino
+    assert armazem.ler_metadados("ab12") == {"filename": "R.pdf", "sha256": hashlib.sha256(b"x" * 10).hexdigest()}
+    assert armazem.obter("cd34") is None
+    assert armazem.ler_metadados("cd34") == {}
+
+
+def test_validade_conta_a_partir_da_gravacao(tmp_path):
+    armazem = ArmazemArquivos(str(tmp_path / "a"), 10_000)
+    destino = armazem.guardar("ab12", _arquivo(tmp_path, "o.pdf", 10))
+    antigo = time.time() - 3600
+    os.utime(destino, (antigo, antigo))
+
+    assert armazem.obter("ab12", validade=60) is None
+    assert armazem.obter("ab12") == destino
+    assert os.stat(destino).st_mtime == antigo  # acerto não "rejuvenesce" o arquivo
+
+
+def test_despeja_os_menos_usados(tmp_path):
+    armazem = ArmazemArquivos(str(tmp_path / "a"), 350)
+    for i, chave in enumerate(["aa", "bb", "cc"]):
+        caminho = armazem.guardar(chave, _arquivo(tmp_path, f"{chave}.pdf", 100), metadados={})
+        os.utime(caminho, (1000 + i, 1000 + i))
+    armazem.obter("aa")  # mais recente agora
+    armazem.guardar("dd", _arquivo(tmp_path, "dd.pdf", 100))
+
+    assert armazem.obter("bb") is None
+    assert not os.path.exists(armazem.caminho("bb") + ".json")
+    assert armazem.obter("aa") and armazem.obter("cc") and armazem.obter("dd")
+    assert armazem.tamanho_total() == 300
@@ -0,0 +1,136 @@
+# test_benchmarks.py
+import os
+from datetime import date
+
+import pytest
+
+from benchmarks import carga, comparacao, consultas, dados_sinteticos, fixtures
+
+
+def _medicoes(**etapas):
+    return {"medicoes": {etapa: {"mediana_s": valor} for etapa, valor in etapas.items()}}
+
+
+def test_comparacao_respeita_tolerancia_e_piso():
+    baseline = _medicoes(**{"render/tipico/Relatório 7": 0.100, "dados/tipico/Relatório 1": 0.0002,
+                            "pdf/tipico/Relatório 1": 0.400, "graficos/tipico/waterfall_r6": 0.500})
+    baseline["tolerancias"] = {"pdf/": 0.5}
+    atual = _medicoes(**{"render/tipico/Relatório 7": 0.140,   # +40%: regressão
+                         "dados/tipico/Relatório 1": 0.0004,   # +100%, mas 0,2 ms: abaixo do piso
+                         "pdf/tipico/Relatório 1": 0.560,      # +40%: dentro da tolerância do pdf
+                         "merge/tipico/reportlab": 0.020})
+
+    linhas = {l["etapa"]: l for l in comparacao.comparar(atual, baseline, tolerancia=0.25, piso_ms=5)}
+
+    assert linhas["render/tipico/Relatório 7"]["status"] == comparacao.REGRESSAO
+    assert linhas["dados/tipico/Relatório 1"]["status"] == comparacao.ESTAVEL
+    assert linhas["pdf/tipico/Relatório 1"]["status"] == comparacao.ESTAVEL
+    assert linhas["pdf/tipico/Relatório 1"]["tolerancia"] == 0.5
+    assert linhas["merge/tipico/reportlab"]["status"] == comparacao.NOVA
+    assert linhas["graficos/tipico/waterfall_r6"]["status"] == comparacao.AUSENTE
+    assert [l["etapa"] for l in comparacao.regressoes(list(linhas.values()))] == ["render/tipico/Relatório 7"]
+    assert "🔴 render/tipico/Relatório 7" in comparacao.formatar(list(linhas.values()))
+
+
+def test_gravacao_reproduz_as_respostas(tmp_path):
+    sinteticos = fixtures.IndicadoresSinteticos("grande")
+    gravador = fixtures.GravadorIndicadores(sinteticos)
+    mes = date(2025, 9, 1)
+    operacionais = gravador.calcular_indicadores_operacionais(mes)
+    gravador.calcular_investimentos_fc(mes, None)
+    assert len(operacionais) == 120
+
+    fixtures.salvar("teste", {"mes": mes.isoformat(), "chamadas": gravador.chamadas}, str(tmp_path))
+    gravados = fixtures.IndicadoresGravados(fixtures.carregar("teste", str(tmp_path))["chamadas"])
+
+    assert gravados.calcular_indicadores_operacionais(mes) == operacionais
+    assert gravados.calcular_investimentos_fc(mes, None) == sinteticos.calcular_investimentos_fc(mes, None)
+    gravados.calcular_indicadores_operacionais(mes)[0]["total_valor"] = -1  # cópia a cada chamada
+    assert gravados.calcular_indicadores_operacionais(mes) == operacionais
+    with pytest.raises(KeyError):
+        gravados.calcular_indicadores_operacionais(date(2025, 8, 1))
+
+
+def test_fixtures_distribuidas_cobrem_os_portes():
+    assert {"pequeno", "tipico", "grande"} <= set(fixtures.fixtures_disponiveis())
+    chamadas = fixtures.carregar("grande")["chamadas"]
+    (operacionais,) = [v for k, v in chamadas.items() if k.startswith("calcular_indicadores_operacionais(")]
+    assert len(operacionais) >= 100
+
+
+def test_dados_sinteticos_consistentes_com_o_plano():
+    volume = dados_sinteticos.Volume(clientes=2, meses=3, contas=20, lancamentos=2, indicadores=5)
+    linhas = dados_sinteticos.gerar_cliente(7, volume)
+
+    assert linhas == dados_sinteticos.gerar_cliente(7, volume)  # determinístico
+    contas = {int(p[1]): p for p in linhas["plano_de_contas"]}
+    assert {f[6] for f in linhas["fc"]} <= set(contas)
+    assert all(contas[f[6]][2] == f[4] and contas[f[6]][4] == f[5] for f in linhas["fc"])
+    assert {f[1].replace(day=1) for f in linhas["fc"]} == set(volume.meses_gerados())
+    assert {f[3] for f in linhas["fc"]} == {"Realizado", "Projetado"}
+    assert all(p[3].startswith("6.") for p in linhas["plano_de_contas"] if p[2] == "6. Investimentos")
+    assert len(linhas["indicador"]) == 3 * 5
+    assert volume.escalado(10).clientes == 20
+
+
+def test_resumo_do_plano_e_percentis():
+    plano = {"Planning Time": 0.2, "Execution Time": 41.5, "Plan": {
+        "Node Type": "Sort", "Total Cost": 120.0, "Actual Rows": 4, "Shared Hit Blocks": 30, "Shared Read Blocks": 2,
+        "Plans": [{"Node Type": "Hash Join", "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "fc"},
+            {"Node Type": "Hash", "Plans": [{"Node Type": "Seq Scan", "Relation Name": "fc"}]}]}]}}
+
+    resumo = consultas.resumir_plano(plano)
+
+    assert resumo["seq_scans"] == {"fc": 2}
+    assert resumo["forma"].startswith("Seq Scan on fc×2")
+    assert (resumo["execucao_ms"], resumo["blocos_cache"], resumo["blocos_disco"]) == (41.5, 30, 2)
+    assert consultas.percentil([1, 2, 3, 4, 5], 50) == 3
+    assert consultas.percentil([1, 2, 3, 4, 5], 95) == pytest.approx(4.8)
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL não definido (Postgres local)")
+def test_carga_sintetica_no_postgres():
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(os.environ["TEST_DATABASE_URL"])
+    volume = dados_sinteticos.Volume(clientes=2, meses=2, contas=12, lancamentos=2, indicadores=3)
+    schema = "bench_teste"
+    contagem = dados_sinteticos.carregar(engine, schema, volume)
+    try:
+        assert contagem["cliente"] == 2 and contagem["fc"] > 0
+        assert dados_sinteticos.parametros_carregados(engine, schema) == volume.parametros()
+        with engine.connect() as conn:
+            # Mesmo join das consultas de Indicadores
+            ligados = conn.execute(text(f"""
+                SELECT count(*) FROM {schema}.fc f
+                JOIN {schema}.plano_de_contas p ON f.id_cliente = p.id_cliente AND text(f.nivel_3_id) = p.nivel_3_id
+            """)).scalar()
+            total = conn.execute(text(f"SELECT count(*) FROM {schema}.fc")).scalar()
+        assert ligados == total == contagem["fc"]
+        assert sorted(consultas.amostra_clientes(engine, schema, 5)) == [[1], [2]]  # sem consolidado com 2 clientes
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+
+
+def test_carga_resume_nivel_e_le_processos():
+    registros = [("pdf", 0.0, 2.0, 200), ("pdf", 0.5, 4.0, 200), ("pdf", 1.0, 0.01, 429),
+                 ("jobs", 1.0, 6.0, 200), ("lote", 2.0, 1.0, 0)]
+    serie = [{"wkhtmltopdf": 2, "rss_mb": 300.0}, {"wkhtmltopdf": 4, "rss_mb": 350.0}]
+
+    nivel = carga.resumir_nivel(3, registros, 10.0, serie)
+
+    assert (nivel["pedidos"], nivel["vazao_rps"], nivel["vazao_por_hora"]) == (5, 0.3, 1080)
+    assert (nivel["taxa_erro"], nivel["taxa_recusa"]) == (0.4, 0.2)
+    assert nivel["acoes"]["pdf"]["status"] == {"200": 2, "429": 1}
+    assert nivel["acoes"]["pdf"]["p50_s"] == 3.0 and nivel["acoes"]["pdf"]["max_s"] == 4.0
+    assert "p50_s" not in nivel["acoes"]["lote"]
+    assert (nivel["wkhtmltopdf_max"], nivel["rss_max_mb"], nivel["rss_final_mb"]) == (4, 350.0, 350.0)
+
+    assert carga._lista_ids("1-3,7") == [1, 2, 3, 7]
+    assert carga._mix("pdf=8,jobs=2,lote") == {"pdf": 8.0, "jobs": 2.0, "lote": 1.0}
+    with pytest.raises(Exception):
+        carga._mix("preview=1")
+    if os.path.isdir("/proc") or carga.psutil is not None:
+        assert carga.amostrar_processos(os.getpid())["rss_mb"] > 0
@@ -0,0 +1,58 @@
+# test_cache_secoes.py
+from src.core.armazem import ArmazemArquivos
+from src.rendering import engine as engine_mod
+from src.rendering.engine import RenderingEngine
+
+from tests.test_engine_concorrente import _indice, _pdf_minimo
+
+
+def _secoes(nota):
+    return [
+        ("Índice", _indice("Cliente")),
+        ("Relatório 8", ([], {"nota_consultor": nota})),
+    ]
+
+
+def test_so_a_secao_alterada_e_reconvertida(monkeypatch, tmp_path):
+    convertidos = []
+
+    def converter(cmd, check):
+        convertidos.append(cmd[-1])
+        _pdf_minimo(cmd[-1])
+
+    monkeypatch.setattr(engine_mod.subprocess, "run", converter)
+    engine = RenderingEngine(cache=ArmazemArquivos(str(tmp_path / "cache"), 10 * 1024 * 1024))
+
+    engine.render_to_pdf(_secoes("<p>v1</p>"), "Cliente", "Setembro", 2025, str(tmp_path / "a.pdf"))
+    assert len(convertidos) == 2
+
+    etapas = []
+    engine.render_to_pdf(_secoes("<p>v2</p>"), "Cliente", "Setembro", 2025, str(tmp_path / "b.pdf"),
+                         progresso=lambda etapa, status: etapas.append(etapa))
+    assert len(convertidos) == 3
+    assert convertidos[-1].endswith("Relatório_8.pdf")
+    assert "cache:Índice" in etapas
+
+    engine.render_to_pdf(_secoes("<p>v2</p>"), "Cliente", "Setembro", 2025, str(tmp_path / "c.pdf"))
+    assert len(convertidos) == 3
+    assert (tmp_path / "c.pdf").stat().st_size > 0
+
+
+def test_chave_muda_com_cliente_e_periodo():
+    from src.rendering.renderers import get_renderer
+    renderer = get_renderer(8)
+    dados = ([], {"nota_consultor": "x"})
+    base = engine_mod.chave_secao("Relatório 8", dados, "A", "Setembro", 2025, renderer)
+    assert base == engine_mod.chave_secao("Relatório 8", dados, "A", "Setembro", 2025, renderer)
+    assert base != engine_mod.chave_secao("Relatório 8", dados, "B", "Setembro", 2025, renderer)
+    assert base != engine_mod.chave_secao("Relatório 8", dados, "A", "Outubro", 2025, renderer)
+
+
+def test_pre_renderizar_aquece_o_cache(monkeypatch, tmp_path):
+    convertidos = []
+    monkeypatch.setattr(engine_mod.subprocess, "run", lambda cmd, check: convertidos.append(1) or _pdf_minimo(cmd[-1]))
+    engine = RenderingEngine(cache=ArmazemArquivos(str(tmp_path / "cache"), 10 * 1024 * 1024))
+
+    assert engine.pre_renderizar(_secoes("<p>v1</p>"), "Cliente", "Setembro", 2025) == 2
+    engine.render_to_pdf(_secoes("<p>v1</p>"), "Cliente", "Setembro", 2025, str(tmp_path / "a.pdf"))
+    assert len(convertidos) == 2
@@ -0,0 +1,31 @@
+# test_cli.py
+import pytest
+
+from src.cli import Manifesto, _resumo_vazao, main
+
+
+def test_manifesto_retoma_apenas_clientes_entregues(tmp_path):
+    caminho = str(tmp_path / "manifesto.json")
+    manifesto = Manifesto(caminho, 9, 2025, [1, 2])
+    (tmp_path / "A.pdf").write_bytes(b"%PDF")
+    manifesto.registrar({"id_cliente": 1, "status": "ok", "arquivo": "A.pdf", "tempo_s": 1.0})
+    manifesto.registrar({"id_cliente": 2, "status": "erro", "erro": "x", "tempo_s": 1.0})
+    manifesto.registrar({"id_cliente": 3, "status": "ok", "arquivo": "C.pdf", "tempo_s": 1.0})
+
+    retomado = Manifesto(caminho, 9, 2025, [1, 2])
+    assert retomado.concluido(1, str(tmp_path))
+    assert not retomado.concluido(2, str(tmp_path))  # falhou: tenta de novo
+    assert not retomado.concluido(3, str(tmp_path))  # PDF sumiu da pasta: gera de novo
+
+    assert not Manifesto(caminho, 10, 2025, [1, 2]).concluido(1, str(tmp_path))
+
+
+def test_resumo_vazao():
+    assert "720 clientes/hora" in _resumo_vazao([5.0, 5.0], 10.0, 2)
+    assert _resumo_vazao([], 10.0, 0).startswith("Nenhum")
+
+
+def test_mes_invalido_e_rejeitado(capsys):
+    with pytest.raises(SystemExit) as erro:
+        main(["close-month", "--mes", "13", "--ano", "2025"])
+    assert erro.value.code == 2
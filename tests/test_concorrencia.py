@@ -0,0 +1,60 @@
+# test_concorrencia.py
+import multiprocessing
+import time
+
+import pytest
+
+from src.core.concorrencia import (
+    SlotsConversao, ConversaoOcupadaError, ControleAdmissao, AdmissaoNegadaError
+)
+
+
+def _segurar_slot(lock_dir, pronto, liberar):
+    slots = SlotsConversao(slots=1, lock_dir=lock_dir)
+    with slots.slot():
+        pronto.set()
+        liberar.wait(10)
+
+
+def test_slots_limitam_conversoes_no_mesmo_processo(tmp_path):
+    slots = SlotsConversao(slots=2, lock_dir=str(tmp_path), timeout=0.2)
+    with slots.slot(), slots.slot():
+        assert slots.em_uso() == 2
+        with pytest.raises(ConversaoOcupadaError):
+            with slots.slot():
+                pass
+    with slots.slot():
+        assert slots.em_uso() == 1
+
+
+def test_slots_valem_entre_processos(tmp_path):
+    pronto, liberar = multiprocessing.Event(), multiprocessing.Event()
+    processo = multiprocessing.Process(target=_segurar_slot, args=(str(tmp_path), pronto, liberar))
+    processo.start()
+    try:
+        assert pronto.wait(10)
+        slots = SlotsConversao(slots=1, lock_dir=str(tmp_path), timeout=0.2)
+        with pytest.raises(ConversaoOcupadaError):
+            with slots.slot():
+                pass
+    finally:
+        liberar.set()
+        processo.join(10)
+
+    with slots.slot(timeout=2):
+        pass
+
+
+def test_admissao_nega_acima_do_limite():
+    controle = ControleAdmissao(max_ativas=1, retry_after_padrao=12)
+    with controle.admitir():
+        with pytest.raises(AdmissaoNegadaError) as erro:
+            with controle.admitir():
+                pass
+        assert erro.value.retry_after == 12
+    assert controle.ativas() == 0
+
+    inicio = controle.entrar()
+    time.sleep(0.01)
+    controle.sair(inicio)
+    assert controle.retry_after() < 12
@@ -0,0 +1,79 @@
+# test_engine_concorrente.py
+import glob
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.armazem import ArmazemArquivos
+from src.core.concorrencia import SlotsConversao, ConversaoOcupadaError
+from src.rendering import engine as engine_mod
+from src.rendering.engine import RenderingEngine
+from src.rendering.renderers import get_renderer
+
+
+def _pdf_minimo(caminho):
+    """Escreve um PDF de uma página com texto (simula o wkhtmltopdf)."""
+    stream = b"BT /F1 24 Tf 72 720 Td (Teste) Tj ET"
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    dados, offsets = b"%PDF-1.4\n", []
+    for i, obj in enumerate(objs, 1):
+        offsets.append(len(dados))
+        dados += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(dados)
+    dados += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for off in offsets:
+        dados += b"%010d 00000 n \n" % off
+    dados += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    with open(caminho, "wb") as f:
+        f.write(dados)
+
+
+def _indice(nome):
+    return {"fluxo_caixa": "Sim", "dre_gerencial": "Não", "indicador": "Não", "nota_consultor": "Não",
+            "cliente_nome": nome, "mes": "Setembro", "ano": 2025, "nome": nome,
+            "Periodo": "Setembro 2025", "marca": "Sim"}
+
+
+def test_renderizacoes_paralelas_isoladas(monkeypatch, tmp_path):
+    monkeypatch.setattr(engine_mod.subprocess, "run", lambda cmd, check: _pdf_minimo(cmd[-1]))
+    engine = RenderingEngine(cache=ArmazemArquivos(str(tmp_path / "cache"), 10 * 1024 * 1024))
+    antes = set(glob.glob(os.path.join(tempfile.gettempdir(), "ize_render_*")))
+
+    def gerar(i):
+        destino = str(tmp_path / f"cliente_{i}.pdf")
+        return engine.render_to_pdf([("Índice", _indice(f"Cliente {i}"))], "Cliente", "Setembro", 2025, destino)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        caminhos = list(executor.map(gerar, range(8)))
+
+    assert len(set(caminhos)) == 8
+    assert all(os.path.getsize(c) > 0 for c in caminhos)
+    # Workspaces temporários removidos ao final de cada geração
+    assert set(glob.glob(os.path.join(tempfile.gettempdir(), "ize_render_*"))) == antes
+
+
+def test_renderizadores_compartilhados_sao_imutaveis():
+    with pytest.raises(AttributeError):
+        get_renderer(1).template = None
+
+
+def test_sem_slot_de_conversao_a_geracao_inteira_falha(monkeypatch, tmp_path):
+    monkeypatch.setattr(engine_mod.subprocess, "run", lambda cmd, check: _pdf_minimo(cmd[-1]))
+    slots = SlotsConversao(slots=1, lock_dir=str(tmp_path / "slots"), timeout=0.1)
+    monkeypatch.setattr(engine_mod, "slots_conversao", slots)
+    destino = tmp_path / "cliente.pdf"
+
+    with slots.slot():  # outra conversão segura o único slot
+        with pytest.raises(ConversaoOcupadaError):
+            RenderingEngine().render_to_pdf([("Índice", _indice("Cliente"))], "Cliente", "Setembro", 2025, str(destino))
+
+    assert not destino.exists()
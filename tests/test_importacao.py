@@ -0,0 +1,63 @@
+# test_importacao.py
+"""
+Orçamento de tempo de importação dos pontos de entrada (subida a frio).
+
+Cada ponto de entrada é importado num processo Python novo; vale o menor de
+`REPETICOES` tempos. Além do tempo, as bibliotecas pesadas (pandas, SQLAlchemy,
+matplotlib, scipy, PDF) não podem ser carregadas na subida: elas são importadas
+no primeiro uso. Em máquinas lentas, `IMPORTACAO_ORCAMENTO_FATOR=2` dobra os limites.
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FATOR = float(os.getenv("IMPORTACAO_ORCAMENTO_FATOR", "1"))
+REPETICOES = 3
+
+PESADOS = ["pandas", "sqlalchemy", "matplotlib", "scipy", "pypdf", "PyPDF2", "reportlab"]
+
+# (preparo fora da medição, importação medida, orçamento em s, módulos proibidos)
+PONTOS_DE_ENTRADA = {
+    # Antes: ~1,1 s (streamlit via config.settings, pandas, SQLAlchemy, numpy, pypdf)
+    "src.api.main": ("", "import src.api.main", 0.6, PESADOS + ["streamlit", "numpy"]),
+    # `streamlit run main.py`: o streamlit já está carregado quando o script roda.
+    # O diagnóstico de deploy importa o PDFPostProcessor de propósito (PyPDF2).
+    # Antes: ~0,5 s além do streamlit (diagnóstico com PyPDF2, pandas, SQLAlchemy)
+    "main.py": ("import streamlit", "import runpy; runpy.run_path('main.py', run_name='entrada')", 0.3,
+                [m for m in PESADOS if m != "PyPDF2"]),
+    "app.py": ("", "import runpy; runpy.run_path('app.py', run_name='entrada')", 0.2, PESADOS + ["fastapi"]),
+}
+
+
+def _medir(preparo: str, importacao: str) -> dict:
+    codigo = (
+        f"import json, sys, time\n{preparo}\n"
+        f"t = time.perf_counter()\n{importacao}\n"
+        "print(json.dumps({'s': time.perf_counter() - t, 'modulos': sorted(sys.modules)}))"
+    )
+    ambiente = dict(os.environ, PYTHONPATH=RAIZ)
+    for variavel in ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT"):
+        ambiente.setdefault(variavel, "5432" if variavel == "DB_PORT" else "teste")
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=ambiente,
+                           capture_output=True, text=True, timeout=120)
+    assert saida.returncode == 0, saida.stderr[-2000:]
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("ponto", list(PONTOS_DE_ENTRADA))
+def test_orcamento_de_importacao(ponto):
+    preparo, importacao, orcamento_s, proibidos = PONTOS_DE_ENTRADA[ponto]
+    if ponto == "main.py" and not (importlib.util.find_spec("streamlit") and importlib.util.find_spec("streamlit_quill")):
+        pytest.skip("streamlit não instalado")
+
+    medicoes = [_medir(preparo, importacao) for _ in range(REPETICOES)]
+    tempo_s = min(m["s"] for m in medicoes)
+
+    carregados = [m for m in proibidos if m in medicoes[0]["modulos"]]
+    assert not carregados, f"{ponto} importa na subida: {carregados}"
+    assert tempo_s <= orcamento_s * FATOR, f"{ponto}: {tempo_s:.3f}s > orçamento de {orcamento_s * FATOR:.2f}s"
@@ -0,0 +1,88 @@
+# test_instrumentacao.py
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.core import metricas
+from src.database.instrumentacao import (
+    EstatisticasConsultas, RegistroConsultasLentas, metodo_chamador, registrar_consulta,
+    resumir_log, rotulo_cliente, ESTATISTICAS,
+)
+
+URL = os.getenv("TEST_DATABASE_URL")
+
+
+class Indicadores:
+    def calcular_algo(self):
+        return self._consultar()
+
+    def _consultar(self):
+        return metodo_chamador()
+
+
+def test_metodo_chamador_e_rotulo_do_cliente():
+    # _consultar faz o papel do execute_query: o rótulo é quem o chamou
+    assert Indicadores().calcular_algo() == "Indicadores.calcular_algo"
+    assert rotulo_cliente({"id_cliente": [15, 12], "year": 2025}) == "12,15"
+    assert rotulo_cliente({"id_cliente": 7}) == "7"
+    assert rotulo_cliente(None) == ""
+
+
+def test_estatisticas_por_metodo_e_cliente():
+    est = EstatisticasConsultas()
+    est.registrar("A.x", "1", 0.2, 10, lenta=False)
+    est.registrar("A.x", "2", 0.9, 5, lenta=True)
+    est.registrar("A.y", "1", 0.1, 1, lenta=False)
+
+    por_cliente = est.resumo()
+    assert [(l["metodo"], l["cliente"]) for l in por_cliente] == [("A.x", "2"), ("A.x", "1"), ("A.y", "1")]
+
+    por_metodo = {l["metodo"]: l for l in est.resumo(por_cliente=False)}
+    assert por_metodo["A.x"]["execucoes"] == 2
+    assert por_metodo["A.x"]["linhas"] == 15
+    assert por_metodo["A.x"]["lentas"] == 1
+    assert por_metodo["A.x"]["max_s"] == pytest.approx(0.9)
+
+
+def test_registrar_consulta_sem_lentidao_nao_captura(monkeypatch):
+    capturas = []
+    monkeypatch.setattr("src.database.instrumentacao.CONSULTAS_LENTAS.capturar",
+                        lambda *a, **k: capturas.append(a))
+    antes = metricas.DB_CONSULTA_LINHAS.valor(metodo="teste_rapida")
+    registrar_consulta(None, "SELECT 1", {"id_cliente": [3]}, "teste_rapida", 0.01, 4, limite_ms=500)
+    registrar_consulta(None, "SELECT 1", {"id_cliente": [3]}, "teste_lenta", 0.8, 1, limite_ms=500)
+    assert metricas.DB_CONSULTA_LINHAS.valor(metodo="teste_rapida") == antes + 4
+    assert [c[3] for c in capturas] == ["teste_lenta"]
+    assert any(l["metodo"] == "teste_rapida" and l["cliente"] == "3" for l in ESTATISTICAS.resumo())
+
+
+def test_captura_limitada_por_intervalo_e_resumo_do_log(tmp_path):
+    caminho = str(tmp_path / "lentas.jsonl")
+    registro = RegistroConsultasLentas(caminho, intervalo_s=600)
+    registro.capturar(None, "UPDATE x SET y = 1", None, "A.x", "1", 1.2, 0, em_segundo_plano=False)
+    registro.capturar(None, "UPDATE x SET y = 1", None, "A.x", "1", 3.0, 0, em_segundo_plano=False)
+    registro.capturar(None, "UPDATE x SET y = 1", None, "A.x", "2", 2.0, 0, em_segundo_plano=False)
+
+    linhas = [json.loads(l) for l in open(caminho, encoding="utf-8")]
+    assert [(l["cliente"], l["duracao_ms"]) for l in linhas] == [("1", 1200.0), ("2", 2000.0)]
+    assert "plano" not in linhas[0]  # só SELECT/WITH recebem EXPLAIN ANALYZE
+
+    resumo = resumir_log([caminho, caminho + ".1"])
+    assert [(g["cliente"], g["capturas"]) for g in resumo] == [("2", 1), ("1", 1)]
+
+
+@pytest.mark.skipif(not URL, reason="TEST_DATABASE_URL não definido (Postgres local)")
+def test_explain_analyze_da_consulta_lenta(tmp_path):
+    engine = create_engine(URL)
+    caminho = str(tmp_path / "lentas.jsonl")
+    registro = RegistroConsultasLentas(caminho)
+    consulta = text("SELECT g FROM generate_series(1, :n) g WHERE g % 2 = 0;")
+    registro.capturar(engine, consulta, {"n": 100}, "A.x", "", 0.7, 50, em_segundo_plano=False)
+    engine.dispose()
+
+    linha = json.loads(open(caminho, encoding="utf-8").readline())
+    assert "erro_explain" not in linha
+    assert "Function Scan on generate_series" in linha["plano"]
+    assert "actual time" in linha["plano"]
@@ -0,0 +1,61 @@
+# test_jobs.py
+import threading
+import time
+
+import pytest
+
+from src.core.jobs import GerenciadorJobs, FilaCheiaError, STATUS_CONCLUIDO, STATUS_ERRO
+
+
+def _esperar(job, timeout=5.0):
+    limite = time.time() + timeout
+    while not job.finalizado and time.time() < limite:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_concluido_com_etapas():
+    def gerar(valor, progresso):
+        progresso("dados:Relatório 1", "iniciado")
+        progresso("dados:Relatório 1", "concluido")
+        progresso("merge", "concluido")
+        return valor * 2
+
+    gerenciador = GerenciadorJobs(max_workers=1, tamanho_fila=5)
+    job = _esperar(gerenciador.submeter(gerar, 21))
+
+    assert job.status == STATUS_CONCLUIDO
+    assert job.resultado == 42
+    estado = job.to_dict()
+    assert [e["etapa"] for e in estado["etapas"]] == ["dados:Relatório 1", "merge"]
+    assert estado["etapas_concluidas"] == 2
+    assert gerenciador.obter(job.id) is job
+
+
+def test_job_com_erro_registra_mensagem():
+    def falhar(progresso):
+        raise ValueError("sem dados")
+
+    gerenciador = GerenciadorJobs(max_workers=1, tamanho_fila=5)
+    job = _esperar(gerenciador.submeter(falhar))
+
+    assert job.status == STATUS_ERRO
+    assert job.erro == "sem dados"
+
+
+def test_fila_cheia_rejeita_submissao():
+    liberar = threading.Event()
+
+    def bloquear(progresso):
+        liberar.wait(5)
+
+    gerenciador = GerenciadorJobs(max_workers=1, tamanho_fila=1)
+    primeiro = gerenciador.submeter(bloquear)
+    # Aguarda o worker retirar o primeiro job da fila
+    while primeiro.status != "processando":
+        time.sleep(0.01)
+    gerenciador.submeter(bloquear)
+
+    with pytest.raises(FilaCheiaError):
+        gerenciador.submeter(bloquear)
+    liberar.set()
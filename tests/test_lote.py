@@ -0,0 +1,104 @@
+# test_lote.py
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+
+from src.core import lote
+
+CLIENTES = [{"id_cliente": 1, "nome": "Padaria"}, {"id_cliente": 2, "nome": "Padaria"}, {"id_cliente": 3, "nome": "Oficina"}]
+
+
+@pytest.fixture
+def pipeline_falso(monkeypatch):
+    """Troca banco e geração por versões locais; devolve os ids gerados."""
+    gerados = []
+
+    def gerar_relatorio_pdf(ids, mes, ano, relatorios, output_dir, db, clientes):
+        gerados.append(ids[0])
+        if ids[0] == 3:
+            raise RuntimeError("sem dados no período")
+        os.makedirs(output_dir, exist_ok=True)
+        caminho = os.path.join(output_dir, "Relatorio_Padaria.pdf")
+        with open(caminho, "wb") as f:
+            f.write(b"%PDF-1.4 cliente " + str(ids[0]).encode())
+        return caminho, "Relatorio_Padaria.pdf"
+
+    monkeypatch.setattr(lote, "DatabaseConnection", lambda: None)
+    monkeypatch.setattr(lote, "buscar_clientes", lambda db: CLIENTES)
+    monkeypatch.setattr(lote, "gerar_relatorio_pdf", gerar_relatorio_pdf)
+    return gerados
+
+
+def test_zip_com_homonimos_erros_e_limpeza(pipeline_falso, tmp_path):
+    dados = b"".join(lote.gerar_lote_zip(None, 9, 2025, [1, 2], concorrencia=2, output_dir=str(tmp_path)))
+
+    with zipfile.ZipFile(io.BytesIO(dados)) as zf:
+        nomes = zf.namelist()
+        resumo = json.loads(zf.read("resumo.json"))
+    # O segundo homônimo a terminar ganha o id como prefixo; resumo.json é sempre o último
+    assert nomes[0] == "Relatorio_Padaria.pdf" and nomes[1] in {"1_Relatorio_Padaria.pdf", "2_Relatorio_Padaria.pdf"}
+    assert nomes[2:] == ["resumo.json"]
+    por_cliente = {c["id_cliente"]: c for c in resumo["clientes"]}
+    assert por_cliente[3]["status"] == "erro" and por_cliente[3]["erro"] == "sem dados no período"
+    assert {por_cliente[1]["arquivo"], por_cliente[2]["arquivo"]} == set(nomes[:2])
+    assert os.listdir(tmp_path) == []  # a pasta do lote é removida
+
+
+def test_desconexao_cancela_clientes_pendentes(pipeline_falso, monkeypatch, tmp_path):
+    liberar, terminou = threading.Event(), threading.Event()
+    gerar = lote.gerar_relatorio_pdf
+
+    def lento(ids, *args, **kwargs):
+        if ids[0] == 1:
+            return gerar(ids, *args, **kwargs)
+        liberar.wait(5)
+        try:
+            return gerar(ids, *args, **kwargs)
+        finally:
+            terminou.set()
+
+    monkeypatch.setattr(lote, "gerar_relatorio_pdf", lento)
+    monkeypatch.setattr(lote, "buscar_clientes", lambda db: [{"id_cliente": i, "nome": str(i)} for i in range(1, 9)])
+
+    fluxo = lote.gerar_lote_zip(None, 9, 2025, [1], concorrencia=2, output_dir=str(tmp_path))
+    next(fluxo)  # cliente 1 pronto; o 2 (e talvez o 3) renderizando, os demais na fila
+    inicio = time.monotonic()
+    fluxo.close()  # desconexão: não espera o cliente 2
+    assert time.monotonic() - inicio < 1
+    liberar.set()
+    assert terminou.wait(5)
+
+    limite = time.monotonic() + 5
+    while os.listdir(tmp_path) and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert {1, 2} <= set(pipeline_falso) <= {1, 2, 3}  # os pendentes (4 a 8) foram cancelados
+    assert os.listdir(tmp_path) == []
+
+
+def test_endpoint_de_lote_entrega_zip(pipeline_falso, monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from src.api import main as api
+
+    monkeypatch.setattr(api, "API_KEY", "chave-teste")
+    monkeypatch.chdir(tmp_path)
+    cliente = TestClient(api.app)
+
+    assert cliente.post("/v1/relatorios/lote", json={"mes": 9, "ano": 2025, "relatorios": [1]},
+                        headers={"X-API-Key": "chave-teste"}).status_code == 422
+    resposta = cliente.post("/v1/relatorios/lote", json={"id_cliente": [1, 3, 1], "mes": 9, "ano": 2025, "relatorios": ["1"]},
+                            headers={"X-API-Key": "chave-teste"})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"] == "application/zip"
+    assert 'filename="Relatorios_09_2025.zip"' in resposta.headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(resposta.content)) as zf:
+        resumo = json.loads(zf.read("resumo.json"))
+        assert zf.namelist() == ["Relatorio_Padaria.pdf", "resumo.json"]
+    assert sorted(c["id_cliente"] for c in resumo["clientes"]) == [1, 3]  # ids repetidos geram uma vez só
+    assert os.listdir(tmp_path / "outputs" / "lote") == []
@@ -0,0 +1,42 @@
+# test_metricas.py
+from src.core.metricas import Contador, Gauge, Histograma, Registro, medir_metodo
+
+
+def test_histograma_exporta_buckets_cumulativos():
+    hist = Histograma("t_duracao_segundos", "Teste.", ["metodo"], buckets=(0.1, 1.0))
+    hist.observar(0.05, metodo="a")
+    hist.observar(0.5, metodo="a")
+    hist.observar(5, metodo="a")
+
+    texto = hist.exportar()
+    assert "# TYPE t_duracao_segundos histogram" in texto
+    assert 't_duracao_segundos_bucket{metodo="a",le="0.1"} 1' in texto
+    assert 't_duracao_segundos_bucket{metodo="a",le="1"} 2' in texto
+    assert 't_duracao_segundos_bucket{metodo="a",le="+Inf"} 3' in texto
+    assert 't_duracao_segundos_count{metodo="a"} 3' in texto
+
+
+def test_decorador_usa_nome_do_metodo():
+    hist = Histograma("t_metodos_segundos", "Teste.", ["metodo"])
+
+    class Calculo:
+        @medir_metodo(hist)
+        def calcular_algo(self, x):
+            return x * 2
+
+    assert Calculo().calcular_algo(2) == 4
+    assert hist.contagem(metodo="calcular_algo") == 1
+
+
+def test_registro_inclui_contadores_e_gauges():
+    registro = Registro()
+    contador = registro.registrar(Contador("t_cache_total", "Teste.", ["resultado"]))
+    gauge = registro.registrar(Gauge("t_pool", "Teste.", ["estado"]))
+    contador.inc(resultado="hit")
+    contador.inc(resultado="hit")
+    gauge.definir_funcao(lambda: {("em_uso",): 3})
+
+    texto = registro.exportar()
+    assert 't_cache_total{resultado="hit"} 2' in texto
+    assert 't_pool{estado="em_uso"} 3' in texto
+    assert texto.endswith("\n")
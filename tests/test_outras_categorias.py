@@ -0,0 +1,115 @@
+# test_outras_categorias.py
+import os
+import random
+
+import pytest
+
+from src.core.utils import calcular_outras_categorias, resumir_top_n
+
+
+def _item(categoria, valor, av=0.0, ah=0.0):
+    return {"categoria": categoria, "valor": valor, "av": av, "ah": ah}
+
+
+def test_top_n_e_outras_casadas_por_categoria():
+    atual = [_item("A", -50.0, -5.0, 10.0), _item("B", -300.0, -30.0, 1.0), _item("C", -100.0),
+             _item("D", -20.0), _item("E", -30.0), _item("F", None)]
+    # No mês anterior "E" estava entre as maiores e "C" não existia
+    anterior = [_item("A", -40.0), _item("B", -280.0), _item("E", -200.0), _item("D", -10.0), _item("G", -15.0)]
+
+    resultado = calcular_outras_categorias(atual, anterior, -500.0, -545.0, 1000.0, top_n=3, usar_valor_abs=True)
+
+    assert [r["subcategoria"] for r in resultado] == ["B", "C", "A", "Outras categorias"]
+    assert resultado[0] == {"subcategoria": "B", "valor": -300.0, "av": -30.0, "ah": 1.0, "representatividade": 60.0}
+    outras = resultado[-1]
+    assert outras["valor"] == -50.0 and outras["representatividade"] == 10.0 and outras["av"] == 5.0
+    # Anterior das mesmas categorias fora do top (D, E, G): 225, e não o "4º em diante" do ranking anterior
+    assert outras["ah"] == round((50.0 / 225.0 - 1) * 100, 2)
+
+
+def test_sem_restante_nao_gera_outras():
+    itens = [_item("A", 10.0), _item("B", 5.0)]
+    assert [r["subcategoria"] for r in calcular_outras_categorias(itens, [], 15.0, 0.0, 0.0)] == ["A", "B"]
+    assert calcular_outras_categorias([], [], 0.0, 0.0, 100.0) == []
+
+
+def test_selecao_parcial_igual_a_ordenacao_estavel():
+    rng = random.Random(7)
+    valores = [float(rng.randint(-50, 50)) for _ in range(5000)]  # muitos empates
+    nomes = [f"conta {i}" for i in range(len(valores))]
+
+    resumo = resumir_top_n(valores, nomes, top_n=25, usar_valor_abs=True)
+
+    esperado = sorted(range(len(valores)), key=lambda i: abs(valores[i]), reverse=True)[:25]
+    assert resumo["indices"] == esperado
+    assert resumo["outras"]["valor"] == pytest.approx(sum(abs(v) for v in valores) - sum(abs(valores[i]) for i in esperado))
+
+
+@pytest.mark.parametrize("top_n", [0, -1])
+def test_top_n_zero_agrupa_tudo_em_outras(top_n):
+    valores = [float(v) for v in range(300)]  # acima do limite da seleção parcial
+
+    resumo = resumir_top_n(valores, [str(v) for v in valores], top_n=top_n)
+
+    assert resumo["indices"] == [] and resumo["valor"] == []
+    assert resumo["outras"]["valor"] == pytest.approx(sum(valores))
+    assert resumo["outras"]["representatividade"] == pytest.approx(100.0)
+
+
+def test_av_e_ah_calculados_sem_colunas_prontas():
+    resumo = resumir_top_n([200.0, 50.0, 10.0], ["x", "y", "z"], [100.0, 40.0, 10.0, 10.0], ["x", "z", "z", "w"],
+                           receita_total=400.0, top_n=2)
+
+    assert resumo["av"] == [50.0, 12.5]
+    assert resumo["ah"] == [100.0, 0.0]  # "y" não existia no mês anterior
+    assert resumo["outras"]["anterior"] == 60.0  # z (40 + 10) e w
+    assert resumo["outras"]["ah"] == pytest.approx((10.0 / 60.0 - 1) * 100)
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL não definido (Postgres local)")
+def test_top_n_no_sql_igual_ao_calculo_em_python():
+    from sqlalchemy import create_engine, text
+
+    from benchmarks import dados_sinteticos
+    from src.core.indicadores import Indicadores
+    from src.database.db_utils import DatabaseConnection
+
+    url, schema = os.environ["TEST_DATABASE_URL"], "bench_teste_top_n"
+    engine = create_engine(url)
+    volume = dados_sinteticos.Volume(clientes=3, meses=3, contas=30, lancamentos=2, indicadores=3)
+    dados_sinteticos.carregar(engine, schema, volume)
+    mes = volume.meses_gerados()[-1]
+    anterior = volume.meses_gerados()[-2]
+    with engine.begin() as conn:
+        # Categoria cuja soma é NULL: no Python vale 0, no SQL não pode ir para o topo.
+        conn.execute(text(f"ALTER TABLE {schema}.fc ALTER COLUMN valor DROP NOT NULL"))
+        conn.execute(text(f"""
+            INSERT INTO {schema}.fc (id_cliente, data, valor, visao, nivel_1, categoria_nivel_3, nivel_3_id)
+            VALUES (1, :data, NULL, 'Realizado', '3. Receitas', 'Sem valor', 0)
+        """), {"data": mes})
+    try:
+        indicadores = Indicadores([1, 2, 3], DatabaseConnection(url, connect_args={"options": f"-csearch_path={schema}"}))
+        receitas = indicadores.calcular_receitas_fc(mes, "3.%")
+        receita = sum(r["total_categoria"] for r in receitas)
+        casos = [
+            (indicadores.calcular_receitas_top_fc, receitas, indicadores.calcular_receitas_fc(anterior, "3.%"),
+             "total_categoria", "categoria_nivel_3", False),
+            (indicadores.calcular_custos_variaveis_top_fc, indicadores.calcular_custos_variaveis_fc(mes, "4.%"),
+             indicadores.calcular_custos_variaveis_fc(anterior, "4.%"), "total_categoria", "nivel_2", True),
+            (indicadores.calcular_despesas_fixas_top_fc, indicadores.calcular_despesas_fixas_fc(mes),
+             indicadores.calcular_despesas_fixas_fc(anterior), "valor", "categoria", True),
+        ]
+        for top_fc, atual, itens_anterior, chave_valor, chave_nome, usar_valor_abs in casos:
+            for top_n in (1, 3):
+                esperado = calcular_outras_categorias(atual, itens_anterior, 0, 0, receita, chave_valor, chave_nome,
+                                                      top_n, usar_valor_abs)
+                resultado = top_fc(mes, anterior, top_n)
+                assert [s["subcategoria"] for s in resultado["subcategorias"]] == [e["subcategoria"] for e in esperado]
+                for obtido, item in zip(resultado["subcategorias"], esperado):
+                    for campo in ("valor", "av", "ah", "representatividade"):
+                        assert obtido[campo] == pytest.approx(item[campo], abs=0.011), (top_fc.__name__, campo)
+                assert resultado["total"] == pytest.approx(sum(i[chave_valor] for i in atual))
+                assert resultado["total_absoluto_anterior"] == pytest.approx(sum(abs(i[chave_valor]) for i in itens_anterior))
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
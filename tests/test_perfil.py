@@ -0,0 +1,34 @@
+# test_perfil.py
+import os
+import pstats
+
+from src.core import perfil
+
+
+def _trabalho():
+    return sum(len(str(i)) for i in range(20000)), [bytearray(1024) for _ in range(200)]
+
+
+def test_inativo_nao_grava(tmp_path):
+    with perfil.perfil_ativo(False):
+        with perfil.perfilar("dados", "c12_2025-09", str(tmp_path)) as base:
+            _trabalho()
+    assert base is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_grava_perfil_e_memoria_por_etapa(tmp_path):
+    with perfil.perfil_ativo():
+        assert perfil.ativo()
+        with perfil.perfilar("render", "c12-15_2025-09", str(tmp_path)) as base:
+            _trabalho()
+    assert not perfil.ativo() or perfil.PERFIL
+
+    assert os.path.basename(base).endswith("_c12-15_2025-09_render")
+    funcoes = {f[2] for f in pstats.Stats(f"{base}.prof").stats}
+    assert "_trabalho" in funcoes
+
+    resumo = open(f"{base}.txt", encoding="utf-8").read()
+    assert "Etapa: render" in resumo
+    assert "pico" in resumo
+    assert "test_perfil.py" in resumo  # linha que alocou os bytearrays
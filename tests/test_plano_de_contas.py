@@ -0,0 +1,137 @@
+# test_plano_de_contas.py
+import os
+
+import pytest
+
+from src.core import metricas
+from src.database.plano_de_contas import CachePlanoDeContas, somar_por_nivel_2
+
+
+def test_soma_por_nivel_2_descarta_contas_fora_do_plano():
+    mapa = {(1, "10"): "4.1 Fretes", (1, "11"): "4.1 Fretes", (2, "10"): "4.2 Comissões", (1, "12"): None}
+    resultado = {
+        "id_cliente": [1, 1, 2, 1, 1],
+        "nivel_3_id": ["10", "11", "10", "12", "99"],
+        "valor": [-10.0, -5.0, -7.0, float("nan"), -1.0],
+        "valor_anterior": [None, -4.0, None, -2.0, -1.0],
+    }
+
+    somas = somar_por_nivel_2(resultado, mapa)
+
+    assert somas == {
+        "4.1 Fretes": {"valor": -15.0, "valor_anterior": -4.0},
+        "4.2 Comissões": {"valor": -7.0, "valor_anterior": None},
+        None: {"valor": None, "valor_anterior": -2.0},  # só tem lançamento no mês anterior
+    }
+
+
+def test_top_n_em_memoria_desempata_como_o_sql():
+    from src.core.indicadores import Indicadores
+
+    atual = [{"categoria": c, "valor": v, "av": None, "ah": None}
+             for c, v in [(None, -30.0), ("B", -30.0), ("A", 30.0), ("C", -5.0)]]
+    anterior = [{"categoria": "C", "valor": -10.0}]
+
+    top = Indicadores._top_n_em_memoria(atual, anterior, 100.0, 2, nome_vazio="Desconhecido")
+
+    # Empate no valor absoluto: ordem alfabética, sem nivel_2 por último (como `ORDER BY chave DESC, categoria`)
+    assert [s["subcategoria"] for s in top["subcategorias"]] == ["A", "B", "Outras categorias"]
+    assert top["subcategorias"][-1] == {"subcategoria": "Outras categorias", "valor": -35.0, "av": 35.0,
+                                        "ah": 250.0, "representatividade": 36.84}
+    assert (top["total"], top["total_absoluto"], top["total_anterior"]) == (-35.0, 95.0, -10.0)
+
+
+def test_categoria_sem_nivel_2_fica_sem_ah():
+    import pandas as pd
+
+    from src.core.indicadores import Indicadores
+
+    indicadores = Indicadores([1], db_connection=None)
+    indicadores._mapa_plano = {(1, "10"): "4.1 Fretes", (1, "11"): None}
+    resultado = pd.DataFrame({
+        "id_cliente": [1, 1],
+        "nivel_3_id": ["10", "11"],
+        "valor": [-20.0, -30.0],
+        "valor_anterior": [-10.0, -15.0],
+        "receita": [100.0, 100.0],
+    })
+
+    atual, anterior, _ = indicadores._por_nivel_2(resultado)
+
+    # Como `a.nivel_2 = p.nivel_2` no SQL antigo: NULL não casa com o mês anterior
+    assert {c["categoria"]: c["ah"] for c in atual} == {"4.1 Fretes": 100.0, None: None}
+    assert {a["categoria"]: a["valor"] for a in anterior} == {"4.1 Fretes": -10.0, None: -15.0}
+
+
+class _CacheEmMemoria(CachePlanoDeContas):
+    """Cache sem banco: os planos "do banco" ficam em `self.banco`."""
+
+    def __init__(self, **kwargs):
+        super().__init__(nome="plano_de_contas_memoria", **kwargs)
+        self.banco = {1: {"10": "4.1 Fretes"}, 2: {"10": "4.2 Comissões"}}
+        self.conferidos, self.lidos = [], []
+
+    def versoes(self, db, id_cliente):
+        self.conferidos.append(list(id_cliente))
+        return {i: repr(self.banco[i]) for i in id_cliente if i in self.banco}
+
+    def carregar(self, db, id_cliente):
+        self.lidos.append(list(id_cliente))
+        return {i: dict(self.banco.get(i, {})) for i in id_cliente}
+
+
+def test_versao_so_e_conferida_depois_da_validade():
+    cache = _CacheEmMemoria(validade_s=3600)
+
+    mapa = cache.mapa(None, [2, 1])
+    cache.banco[1] = {"10": "Novo grupo"}
+    assert cache.mapa(None, [1, 2]) == mapa == {(1, "10"): "4.1 Fretes", (2, "10"): "4.2 Comissões"}
+    assert cache.conferidos == [[1, 2]] and cache.lidos == [[1, 2]]
+
+    cache.invalidar([1])  # ex.: fim da carga do ETL
+    assert cache.mapa(None, [1, 2])[(1, "10")] == "Novo grupo"
+    assert cache.conferidos[-1] == [1] and cache.lidos[-1] == [1]
+
+
+def test_invalidar_durante_a_leitura_nao_quebra_o_mapa():
+    class Concorrente(_CacheEmMemoria):
+        def carregar(self, db, id_cliente):
+            self.invalidar()  # outra thread limpa o cache no meio da leitura
+            return super().carregar(db, id_cliente)
+
+    cache = Concorrente(validade_s=0)
+    cache.mapa(None, [1])
+    cache.banco[2] = {"11": "4.3 Impostos"}
+
+    assert cache.mapa(None, [1, 2]) == {(1, "10"): "4.1 Fretes", (2, "11"): "4.3 Impostos"}
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL não definido (Postgres local)")
+def test_plano_lido_uma_vez_e_relido_quando_muda():
+    from sqlalchemy import create_engine, text
+
+    from benchmarks import dados_sinteticos
+    from src.database.db_utils import DatabaseConnection
+
+    url, schema = os.environ["TEST_DATABASE_URL"], "bench_teste_plano"
+    engine = create_engine(url)
+    dados_sinteticos.carregar(engine, schema, dados_sinteticos.Volume(clientes=2, meses=1, contas=12, lancamentos=1,
+                                                                      indicadores=1))
+    try:
+        db = DatabaseConnection(url, connect_args={"options": f"-csearch_path={schema}"})
+        cache = CachePlanoDeContas(nome="plano_de_contas_teste", validade_s=0)
+
+        mapa = cache.mapa(db, [1, 2])
+        assert len(mapa) == 24 and all(isinstance(chave[1], str) for chave in mapa)
+        assert cache.mapa(db, [2, 1]) == mapa
+        assert metricas.CACHE_REQUISICOES.valor(cache="plano_de_contas_teste", resultado="miss") == 2
+        assert metricas.CACHE_REQUISICOES.valor(cache="plano_de_contas_teste", resultado="hit") == 2
+
+        with engine.begin() as conn:
+            conn.execute(text(f"UPDATE {schema}.plano_de_contas SET nivel_2 = 'Novo grupo' WHERE id_cliente = 2"))
+        mapa = cache.mapa(db, [1, 2])
+        assert {n2 for (cliente, _), n2 in mapa.items() if cliente == 2} == {"Novo grupo"}
+        assert metricas.CACHE_REQUISICOES.valor(cache="plano_de_contas_teste", resultado="miss") == 3
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
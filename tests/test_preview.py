@@ -0,0 +1,26 @@
+# test_preview.py
+import os
+
+from src.rendering.renderers import get_renderer
+from src.rendering.renderers.base_renderer import (
+    ASSETS_DIR, DPI_PREVIEW, ler_asset_base64, modo_preview, resolver_assets
+)
+
+RODAPE = os.path.join(ASSETS_DIR, "icons", "rodape.png")
+
+
+def test_preview_referencia_assets_em_vez_de_embutir():
+    renderer = get_renderer(1)
+    with modo_preview():
+        marcador = renderer.carregar_asset(RODAPE)
+        assert renderer.dpi_grafico(800) == DPI_PREVIEW
+    html = f'<img src="data:image/png;base64,{marcador}"/>'
+
+    assert resolver_assets(html, "/v1/assets") == '<img src="/v1/assets/icons/rodape.png"/>'
+    assert resolver_assets(html) == f'<img src="data:image/png;base64,{ler_asset_base64(RODAPE)}"/>'
+
+
+def test_fora_do_preview_mantem_base64():
+    renderer = get_renderer(1)
+    assert renderer.carregar_asset(RODAPE) == ler_asset_base64(RODAPE)
+    assert renderer.dpi_grafico(800) == 800
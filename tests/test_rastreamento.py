@@ -0,0 +1,66 @@
+# test_rastreamento.py
+import json
+import threading
+
+import pytest
+
+from src.core import rastreamento
+from src.core.jobs import GerenciadorJobs
+
+
+@pytest.fixture
+def spans(tmp_path):
+    caminho = tmp_path / "spans.jsonl"
+    rastreamento.configurar(True, str(caminho))
+
+    def ler():
+        linhas = [json.loads(l) for l in caminho.read_text(encoding="utf-8").splitlines()]
+        return [l["resourceSpans"][0]["scopeSpans"][0]["spans"][0] for l in linhas]
+
+    yield ler
+    rastreamento.configurar(False)
+
+
+def _atributos(span):
+    return {a["key"]: list(a["value"].values())[0] for a in span["attributes"]}
+
+
+def test_spans_aninhados_herdam_cliente_e_mes(spans):
+    with rastreamento.span("gerar_relatorio_pdf", **rastreamento.atributos_periodo([15, 12], 9, 2025)):
+        with rastreamento.span("db.query", **{"code.function": "Indicadores.calcular_x"}) as consulta:
+            consulta.definir(**{"db.rows": 3})
+        with pytest.raises(RuntimeError):
+            with rastreamento.span("wkhtmltopdf"):
+                raise RuntimeError("exit 1")
+
+    consulta, conversao, raiz = spans()
+    assert raiz["name"] == "gerar_relatorio_pdf" and "parentSpanId" not in raiz
+    assert consulta["parentSpanId"] == raiz["spanId"] == conversao["parentSpanId"]
+    assert consulta["traceId"] == raiz["traceId"] == conversao["traceId"]
+    assert _atributos(consulta) == {"ize.cliente": "12,15", "ize.mes": "9", "ize.ano": "2025",
+                                    "code.function": "Indicadores.calcular_x", "db.rows": "3"}
+    assert conversao["status"] == {"code": rastreamento.STATUS_ERRO, "message": "RuntimeError: exit 1"}
+    assert int(raiz["endTimeUnixNano"]) >= int(conversao["endTimeUnixNano"])
+
+
+def test_traceparent_e_jobs_continuam_o_trace(spans):
+    externo = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    gerenciador = GerenciadorJobs(max_workers=1)
+    with rastreamento.continuar_trace(externo), rastreamento.span("HTTP POST /v1/jobs"):
+        job = gerenciador.submeter(lambda progresso: rastreamento.span_atual().nome)
+
+    while not job.finalizado:
+        threading.Event().wait(0.01)
+    assert job.resultado == "HTTP POST /v1/jobs"  # o worker roda no contexto de quem submeteu
+
+    (requisicao,) = spans()
+    assert requisicao["traceId"] == "a" * 32
+    assert requisicao["parentSpanId"] == "b" * 16
+
+
+def test_desligado_nao_grava(tmp_path):
+    rastreamento.configurar(False)
+    with rastreamento.span("qualquer") as span:
+        span.definir(x=1)
+    assert span is rastreamento.SPAN_NULO
+    assert rastreamento.span_atual() is None
@@ -0,0 +1,56 @@
+# test_singleflight.py
+import threading
+import time
+
+import pytest
+
+from src.core.singleflight import SingleFlight
+
+
+def test_chamadas_identicas_compartilham_uma_execucao():
+    sf = SingleFlight("teste")
+    execucoes = []
+    resultados = []
+
+    def trabalho():
+        execucoes.append(1)
+        time.sleep(0.2)
+        return "pdf"
+
+    threads = [threading.Thread(target=lambda: resultados.append(sf.executar("k", trabalho)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert len(execucoes) == 1
+    assert resultados == ["pdf"] * 5
+    assert sf.em_andamento() == 0
+
+
+def test_erro_do_lider_chega_aos_seguidores_e_nao_fica_em_cache():
+    sf = SingleFlight("teste")
+    iniciou = threading.Event()
+    erros = []
+
+    def falha():
+        iniciou.set()
+        time.sleep(0.1)
+        raise ValueError("falhou")
+
+    def seguidor():
+        iniciou.wait(5)
+        try:
+            sf.executar("k", lambda: "outro")
+        except ValueError as e:
+            erros.append(e)
+
+    t = threading.Thread(target=seguidor)
+    t.start()
+    with pytest.raises(ValueError):
+        sf.executar("k", falha)
+    t.join(5)
+
+    assert len(erros) == 1
+    assert sf.executar("k", lambda: "novo") == "novo"
@@ -0,0 +1,70 @@
+# test_snapshots.py
+from src.core.snapshots import ArmazemSnapshots
+
+
+def test_ida_e_volta_independe_da_ordem_dos_clientes(tmp_path):
+    armazem = ArmazemSnapshots(str(tmp_path))
+    snapshot = {"display_nome": "ACME", "secoes": {1: ([{"categoria": "Vendas", "av": 12.5}], {"notas": ""})}}
+    armazem.salvar([3, 1], 5, 2024, snapshot)
+
+    assert armazem.carregar([1, 3], 5, 2024) == snapshot
+    assert armazem.carregar([1, 3], 6, 2024) is None
+
+
+def test_versao_do_schema_isola_snapshots(tmp_path):
+    ArmazemSnapshots(str(tmp_path), versao=1).salvar([1], 5, 2024, {"secoes": {}})
+
+    assert ArmazemSnapshots(str(tmp_path), versao=2).carregar([1], 5, 2024) is None
+
+
+def test_snapshot_corrompido_e_ignorado(tmp_path):
+    armazem = ArmazemSnapshots(str(tmp_path))
+    caminho = armazem.salvar([1], 5, 2024, {"secoes": {}})
+    with open(caminho, "wb") as f:
+        f.write(b"lixo")
+
+    assert armazem.carregar([1], 5, 2024) is None
+    assert armazem.remover([1], 5, 2024)
+
+
+def test_mes_so_fecha_depois_da_carencia(monkeypatch):
+    from datetime import date
+
+    from src.core import pipeline
+
+    monkeypatch.setattr(pipeline, "SNAPSHOT_CARENCIA_DIAS", 5)
+
+    assert not pipeline.mes_fechado(9, 2025, hoje=date(2025, 9, 30))
+    assert not pipeline.mes_fechado(9, 2025, hoje=date(2025, 10, 1))  # ETL do fechamento ainda carregando
+    assert not pipeline.mes_fechado(12, 2025, hoje=date(2026, 1, 5))
+    assert pipeline.mes_fechado(9, 2025, hoje=date(2025, 10, 6))
+    assert pipeline.mes_fechado(12, 2025, hoje=date(2026, 1, 6))
+    assert pipeline.mes_fechado(8, 2025, hoje=date(2025, 10, 1))
+
+    monkeypatch.setattr(pipeline, "SNAPSHOT_CARENCIA_DIAS", 0)
+    assert pipeline.mes_fechado(9, 2025, hoje=date(2025, 10, 1))
+
+
+def test_artefato_de_mes_fechado_invalidado_por_snapshot_recapturado(monkeypatch, tmp_path):
+    import os
+    import time
+
+    from src.core import pipeline
+    from src.core.armazem import ArmazemArquivos
+
+    monkeypatch.setattr(pipeline, "artefatos", ArmazemArquivos(str(tmp_path / "artefatos"), 10_000))
+    monkeypatch.setattr(pipeline, "snapshots", ArmazemSnapshots(str(tmp_path / "snapshots")))
+    monkeypatch.setattr(pipeline.perfil, "ativo", lambda: False)
+    agora = time.time()
+    snapshot = pipeline.snapshots.salvar([1], 5, 2024, {"secoes": {}})
+    os.utime(snapshot, (agora - 60, agora - 60))
+    (tmp_path / "gerado.pdf").write_bytes(b"%PDF-1.4")
+    chave = pipeline.chave_geracao([1], 5, 2024, [1])
+    caminho = pipeline.artefatos.guardar(chave, str(tmp_path / "gerado.pdf"), metadados={"filename": "R.pdf"})
+
+    assert pipeline.obter_artefato(chave, [1], 5, 2024) == (caminho, "R.pdf")
+
+    # Carga tardia: o snapshot foi recapturado depois que o PDF foi gerado
+    pipeline.snapshots.salvar([1], 5, 2024, {"secoes": {}})
+    os.utime(snapshot, (agora + 60, agora + 60))
+    assert pipeline.obter_artefato(chave, [1], 5, 2024) is None